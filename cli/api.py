@@ -0,0 +1,490 @@
+"""
+本地 HTTP 接口
+`python lottery.py api` 启动一个 asyncio HTTP 服务，供内部看板查询预测和统计数据。
+各彩票的历史数据和预测器常驻内存（与常驻服务共用 WarmLottery），后台每 API_REFRESH_INTERVAL 秒检查一次
+数据库最新期号，请求本身不访问数据库；响应按最新期号缓存，同一期号内重复请求直接返回缓存的响应。
+
+接口（<lottery> 为 ssq / dlt / qxc / qlc）:
+    GET  /api/lotteries                        各彩票最新期号和数据条数
+    GET  /api/<lottery>/latest                 最新一期
+    GET  /api/<lottery>/predict?count=5        预测号码（同一期号内结果不变）
+    GET  /api/<lottery>/stats                  全部历史的统计（频率、奇偶、和值、跨度、AC 值、区间比、尾数）
+    GET  /api/<lottery>/frequency?window=100   最近 window 期的号码频率
+    POST /api/<lottery>/check?issue=2025001    核对号码：请求体为 NDJSON（每行一注，格式同 generate --out *.ndjson），
+                                               逐注流式返回 NDJSON 命中个数，最后一行为汇总（issue 默认最新一期）
+
+只依赖标准库（HTTP/1.1，支持 keep-alive），不需要安装 aiohttp。
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from core.analyzer import HistoryAnalyzer, analyze_history
+from core.config import (
+    API_CONFIG, DEFAULT_PREDICTION_COUNT, DIVERSITY_METRIC, LOG_DIR, LOTTERY_NAMES, PREDICTION_OVERSAMPLE,
+)
+from core.draw_history import DrawHistory, _as_ints, get_layout
+from cli.serve import LOTTERY_TYPES, WarmLottery
+
+logger = logging.getLogger(__name__)
+
+STATUS_TEXT = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    411: 'Length Required',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+# 请求头的最大长度（字节）
+MAX_HEADER_SIZE = 16 * 1024
+
+# 请求体的最大长度（字节，约为 API_MAX_TICKETS 默认值一百万注 NDJSON 的两倍）
+MAX_BODY_SIZE = 256 * 1024 * 1024
+
+# 单次预测的最大条数
+MAX_PREDICTION_COUNT = 100
+
+# 号码核对每批处理的注数（每批写出一个分块）
+CHECK_BATCH_SIZE = 500
+
+
+class HTTPError(Exception):
+    """返回给客户端的错误（状态码 + 说明）"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+    """已解析的 HTTP 请求（请求体由处理函数按需读取）"""
+
+    def __init__(self, method: str, target: str, version: str, headers: Dict[str, str], reader,
+                 content_length: int = 0):
+        parts = urlsplit(target)
+        self.method = method
+        self.path = parts.path.rstrip('/') or '/'
+        self.query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        self.version = version
+        self.headers = headers
+        self.reader = reader
+        self.body_remaining = content_length
+        self.responded = False
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+    def int_param(self, name: str, default: int, low: int, high: int) -> int:
+        value = self.query.get(name)
+        if value is None:
+            return default
+        try:
+            value = int(value)
+        except ValueError:
+            raise HTTPError(400, f"参数 {name} 必须是整数: {value}")
+        if not low <= value <= high:
+            raise HTTPError(400, f"参数 {name} 必须在 {low}-{high} 之间: {value}")
+        return value
+
+    async def iter_lines(self):
+        """逐行读取请求体（按 Content-Length 分块读取，不会读到下一个请求）"""
+        buffer = b''
+        while self.body_remaining > 0:
+            chunk = await self.reader.read(min(self.body_remaining, 65536))
+            if not chunk:
+                break
+            self.body_remaining -= len(chunk)
+            *lines, buffer = (buffer + chunk).split(b'\n')
+            for line in lines:
+                yield line
+        if buffer:
+            yield buffer
+
+    async def discard_body(self):
+        """丢弃未读取的请求体（keep-alive 连接上的下一个请求从正确位置开始）"""
+        while self.body_remaining > 0:
+            chunk = await self.reader.read(min(self.body_remaining, 65536))
+            if not chunk:
+                break
+            self.body_remaining -= len(chunk)
+
+
+async def _read_request(reader) -> Optional[Request]:
+    """读取请求行和请求头（连接关闭时返回 None）"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise HTTPError(400, '请求头过长')
+
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, version = lines[0].split(' ')
+    except ValueError:
+        raise HTTPError(400, f"无效的请求行: {lines[0][:100]}")
+
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+
+    content_length = headers.get('content-length', '0') or '0'
+    if not (content_length.isascii() and content_length.isdigit()):
+        raise HTTPError(400, f"无效的 Content-Length: {content_length[:20]}")
+    if int(content_length) > MAX_BODY_SIZE:
+        raise HTTPError(413, f"请求体超过 {MAX_BODY_SIZE} 字节")
+    return Request(method.upper(), target, version, headers, reader, int(content_length))
+
+
+def _json_bytes(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, default=str).encode('utf-8')
+
+
+def _head(status: int, headers: Dict[str, str], keep_alive: bool) -> bytes:
+    lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}"]
+    headers = {
+        **headers,
+        'Connection': 'keep-alive' if keep_alive else 'close',
+        # 内部看板在浏览器中直接调用
+        'Access-Control-Allow-Origin': '*',
+    }
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+
+def _write_json(writer, request: Request, status: int, body: bytes):
+    writer.write(_head(status, {
+        'Content-Type': 'application/json; charset=utf-8',
+        'Content-Length': str(len(body)),
+    }, request.keep_alive) + body)
+    request.responded = True
+
+
+class LotteryAPI:
+    """HTTP 接口的路由和处理函数"""
+
+    def __init__(self, lottery_types: List[str] = None, refresh_interval: float = None):
+        """
+        Args:
+            lottery_types: 提供接口的彩票类型（默认全部）
+            refresh_interval: 检查数据库最新期号的间隔（秒，默认 API_CONFIG['refresh_interval']）
+        """
+        self.lotteries = {lottery_type: WarmLottery(lottery_type) for lottery_type in (lottery_types or LOTTERY_TYPES)}
+        self.refresh_interval = refresh_interval or API_CONFIG['refresh_interval']
+        self.max_tickets = API_CONFIG['max_tickets']
+        # (彩票类型, 接口, 参数) -> (期号, 响应体)
+        self._cache: Dict[Tuple, Tuple[str, bytes]] = {}
+        self.requests = 0
+        self.port = None
+
+        self.routes = {
+            'latest': ('GET', self.latest),
+            'predict': ('GET', self.predict),
+            'stats': ('GET', self.stats),
+            'frequency': ('GET', self.frequency),
+            'check': ('POST', self.check),
+        }
+
+    # ---------- 常驻数据 ----------
+
+    def _refresh(self, lottery: WarmLottery) -> bool:
+        with lottery.lock:
+            return lottery.refresh()
+
+    async def refresh_all(self):
+        """检查各彩票的数据库最新期号，有新一期时重新加载并清除该彩票的缓存响应"""
+        loop = asyncio.get_running_loop()
+        for lottery_type, lottery in self.lotteries.items():
+            try:
+                changed = await loop.run_in_executor(None, self._refresh, lottery)
+            except Exception as e:
+                # 数据库暂时不可用：继续使用内存中的数据
+                logger.warning(f"{LOTTERY_NAMES.get(lottery_type, lottery_type)} 检查最新期号失败: {e}")
+                continue
+            if changed:
+                for key in [key for key in self._cache if key[0] == lottery_type]:
+                    del self._cache[key]
+
+    async def refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh_all()
+
+    def _lottery(self, lottery_type: str) -> WarmLottery:
+        lottery = self.lotteries.get(lottery_type)
+        if lottery is None:
+            raise HTTPError(404, f"不支持的彩票类型: {lottery_type}。支持的类型: {list(self.lotteries)}")
+        if not lottery.data:
+            raise HTTPError(503, f"{lottery.modules['name']} 没有历史数据（数据库不可用或尚未爬取）")
+        return lottery
+
+    async def _cached(self, lottery: WarmLottery, name: str, params: Tuple, compute: Callable[[], Dict]) -> bytes:
+        """按最新期号缓存的响应体（未命中时在线程池中计算）"""
+        key = (lottery.lottery_type, name, params)
+        issue = lottery.latest['lottery_no'] if lottery.latest else None
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == issue:
+            return cached[1]
+
+        body = _json_bytes(await asyncio.get_running_loop().run_in_executor(None, compute))
+        self._cache[key] = (issue, body)
+        return body
+
+    # ---------- 接口 ----------
+
+    async def lotteries_index(self, request: Request) -> bytes:
+        return _json_bytes({
+            lottery_type: {
+                'lottery_name': lottery.modules['name'],
+                'latest': lottery.latest['lottery_no'] if lottery.latest else None,
+                'draw_count': len(lottery.data) if lottery.data else 0,
+                'loaded_at': lottery.loaded_at,
+            }
+            for lottery_type, lottery in self.lotteries.items()
+        })
+
+    async def latest(self, request: Request, lottery: WarmLottery) -> bytes:
+        return await self._cached(lottery, 'latest', (), lambda: {
+            'lottery_type': lottery.lottery_type,
+            'lottery_name': lottery.modules['name'],
+            'latest': lottery.latest,
+        })
+
+    async def predict(self, request: Request, lottery: WarmLottery) -> bytes:
+        count = request.int_param('count', DEFAULT_PREDICTION_COUNT, 1, MAX_PREDICTION_COUNT)
+
+        def compute():
+            with lottery.lock:
+                predictions = lottery.get_predictor(refresh=False).predict(
+                    count=count,
+                    oversample=PREDICTION_OVERSAMPLE,
+                    metric=DIVERSITY_METRIC
+                )
+            return {
+                'lottery_type': lottery.lottery_type,
+                'issue': lottery.latest['lottery_no'],
+                'predictions': predictions,
+            }
+        return await self._cached(lottery, 'predict', (count,), compute)
+
+    async def stats(self, request: Request, lottery: WarmLottery) -> bytes:
+        data = lottery.data
+        return await self._cached(lottery, 'stats', (), lambda: {
+            'lottery_type': lottery.lottery_type,
+            'issue': lottery.latest['lottery_no'],
+            **analyze_history(lottery.lottery_type, data),
+        })
+
+    async def frequency(self, request: Request, lottery: WarmLottery) -> bytes:
+        data = lottery.data
+        window = request.int_param('window', 100, 1, len(data))
+
+        def compute():
+            # 数据按开奖日期倒序，前 window 条即最近 window 期
+            summary = HistoryAnalyzer(DrawHistory(lottery.lottery_type, data[:window])).summary()
+            return {
+                'lottery_type': lottery.lottery_type,
+                'issue': lottery.latest['lottery_no'],
+                'window': window,
+                'frequency': summary['frequency'],
+                'extra_frequency': summary['extra_frequency'],
+            }
+        return await self._cached(lottery, 'frequency', (window,), compute)
+
+    def _find_draw(self, lottery: WarmLottery, issue: Optional[str]) -> Dict:
+        if not issue:
+            return lottery.latest
+        for record in lottery.data:
+            if record['lottery_no'] == issue or record['lottery_no'][-5:] == issue[-5:]:
+                return record
+        raise HTTPError(404, f"{lottery.modules['name']} 没有第 {issue} 期的开奖数据")
+
+    async def check(self, request: Request, lottery: WarmLottery, writer):
+        """核对号码（流式读取请求体，逐批写出分块响应）"""
+        if 'content-length' not in request.headers:
+            raise HTTPError(411, '请求体需要 Content-Length')
+
+        draw = self._find_draw(lottery, request.query.get('issue'))
+        layout = get_layout(lottery.lottery_type)
+        main_key, extra_key = layout['main_key'], layout['extra_key']
+        draw_main = _as_ints(draw[main_key])
+        draw_main_set = set(draw_main)
+        draw_extra = set(_as_ints(draw[extra_key])) if extra_key else set()
+
+        def hits(ticket: Dict) -> Dict:
+            main = _as_ints(ticket[main_key])
+            if layout['positional']:
+                # 七星彩按位置核对
+                main_hits = sum(1 for a, b in zip(main, draw_main) if a == b)
+            else:
+                main_hits = len(draw_main_set.intersection(main))
+            extra_hits = len(draw_extra.intersection(_as_ints(ticket[extra_key]))) if extra_key else 0
+            return {'main_hits': main_hits, 'extra_hits': extra_hits}
+
+        writer.write(_head(200, {
+            'Content-Type': 'application/x-ndjson; charset=utf-8',
+            'Transfer-Encoding': 'chunked',
+        }, request.keep_alive))
+        request.responded = True
+
+        def write_chunk(lines: List[bytes]):
+            payload = b''.join(lines)
+            writer.write(f"{len(payload):x}\r\n".encode('ascii') + payload + b'\r\n')
+
+        distribution: Dict[str, int] = {}
+        count = 0
+        batch = []
+        async for line in request.iter_lines():
+            line = line.strip()
+            if not line:
+                continue
+            if count >= self.max_tickets:
+                batch.append(_json_bytes({'error': f"超过单次核对的最大注数 {self.max_tickets}"}) + b'\n')
+                await request.discard_body()
+                break
+
+            try:
+                result = {'index': count, **hits(json.loads(line))}
+                level = f"{result['main_hits']}+{result['extra_hits']}"
+                distribution[level] = distribution.get(level, 0) + 1
+            except (ValueError, KeyError, TypeError) as e:
+                result = {'index': count, 'error': f"无效的号码: {e}"}
+            count += 1
+            batch.append(_json_bytes(result) + b'\n')
+
+            if len(batch) >= CHECK_BATCH_SIZE:
+                write_chunk(batch)
+                batch = []
+                # 客户端读取较慢时等待（背压），不在内存中堆积响应
+                await writer.drain()
+
+        batch.append(_json_bytes({'summary': {
+            'issue': draw['lottery_no'],
+            'tickets': count,
+            'hits': dict(sorted(distribution.items(), reverse=True)),
+        }}) + b'\n')
+        write_chunk(batch)
+        writer.write(b'0\r\n\r\n')
+
+    # ---------- 连接处理 ----------
+
+    async def dispatch(self, request: Request, writer):
+        self.requests += 1
+        parts = [part for part in request.path.split('/') if part]
+        if parts == ['api', 'lotteries']:
+            if request.method != 'GET':
+                raise HTTPError(405, f"{request.path} 只支持 GET")
+            _write_json(writer, request, 200, await self.lotteries_index(request))
+            return
+        if len(parts) != 3 or parts[0] != 'api' or parts[2] not in self.routes:
+            raise HTTPError(404, f"接口不存在: {request.path}")
+
+        method, handler = self.routes[parts[2]]
+        if request.method != method:
+            raise HTTPError(405, f"{request.path} 只支持 {method}")
+        lottery = self._lottery(parts[1])
+        if handler == self.check:
+            await self.check(request, lottery, writer)
+        else:
+            _write_json(writer, request, 200, await handler(request, lottery))
+
+    async def handle_connection(self, reader, writer):
+        """处理一个连接上的请求（keep-alive 时依次处理多个请求）"""
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except HTTPError as e:
+                    writer.write(_head(e.status, {'Content-Length': '0'}, False))
+                    break
+                if request is None:
+                    break
+
+                start = time.perf_counter()
+                try:
+                    await self.dispatch(request, writer)
+                except HTTPError as e:
+                    if request.responded:
+                        break
+                    _write_json(writer, request, e.status, _json_bytes({'error': e.message}))
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception as e:
+                    logger.error(f"{request.method} {request.path} 处理失败: {e}", exc_info=True)
+                    if request.responded:
+                        break
+                    _write_json(writer, request, 500, _json_bytes({'error': str(e)}))
+                logger.debug(f"{request.method} {request.path} {(time.perf_counter() - start) * 1000:.1f}ms")
+
+                await request.discard_body()
+                await writer.drain()
+                if not request.keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve_api(host: str = None, port: int = None, api: LotteryAPI = None, ready: asyncio.Event = None):
+    """运行 HTTP 接口（直到被取消）
+
+    Args:
+        host: 监听地址（默认 API_CONFIG['host']）
+        port: 端口（默认 API_CONFIG['port']，0 为随机端口）
+        api: 接口实例（默认新建，加载全部彩票）
+        ready: 开始监听后设置的事件（基准测试在同一进程中启动服务时使用）
+    """
+    api = api or LotteryAPI()
+    host = host or API_CONFIG['host']
+    port = API_CONFIG['port'] if port is None else port
+
+    start = time.perf_counter()
+    await api.refresh_all()
+    logger.info(f"历史数据加载完成（{time.perf_counter() - start:.1f}s）")
+
+    server = await asyncio.start_server(api.handle_connection, host, port, limit=MAX_HEADER_SIZE)
+    api.port = server.sockets[0].getsockname()[1]
+    refresher = asyncio.create_task(api.refresh_loop())
+    logger.info(f"HTTP 接口已启动: http://{host}:{api.port}/api/lotteries")
+    if ready is not None:
+        ready.set()
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        refresher.cancel()
+
+
+def start_api(host: str = None, port: int = None):
+    """启动 HTTP 接口（阻塞直到 Ctrl+C）"""
+    log_dir = LOG_DIR / 'api'
+    log_dir.mkdir(exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_dir / 'api.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+    try:
+        asyncio.run(serve_api(host, port))
+    except KeyboardInterrupt:
+        logger.info("HTTP 接口已停止")
@@ -0,0 +1,108 @@
+"""
+预测回测
+对最近若干期，只用该期之前的历史数据预测，再与实际开奖号码核对命中个数。
+每一期都要重新分析历史数据，耗时与期数成正比，因此按期号拆分为多个分片（plan_backtest_shards），
+放入任务队列由多个 worker 同时执行（`python lottery.py queue add backtest ssq --issues 500`），
+各分片的结果用 merge_backtest_results() 合并。
+"""
+
+import logging
+from typing import Dict, List
+
+from core.draw_history import _as_ints, get_layout
+from cli.smart_fetch import predict_from_history
+
+logger = logging.getLogger(__name__)
+
+# 回测某一期至少需要的历史期数（更早的期跳过）
+MIN_HISTORY = 100
+
+
+def count_hits(layout: Dict, draw: Dict, ticket: Dict) -> tuple:
+    """一注号码与开奖号码的命中个数 (主号码, 附加号码)（七星彩按位置核对）"""
+    draw_main = _as_ints(draw[layout['main_key']])
+    main = _as_ints(ticket[layout['main_key']])
+    if layout['positional']:
+        main_hits = sum(1 for a, b in zip(main, draw_main) if a == b)
+    else:
+        main_hits = len(set(draw_main).intersection(main))
+    extra_key = layout['extra_key']
+    extra_hits = len(set(_as_ints(draw[extra_key])).intersection(_as_ints(ticket[extra_key]))) if extra_key else 0
+    return main_hits, extra_hits
+
+
+def plan_backtest_shards(history: List[Dict], issues: int, shard_size: int) -> List[List[str]]:
+    """最近 issues 期按 shard_size 期一组拆分为分片（期号列表，历史数据按开奖日期倒序）
+
+    Raises:
+        ValueError: 参数不合法
+    """
+    if issues < 1 or shard_size < 1:
+        raise ValueError(f"回测期数和分片大小必须大于 0（当前: {issues}, {shard_size}）")
+    usable = max(0, len(history) - MIN_HISTORY)
+    if usable == 0:
+        raise ValueError(f"历史数据只有 {len(history)} 期，回测至少需要 {MIN_HISTORY + 1} 期")
+    lottery_nos = [row['lottery_no'] for row in history[:min(issues, usable)]]
+    return [lottery_nos[i:i + shard_size] for i in range(0, len(lottery_nos), shard_size)]
+
+
+def backtest_shard(lottery_type: str, history: List[Dict], issues: List[str]) -> Dict:
+    """回测一个分片
+
+    Args:
+        lottery_type: 彩票类型
+        history: 全部历史数据（按开奖日期倒序）
+        issues: 要回测的期号
+
+    Returns:
+        {'issues': 回测期数, 'tickets': 预测注数, 'hits': {'主+附加': 注数}, 'best': {'主+附加': 期数}, 'skipped': [...]}
+    """
+    layout = get_layout(lottery_type)
+    position = {row['lottery_no']: i for i, row in enumerate(history)}
+    hits: Dict[str, int] = {}
+    best: Dict[str, int] = {}
+    skipped = []
+    tickets = 0
+
+    for issue in issues:
+        index = position.get(issue)
+        if index is None or len(history) - index - 1 < MIN_HISTORY:
+            skipped.append(issue)
+            continue
+
+        draw = history[index]
+        predictions = predict_from_history(lottery_type, history[index + 1:])
+        results = [count_hits(layout, draw, prediction) for prediction in predictions]
+        for main_hits, extra_hits in results:
+            level = f"{main_hits}+{extra_hits}"
+            hits[level] = hits.get(level, 0) + 1
+        if results:
+            top = max(results)
+            best[f"{top[0]}+{top[1]}"] = best.get(f"{top[0]}+{top[1]}", 0) + 1
+        tickets += len(results)
+
+    if skipped:
+        logger.warning(f"⚠️ {len(skipped)} 期没有足够的历史数据或不存在，跳过: {skipped[:10]}")
+    logger.info(f"回测完成: {len(issues) - len(skipped)} 期，{tickets} 注")
+    return {
+        'issues': len(issues) - len(skipped),
+        'tickets': tickets,
+        'hits': dict(sorted(hits.items(), reverse=True)),
+        'best': dict(sorted(best.items(), reverse=True)),
+        'skipped': skipped,
+    }
+
+
+def merge_backtest_results(results: List[Dict]) -> Dict:
+    """合并多个分片的回测结果"""
+    merged = {'issues': 0, 'tickets': 0, 'hits': {}, 'best': {}, 'skipped': []}
+    for result in results:
+        merged['issues'] += result['issues']
+        merged['tickets'] += result['tickets']
+        merged['skipped'].extend(result['skipped'])
+        for key in ('hits', 'best'):
+            for level, count in result[key].items():
+                merged[key][level] = merged[key].get(level, 0) + count
+    merged['hits'] = dict(sorted(merged['hits'].items(), reverse=True))
+    merged['best'] = dict(sorted(merged['best'].items(), reverse=True))
+    return merged
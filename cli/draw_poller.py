@@ -0,0 +1,205 @@
+"""
+开奖当晚轮询
+固定时间（每天 21:30）执行的定时任务不管当天是否开奖都会请求四种彩票，开奖结果也可能尚未发布。
+轮询模式（schedule --mode adaptive）按各彩票的开奖日和开奖时间分别调度：
+
+- 开奖后 poll_start 分钟开始请求这一期（只请求预计的期号）
+- 没有获取到时按 指数退避 -> 线性增加 的间隔重试，每期最多 poll_max_attempts 次请求
+- 数据库最新一期比调度时前进（获取到新开奖）后立即预测并发送通知，然后调度下一个开奖日；
+  休市（如春节）会使推算的期号偏大，因此不按推算的期号判断是否获取到
+- 启动时数据库落后（定时任务停了几天）则立即请求，获取到最近一期为止
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from core.config import LOTTERY_NAMES, SCHEDULE_CONFIG
+from core.draw_calendar import CHINA_TZ, DrawCalendar, _parse_date
+from core.fetch_planner import _issue_key
+from core.utils import load_db_config
+from cli.parallel_job import _load_history
+from cli.smart_fetch import (
+    get_lottery_modules, import_class, load_cached_predictions, predict_from_history, smart_fetch, store_predictions
+)
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_delays(initial: float, factor: float, linear_after: float, step: float,
+                   max_attempts: int) -> List[float]:
+    """各次请求之间的等待（秒）：先按 factor 倍增，达到 linear_after 后每次增加 step
+
+    Returns:
+        max_attempts - 1 个等待时间，如 [60, 120, 240, 480, 600, 720, ...]
+    """
+    delays = []
+    delay = initial
+    for _ in range(max(0, max_attempts - 1)):
+        delays.append(delay)
+        delay = delay * factor if delay * factor <= linear_after else max(delay, linear_after) + step
+    return delays
+
+
+def _latest_draws(lottery_type: str):
+    """数据库最新一期和最近的开奖记录（每次轮询前重新读取）"""
+    modules = get_lottery_modules(lottery_type)
+    db = import_class(modules['database_class'])(load_db_config())
+    db.connect()
+    try:
+        return db.get_latest_lottery(), db.get_recent_draws()
+    finally:
+        db.close()
+
+
+def _fetch_incremental(lottery_type: str, **options) -> Dict:
+    """默认的请求方式：增量爬取入库"""
+    return smart_fetch(lottery_type, mode='incremental', **options)
+
+
+def _predict_latest(lottery_type: str) -> List[Dict]:
+    """默认的预测方式：读取全部历史数据后预测"""
+    return predict_from_history(lottery_type, _load_history(lottery_type))
+
+
+class DrawPoller:
+    """单个彩票类型的开奖当晚轮询"""
+
+    def __init__(self, lottery_type: str, scheduler, on_result: Callable[[List[Dict]], None] = None,
+                 config: Dict = None, fetch: Callable[..., Dict] = None,
+                 predict: Callable[[str], List[Dict]] = None):
+        """
+        Args:
+            lottery_type: 彩票类型
+            scheduler: APScheduler 调度器（每次请求为一个 'date' 任务）
+            on_result: 获取到新一期并预测后的回调（参数为结果列表，格式同 smart_fetch）
+            config: 轮询参数（默认 SCHEDULE_CONFIG）
+            fetch: 增量爬取，fetch(lottery_type, publish_delay=0) 返回格式同 smart_fetch
+                   （默认 smart_fetch(mode='incremental')，常驻服务传入使用常驻连接的方法）
+            predict: 预测最新一期，predict(lottery_type) 返回预测结果
+                     （默认读取历史数据后 predict_from_history()，常驻服务传入使用内存中预测器的方法）
+        """
+        self.lottery_type = lottery_type
+        self.name = LOTTERY_NAMES.get(lottery_type, lottery_type)
+        self.scheduler = scheduler
+        self.on_result = on_result
+        self.fetch = fetch or _fetch_incremental
+        self.predict = predict or _predict_latest
+        self.config = {**SCHEDULE_CONFIG, **(config or {})}
+        self.delays = backoff_delays(self.config['poll_initial'], self.config['poll_factor'],
+                                     self.config['poll_linear_after'], self.config['poll_step'],
+                                     self.config['poll_max_attempts'])
+        self.job_id = f'poll-{lottery_type}'
+
+        self.target: Optional[Dict] = None   # 正在等待的一期（DrawCalendar.iter_expected() 的元素）
+        self.attempts = 0
+        self._baseline: Optional[Dict] = None  # 调度时数据库的最新一期，比它新即为获取到
+        self._given_up = date.min            # 放弃等待的最后一个开奖日，不再重复轮询
+
+    def next_target(self, latest: Dict, recent_draws, now: datetime = None) -> Optional[Dict]:
+        """下一次要等待的一期
+
+        开奖后 poll_start 分钟已过的最近一期（数据库落后时立即请求）；没有则为下一个开奖日的一期
+        """
+        now = now or datetime.now(CHINA_TZ)
+        poll_start = timedelta(minutes=self.config['poll_start'])
+        calendar = DrawCalendar(self.lottery_type, recent_draws)
+
+        target = None
+        for draw in calendar.iter_expected(latest['lottery_no'], latest['draw_date']):
+            if draw['draw_date'] <= self._given_up:
+                continue
+            draw = {**draw, 'poll_at': draw['draw_time'] + poll_start}
+            if draw['poll_at'] <= now:
+                target = draw
+                continue
+            return target or draw
+        return target
+
+    def arm(self, now: datetime = None):
+        """调度下一期的第一次请求"""
+        now = now or datetime.now(CHINA_TZ)
+        try:
+            latest, recent_draws = _latest_draws(self.lottery_type)
+        except Exception as e:
+            # 数据库暂时不可用：稍后重新调度，不中断轮询
+            logger.error(f"{self.name} 读取最新期号失败，{self.config['poll_initial']:.0f} 秒后重试: {e}")
+            self.scheduler.add_job(self.arm, 'date', run_date=now + timedelta(seconds=self.config['poll_initial']),
+                                   id=self.job_id, replace_existing=True, misfire_grace_time=None)
+            return
+        if not latest:
+            logger.warning(f"{self.name} 数据库为空，无法推算开奖时间，请先执行全量爬取")
+            return
+
+        self._baseline = latest
+        self.target = self.next_target(latest, recent_draws, now)
+        self.attempts = 0
+        if self.target is None:
+            logger.warning(f"{self.name} 无法推算下一期（最新期号 {latest['lottery_no']}）")
+            return
+
+        run_at = max(self.target['poll_at'], now)
+        logger.info(f"⏰ {self.name} 第 {self.target['issue']} 期 {self.target['draw_time']:%m-%d %H:%M} 开奖，"
+                    f"{run_at:%m-%d %H:%M:%S} 开始请求")
+        self._schedule(run_at)
+
+    def _schedule(self, run_at: datetime):
+        # 调度器繁忙时延后执行而不是丢弃（丢弃会中断轮询）
+        self.scheduler.add_job(self.poll, 'date', run_date=run_at, id=self.job_id,
+                               replace_existing=True, misfire_grace_time=None)
+
+    def _reached(self, result: Dict) -> bool:
+        """数据库最新一期是否比调度时前进（期号或开奖日期更新）"""
+        latest = result.get('latest')
+        if not (result.get('success') and latest):
+            return False
+        baseline = self._baseline
+        return _issue_key(latest['lottery_no']) > _issue_key(baseline['lottery_no']) or \
+            _parse_date(latest['draw_date']) > _parse_date(baseline['draw_date'])
+
+    def poll(self):
+        """请求一次：获取到目标期号则预测并通知，否则按退避间隔再次调度"""
+        self.attempts += 1
+        issue = self.target['issue']
+        logger.info(f"🔍 {self.name} 第 {issue} 期 第 {self.attempts} 次请求")
+
+        # 开奖后即请求，不再等待预计的发布时间
+        result = self.fetch(self.lottery_type, publish_delay=0)
+
+        if self._reached(result):
+            logger.info(f"✅ {self.name} 第 {result['latest']['lottery_no']} 期已获取（第 {self.attempts} 次请求）")
+            try:
+                predictions = load_cached_predictions(self.lottery_type, result['latest'])
+                if predictions is None:
+                    predictions = self.predict(self.lottery_type)
+                    store_predictions(self.lottery_type, result['latest'], predictions)
+                result['predictions'] = predictions
+            except Exception as e:
+                logger.error(f"{self.name} 预测失败: {e}", exc_info=True)
+                result['predictions'] = []
+            if self.on_result is not None:
+                self.on_result([result])
+            self.arm()
+            return
+
+        if self.attempts > len(self.delays):
+            logger.warning(f"⚠️ {self.name} 第 {issue} 期 {self.attempts} 次请求仍未获取，停止等待这一期")
+            self._given_up = self.target['draw_date']
+            self.arm()
+            return
+
+        delay = self.delays[self.attempts - 1]
+        logger.info(f"   {self.name} 第 {issue} 期尚未发布，{delay:.0f} 秒后重试")
+        self._schedule(datetime.now(CHINA_TZ) + timedelta(seconds=delay))
+
+
+def start_polling(scheduler, lottery_types: List[str], on_result: Callable[[List[Dict]], None] = None,
+                  fetch: Callable[..., Dict] = None, predict: Callable[[str], List[Dict]] = None
+                  ) -> List[DrawPoller]:
+    """为各彩票类型调度开奖当晚轮询（fetch / predict 见 DrawPoller）"""
+    pollers = []
+    for lottery_type in lottery_types:
+        poller = DrawPoller(lottery_type, scheduler, on_result, fetch=fetch, predict=predict)
+        poller.arm()
+        pollers.append(poller)
+    return pollers
@@ -24,8 +24,15 @@ def setup_logging(lottery_type: str):
     )
 
 
-def fetch_full_history(lottery_type: str):
-    """爬取全量历史数据（重构版本）"""
+def fetch_full_history(lottery_type: str, workers: int = None, stream: bool = None, pipeline: bool = None):
+    """爬取全量历史数据（重构版本）
+
+    Args:
+        lottery_type: 彩票类型
+        workers: 并发数（默认读取 SPIDER_WORKERS，大于 1 时并发爬取；流水线模式为下载线程数）
+        stream: 是否流式爬取（默认读取 SPIDER_STREAM，仅顺序爬取时生效）
+        pipeline: 是否使用 下载->解析->规整->入库 流水线（默认读取 SPIDER_PIPELINE）
+    """
     setup_logging(lottery_type)
     
     logger.info("=" * 60)
@@ -33,7 +40,12 @@ def fetch_full_history(lottery_type: str):
     logger.info("=" * 60)
     
     # 调用统一的智能爬取方法
-    result = smart_fetch(lottery_type, mode='full')
+    options = {'workers': workers}
+    if stream is not None:
+        options['stream'] = stream
+    if pipeline is not None:
+        options['pipeline'] = pipeline
+    result = smart_fetch(lottery_type, mode='full', **options)
     
     if result.get('success'):
         logger.info("=" * 60)
@@ -49,14 +61,46 @@ def fetch_full_history(lottery_type: str):
         logger.error(f"全量爬取失败: {result.get('error', '未知错误')}")
 
 
-def fetch_incremental_data(lottery_type: str, with_predict: bool = False):
-    """增量爬取最新数据（重构版本）"""
+def repair_gaps(lottery_type: str, year: int = None):
+    """修复缺号：只请求已有数据内部缺失的期号和未到年末的往年末尾
+
+    Args:
+        lottery_type: 彩票类型
+        year: 只修复该年（默认全部年份）
+    """
+    setup_logging(lottery_type)
+
+    logger.info("=" * 60)
+    logger.info(f"检查{LOTTERY_NAMES.get(lottery_type, lottery_type)}缺号")
+    logger.info("=" * 60)
+
+    result = smart_fetch(lottery_type, mode='repair', target_year=year)
+
+    if result.get('success'):
+        logger.info("=" * 60)
+        logger.info(f"缺号: 修复前 {result['missing_before']} 期，修复后 {result['missing_after']} 期"
+                    f"（请求 {result['request_count']} 次，新增 {result['inserted']} 条）")
+        if result['incomplete_years']:
+            logger.warning(f"数据未到年末的年份: {', '.join(map(str, result['incomplete_years']))}")
+        logger.info("=" * 60)
+    else:
+        logger.error(f"缺号修复失败: {result.get('error', '未知错误')}")
+
+
+def fetch_incremental_data(lottery_type: str, with_predict: bool = False, force: bool = False):
+    """增量爬取最新数据（重构版本）
+
+    Args:
+        lottery_type: 彩票类型
+        with_predict: 是否进行预测
+        force: 忽略开奖日历，未到开奖时间也请求网络
+    """
     logger.info("=" * 60)
     logger.info(f"增量爬取 {LOTTERY_NAMES.get(lottery_type, lottery_type)}")
     logger.info("=" * 60)
     
     # 调用统一的智能爬取方法
-    result = smart_fetch(lottery_type, mode='incremental', with_predict=with_predict)
+    result = smart_fetch(lottery_type, mode='incremental', with_predict=with_predict, force=force)
     
     if result.get('success'):
         # 显示最新一期信息
@@ -100,9 +144,28 @@ def fetch_incremental_data(lottery_type: str, with_predict: bool = False):
     return result
 
 
-def fetch_latest(lottery_type: str):
-    """增量爬取最新数据（CLI 入口）"""
+def fetch_latest(lottery_type: str, force: bool = False, daemon: bool = False):
+    """增量爬取最新数据（CLI 入口）
+
+    Args:
+        daemon: 通过常驻服务执行（服务未启动时在本进程中执行）
+    """
     setup_logging(lottery_type)
     
+    if daemon:
+        from core.daemon import DaemonClient, DaemonUnavailable
+        try:
+            result = DaemonClient().request('fetch', lottery_type=lottery_type, force=force)
+        except DaemonUnavailable as e:
+            logger.warning(f"{e}，改为在本进程中爬取")
+        else:
+            if result.get('success'):
+                latest = result.get('latest') or {}
+                logger.info(f"{LOTTERY_NAMES.get(lottery_type, lottery_type)} 新增 {result.get('inserted', 0)} 条，"
+                            f"最新一期: {latest.get('lottery_no', '-')} ({latest.get('draw_date', '-')})")
+            else:
+                logger.error(f"增量爬取失败: {result.get('error', '未知错误')}")
+            return
+    
     # 调用核心方法
-    fetch_incremental_data(lottery_type, with_predict=False)
+    fetch_incremental_data(lottery_type, with_predict=False, force=force)
@@ -0,0 +1,227 @@
+"""
+批量生成号码命令
+按策略持续生成号码并逐注写入 CSV / NDJSON 文件，
+用位图去重，内存占用固定，适合合买时一次生成大量号码
+"""
+
+import csv
+import json
+import logging
+import time
+from pathlib import Path
+from typing import List, Dict, Optional
+
+from core.config import LOG_DIR, LOTTERY_NAMES, DEFAULT_STRATEGIES
+from core.utils import load_db_config
+from core.ticket_codec import TicketCodec, TicketSeenSet
+from cli.smart_fetch import get_lottery_modules, import_class
+
+logger = logging.getLogger(__name__)
+
+# 连续多少次生成的都是重复号码时停止（策略的号码空间已基本耗尽）
+DEFAULT_MAX_STALL = 100000
+
+# 进度日志间隔（秒）
+PROGRESS_INTERVAL = 5.0
+
+
+def setup_logging(lottery_type: str):
+    """设置日志"""
+    log_dir = LOG_DIR / lottery_type
+    log_dir.mkdir(exist_ok=True)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_dir / 'generate.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+
+class TicketWriter:
+    """号码文件写入器（逐注写入，不在内存中保留结果）"""
+
+    def __init__(self, path: Path, fmt: str, fields: List[str], digit_width: int = 2):
+        """
+        Args:
+            path: 输出文件路径
+            fmt: 文件格式 ('csv' 或 'ndjson')
+            fields: 号码字段名（如 ['red_balls', 'blue_ball']）
+            digit_width: CSV 中号码的位数（七星彩为 1）
+        """
+        self.path = path
+        self.fmt = fmt
+        self.fields = fields
+        self.digit_width = digit_width
+        self._file = None
+        self._writer = None
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.fmt == 'csv':
+            self._file = open(self.path, 'w', newline='', encoding='utf-8-sig')
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(['index', *self.fields, 'strategy'])
+        else:
+            self._file = open(self.path, 'w', encoding='utf-8')
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._file.close()
+
+    def _format(self, value) -> str:
+        if isinstance(value, (list, tuple)):
+            return ' '.join(self._format(v) for v in value)
+        return f"{int(value):0{self.digit_width}d}"
+
+    def write(self, index: int, ticket: Dict):
+        """写入一注号码"""
+        if self.fmt == 'csv':
+            self._writer.writerow([index, *(self._format(ticket[f]) for f in self.fields), ticket['strategy']])
+        else:
+            record = {'index': index}
+            for field in self.fields:
+                value = ticket[field]
+                record[field] = [int(v) for v in value] if isinstance(value, (list, tuple)) else int(value)
+            record['strategy'] = ticket['strategy']
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def _resolve_format(out: Path, fmt: Optional[str]) -> str:
+    """确定输出格式：显式指定优先，否则按扩展名判断（默认 CSV）"""
+    if fmt:
+        return fmt
+    if out.suffix.lower() in ('.ndjson', '.jsonl', '.json'):
+        return 'ndjson'
+    return 'csv'
+
+
+def generate_tickets(lottery_type: str, lottery_data: List[Dict], count: int, out: Path,
+                     strategies: List[str] = None, fmt: str = None,
+                     max_stall: int = DEFAULT_MAX_STALL) -> Dict:
+    """按策略批量生成不重复的号码并写入文件
+
+    Args:
+        lottery_type: 彩票类型
+        lottery_data: 历史中奖数据列表
+        count: 目标注数
+        out: 输出文件路径
+        strategies: 使用的策略列表（默认 DEFAULT_STRATEGIES）
+        fmt: 输出格式 ('csv' 或 'ndjson'，默认按扩展名判断)
+        max_stall: 连续重复（或被排除的历史号码）次数上限，超过后提前停止
+
+    Returns:
+        {'count': 写入注数, 'generated': 生成次数, 'duplicates': 重复次数, 'rejected': 排除的历史号码次数,
+         'elapsed': 耗时（秒）, 'rate': 每秒注数, 'path': 文件路径, 'format': 格式}
+    """
+    modules = get_lottery_modules(lottery_type)
+    PredictorClass = import_class(modules['predictor_class'])
+
+    strategy_names = [s.strip() for s in (strategies or DEFAULT_STRATEGIES) if s.strip()]
+    out = Path(out)
+    fmt = _resolve_format(out, fmt)
+
+    codec = TicketCodec(lottery_type)
+    seen = TicketSeenSet(codec)
+    if count > codec.size:
+        logger.warning(f"目标注数 {count} 超过号码组合总数 {codec.size}，按组合总数生成")
+        count = codec.size
+
+    fields = [codec.main_key] + ([codec.extra_key] if codec.extra_key else [])
+    digit_width = 1 if codec.layout['positional'] else 2
+
+    predictor = PredictorClass(lottery_data, strategies=strategy_names)
+    tickets = predictor.iter_predictions(strategy_names, yield_rejected=True)
+
+    logger.info(f"开始生成 {count} 注{modules['name']}号码，策略: {', '.join(strategy_names)}，"
+                f"输出: {out}（{fmt}），去重位图 {seen.nbytes / 1024 / 1024:.1f} MB")
+
+    written = 0
+    generated = 0
+    rejected = 0
+    stall = 0
+    start_time = time.time()
+    last_report = start_time
+
+    with TicketWriter(out, fmt, fields, digit_width) as writer:
+        while written < count:
+            ticket = next(tickets)
+            if ticket is None:
+                # 策略生成了历史中奖号码（已被排除），同样计入连续失败次数
+                rejected += 1
+                stall += 1
+                if stall >= max_stall:
+                    logger.warning(f"连续 {stall} 次生成重复或历史号码，策略可生成的号码已基本耗尽，提前停止")
+                    break
+                continue
+            generated += 1
+
+            if not seen.add(ticket):
+                stall += 1
+                if stall >= max_stall:
+                    logger.warning(f"连续 {stall} 次生成重复或历史号码，策略可生成的号码已基本耗尽，提前停止")
+                    break
+                continue
+
+            stall = 0
+            written += 1
+            writer.write(written, ticket)
+
+            # 每 1000 注检查一次是否需要输出进度
+            if written % 1000 == 0:
+                now = time.time()
+                if now - last_report >= PROGRESS_INTERVAL:
+                    last_report = now
+                    logger.info(f"已生成 {written}/{count} 注，{written / (now - start_time):.0f} 注/秒，"
+                                f"重复率 {(generated - written) / generated:.1%}")
+
+    elapsed = time.time() - start_time
+    rate = written / elapsed if elapsed > 0 else 0.0
+
+    logger.info(f"✅ 生成完成: {written} 注，耗时 {elapsed:.2f} 秒，{rate:.0f} 注/秒，"
+                f"重复 {generated - written} 次，排除历史号码 {rejected} 次")
+
+    return {
+        'count': written,
+        'generated': generated,
+        'duplicates': generated - written,
+        'rejected': rejected,
+        'elapsed': elapsed,
+        'rate': rate,
+        'path': str(out),
+        'format': fmt,
+    }
+
+
+def generate(lottery_type: str, count: int, out: str, strategies: List[str] = None,
+             fmt: str = None, max_stall: int = DEFAULT_MAX_STALL) -> Optional[Dict]:
+    """批量生成号码命令入口（从数据库读取历史数据）"""
+    setup_logging(lottery_type)
+
+    logger.info("=" * 60)
+    logger.info(f"批量生成{LOTTERY_NAMES.get(lottery_type, lottery_type)}号码")
+    logger.info("=" * 60)
+
+    modules = get_lottery_modules(lottery_type)
+    DatabaseClass = import_class(modules['database_class'])
+    db = DatabaseClass(load_db_config())
+
+    try:
+        db.connect()
+        lottery_data = db.get_all_lottery_data()
+
+        if not lottery_data:
+            logger.error("数据库中没有历史数据，请先运行爬取命令")
+            return None
+
+        logger.info(f"使用 {len(lottery_data)} 条历史数据")
+        return generate_tickets(lottery_type, lottery_data, count, Path(out),
+                                strategies=strategies, fmt=fmt, max_stall=max_stall)
+
+    except Exception as e:
+        logger.error(f"批量生成失败: {e}", exc_info=True)
+        return None
+    finally:
+        db.close()
@@ -0,0 +1,172 @@
+"""
+定时任务并行执行
+开奖当晚的定时任务中，四种彩票各自 连接数据库 -> 增量爬取 -> 入库 -> 预测，互不依赖：
+
+- 爬取、入库（网络和数据库 I/O）在线程池中同时进行，每种彩票一个线程；各线程持有自己的爬取锁，
+  增量请求交给同一个异步爬虫引擎（AsyncSpiderEngine），共用连接池和域名并发限制
+- 预测（CPU 密集）提交到进程池，不受 GIL 限制；某种彩票入库完成后立即开始预测，不等其他彩票
+- 单种彩票失败（异常、数据库不可用）只影响它自己
+- 整个任务有截止时间，超时未完成的彩票记为失败，已完成的结果照常返回
+- 所有结果汇总后按彩票顺序返回，再统一发送 Telegram 通知
+"""
+
+import logging
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+from core.async_spider import AsyncSpiderEngine
+from core.config import LOTTERY_NAMES, SCHEDULE_CONFIG
+from core.utils import load_db_config
+from cli.smart_fetch import (
+    get_lottery_modules, import_class, load_cached_predictions, predict_from_history, smart_fetch, store_predictions
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _process_context():
+    """预测进程的启动方式
+
+    进程池在第一次提交预测时才创建子进程，此时其他 I/O 线程可能正持有 requests、logging、SQLite 的锁，
+    fork 出的子进程会继承这些已加锁的锁而死锁；使用 forkserver（Windows 为 spawn）从干净的进程创建子进程。
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def _load_history(lottery_type: str) -> List[Dict]:
+    """读取预测所需的历史数据（在线程中执行，使用独立的数据库连接）"""
+    modules = get_lottery_modules(lottery_type)
+    db = import_class(modules['database_class'])(load_db_config())
+    db.connect()
+    try:
+        return db.get_all_lottery_data()
+    finally:
+        db.close()
+
+
+def _fetch_and_load(lottery_type: str, with_predict: bool, force: bool,
+                    engine: AsyncSpiderEngine = None) -> Tuple[Dict, Optional[List[Dict]]]:
+    """线程任务：增量爬取入库，需要预测时再读取历史数据（没有新开奖时使用缓存的预测结果）"""
+    result = smart_fetch(lottery_type, mode='incremental', force=force, engine=engine)
+    history = None
+    if with_predict and result.get('success'):
+        cached = load_cached_predictions(lottery_type, result.get('latest'))
+        if cached is not None:
+            result['predictions'] = cached
+            result['predictions_cached'] = True
+            return result, None
+        history = _load_history(lottery_type)
+        if not history:
+            logger.warning(f"{result['lottery_name']}无历史数据，无法进行预测")
+    return result, history
+
+
+def _failure(lottery_type: str, error: str) -> Dict:
+    return {
+        'success': False,
+        'lottery_type': lottery_type,
+        'lottery_name': LOTTERY_NAMES.get(lottery_type, lottery_type),
+        'error': error,
+    }
+
+
+class ParallelJobRunner:
+    """定时任务并行执行器"""
+
+    def __init__(self, io_workers: int = None, cpu_workers: int = None, deadline: float = None):
+        """
+        Args:
+            io_workers: 爬取入库线程数（默认 SCHEDULE_CONFIG['io_workers']）
+            cpu_workers: 预测进程数（默认 SCHEDULE_CONFIG['cpu_workers']，0 为在线程中预测）
+            deadline: 整个任务的截止时间（秒，默认 SCHEDULE_CONFIG['deadline']）
+        """
+        self.io_workers = max(1, io_workers or SCHEDULE_CONFIG['io_workers'])
+        self.cpu_workers = SCHEDULE_CONFIG['cpu_workers'] if cpu_workers is None else max(0, cpu_workers)
+        self.deadline = deadline or SCHEDULE_CONFIG['deadline']
+
+    def run(self, lottery_types: List[str], with_predict: bool = True, force: bool = False) -> List[Dict]:
+        """并行执行各彩票的增量爬取和预测
+
+        Args:
+            lottery_types: 彩票类型列表
+            with_predict: 是否进行预测
+            force: 忽略开奖日历，总是请求网络
+
+        Returns:
+            每种彩票的结果（顺序同 lottery_types，格式同 smart_fetch(mode='incremental', with_predict=True)）；
+            超过截止时间的彩票为 {'success': False, 'error': ...}
+        """
+        start = time.monotonic()
+        results: Dict[str, Dict] = {}
+
+        engine = AsyncSpiderEngine().start()
+        io_pool = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix='schedule-io')
+        cpu_pool = None
+        if with_predict and self.cpu_workers:
+            cpu_pool = ProcessPoolExecutor(max_workers=self.cpu_workers, mp_context=_process_context())
+        predict_pool = cpu_pool or io_pool
+
+        pending = {
+            io_pool.submit(_fetch_and_load, lottery_type, with_predict, force, engine): ('fetch', lottery_type)
+            for lottery_type in lottery_types
+        }
+
+        try:
+            while pending:
+                remaining = self.deadline - (time.monotonic() - start)
+                if remaining <= 0:
+                    break
+                done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    stage, lottery_type = pending.pop(future)
+                    try:
+                        value = future.result()
+                    except Exception as e:
+                        logger.error(f"{lottery_type} {'预测' if stage == 'predict' else '爬取'}失败: {e}", exc_info=True)
+                        if stage == 'predict':
+                            results[lottery_type]['predictions'] = []
+                        else:
+                            results[lottery_type] = _failure(lottery_type, str(e))
+                        continue
+
+                    if stage == 'predict':
+                        results[lottery_type]['predictions'] = value
+                        store_predictions(lottery_type, results[lottery_type].get('latest'), value)
+                        logger.info(f"✓ {results[lottery_type]['lottery_name']} 预测完成（{len(value)} 组）")
+                        continue
+
+                    result, history = value
+                    results[lottery_type] = result
+                    if history:
+                        # 入库完成即开始预测，不等其他彩票
+                        try:
+                            future = predict_pool.submit(predict_from_history, lottery_type, history)
+                        except RuntimeError as e:
+                            # 进程池不可用（如子进程异常退出），改为在线程中预测
+                            logger.warning(f"预测进程池不可用，改为在线程中预测: {e}")
+                            predict_pool = io_pool
+                            future = predict_pool.submit(predict_from_history, lottery_type, history)
+                        pending[future] = ('predict', lottery_type)
+                    elif with_predict and result.get('success'):
+                        result.setdefault('predictions', [])
+
+            for stage, lottery_type in pending.values():
+                logger.error(f"{lottery_type} 超过截止时间 {self.deadline:.0f} 秒（{'预测' if stage == 'predict' else '爬取'}未完成）")
+                if stage == 'predict':
+                    results[lottery_type]['predictions'] = []
+                    results[lottery_type]['timeout'] = True
+                else:
+                    results[lottery_type] = _failure(lottery_type, f"超过截止时间 {self.deadline:.0f} 秒")
+        finally:
+            # 超时的任务不再等待（未完成的请求被取消，线程无法中止，会在后台结束）
+            engine.close()
+            io_pool.shutdown(wait=not pending, cancel_futures=True)
+            if cpu_pool is not None:
+                cpu_pool.shutdown(wait=not pending, cancel_futures=True)
+
+        logger.info(f"定时任务并行执行完成，耗时 {time.monotonic() - start:.1f} 秒")
+        return [results.get(lottery_type) or _failure(lottery_type, '未执行') for lottery_type in lottery_types]
@@ -4,9 +4,10 @@
 
 import logging
 import os
-from core.config import LOG_DIR, LOTTERY_NAMES
+from core.config import LOG_DIR, LOTTERY_NAMES, PREDICTION_OVERSAMPLE, DIVERSITY_METRIC
 from core.utils import load_db_config
 from core.telegram_bot import TelegramBot
+from core.cooccurrence import get_cooccurrence
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +27,65 @@ def setup_logging(lottery_type: str):
     )
 
 
+def log_shape_statistics(summary: dict):
+    """输出形态统计（奇偶、和值、跨度、AC 值、区间比），数据来自一次性计算的 summary"""
+    top_odd_even = sorted(summary['odd_even'].items(), key=lambda x: x[1], reverse=True)[:3]
+    logger.info(f"奇偶比前3: {[f'{k}({v})' for k, v in top_odd_even]}")
+    
+    sum_stats = summary['sum']
+    span_stats = summary['span']
+    logger.info(f"和值: 平均 {sum_stats['mean']}，范围 {sum_stats['min']}-{sum_stats['max']}")
+    logger.info(f"跨度: 平均 {span_stats['mean']}，范围 {span_stats['min']}-{span_stats['max']}")
+    
+    if summary['ac']:
+        top_ac = sorted(summary['ac'].items(), key=lambda x: x[1], reverse=True)[:3]
+        logger.info(f"AC值前3: {[f'{k}({v})' for k, v in top_ac]}")
+    
+    top_zone = list(summary['zone_ratio'].items())[:3]
+    logger.info(f"区间比前3: {[f'{k}({v})' for k, v in top_zone]}")
+
+
+def format_prediction(lottery_type: str, pred: dict) -> str:
+    """单组预测号码的文字表示"""
+    if lottery_type == 'ssq':
+        red_str = ','.join([f"{int(x):02d}" for x in pred['red_balls']])
+        return f"红球 {red_str} | 蓝球 {int(pred['blue_ball']):02d}"
+    if lottery_type == 'dlt':
+        front_str = ','.join([f"{int(x):02d}" for x in pred['front_balls']])
+        back_str = ','.join([f"{int(x):02d}" for x in pred['back_balls']])
+        return f"前区 {front_str} | 后区 {back_str}"
+    if lottery_type == 'qxc':
+        return ' '.join([str(n) for n in pred['numbers']])
+    basic_str = ' '.join([f"{int(b):02d}" for b in pred['basic_balls']])
+    return f"{basic_str} + {int(pred['special_ball']):02d}"
+
+
+def predict_via_daemon(lottery_type: str, count: int = None) -> bool:
+    """通过常驻服务预测（使用服务内存中的预测器），服务未启动时返回 False
+
+    Args:
+        lottery_type: 彩票类型
+        count: 预测条数（默认 DEFAULT_PREDICTION_COUNT）
+    """
+    from core.daemon import DaemonClient, DaemonUnavailable
+
+    setup_logging(lottery_type)
+    try:
+        result = DaemonClient().request('predict', lottery_type=lottery_type, count=count)
+    except DaemonUnavailable as e:
+        logger.warning(f"{e}，改为在本进程中预测")
+        return False
+
+    latest = result.get('latest') or {}
+    logger.info(f"{result['lottery_name']} 预测结果（最新一期 {latest.get('lottery_no', '-')}，"
+                f"服务端耗时 {result['elapsed'] * 1000:.1f} ms）:")
+    for i, pred in enumerate(result['predictions'], 1):
+        strategy_name = pred.get('strategy_name', '')
+        label = f"组合 {i} [{strategy_name}]" if strategy_name else f"组合 {i}"
+        logger.info(f"{label}: {format_prediction(lottery_type, pred)}")
+    return True
+
+
 def predict(lottery_type: str):
     """执行预测"""
     setup_logging(lottery_type)
@@ -64,7 +124,11 @@ def predict(lottery_type: str):
             predictor = SSQPredictor(lottery_data, strategies=default_strategies)
             
             # 预测（使用配置的条数）
-            predictions = predictor.predict(count=default_count)
+            predictions = predictor.predict(
+                count=default_count,
+                oversample=PREDICTION_OVERSAMPLE,
+                metric=DIVERSITY_METRIC
+            )
             
             # 显示预测结果
             logger.info("\n" + "=" * 60)
@@ -104,6 +168,13 @@ def predict(lottery_type: str):
             consecutive = stats.get_consecutive_analysis()
             logger.info(f"连号分析: {consecutive}")
             
+            # 号码关联（按最新期号缓存）
+            top_pairs = get_cooccurrence('ssq', lottery_data).top_pairs(5)
+            logger.info(f"红球共现前5: {[f'{a:02d}-{b:02d}({c})' for a, b, c in top_pairs]}")
+            
+            # 形态统计（与频率、连号共用同一次计算结果）
+            log_shape_statistics(stats.summary)
+            
             # 最新一期
             latest = db.get_latest_lottery()
             if latest:
@@ -163,7 +234,11 @@ def predict(lottery_type: str):
             predictor = DLTPredictor(lottery_data, strategies=default_strategies)
             
             # 预测（使用配置的条数）
-            predictions = predictor.predict(count=default_count)
+            predictions = predictor.predict(
+                count=default_count,
+                oversample=PREDICTION_OVERSAMPLE,
+                metric=DIVERSITY_METRIC
+            )
             
             # 显示预测结果
             logger.info("\n" + "=" * 60)
@@ -203,6 +278,13 @@ def predict(lottery_type: str):
             consecutive = stats.get_consecutive_analysis()
             logger.info(f"连号分析: {consecutive}")
             
+            # 号码关联（按最新期号缓存）
+            top_pairs = get_cooccurrence('dlt', lottery_data).top_pairs(5)
+            logger.info(f"前区共现前5: {[f'{a:02d}-{b:02d}({c})' for a, b, c in top_pairs]}")
+            
+            # 形态统计（与频率、连号共用同一次计算结果）
+            log_shape_statistics(stats.summary)
+            
             # 最新一期
             latest = db.get_latest_lottery()
             if latest:
@@ -263,7 +345,11 @@ def predict(lottery_type: str):
             predictor = QXCPredictor(lottery_data, strategies=default_strategies)
             
             # 预测
-            predictions = predictor.predict(count=default_count)
+            predictions = predictor.predict(
+                count=default_count,
+                oversample=PREDICTION_OVERSAMPLE,
+                metric=DIVERSITY_METRIC
+            )
             
             # 显示预测结果
             logger.info("\n" + "=" * 60)
@@ -294,6 +380,13 @@ def predict(lottery_type: str):
                     top_nums = sorted(pos_freq.items(), key=lambda x: x[1], reverse=True)[:3]
                     logger.info(f"第{pos}位频率前3: {[f'{k}({v})' for k, v in top_nums]}")
             
+            # 相邻位置关联（按最新期号缓存）
+            top_pairs = get_cooccurrence('qxc', lottery_data).top_pairs(5)
+            logger.info(f"相邻位共现前5: {[f'第{p}-{p + 1}位 {a}{b}({c})' for p, a, b, c in top_pairs]}")
+            
+            # 形态统计（与频率、连号共用同一次计算结果）
+            log_shape_statistics(stats.summary)
+            
             # 最新一期
             latest = db.get_latest_lottery()
             if latest:
@@ -351,7 +444,11 @@ def predict(lottery_type: str):
             predictor = QLCPredictor(lottery_data, strategies=default_strategies)
             
             # 预测
-            predictions = predictor.predict(count=default_count)
+            predictions = predictor.predict(
+                count=default_count,
+                oversample=PREDICTION_OVERSAMPLE,
+                metric=DIVERSITY_METRIC
+            )
             
             # 显示预测结果
             logger.info("\n" + "=" * 60)
@@ -388,6 +485,13 @@ def predict(lottery_type: str):
                 top_special = sorted(special_freq.items(), key=lambda x: x[1], reverse=True)[:3]
                 logger.info(f"特别号频率前3: {[f'{k}({v})' for k, v in top_special]}")
             
+            # 号码关联（按最新期号缓存）
+            top_pairs = get_cooccurrence('qlc', lottery_data).top_pairs(5)
+            logger.info(f"基本号共现前5: {[f'{a:02d}-{b:02d}({c})' for a, b, c in top_pairs]}")
+            
+            # 形态统计（与频率、连号共用同一次计算结果）
+            log_shape_statistics(stats.summary)
+            
             # 最新一期
             latest = db.get_latest_lottery()
             if latest:
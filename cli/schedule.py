@@ -5,6 +5,7 @@
 import logging
 from apscheduler.schedulers.blocking import BlockingScheduler
 from datetime import datetime
+from typing import Dict, List
 from core.config import LOG_DIR, LOTTERY_NAMES
 from core.utils import load_db_config
 
@@ -35,92 +36,119 @@ def fetch_and_predict_single(lottery_type: str):
     return smart_fetch(lottery_type, mode='incremental', with_predict=True)
 
 
+# 等待其他进程发送同一彩票通知的最长时间（秒）
+NOTIFY_LOCK_WAIT = 60
+
+
+def _prediction_message(result: Dict) -> str:
+    """单个彩票类型的预测通知"""
+    message = f"🔮 <b>{result['lottery_name']}预测</b>\n\n"
+    
+    # 显示所有预测组合
+    for i, pred in enumerate(result['predictions'], 1):
+        strategy_name = pred.get('strategy_name', pred.get('strategy', '未知策略'))
+        
+        message += f"<b>组合 {i}: [{strategy_name}]</b>\n"
+        
+        if result['lottery_type'] == 'ssq':
+            red_str = ' '.join([f"{int(b):02d}" for b in pred['red_balls']])
+            message += f"🔴 红球: <code>{red_str}</code>\n"
+            message += f"🔵 蓝球: <code>{int(pred['blue_ball']):02d}</code>\n\n"
+        elif result['lottery_type'] == 'dlt':
+            front_str = ' '.join([f"{int(b):02d}" for b in pred['front_balls']])
+            back_str = ' '.join([f"{int(b):02d}" for b in pred['back_balls']])
+            message += f"🔴 前区: <code>{front_str}</code>\n"
+            message += f"🔵 后区: <code>{back_str}</code>\n\n"
+        elif result['lottery_type'] == 'qxc':
+            numbers_str = ' '.join([str(n) for n in pred['numbers']])
+            message += f"🔢 号码: <code>{numbers_str}</code>\n\n"
+        elif result['lottery_type'] == 'qlc':
+            basic_str = ' '.join([f"{int(b):02d}" for b in pred['basic_balls']])
+            special_str = f"{int(pred['special_ball']):02d}"
+            message += f"🔴 基本号: <code>{basic_str}</code>\n"
+            message += f"🔵 特别号: <code>{special_str}</code>\n\n"
+    
+    message += "━━━━━━━━━━━━━━━\n"
+    message += "⚠️ 仅供参考，理性购彩"
+    return message
+
+
+def send_predictions(results: List[Dict]):
+    """发送预测结果的 Telegram 通知（每种彩票一条消息，没有预测结果或该期已通知过的跳过）
+
+    检查和记录已通知在同一把跨进程锁内完成，多个定时任务实例同时获取到同一期时只发送一次。
+    所有彩票的消息一次批量发送（各目标同时发送），按彩票类型顺序加锁，多个进程之间不会互相等待成环。
+    """
+    if not results:
+        return
+    
+    locks = []
+    try:
+        from core.named_lock import named_lock
+        from core.run_state import get_run_state
+        from core.telegram_bot import TelegramBot
+        telegram = TelegramBot()
+        run_state = get_run_state()
+        
+        pending = []
+        for result in sorted(results, key=lambda r: r['lottery_type']):
+            # 只发送有预测结果的彩票类型
+            if not result.get('predictions'):
+                logger.info(f"跳过 {result['lottery_name']}：无预测结果")
+                continue
+            
+            issue = (result.get('latest') or {}).get('lottery_no')
+            lock = named_lock(f"notify-{result['lottery_type']}") if run_state is not None and issue else None
+            if lock is not None:
+                if not lock.acquire(NOTIFY_LOCK_WAIT):
+                    logger.warning(f"跳过 {result['lottery_name']}：其他进程正在发送通知")
+                    continue
+                locks.append(lock)
+                # 同一期只通知一次（没有新开奖时定时任务不再重复发送）
+                if run_state.is_notified(result['lottery_type'], issue):
+                    logger.info(f"跳过 {result['lottery_name']}：第 {issue} 期的预测已发送")
+                    continue
+            pending.append((result, issue, lock))
+        
+        if not pending:
+            return
+        
+        sent = telegram.send_messages([_prediction_message(result) for result, _, _ in pending])
+        for (result, issue, lock), ok in zip(pending, sent):
+            if not ok:
+                continue
+            if lock is not None:
+                run_state.mark_notified(result['lottery_type'], issue)
+            logger.info(f"✓ {result['lottery_name']} Telegram 通知已发送")
+        
+    except Exception as e:
+        logger.error(f"发送 Telegram 通知失败: {e}", exc_info=True)
+    finally:
+        for lock in locks:
+            lock.release()
+
+
 def fetch_latest_data():
     """增量爬取所有彩票类型的最新数据并预测"""
     logger.info(f"定时任务开始: {datetime.now()}")
     
-    results = []
-    
-    # 处理双色球
-    ssq_result = fetch_and_predict_single('ssq')
-    if ssq_result:
-        results.append(ssq_result)
-    
-    # 处理大乐透
-    dlt_result = fetch_and_predict_single('dlt')
-    if dlt_result:
-        results.append(dlt_result)
-    
-    # 处理七星彩
-    qxc_result = fetch_and_predict_single('qxc')
-    if qxc_result:
-        results.append(qxc_result)
-    
-    # 处理七乐彩
-    qlc_result = fetch_and_predict_single('qlc')
-    if qlc_result:
-        results.append(qlc_result)
+    # 四种彩票（双色球、大乐透、七星彩、七乐彩）同时爬取入库（线程池），再分别预测（进程池），
+    # 单种彩票失败不影响其他彩票，超过截止时间的彩票记为失败；全部结果汇总后再发送通知
+    from cli.parallel_job import ParallelJobRunner
+    results = [r for r in ParallelJobRunner().run(['ssq', 'dlt', 'qxc', 'qlc'], with_predict=True) if r]
     
     # 发送 Telegram 通知
-    if results:
-        try:
-            from core.telegram_bot import TelegramBot
-            telegram = TelegramBot()
-            
-            # 为每个彩票类型单独发送消息
-            for result in results:
-                predictions = result.get('predictions', [])
-                
-                # 只发送有预测结果的彩票类型
-                if not predictions:
-                    logger.info(f"跳过 {result['lottery_name']}：无预测结果")
-                    continue
-                
-                # 构建单个彩票类型的消息
-                message = f"🔮 <b>{result['lottery_name']}预测</b>\n\n"
-                
-                # 显示所有预测组合
-                for i, pred in enumerate(predictions, 1):
-                    strategy_name = pred.get('strategy_name', pred.get('strategy', '未知策略'))
-                    
-                    message += f"<b>组合 {i}: [{strategy_name}]</b>\n"
-                    
-                    if result['lottery_type'] == 'ssq':
-                        red_str = ' '.join([f"{int(b):02d}" for b in pred['red_balls']])
-                        message += f"🔴 红球: <code>{red_str}</code>\n"
-                        message += f"🔵 蓝球: <code>{int(pred['blue_ball']):02d}</code>\n\n"
-                    elif result['lottery_type'] == 'dlt':
-                        front_str = ' '.join([f"{int(b):02d}" for b in pred['front_balls']])
-                        back_str = ' '.join([f"{int(b):02d}" for b in pred['back_balls']])
-                        message += f"🔴 前区: <code>{front_str}</code>\n"
-                        message += f"🔵 后区: <code>{back_str}</code>\n\n"
-                    elif result['lottery_type'] == 'qxc':
-                        numbers_str = ' '.join([str(n) for n in pred['numbers']])
-                        message += f"🔢 号码: <code>{numbers_str}</code>\n\n"
-                    elif result['lottery_type'] == 'qlc':
-                        basic_str = ' '.join([f"{int(b):02d}" for b in pred['basic_balls']])
-                        special_str = f"{int(pred['special_ball']):02d}"
-                        message += f"🔴 基本号: <code>{basic_str}</code>\n"
-                        message += f"🔵 特别号: <code>{special_str}</code>\n\n"
-                
-                message += "━━━━━━━━━━━━━━━\n"
-                message += "⚠️ 仅供参考，理性购彩"
-                
-                # 发送单个彩票类型的消息
-                telegram.send_message(message)
-                logger.info(f"✓ {result['lottery_name']} Telegram 通知已发送")
-            
-        except Exception as e:
-            logger.error(f"发送 Telegram 通知失败: {e}", exc_info=True)
+    send_predictions(results)
     
     logger.info(f"定时任务结束: {datetime.now()}")
 
 
-def start_schedule(lottery_type: str = None):
+def start_schedule(lottery_type: str = None, mode: str = 'cron'):
     """启动定时任务
     
     Args:
         lottery_type: 彩票类型，如果为 None 则处理所有类型
+        mode: 'cron' 每天 21:30 处理所有类型；'adaptive' 按各彩票开奖日和开奖时间轮询（见 cli/draw_poller.py）
     """
     # 使用通用日志目录
     log_dir = LOG_DIR / 'schedule'
@@ -137,6 +165,20 @@ def start_schedule(lottery_type: str = None):
     
     scheduler = BlockingScheduler()
     
+    if mode == 'adaptive':
+        # 开奖后开始轮询，获取到新一期立即预测并通知
+        from cli.draw_poller import start_polling
+        start_polling(scheduler, [lottery_type] if lottery_type else ['ssq', 'dlt', 'qxc', 'qlc'], send_predictions)
+        logger.info("定时任务已启动 - 开奖当晚轮询（双色球 + 大乐透 + 七星彩 + 七乐彩）")
+        logger.info("按 Ctrl+C 停止")
+        try:
+            scheduler.start()
+        except (KeyboardInterrupt, SystemExit):
+            logger.info("定时任务已停止")
+        return
+    elif mode != 'cron':
+        raise ValueError(f"不支持的定时任务模式: {mode}")
+    
     # 每天晚上21:30执行（开奖后1小时）
     scheduler.add_job(
         fetch_latest_data,
@@ -0,0 +1,373 @@
+"""
+常驻服务命令
+`python lottery.py serve` 启动后常驻内存，保持各彩票的数据库连接、HTTP 连接池、历史数据和已完成分析的预测器，
+CLI 命令（`predict --daemon` / `fetch --daemon`）和定时任务（`serve --schedule`）通过本地套接字向它发送请求：
+
+- 预测请求直接使用内存中的预测器，不再重新导入模块、读取 .env、连接数据库和分析全部历史数据
+- 每次请求只查询数据库最新期号，有新开奖（本服务或其他进程入库）时才重新读取历史数据和分析
+- 增量爬取仍通过 smart_fetch()，传入常驻的数据库连接和爬虫（专用的 HTTP 连接池），入库后直接用内存中的预测器预测
+- 开奖当晚轮询（serve --schedule adaptive）同样使用常驻的连接和预测器
+
+协议见 core/daemon.py。
+"""
+
+import logging
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+
+from core.base_spider import create_session
+from core.config import (
+    DEFAULT_PREDICTION_COUNT, DEFAULT_STRATEGIES, DIVERSITY_METRIC, LOG_DIR, LOTTERY_NAMES, PREDICTION_OVERSAMPLE,
+    SERVE_CONFIG, SPIDER_CONFIG,
+)
+from core.daemon import DaemonClient, encode_message, parse_address, read_message
+from core.utils import load_db_config
+from cli.smart_fetch import get_lottery_modules, import_class, load_cached_predictions, smart_fetch, store_predictions
+
+logger = logging.getLogger(__name__)
+
+LOTTERY_TYPES = ['ssq', 'dlt', 'qxc', 'qlc']
+
+
+class WarmLottery:
+    """单个彩票类型的常驻状态（同一时间只有一个请求使用）"""
+
+    def __init__(self, lottery_type: str):
+        self.lottery_type = lottery_type
+        self.modules = get_lottery_modules(lottery_type)
+        self.lock = threading.Lock()
+        self.db = None
+        self.spider = None
+        self.latest = None      # 已加载历史数据的最新一期
+        self.data = None        # 历史数据
+        self.predictor = None   # 已完成分析的预测器
+        self.loaded_at = None
+
+    def connect(self):
+        """复用数据库连接（断开时重连）"""
+        if self.db is None:
+            self.db = import_class(self.modules['database_class'])(load_db_config())
+            self.db.connect()
+            self.db.create_table()
+        else:
+            self.db.ensure_connection()
+        return self.db
+
+    def get_spider(self):
+        """复用爬虫（专用的 Session，keep-alive 连接跨请求保持）"""
+        if self.spider is None:
+            self.spider = import_class(self.modules['spider_class'])(
+                timeout=SPIDER_CONFIG['timeout'],
+                retry_times=SPIDER_CONFIG['retry_times'],
+                session=create_session()
+            )
+        return self.spider
+
+    def refresh(self) -> bool:
+        """数据库最新期号变化时重新读取历史数据（返回是否重新读取）"""
+        latest = self.connect().get_latest_lottery()
+        if self.data is not None and latest and self.latest and latest['lottery_no'] == self.latest['lottery_no']:
+            return False
+
+        start = time.perf_counter()
+        self.data = self.db.get_all_lottery_data()
+        self.latest = latest
+        self.predictor = None
+        self.loaded_at = datetime.now().isoformat(timespec='seconds')
+        logger.info(f"{self.modules['name']} 加载历史数据 {len(self.data)} 条"
+                    f"（最新 {latest['lottery_no'] if latest else '-'}，{time.perf_counter() - start:.2f}s）")
+        return True
+
+    def get_predictor(self, refresh: bool = True):
+        """已分析的预测器（历史数据变化后重新创建）
+
+        Args:
+            refresh: 先检查数据库最新期号（HTTP 接口由后台定时检查，请求时不访问数据库）
+        """
+        if refresh or self.data is None:
+            self.refresh()
+        if not self.data:
+            raise ValueError(f"{self.modules['name']} 数据库中没有历史数据，请先运行爬取命令")
+        if self.predictor is None:
+            start = time.perf_counter()
+            self.predictor = import_class(self.modules['predictor_class'])(self.data, strategies=DEFAULT_STRATEGIES)
+            logger.info(f"{self.modules['name']} 分析历史数据完成（{time.perf_counter() - start:.2f}s）")
+        return self.predictor
+
+    def predict(self, count: int = None) -> List[Dict]:
+        """使用内存中的预测器预测（调用方持有 lock）"""
+        return self.get_predictor().predict(
+            count=count or DEFAULT_PREDICTION_COUNT,
+            oversample=PREDICTION_OVERSAMPLE,
+            metric=DIVERSITY_METRIC
+        )
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+        if self.spider is not None:
+            self.spider.close()
+            self.spider = None
+
+
+class LotteryService:
+    """常驻服务的请求处理"""
+
+    def __init__(self, lottery_types: List[str] = None):
+        self.lotteries = {lottery_type: WarmLottery(lottery_type) for lottery_type in (lottery_types or LOTTERY_TYPES)}
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.requests = 0
+        self.commands = {
+            'ping': self.ping,
+            'status': self.status,
+            'predict': self.predict,
+            'fetch': self.fetch,
+            'schedule': self.scheduled_job,
+        }
+
+    def _get(self, lottery_type: str) -> WarmLottery:
+        if lottery_type not in self.lotteries:
+            raise ValueError(f"不支持的彩票类型: {lottery_type}。支持的类型: {list(self.lotteries)}")
+        return self.lotteries[lottery_type]
+
+    def warm_up(self):
+        """启动时加载各彩票的历史数据并完成分析（失败的彩票在第一次请求时重试）"""
+        for lottery in self.lotteries.values():
+            try:
+                with lottery.lock:
+                    lottery.get_predictor()
+            except Exception as e:
+                logger.warning(f"{lottery.modules['name']} 预加载失败: {e}")
+
+    def handle(self, request: Dict):
+        """处理一个请求（未知命令抛出 ValueError）"""
+        command = request.get('command')
+        if command not in self.commands:
+            raise ValueError(f"不支持的命令: {command}。支持的命令: {list(self.commands)}")
+        params = {key: value for key, value in request.items() if key != 'command'}
+        self.requests += 1
+        return self.commands[command](**params)
+
+    # ---------- 命令 ----------
+
+    def ping(self) -> Dict:
+        return {'pid': os.getpid()}
+
+    def status(self) -> Dict:
+        return {
+            'pid': os.getpid(),
+            'started_at': self.started_at,
+            'requests': self.requests,
+            'lotteries': {
+                lottery_type: {
+                    'latest': lottery.latest['lottery_no'] if lottery.latest else None,
+                    'rows': len(lottery.data) if lottery.data is not None else 0,
+                    'analyzed': lottery.predictor is not None,
+                    'loaded_at': lottery.loaded_at,
+                }
+                for lottery_type, lottery in self.lotteries.items()
+            },
+        }
+
+    def predict(self, lottery_type: str, count: int = None) -> Dict:
+        """使用内存中的预测器预测（每次请求生成新的号码）"""
+        lottery = self._get(lottery_type)
+        start = time.perf_counter()
+        with lottery.lock:
+            predictions = lottery.predict(count)
+            latest = lottery.latest
+        return {
+            'lottery_type': lottery_type,
+            'lottery_name': lottery.modules['name'],
+            'latest': latest,
+            'predictions': predictions,
+            'elapsed': time.perf_counter() - start,
+        }
+
+    def fetch(self, lottery_type: str, force: bool = False, with_predict: bool = False,
+              publish_delay: float = None) -> Dict:
+        """增量爬取（使用常驻的数据库连接和爬虫）；with_predict 时用内存中的预测器预测最新一期
+        （没有新开奖时使用缓存的预测结果）
+
+        Args:
+            publish_delay: 开奖后多少分钟视为已发布（开奖当晚轮询传 0），默认同 smart_fetch()
+        """
+        lottery = self._get(lottery_type)
+        with lottery.lock:
+            result = smart_fetch(lottery_type, mode='incremental', force=force, publish_delay=publish_delay,
+                                 db=lottery.connect(), spider=lottery.get_spider())
+            if with_predict and result.get('success'):
+                latest = result.get('latest')
+                predictions = load_cached_predictions(lottery_type, latest)
+                if predictions is None:
+                    predictions = lottery.predict()
+                    store_predictions(lottery_type, latest, predictions)
+                else:
+                    result['predictions_cached'] = True
+                result['predictions'] = predictions
+        return result
+
+    def predict_latest(self, lottery_type: str) -> List[Dict]:
+        """使用内存中的预测器预测最新一期（开奖当晚轮询获取到新一期后调用）"""
+        lottery = self._get(lottery_type)
+        with lottery.lock:
+            return lottery.predict()
+
+    def _scheduled_fetch(self, lottery_type: str) -> Dict:
+        """定时任务中单种彩票的爬取和预测（失败只影响它自己）"""
+        try:
+            return self.fetch(lottery_type, with_predict=True)
+        except Exception as e:
+            logger.error(f"{lottery_type} 爬取失败: {e}", exc_info=True)
+            return {
+                'success': False,
+                'lottery_type': lottery_type,
+                'lottery_name': LOTTERY_NAMES.get(lottery_type, lottery_type),
+                'error': str(e),
+            }
+
+    def scheduled_job(self) -> List[Dict]:
+        """定时任务：各彩票同时增量爬取，使用内存中的预测器预测，再发送通知"""
+        from cli.schedule import send_predictions
+
+        logger.info(f"定时任务开始: {datetime.now()}")
+        with ThreadPoolExecutor(max_workers=len(self.lotteries), thread_name_prefix='serve-job') as pool:
+            results = list(pool.map(self._scheduled_fetch, self.lotteries))
+        send_predictions([result for result in results if result.get('success')])
+        logger.info(f"定时任务结束: {datetime.now()}")
+        return results
+
+    def close(self):
+        for lottery in self.lotteries.values():
+            with lottery.lock:
+                lottery.close()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """每个连接处理一个请求"""
+
+    def handle(self):
+        try:
+            request = read_message(self.rfile)
+            if not request:
+                return
+            response = {'ok': True, 'result': self.server.service.handle(request)}
+        except Exception as e:
+            logger.error(f"请求处理失败: {e}", exc_info=True)
+            response = {'ok': False, 'error': str(e)}
+        self.wfile.write(encode_message(response))
+
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class _ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+class _ThreadingTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def create_server(service: LotteryService, address: str = None):
+    """在本地套接字上创建服务（Unix 套接字文件已存在但没有服务在运行时删除后重新创建）"""
+    address = address or SERVE_CONFIG['address']
+    if DaemonClient(address, timeout=2).is_running():
+        raise RuntimeError(f"常驻服务已在运行: {address}")
+
+    family, bind_address = parse_address(address)
+    if family == socket.AF_INET:
+        server = _ThreadingTCPServer(bind_address, _RequestHandler)
+    else:
+        if os.path.exists(bind_address):
+            os.unlink(bind_address)
+        server = _ThreadingUnixServer(bind_address, _RequestHandler)
+        # 只有当前用户可以连接
+        os.chmod(bind_address, 0o600)
+    server.service = service
+    server.address = address
+    return server
+
+
+def _start_scheduler(service: LotteryService, mode: str):
+    """在服务进程内运行定时任务（使用内存中的状态）"""
+    from apscheduler.schedulers.background import BackgroundScheduler
+
+    scheduler = BackgroundScheduler()
+    if mode == 'adaptive':
+        from cli.draw_poller import start_polling
+        from cli.schedule import send_predictions
+        start_polling(scheduler, list(service.lotteries), send_predictions,
+                      fetch=service.fetch, predict=service.predict_latest)
+        logger.info("定时任务 - 开奖当晚轮询")
+    elif mode == 'cron':
+        # 每天晚上21:30执行（开奖后1小时）
+        scheduler.add_job(service.scheduled_job, 'cron', hour=21, minute=30)
+        logger.info("定时任务 - 每天 21:30 执行")
+    else:
+        raise ValueError(f"不支持的定时任务模式: {mode}")
+    scheduler.start()
+    return scheduler
+
+
+def _exit_on_signal(signum, frame):
+    raise SystemExit(0)
+
+
+def start_server(schedule_mode: str = None, address: str = None):
+    """启动常驻服务（阻塞直到 Ctrl+C 或 SIGTERM）
+
+    Args:
+        schedule_mode: 同时运行定时任务（'cron' / 'adaptive'），None 为不运行
+        address: 服务地址（默认 SERVE_CONFIG['address']）
+    """
+    log_dir = LOG_DIR / 'serve'
+    log_dir.mkdir(exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_dir / 'serve.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+    service = LotteryService()
+    try:
+        server = create_server(service, address)
+    except RuntimeError as e:
+        logger.error(f"❌ {e}")
+        return
+
+    start = time.perf_counter()
+    service.warm_up()
+    logger.info(f"预加载完成（{time.perf_counter() - start:.1f}s）: "
+                f"{', '.join(LOTTERY_NAMES.get(t, t) for t in service.lotteries)}")
+
+    scheduler = _start_scheduler(service, schedule_mode) if schedule_mode else None
+
+    # docker stop / systemctl stop 发送 SIGTERM，与 Ctrl+C 一样正常退出
+    signal.signal(signal.SIGTERM, _exit_on_signal)
+
+    logger.info(f"常驻服务已启动: {server.address}（pid {os.getpid()}）")
+    logger.info("按 Ctrl+C 停止")
+    try:
+        server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        logger.info("常驻服务正在停止")
+    finally:
+        if scheduler is not None:
+            scheduler.shutdown(wait=False)
+        server.server_close()
+        service.close()
+        family, bind_address = parse_address(server.address)
+        if family != socket.AF_INET and os.path.exists(bind_address):
+            os.unlink(bind_address)
+        logger.info("常驻服务已停止")
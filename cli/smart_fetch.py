@@ -3,10 +3,20 @@
 重构后的核心爬取逻辑，支持全量、增量、定时任务
 """
 
+import json
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
-from core.config import LOTTERY_NAMES
+from core.config import LOTTERY_NAMES, SPIDER_CONFIG
+from core.base_spider import NoDelay
+from core.rate_limiter import get_host_limiter
+from core.fetch_planner import GapIndex, plan_fetch_ranges
+from core.draw_calendar import DrawCalendar
+from core.pipeline import FetchPipeline
+from core.crawl_journal import CrawlJournal, record_hash, combine_hashes, records_digest
+from core.named_lock import named_lock
+from core.run_state import get_run_state
 from core.utils import load_db_config
 
 logger = logging.getLogger(__name__)
@@ -64,11 +74,22 @@ def smart_fetch(lottery_type: str, mode: str = 'incremental', **options) -> Dict
     
     Args:
         lottery_type: 彩票类型 ('ssq', 'dlt', 'qxc' 或 'qlc')
-        mode: 爬取模式 ('incremental' 增量, 'full' 全量, 'year' 指定年份)
+        mode: 爬取模式 ('incremental' 增量, 'full' 全量, 'year' 指定年份, 'repair' 修复缺号)
         **options: 其他选项
-            - target_year: 指定年份（mode='year' 时使用）
+            - target_year: 指定年份（mode='year' 时使用；mode='repair' 时只修复该年）
             - with_predict: 是否进行预测
             - batch_size: 批次大小（全量模式使用）
+            - workers: 全量模式并发数（默认 SPIDER_CONFIG['workers']，大于 1 时并发爬取）
+            - stream: 全量/年份模式是否流式爬取（默认 SPIDER_CONFIG['stream']）
+            - pipeline: 全量/年份模式是否使用流水线（默认 SPIDER_CONFIG['pipeline']，workers 为下载线程数）
+            - journal: 全量模式是否记录爬取日志并断点续爬（默认 SPIDER_CONFIG['journal']）
+            - force: 增量模式忽略开奖日历，总是请求网络
+            - publish_delay: 增量模式按开奖日历判断时，开奖后多少分钟视为已发布（默认 SPIDER_CONFIG['publish_delay']）
+            - lock: 是否加跨进程锁（默认 SPIDER_CONFIG['lock']）；其他进程正在爬取时等待并使用它的结果（带 'shared': True）
+            - engine: 已启动的异步爬虫引擎（AsyncSpiderEngine），增量模式通过它请求；
+                      多个线程共用一个引擎时，各自持有爬取锁，请求在同一个事件循环中同时进行
+            - spider: 复用的爬虫实例（常驻服务使用），默认新建
+            - db: 复用的已连接数据库实例（常驻服务使用，不在这里关闭），默认新建连接
     
     Returns:
         dict: 爬取结果
@@ -81,26 +102,37 @@ def smart_fetch(lottery_type: str, mode: str = 'incremental', **options) -> Dict
         SpiderClass = import_class(modules['spider_class'])
         DatabaseClass = import_class(modules['database_class'])
         
-        # 初始化
-        spider = SpiderClass(timeout=15, retry_times=3)
-        db = DatabaseClass(load_db_config())
-        db.connect()
-        db.create_table()
+        # 初始化（全量/年份/修复模式的请求速率由域名限流器控制，不再额外随机等待）
+        spider = options.pop('spider', None)
+        if spider is None:
+            rate_limited = mode in ('full', 'year', 'repair')
+            spider = SpiderClass(
+                timeout=SPIDER_CONFIG['timeout'],
+                retry_times=SPIDER_CONFIG['retry_times'],
+                delay=NoDelay() if rate_limited else None,
+                limiter=get_host_limiter(SpiderClass.BASE_URL) if rate_limited else None
+            )
+        db = options.pop('db', None)
+        own_db = db is None
+        if own_db:
+            db = DatabaseClass(load_db_config())
+            db.connect()
+            db.create_table()
         
         logger.info(f"📊 智能爬取 {modules['name']} (模式: {mode})")
         
-        # 根据模式执行不同的爬取逻辑
-        if mode == 'incremental':
-            result = _fetch_incremental(spider, db, modules, lottery_type, **options)
-        elif mode == 'full':
-            result = _fetch_full_history(spider, db, modules, lottery_type, **options)
-        elif mode == 'year':
-            target_year = options.get('target_year')
-            if not target_year:
-                raise ValueError("年份模式需要指定 target_year 参数")
-            result = _fetch_single_year(spider, db, modules, lottery_type, target_year, **options)
+        if options.pop('lock', SPIDER_CONFIG['lock']):
+            # 同一种彩票同一时间只有一个进程爬取入库，其他进程（定时任务、手动 fetch）等待并使用它的结果
+            share_key = json.dumps({'mode': mode, 'target_year': options.get('target_year'),
+                                    'force': options.get('force', False),
+                                    'publish_delay': options.get('publish_delay')}, sort_keys=True)
+            result = named_lock(f'fetch-{lottery_type}').run_once(
+                lambda: _run_mode(spider, db, modules, lottery_type, mode, options),
+                key=share_key,
+                wait=SPIDER_CONFIG['lock_wait']
+            )
         else:
-            raise ValueError(f"不支持的模式: {mode}")
+            result = _run_mode(spider, db, modules, lottery_type, mode, options)
         
         # 添加基础信息
         result.update({
@@ -109,11 +141,19 @@ def smart_fetch(lottery_type: str, mode: str = 'incremental', **options) -> Dict
             'mode': mode
         })
         
-        # 如果需要预测
-        if options.get('with_predict', False) and result.get('inserted', 0) >= 0:
-            result['predictions'] = _generate_predictions(db, modules, lottery_type, **options)
+        # 如果需要预测（没有新开奖时使用缓存的预测结果）
+        if options.get('with_predict', False):
+            latest = result.get('latest') or db.get_latest_lottery()
+            predictions = load_cached_predictions(lottery_type, latest)
+            if predictions is None:
+                predictions = _generate_predictions(db, modules, lottery_type, **options)
+                store_predictions(lottery_type, latest, predictions)
+            else:
+                result['predictions_cached'] = True
+            result['predictions'] = predictions
         
-        db.close()
+        if own_db:
+            db.close()
         return result
         
     except Exception as e:
@@ -125,11 +165,114 @@ def smart_fetch(lottery_type: str, mode: str = 'incremental', **options) -> Dict
         }
 
 
+def _run_mode(spider, db, modules, lottery_type: str, mode: str, options: Dict) -> Dict:
+    """按模式爬取入库（options 中的 workers / journal 会被取出）"""
+    if mode == 'incremental':
+        result = _fetch_incremental(spider, db, modules, lottery_type, **options)
+    elif mode == 'full':
+        workers = options.pop('workers', None) or SPIDER_CONFIG['workers']
+        journal = CrawlJournal(lottery_type) if options.pop('journal', SPIDER_CONFIG['journal']) else None
+        if options.get('pipeline', SPIDER_CONFIG['pipeline']):
+            result = _fetch_pipeline(spider, db, modules, lottery_type, workers, journal=journal)
+        elif workers > 1:
+            result = _fetch_full_history_concurrent(db, modules, lottery_type, workers, journal=journal, **options)
+        else:
+            result = _fetch_full_history(spider, db, modules, lottery_type, journal=journal, **options)
+        if journal is not None:
+            result['journal'] = journal.finish()
+            if result['journal']['status'] == 'running':
+                logger.warning(f"📒 有 {len(result.get('failed_ranges') or [])} 段未完成，"
+                               f"再次执行全量爬取将从爬取日志继续: {journal.path}")
+    elif mode == 'year':
+        target_year = options.get('target_year')
+        if not target_year:
+            raise ValueError("年份模式需要指定 target_year 参数")
+        if options.get('pipeline', SPIDER_CONFIG['pipeline']):
+            workers = options.get('workers') or SPIDER_CONFIG['workers']
+            result = _fetch_pipeline(spider, db, modules, lottery_type, workers, years=[target_year])
+            result['target_year'] = target_year
+        else:
+            result = _fetch_single_year(spider, db, modules, lottery_type, target_year, **options)
+    elif mode == 'repair':
+        result = _fetch_repair(spider, db, modules, lottery_type, options.get('target_year'))
+    else:
+        raise ValueError(f"不支持的模式: {mode}")
+    return result
+
+
+def smart_fetch_all(lottery_types: List[str] = None, **options) -> List[Dict]:
+    """并发增量爬取多种彩票
+
+    每种彩票在各自的线程中执行 smart_fetch(mode='incremental')（持有爬取锁、使用预测缓存），
+    请求交给同一个异步爬虫引擎同时进行（按域名限制并发数），总耗时约等于最慢的一次请求
+
+    Args:
+        lottery_types: 彩票类型列表（默认全部）
+        **options: 其他选项（同 smart_fetch()）
+            - limit_per_host: 每个域名的最大并发请求数（默认 SPIDER_CONFIG['async_limit_per_host']）
+
+    Returns:
+        list: 每种彩票的爬取结果（顺序同 lottery_types，格式同 smart_fetch(mode='incremental')）
+    """
+    from core.async_spider import AsyncSpiderEngine
+
+    lottery_types = lottery_types or list(LOTTERY_NAMES)
+    with AsyncSpiderEngine(limit_per_host=options.pop('limit_per_host', None)) as engine:
+        with ThreadPoolExecutor(max_workers=len(lottery_types)) as executor:
+            futures = [
+                executor.submit(smart_fetch, lottery_type, mode='incremental', engine=engine, **options)
+                for lottery_type in lottery_types
+            ]
+            return [future.result() for future in futures]
+
+
 def _fetch_incremental(spider, db, modules, lottery_type, **options) -> Dict:
     """增量爬取逻辑"""
+    issue_range = _incremental_range(db, modules, lottery_type, options.get('force', False),
+                                     options.get('publish_delay'))
+    if issue_range is None:
+        # 尚未开奖，不请求网络
+        return _store_incremental(db, [])
+    start_issue, end_issue = issue_range
+    
+    # 调用爬取方法（有异步爬虫引擎时交给引擎的事件循环，与其他彩票的请求同时进行）
+    engine = options.get('engine')
+    if engine is not None:
+        data = engine.fetch_sync(spider, start_issue=start_issue, end_issue=end_issue)
+    else:
+        data = spider.fetch(start_issue=start_issue, end_issue=end_issue)
+    
+    return _store_incremental(db, data)
+
+
+def _incremental_range(db, modules, lottery_type: str = None, force: bool = False,
+                       publish_delay: float = None) -> Optional[Tuple[str, str]]:
+    """根据数据库最新期号确定增量爬取的期号范围
+
+    启用开奖日历（SPIDER_DRAW_CALENDAR）时按开奖日推算：下一期尚未开奖发布时返回 None（不请求网络），
+    只缺一期时只请求这一期；数据库为空、force=True 或推算失败时请求到当年末（YY200）。
+    publish_delay 为开奖后多少分钟视为已发布（开奖当晚轮询时传 0，开奖后即请求）
+    """
     # 获取数据库中最新期号
     latest_in_db = db.get_latest_lottery()
     
+    if latest_in_db and lottery_type and SPIDER_CONFIG['draw_calendar'] and not force:
+        latest_no, latest_date = latest_in_db['lottery_no'], latest_in_db['draw_date']
+        try:
+            calendar = DrawCalendar(lottery_type, db.get_recent_draws(), publish_delay=publish_delay)
+            issue_range = calendar.plan_incremental(latest_no, latest_date)
+        except Exception as e:
+            logger.warning(f"开奖日历推算失败，按期号范围爬取: {e}")
+        else:
+            logger.info(f"数据库最新期号: {latest_no} ({latest_date})")
+            if issue_range is None:
+                expected = calendar.next_expected(latest_no, latest_date)
+                logger.info(f"⏭️ 下一期 {expected['issue']} 预计 {expected['publish_time']:%Y-%m-%d %H:%M} 发布，"
+                            f"暂不请求")
+                return None
+            logger.info(f"爬取期号范围: {issue_range[0]} - {issue_range[1]}（按开奖日历）")
+            return issue_range
+    
     # 确定爬取范围
     current_year = datetime.now().year
     year_short = str(current_year)[2:]
@@ -169,10 +312,11 @@ def _fetch_incremental(spider, db, modules, lottery_type, **options) -> Dict:
         logger.info(f"数据库为空，从最后期号 {last_issue} 的下一期 {start_issue} 开始")
     
     logger.info(f"爬取期号范围: {start_issue} - {end_issue}")
-    
-    # 调用爬取方法
-    data = spider.fetch(start_issue=start_issue, end_issue=end_issue)
-    
+    return start_issue, end_issue
+
+
+def _store_incremental(db, data: List[Dict]) -> Dict:
+    """增量数据入库"""
     inserted = 0
     if data:
         logger.info(f"获取 {len(data)} 条数据")
@@ -192,134 +336,316 @@ def _fetch_incremental(spider, db, modules, lottery_type, **options) -> Dict:
     }
 
 
-def _fetch_full_history(spider, db, modules, lottery_type, **options) -> Dict:
-    """全量爬取逻辑（按年份推进，自动查找缺失年份）
+def _gap_index(db, modules, lottery_type: str, known_nos: List[str] = None) -> GapIndex:
+    """数据库已有期号的缺口索引（按各年最后一期的开奖日期和开奖日历判断往年数据是否已到年末）"""
+    if known_nos is None:
+        known_nos = db.get_all_lottery_nos()
+    calendar = DrawCalendar(lottery_type, db.get_recent_draws())
+    return GapIndex(known_nos, modules['last_issue'], last_draws=db.get_year_last_draws(), calendar=calendar)
+
+
+def _plan_ranges(db, modules, lottery_type: str, years: List[int] = None, journal: CrawlJournal = None,
+                 known_nos: List[str] = None) -> List[Dict]:
+    """查询数据库已有期号，规划需要请求的期号范围（缺口合并后）
+
+    有爬取日志时：上次中断则沿用当时的规划继续，否则跳过日志中已完成的范围
+    """
+    index = _gap_index(db, modules, lottery_type, known_nos)
+    plan = plan_fetch_ranges(index, years=years)
+    if journal is not None:
+        plan = journal.plan(index, plan)
+    if plan:
+        logger.info(f"缺失约 {index.missing_count(years)} 期，合并为 {len(plan)} 次请求: "
+                    f"{', '.join(r['start'] + '-' + r['end'] for r in plan)}")
+    return plan
+
+
+def _plan_years(plan: List[Dict]) -> int:
+    """规划覆盖的年份数"""
+    years = set()
+    for item in plan:
+        years.update(range(int(item['start'][:2]), int(item['end'][:2]) + 1))
+    return len(years)
+
+
+def _fetch_range(spider, db, start_issue: str, end_issue: str, stream: bool = False,
+                 journal: CrawlJournal = None) -> Dict:
+    """爬取一个期号范围并入库
+
+    - 普通模式：整页下载解析后一次入库
+    - 流式模式：spider.iter_fetch() 边下载边解析，每凑满 SPIDER_BATCH_SIZE 条入库一次，
+      下载未完成时已开始入库，内存中最多只有一批数据；中途出错时已解析的数据仍会入库
+    - 有爬取日志时记录该范围的状态（失败或中途出错的范围下次续爬时重新请求）
+
+    Returns:
+        {'fetched': 获取条数, 'inserted': 新增条数, 'skipped': 跳过条数, 'error': 错误信息或 None}
+    """
+    stats = {'fetched': 0, 'inserted': 0, 'skipped': 0, 'error': None}
+    item = {'start': start_issue, 'end': end_issue}
+
+    def insert(data: List[Dict]):
+        inserted, duplicated, skipped = db.insert_lottery_data(data, skip_existing=True)
+        stats['inserted'] += inserted
+        stats['skipped'] += skipped
+
+    if not stream:
+        try:
+            # 有爬取日志时需要区分"没有数据"和"获取失败"
+            data = spider.fetch(start_issue=start_issue, end_issue=end_issue, raise_errors=journal is not None)
+        except Exception as e:
+            stats['error'] = str(e)
+            logger.warning(f"   ⚠️ {start_issue} - {end_issue} 爬取失败: {e}")
+            if journal is not None:
+                journal.mark(item, 'failed', error=str(e))
+            return stats
+        stats['fetched'] = len(data)
+        if journal is not None:
+            journal.mark(item, 'parsed', rows=len(data), digest=records_digest(data))
+        if data:
+            insert(data)
+        if journal is not None:
+            journal.mark(item, 'inserted', inserted=stats['inserted'])
+        return stats
+
+    batch_size = SPIDER_CONFIG['batch_size']
+    batch = []
+    hashes = []
+    try:
+        for record in spider.iter_fetch(start_issue, end_issue):
+            batch.append(record)
+            stats['fetched'] += 1
+            if journal is not None:
+                hashes.append(record_hash(record))
+            if len(batch) >= batch_size:
+                data, batch = batch, []
+                insert(data)
+    except Exception as e:
+        stats['error'] = str(e)
+        logger.warning(f"   ⚠️ {start_issue} - {end_issue} 流式爬取中断（已获取 {stats['fetched']} 条）: {e}")
+
+    if batch:
+        insert(batch)
+    if journal is not None:
+        if stats['error']:
+            journal.mark(item, 'failed', rows=stats['fetched'], error=stats['error'])
+        else:
+            journal.mark(item, 'parsed', rows=stats['fetched'], digest=combine_hashes(hashes))
+            journal.mark(item, 'inserted', inserted=stats['inserted'])
+    return stats
+
+
+def _fetch_full_history(spider, db, modules, lottery_type, journal: CrawlJournal = None, **options) -> Dict:
+    """全量爬取逻辑（按缺失期号顺序爬取）
     
-    核心逻辑（与 Worker 版本保持一致）：
-    1. 从起始年份开始，逐年爬取
-    2. 第一年使用 lastIssue + 1 作为起始期号
-    3. 其他年份从 001 开始（关键：跨年时从 001 开始，而不是从 lastIssue 的期号开始）
-    4. 如果某年无数据，跳过并继续下一年
+    核心逻辑：
+    1. 只查询一次数据库已有期号，计算从起始期号（lastIssue + 1）到当前年份的缺失区间
+    2. 相邻年份的连续缺口合并为一次请求（500.com 接口支持跨年期号范围），
+       只有预计行数超过 SPIDER_MAX_RANGE_ROWS 时才拆分
+    3. 依次请求各范围，请求间隔由域名限流器控制
+    4. 有爬取日志时记录各范围的进度，中断后再次执行从日志继续
     """
-    last_issue = modules['last_issue']
-    start_year = int('20' + last_issue[:2])
-    current_year = datetime.now().year
+    plan = _plan_ranges(db, modules, lottery_type, journal=journal)
+    stream = options.get('stream', SPIDER_CONFIG['stream'])
     
-    logger.info(f"最后期号: {last_issue}, 起始年份: {start_year}, 当前年份: {current_year}")
+    logger.info(f"最后期号: {modules['last_issue']}, 当前年份: {datetime.now().year}")
     
     total_inserted = 0
-    year_count = 0
+    failed_ranges = []
     
-    # 循环爬取所有年份（使用 for 循环避免死循环）
-    for year in range(start_year, current_year + 1):
-        year_short = str(year)[2:]
-        
-        # 检查数据库最新期号
-        latest = db.get_latest_lottery()
-        
-        # 确定该年份的起始期号
-        if latest:
-            latest_no = latest['lottery_no']
-            latest_year = int('20' + latest_no[2:4])
-            latest_issue = int(latest_no[4:])
-            
-            if latest_year > year:
-                # 数据库已有更新年份的数据，跳过当前年份
-                logger.info(f"📅 跳过 {year} 年：数据库已有更新年份数据")
-                continue
-            elif latest_year == year:
-                # 数据库已有当前年份的数据，从最新期号的下一期开始
-                next_issue = latest_issue + 1
-                if next_issue > 200:
-                    # 当前年份已爬取完毕，跳过
-                    logger.info(f"📅 跳过 {year} 年：数据库已有完整数据（最新期号: {latest_no}）")
-                    continue
-                start_issue = f"{year_short}{next_issue:03d}"
-                logger.info(f"📅 继续爬取 {year} 年：从期号 {start_issue} 开始（数据库最新: {latest_no}）")
-            else:
-                # 数据库最新年份小于当前年份，从该年份第一期开始
-                if year == start_year:
-                    # 第一年：使用配置中的 last_issue + 1 作为起始期号
-                    start_issue_num = int(last_issue[2:]) + 1
-                    start_issue = f"{year_short}{start_issue_num:03d}"
-                else:
-                    # 其他年份：从 001 开始
-                    start_issue = f"{year_short}001"
-        else:
-            # 数据库为空
-            if year == start_year:
-                # 第一年：使用配置中的 last_issue + 1 作为起始期号
-                start_issue_num = int(last_issue[2:]) + 1
-                start_issue = f"{year_short}{start_issue_num:03d}"
-            else:
-                # 其他年份：从 001 开始
-                start_issue = f"{year_short}001"
-        
-        end_issue = f"{year_short}200"
-        
-        # 爬取目标年份的数据
-        year_count += 1
-        logger.info(f"📅 爬取第 {year_count} 年: {year} 年数据 (期号: {start_issue} - {end_issue})")
-        
-        # 使用统一的 fetch 方法爬取该年度数据
-        data = spider.fetch(start_issue=start_issue, end_issue=end_issue)
-        
-        if not data or len(data) == 0:
-            logger.warning(f"   ⚠️ {year} 年无数据，跳过")
-            # 关键：跳过无数据的年份，继续下一年（避免死循环）
-            continue
-        
-        logger.info(f"   ✅ 获取 {len(data)} 条数据")
+    for i, item in enumerate(plan, 1):
+        start_issue, end_issue = item['start'], item['end']
+        logger.info(f"📅 爬取第 {i}/{len(plan)} 段: {start_issue} - {end_issue}（预计 {item.get('rows', '?')} 期）")
         
         # 批量插入（自动跳过已存在的数据）
-        inserted, duplicated, skipped = db.insert_lottery_data(data, skip_existing=True)
-        logger.info(f"   ✅ 入库: 新增 {inserted} 条，重复 {duplicated} 条，跳过 {skipped} 条")
+        stats = _fetch_range(spider, db, start_issue, end_issue, stream, journal)
+        total_inserted += stats['inserted']
+        if stats['error']:
+            failed_ranges.append(f"{start_issue}-{end_issue}")
         
-        total_inserted += inserted
+        if not stats['fetched']:
+            logger.warning(f"   ⚠️ {start_issue} - {end_issue} 无数据，跳过")
+            continue
         
-        # 添加延迟，避免访问过于频繁
-        import time
-        time.sleep(2)
+        logger.info(f"   ✅ 获取 {stats['fetched']} 条，新增 {stats['inserted']} 条，跳过 {stats['skipped']} 条")
     
     # 获取最终统计
     table_name = f'{lottery_type}_lottery'
     total = db.get_total_count(table_name)
     latest = db.get_latest_lottery()
+    year_count = _plan_years(plan)
     
     logger.info(f"✅ {modules['name']}全量爬取完成")
-    logger.info(f"爬取年份数: {year_count}")
+    logger.info(f"爬取年份数: {year_count}（请求 {len(plan)} 次）")
     logger.info(f"新增数据: {total_inserted} 条")
     logger.info(f"数据库总记录数: {total}")
     
+    result = {
+        'success': True,
+        'inserted': total_inserted,
+        'total': total,
+        'year_count': year_count,
+        'request_count': len(plan),
+        'latest': latest
+    }
+    if journal is not None:
+        result['failed_ranges'] = failed_ranges
+    return result
+
+
+def _fetch_full_history_concurrent(db, modules, lottery_type, workers: int, journal: CrawlJournal = None,
+                                   **options) -> Dict:
+    """并发全量爬取
+
+    1. 只查询一次数据库，预先规划所有缺失的期号范围
+    2. 由线程池并发请求，各线程共用一个爬虫实例（连接池 Session 按线程共享）
+    3. 所有请求经过按域名共享的令牌桶限流，代替固定的 sleep
+    4. 结果在主线程中按完成顺序入库（数据库连接不跨线程使用）
+    """
+    import time
+
+    plan = _plan_ranges(db, modules, lottery_type, journal=journal)
+    if not plan:
+        logger.info(f"✅ {modules['name']}数据已是最新，无需全量爬取")
+    else:
+        logger.info(f"📅 规划请求 {len(plan)} 次（{plan[0]['start']} - {plan[-1]['end']}），并发数 {workers}")
+
+    SpiderClass = import_class(modules['spider_class'])
+    spider = SpiderClass(
+        timeout=SPIDER_CONFIG['timeout'],
+        retry_times=SPIDER_CONFIG['retry_times'],
+        delay=NoDelay(),
+        limiter=get_host_limiter(SpiderClass.BASE_URL)
+    )
+
+    def fetch_range(start_issue: str, end_issue: str) -> List[Dict]:
+        # 获取失败时抛出，记入失败范围（而不是当作"无数据"）
+        return spider.fetch(start_issue=start_issue, end_issue=end_issue, raise_errors=True)
+
+    total_inserted = 0
+    failed_ranges = []
+    start_time = time.time()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'fetch-{lottery_type}') as executor:
+        futures = {
+            executor.submit(fetch_range, item['start'], item['end']): item
+            for item in plan
+        }
+
+        for future in as_completed(futures):
+            item = futures[future]
+            issue_range = f"{item['start']}-{item['end']}"
+            try:
+                data = future.result()
+            except Exception as e:
+                logger.error(f"   ❌ {issue_range} 爬取失败: {e}")
+                failed_ranges.append(issue_range)
+                if journal is not None:
+                    journal.mark(item, 'failed', error=str(e))
+                continue
+
+            if journal is not None:
+                journal.mark(item, 'parsed', rows=len(data), digest=records_digest(data))
+            if not data:
+                logger.warning(f"   ⚠️ {issue_range} 无数据，跳过")
+                if journal is not None:
+                    journal.mark(item, 'inserted', inserted=0)
+                continue
+
+            inserted, duplicated, skipped = db.insert_lottery_data(data, skip_existing=True)
+            total_inserted += inserted
+            if journal is not None:
+                journal.mark(item, 'inserted', inserted=inserted)
+            logger.info(f"   ✅ {issue_range}: 获取 {len(data)} 条，新增 {inserted} 条，跳过 {skipped} 条")
+
+    # 获取最终统计
+    table_name = f'{lottery_type}_lottery'
+    total = db.get_total_count(table_name)
+    latest = db.get_latest_lottery()
+    year_count = _plan_years(plan)
+
+    logger.info(f"✅ {modules['name']}并发全量爬取完成，耗时 {time.time() - start_time:.1f} 秒")
+    logger.info(f"爬取年份数: {year_count}（请求 {len(plan)} 次）")
+    logger.info(f"新增数据: {total_inserted} 条")
+    logger.info(f"数据库总记录数: {total}")
+    if failed_ranges:
+        logger.warning(f"失败范围: {sorted(failed_ranges)}")
+
     return {
         'success': True,
         'inserted': total_inserted,
         'total': total,
         'year_count': year_count,
+        'request_count': len(plan),
+        'failed_ranges': sorted(failed_ranges),
+        'latest': latest
+    }
+
+
+def _fetch_pipeline(spider, db, modules, lottery_type, workers: int = 1, years: List[int] = None,
+                    journal: CrawlJournal = None) -> Dict:
+    """流水线爬取（全量或指定年份）
+
+    1. 只查询一次数据库已有期号，规划缺失的期号范围
+    2. 下载、解析、规整在各自的线程中同时进行，阶段之间为有界队列（背压），
+       下一段在下载时上一段已在解析和入库
+    3. 已有期号在规整阶段去掉，入库时不再逐批查询
+    """
+    known_nos = db.get_all_lottery_nos()
+    plan = _plan_ranges(db, modules, lottery_type, years=years, journal=journal, known_nos=known_nos)
+    if not plan:
+        logger.info(f"✅ {modules['name']}数据已完整，无需爬取")
+    else:
+        logger.info(f"📅 流水线爬取: 规划请求 {len(plan)} 次（{plan[0]['start']} - {plan[-1]['end']}），"
+                    f"下载线程 {workers}")
+
+    pipeline = FetchPipeline(spider, db, workers=workers, known_nos=known_nos, journal=journal)
+    stats = pipeline.run(plan)
+
+    table_name = f'{lottery_type}_lottery'
+    total = db.get_total_count(table_name)
+    latest = db.get_latest_lottery()
+    year_count = _plan_years(plan)
+
+    logger.info(f"✅ {modules['name']}流水线爬取完成，耗时 {stats['elapsed']:.1f} 秒")
+    pipeline.log_stats()
+    logger.info(f"获取 {stats['fetched']} 条，新增 {stats['inserted']} 条，跳过 {stats['skipped']} 条")
+    logger.info(f"数据库总记录数: {total}")
+    if stats['failed_ranges']:
+        logger.warning(f"失败范围: {stats['failed_ranges']}")
+
+    return {
+        'success': True,
+        'inserted': stats['inserted'],
+        'total': total,
+        'year_count': year_count,
+        'request_count': len(plan),
+        'failed_ranges': stats['failed_ranges'],
+        'stages': stats['stages'],
         'latest': latest
     }
 
 
 def _fetch_single_year(spider, db, modules, lottery_type, target_year: int, **options) -> Dict:
-    """爬取指定年份的数据"""
-    year_short = str(target_year)[2:]
-    start_issue = f"{year_short}001"
-    end_issue = f"{year_short}200"
+    """爬取指定年份的数据（只请求该年缺失的期号）"""
+    plan = _plan_ranges(db, modules, lottery_type, years=[target_year])
     
-    logger.info(f"📅 爬取 {target_year} 年数据 (期号: {start_issue} - {end_issue})")
-    
-    # 使用统一的 fetch 方法爬取该年度数据
-    data = spider.fetch(start_issue=start_issue, end_issue=end_issue)
+    if not plan:
+        logger.info(f"✅ {target_year} 年数据已完整，无需爬取")
     
+    stream = options.get('stream', SPIDER_CONFIG['stream'])
     inserted = 0
-    if data and len(data) > 0:
-        logger.info(f"✅ 获取 {len(data)} 条数据")
+    for item in plan:
+        start_issue, end_issue = item['start'], item['end']
+        logger.info(f"📅 爬取 {target_year} 年数据 (期号: {start_issue} - {end_issue})")
         
-        # 批量插入（自动跳过已存在的数据）
-        inserted, duplicated, skipped = db.insert_lottery_data(data, skip_existing=True)
-        logger.info(f"✅ 入库: 新增 {inserted} 条，重复 {duplicated} 条，跳过 {skipped} 条")
-    else:
-        logger.warning(f"⚠️ {target_year} 年无数据")
+        # 爬取并入库（自动跳过已存在的数据）
+        stats = _fetch_range(spider, db, start_issue, end_issue, stream)
+        
+        if stats['fetched']:
+            inserted += stats['inserted']
+            logger.info(f"✅ 获取 {stats['fetched']} 条，新增 {stats['inserted']} 条，跳过 {stats['skipped']} 条")
+        else:
+            logger.warning(f"⚠️ {start_issue} - {end_issue} 无数据")
     
     # 获取最新一期
     latest = db.get_latest_lottery()
@@ -332,28 +658,146 @@ def _fetch_single_year(spider, db, modules, lottery_type, target_year: int, **op
     }
 
 
+def _log_missing(missing: Dict[int, List[str]], limit: int = 10):
+    """按年份输出缺失的期号（每年最多列出 limit 个）"""
+    for year, issues in sorted(missing.items()):
+        shown = ', '.join(issues[:limit]) + (f" 等 {len(issues)} 期" if len(issues) > limit else '')
+        logger.info(f"   {year} 年缺 {len(issues)} 期: {shown}")
+
+
+def _log_tails(index: GapIndex, tails: List[List[int]]):
+    """输出数据未到年末的往年"""
+    for start, _ in tails:
+        year = start // 1000
+        last_date = index.year_last_date.get(year)
+        logger.info(f"   {2000 + year} 年只到第 {start % 1000 - 1:03d} 期"
+                    f"{f'（{last_date}）' if last_date else ''}，之后的开奖缺失")
+
+
+def _fetch_repair(spider, db, modules, lottery_type, target_year: int = None) -> Dict:
+    """修复缺号：只请求已有数据内部缺失的期号和未到年末的往年末尾
+
+    1. 一次查询全部期号，按年份用集合差计算缺号（每年第 1 期到已有的最大期号）
+    2. 往年最后一期之后按开奖日历还有开奖日（全量爬取中途失败）的，请求该年最大期号之后的部分
+    3. 相邻的缺号合并为尽量少的请求（规则同全量爬取，中间已有期数不多时也合并）
+    4. 修复后重新计算，仍然缺失的期号即数据源本身没有的期号
+    """
+    years = [target_year] if target_year else None
+    index = _gap_index(db, modules, lottery_type)
+    missing = index.missing_issues(years)
+    missing_before = sum(len(issues) for issues in missing.values())
+    tails = index.incomplete_tails(years)
+
+    if not missing_before and not tails:
+        logger.info(f"✅ {modules['name']}期号连续，没有缺号")
+        return {
+            'success': True,
+            'inserted': 0,
+            'missing_before': 0,
+            'missing_after': 0,
+            'request_count': 0,
+            'remaining': {},
+            'incomplete_years': [],
+            'latest': db.get_latest_lottery()
+        }
+
+    if missing_before:
+        logger.info(f"🔍 {modules['name']}缺 {missing_before} 期:")
+        _log_missing(missing)
+    if tails:
+        logger.info(f"🔍 {modules['name']}有 {len(tails)} 年的数据未到年末:")
+        _log_tails(index, tails)
+
+    plan = plan_fetch_ranges(index, years=years, gaps=index.holes(years))
+    logger.info(f"合并为 {len(plan)} 次请求: {', '.join(item['start'] + '-' + item['end'] for item in plan)}")
+
+    total_inserted = 0
+    empty_ranges = []
+    for item in plan:
+        stats = _fetch_range(spider, db, item['start'], item['end'])
+        total_inserted += stats['inserted']
+        if not stats['fetched']:
+            empty_ranges.append(f"{item['start']}-{item['end']}")
+        logger.info(f"   🔧 {item['start']} - {item['end']}: 获取 {stats['fetched']} 条，新增 {stats['inserted']} 条")
+
+    index = _gap_index(db, modules, lottery_type)
+    remaining = index.missing_issues(years)
+    missing_after = sum(len(issues) for issues in remaining.values())
+    tails = index.incomplete_tails(years)
+
+    logger.info(f"✅ {modules['name']}缺号修复完成: 修复 {missing_before - missing_after} 期，新增 {total_inserted} 条")
+    if missing_after:
+        logger.warning(f"仍缺 {missing_after} 期（数据源没有这些期号或请求失败）:")
+        _log_missing(remaining)
+    if tails:
+        logger.warning(f"仍有 {len(tails)} 年的数据未到年末（数据源没有更多开奖或请求失败）:")
+        _log_tails(index, tails)
+
+    return {
+        'success': True,
+        'inserted': total_inserted,
+        'missing_before': missing_before,
+        'missing_after': missing_after,
+        'request_count': len(plan),
+        'empty_ranges': empty_ranges,
+        'remaining': remaining,
+        'incomplete_years': [2000 + start // 1000 for start, _ in tails],
+        'latest': db.get_latest_lottery()
+    }
+
+
 def _generate_predictions(db, modules, lottery_type, **options) -> List[Dict]:
     """生成预测结果"""
     try:
-        # 动态导入预测器
-        PredictorClass = import_class(modules['predictor_class'])
-        
         # 获取历史数据
         history_data = db.get_all_lottery_data()
         if not history_data:
             logger.warning("无历史数据，无法进行预测")
             return []
         
-        # 获取预测配置
-        from core.config import DEFAULT_STRATEGIES, DEFAULT_PREDICTION_COUNT
-        
-        # 创建预测器并预测
-        predictor = PredictorClass(history_data, strategies=DEFAULT_STRATEGIES)
-        predictions = predictor.predict(count=DEFAULT_PREDICTION_COUNT)
-        
-        logger.info(f"预测结果（共 {len(predictions)} 组）")
-        return predictions
+        return predict_from_history(lottery_type, history_data)
         
     except Exception as e:
         logger.error(f"预测失败: {e}", exc_info=True)
-        return []
\ No newline at end of file
+        return []
+
+
+def load_cached_predictions(lottery_type: str, latest: Optional[Dict]) -> Optional[List[Dict]]:
+    """数据库最新一期已预测过（预测配置未变）时返回缓存的预测结果，否则返回 None"""
+    run_state = get_run_state()
+    if run_state is None or not latest:
+        return None
+    predictions = run_state.get_predictions(lottery_type, latest['lottery_no'])
+    if predictions is not None:
+        logger.info(f"⏭️ {LOTTERY_NAMES.get(lottery_type, lottery_type)} 第 {latest['lottery_no']} 期已预测，"
+                    f"没有新开奖，使用缓存的预测结果")
+    return predictions
+
+
+def store_predictions(lottery_type: str, latest: Optional[Dict], predictions: List[Dict]):
+    """缓存数据库最新一期的预测结果"""
+    run_state = get_run_state()
+    if run_state is not None and latest:
+        run_state.save_predictions(lottery_type, latest['lottery_no'], predictions)
+
+
+def predict_from_history(lottery_type: str, history_data: List[Dict]) -> List[Dict]:
+    """根据历史数据生成预测（模块级函数，可在进程池中执行）"""
+    # 动态导入预测器
+    PredictorClass = import_class(get_lottery_modules(lottery_type)['predictor_class'])
+    
+    # 获取预测配置
+    from core.config import (
+        DEFAULT_STRATEGIES, DEFAULT_PREDICTION_COUNT, PREDICTION_OVERSAMPLE, DIVERSITY_METRIC
+    )
+    
+    # 创建预测器并预测
+    predictor = PredictorClass(history_data, strategies=DEFAULT_STRATEGIES)
+    predictions = predictor.predict(
+        count=DEFAULT_PREDICTION_COUNT,
+        oversample=PREDICTION_OVERSAMPLE,
+        metric=DIVERSITY_METRIC
+    )
+    
+    logger.info(f"预测结果（共 {len(predictions)} 组）")
+    return predictions
@@ -0,0 +1,105 @@
+"""
+旋转矩阵命令
+用策略选出号码池，按覆盖率挑选指定注数（双色球、大乐透、七乐彩）
+"""
+
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+from core.config import LOG_DIR, LOTTERY_NAMES
+from core.utils import load_db_config
+from core.draw_history import get_layout
+from cli.smart_fetch import get_lottery_modules, import_class
+from cli.generate import TicketWriter, _resolve_format
+
+logger = logging.getLogger(__name__)
+
+# 支持旋转矩阵的彩票类型（七星彩按位置开奖，不适用）
+WHEEL_LOTTERIES = ['ssq', 'dlt', 'qlc']
+
+
+def setup_logging(lottery_type: str):
+    """设置日志"""
+    log_dir = LOG_DIR / lottery_type
+    log_dir.mkdir(exist_ok=True)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_dir / 'wheel.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+
+def wheel(lottery_type: str, budget: int, pool_size: int = None, cover: int = 3,
+          strategies: List[str] = None, out: str = None, fmt: str = None,
+          seed: int = None) -> Optional[List[dict]]:
+    """旋转矩阵命令入口
+
+    Args:
+        lottery_type: 彩票类型 ('ssq', 'dlt', 'qlc')
+        budget: 注数
+        pool_size: 号码池大小（默认使用预测器的默认值）
+        cover: 覆盖目标（2=二码、3=三码、4=四码）
+        strategies: 用于选号码池的策略列表
+        out: 输出文件路径（可选）
+        fmt: 输出格式 ('csv' 或 'ndjson')
+        seed: 随机种子
+
+    Returns:
+        预测结果列表
+    """
+    if lottery_type not in WHEEL_LOTTERIES:
+        raise ValueError(f"旋转矩阵不支持的彩票类型: {lottery_type}。支持的类型: {WHEEL_LOTTERIES}")
+
+    setup_logging(lottery_type)
+
+    logger.info("=" * 60)
+    logger.info(f"{LOTTERY_NAMES.get(lottery_type, lottery_type)}旋转矩阵")
+    logger.info("=" * 60)
+
+    modules = get_lottery_modules(lottery_type)
+    DatabaseClass = import_class(modules['database_class'])
+    PredictorClass = import_class(modules['predictor_class'])
+    db = DatabaseClass(load_db_config())
+
+    try:
+        db.connect()
+        lottery_data = db.get_all_lottery_data()
+
+        if not lottery_data:
+            logger.error("数据库中没有历史数据，请先运行爬取命令")
+            return None
+
+        strategy_names = [s.strip() for s in strategies if s.strip()] if strategies else None
+        predictor = PredictorClass(lottery_data, strategies=strategy_names)
+
+        options = {'budget': budget, 'cover': cover, 'strategies': strategy_names, 'seed': seed}
+        if pool_size:
+            options['pool_size'] = pool_size
+        predictions = predictor.predict_wheel(**options)
+
+        layout = get_layout(lottery_type)
+        for i, pred in enumerate(predictions, 1):
+            logger.info(f"第 {i} 注: {pred[layout['main_key']]} + {pred[layout['extra_key']]}")
+
+        if out:
+            path = Path(out)
+            with TicketWriter(path, _resolve_format(path, fmt), [layout['main_key'], layout['extra_key']]) as writer:
+                for i, pred in enumerate(predictions, 1):
+                    writer.write(i, pred)
+            logger.info(f"已写入: {path}")
+
+        return predictions
+
+    except ValueError as e:
+        logger.error(f"旋转矩阵生成失败: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"旋转矩阵生成失败: {e}", exc_info=True)
+        return None
+    finally:
+        db.close()
@@ -0,0 +1,247 @@
+"""
+任务队列 worker
+`python lottery.py worker` 循环领取任务队列（core/job_queue.py）中的任务并执行，可以在多台机器、多个进程上同时运行：
+
+- fetch：增量（或全量）爬取入库，可同时预测
+- predict：预测最新一期的下一期（没有新开奖时使用缓存的预测结果）
+- backtest：回测一个分片（cli/backtest.py）
+- generate：批量生成号码到 worker 本机的文件
+- export：导出数据
+
+执行期间每隔租约时长的 1/3 续租一次；任务失败时由队列延迟重试。
+`--kinds fetch,predict` 只领取指定类型的任务，开奖当晚的爬取不会被耗时的回测、批量生成占满。
+"""
+
+import logging
+import signal
+import threading
+import time
+from typing import Dict, List, Optional
+
+from core.config import LOG_DIR, LOTTERY_NAMES, QUEUE_CONFIG, SUPPORTED_LOTTERIES
+from core.job_queue import JobQueue, default_worker_id, get_job_queue
+
+logger = logging.getLogger(__name__)
+
+
+def _lottery_type(payload: Dict) -> str:
+    lottery_type = payload.get('lottery_type')
+    if lottery_type not in SUPPORTED_LOTTERIES:
+        raise ValueError(f"不支持的彩票类型: {lottery_type}。支持的类型: {SUPPORTED_LOTTERIES}")
+    return lottery_type
+
+
+def _run_fetch(payload: Dict) -> Dict:
+    from cli.smart_fetch import smart_fetch
+
+    result = smart_fetch(
+        _lottery_type(payload),
+        mode=payload.get('mode', 'incremental'),
+        force=payload.get('force', False),
+        with_predict=payload.get('with_predict', False)
+    )
+    if not result.get('success'):
+        raise RuntimeError(result.get('error', '爬取失败'))
+    return result
+
+
+def _run_predict(payload: Dict) -> Dict:
+    from cli.parallel_job import _load_history
+    from cli.smart_fetch import load_cached_predictions, predict_from_history, store_predictions
+
+    lottery_type = _lottery_type(payload)
+    history = _load_history(lottery_type)
+    if not history:
+        raise ValueError(f"{LOTTERY_NAMES[lottery_type]} 数据库中没有历史数据，请先运行爬取命令")
+    latest = history[0]
+    predictions = load_cached_predictions(lottery_type, latest)
+    cached = predictions is not None
+    if not cached:
+        predictions = predict_from_history(lottery_type, history)
+        store_predictions(lottery_type, latest, predictions)
+    return {'issue': latest['lottery_no'], 'predictions': predictions, 'cached': cached}
+
+
+def _run_backtest(payload: Dict) -> Dict:
+    from cli.backtest import backtest_shard
+    from cli.parallel_job import _load_history
+
+    lottery_type = _lottery_type(payload)
+    return backtest_shard(lottery_type, _load_history(lottery_type), payload['issues'])
+
+
+def _run_generate(payload: Dict) -> Dict:
+    from cli.generate import generate
+
+    result = generate(
+        _lottery_type(payload),
+        count=payload['count'],
+        out=payload['out'],
+        strategies=payload.get('strategies')
+    )
+    if result is None:
+        raise RuntimeError('批量生成失败，详见日志')
+    return result
+
+
+def _run_export(payload: Dict) -> Dict:
+    from cli.export import export_lottery
+
+    return export_lottery(_lottery_type(payload))
+
+
+# 任务类型 -> 处理函数（接收 payload，返回可 JSON 序列化的结果，失败时抛出异常）
+JOB_HANDLERS = {
+    'fetch': _run_fetch,
+    'predict': _run_predict,
+    'backtest': _run_backtest,
+    'generate': _run_generate,
+    'export': _run_export,
+}
+
+# 各类型任务的默认优先级（开奖后的爬取和预测先执行）
+DEFAULT_PRIORITIES = {
+    'fetch': 10,
+    'predict': 5,
+}
+
+
+def enqueue_job(queue: JobQueue, kind: str, payload: Dict, priority: int = None, delay: float = 0) -> int:
+    """添加任务（检查任务类型和彩票类型）
+
+    Raises:
+        ValueError: 不支持的任务类型或彩票类型
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"不支持的任务类型: {kind}。支持的类型: {list(JOB_HANDLERS)}")
+    _lottery_type(payload)
+    if priority is None:
+        priority = DEFAULT_PRIORITIES.get(kind, 0)
+    job_id = queue.enqueue(kind, payload, priority=priority, delay=delay)
+    logger.info(f"已添加任务 #{job_id}: {kind} {LOTTERY_NAMES[payload['lottery_type']]}")
+    return job_id
+
+
+def enqueue_backtest(queue: JobQueue, lottery_type: str, issues: int, shard_size: int,
+                     priority: int = None) -> List[int]:
+    """回测最近 issues 期，每 shard_size 期一个任务"""
+    from cli.backtest import plan_backtest_shards
+    from cli.parallel_job import _load_history
+
+    shards = plan_backtest_shards(_load_history(lottery_type), issues, shard_size)
+    return [
+        enqueue_job(queue, 'backtest', {'lottery_type': lottery_type, 'issues': shard}, priority=priority)
+        for shard in shards
+    ]
+
+
+class Worker:
+    """领取并执行任务"""
+
+    def __init__(self, queue: JobQueue, kinds: List[str] = None, worker_id: str = None,
+                 poll_interval: float = None):
+        """
+        Args:
+            queue: 任务队列
+            kinds: 只领取这些类型的任务（默认全部）
+            worker_id: worker 标识（默认 主机名:进程号）
+            poll_interval: 队列为空时的等待（秒，默认 QUEUE_CONFIG['poll_interval']）
+
+        Raises:
+            ValueError: 不支持的任务类型
+        """
+        unknown = [kind for kind in kinds or [] if kind not in JOB_HANDLERS]
+        if unknown:
+            raise ValueError(f"不支持的任务类型: {unknown}。支持的类型: {list(JOB_HANDLERS)}")
+        self.queue = queue
+        self.kinds = kinds or list(JOB_HANDLERS)
+        self.worker_id = worker_id or default_worker_id()
+        self.poll_interval = poll_interval or QUEUE_CONFIG['poll_interval']
+        self.stop_event = threading.Event()
+
+    def _keep_alive(self, job: Dict, done: threading.Event):
+        """续租线程（租约被其他 worker 接管时停止续租，结果不会记录）"""
+        interval = self.queue.visibility_timeout / 3
+        while not done.wait(interval):
+            try:
+                if not self.queue.heartbeat(job):
+                    logger.warning(f"⚠️ 任务 #{job['id']} 的租约已被其他 worker 接管")
+                    return
+            except Exception as e:
+                logger.warning(f"任务 #{job['id']} 续租失败: {e}")
+
+    def run_job(self, job: Dict) -> str:
+        """执行一个已领取的任务，返回最终状态（done / pending / failed / lost）"""
+        logger.info(f"▶️ 任务 #{job['id']} {job['kind']}（第 {job['attempts']}/{job['max_attempts']} 次）: {job['payload']}")
+        done = threading.Event()
+        keep_alive = threading.Thread(target=self._keep_alive, args=(job, done), daemon=True,
+                                      name=f"job-{job['id']}-lease")
+        keep_alive.start()
+        start = time.perf_counter()
+        try:
+            result = JOB_HANDLERS[job['kind']](job['payload'])
+        except Exception as e:
+            done.set()
+            keep_alive.join()
+            logger.error(f"❌ 任务 #{job['id']} 失败: {e}", exc_info=True)
+            status = self.queue.fail(job, f"{type(e).__name__}: {e}")
+            if status == 'pending':
+                logger.info(f"任务 #{job['id']} 稍后重试")
+            return status
+
+        done.set()
+        keep_alive.join()
+        if not self.queue.complete(job, result):
+            logger.warning(f"⚠️ 任务 #{job['id']} 的租约已被其他 worker 接管，结果未记录")
+            return 'lost'
+        logger.info(f"✅ 任务 #{job['id']} 完成（{time.perf_counter() - start:.1f}s）")
+        return 'done'
+
+    def run(self, once: bool = False) -> int:
+        """循环领取并执行任务，直到 stop_event 被设置（once 时队列为空即返回），返回执行的任务数"""
+        processed = 0
+        while not self.stop_event.is_set():
+            job = self.queue.lease(self.worker_id, self.kinds)
+            if job is None:
+                if once:
+                    break
+                self.stop_event.wait(self.poll_interval)
+                continue
+            self.run_job(job)
+            processed += 1
+        return processed
+
+
+def start_worker(kinds: List[str] = None, once: bool = False, backend: str = None) -> Optional[int]:
+    """启动 worker（阻塞直到 Ctrl+C / SIGTERM，当前任务执行完后退出）"""
+    log_dir = LOG_DIR / 'worker'
+    log_dir.mkdir(exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_dir / 'worker.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+    try:
+        worker = Worker(get_job_queue(backend), kinds=kinds)
+    except ValueError as e:
+        logger.error(f"❌ {e}")
+        return None
+
+    def stop(signum, frame):
+        logger.info("收到停止信号，当前任务执行完后退出")
+        worker.stop_event.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    logger.info(f"worker 已启动: {worker.worker_id}，任务类型: {', '.join(worker.kinds)}")
+    try:
+        processed = worker.run(once=once)
+    finally:
+        worker.queue.close()
+    logger.info(f"worker 已停止，共执行 {processed} 个任务")
+    return processed
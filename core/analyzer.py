@@ -0,0 +1,190 @@
+"""
+统一统计分析器
+在号码矩阵上一次性计算所有常用统计指标（频率、连号、奇偶、和值、跨度、AC 值、区间比、尾数），
+替代逐项遍历历史数据的统计方法，适用于全部四种彩票
+"""
+
+import logging
+from collections import Counter
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from core.draw_history import DrawHistory
+
+logger = logging.getLogger(__name__)
+
+# 区间比划分的区间个数
+ZONE_COUNT = 3
+
+
+def _distribution(values: np.ndarray) -> Dict[int, int]:
+    """把整数数组统计为 {值: 次数}（按值排序）"""
+    if values.size == 0:
+        return {}
+    uniques, counts = np.unique(values, return_counts=True)
+    return {int(v): int(c) for v, c in zip(uniques, counts)}
+
+
+def _describe(values: np.ndarray) -> Dict:
+    """数值型指标的概要统计"""
+    if values.size == 0:
+        return {'min': None, 'max': None, 'mean': None}
+    return {
+        'min': int(values.min()),
+        'max': int(values.max()),
+        'mean': round(float(values.mean()), 2),
+    }
+
+
+class HistoryAnalyzer:
+    """历史数据统计分析器
+
+    构造时在号码矩阵上完成所有逐期指标的向量化计算，
+    逐期结果保存在属性中（如 sums、spans、ac_values），summary() 负责汇总。
+    """
+
+    def __init__(self, history: DrawHistory):
+        """
+        Args:
+            history: 号码矩阵
+        """
+        self.history = history
+        self.positional = history.layout['positional']
+        main = history.main.astype(np.int32)
+        n, k = main.shape
+
+        # 主号码区频率（七星彩按位置分别统计）
+        size = history.ball_count
+        offsets = main - history.main_min
+        if self.positional:
+            position_ids = np.broadcast_to(np.arange(k), (n, k))
+            flat = (position_ids * size + offsets).ravel()
+            self.frequency = np.bincount(flat, minlength=k * size).reshape(k, size)
+        else:
+            self.frequency = np.bincount(offsets.ravel(), minlength=size)
+
+        # 附加号码区频率
+        self.extra_frequency = None
+        if history.extra is not None:
+            extra_min, extra_max = history.layout['extra_range']
+            self.extra_frequency = np.bincount(
+                (history.extra.astype(np.int32) - extra_min).ravel(),
+                minlength=extra_max - extra_min + 1
+            )
+
+        # 奇偶、和值、跨度
+        self.odd_counts = (main % 2).sum(axis=1)
+        self.sums = main.sum(axis=1)
+        self.spans = main.max(axis=1) - main.min(axis=1) if n else np.zeros(0, dtype=np.int32)
+
+        # 区间比：把号码范围均分为 ZONE_COUNT 段
+        zone_edges = [chunk[-1] for chunk in np.array_split(np.arange(history.main_min, history.main_max + 1), ZONE_COUNT)]
+        zone_ids = np.searchsorted(np.array(zone_edges), main)
+        self.zone_counts = np.stack([(zone_ids == z).sum(axis=1) for z in range(ZONE_COUNT)], axis=1) \
+            if n else np.zeros((0, ZONE_COUNT), dtype=np.int64)
+
+        # 尾数分布
+        self.tail_frequency = np.bincount((main % 10).ravel(), minlength=10)
+
+        # 连号与 AC 值只对组合型彩票有意义（矩阵行已排序）
+        self.longest_runs = None
+        self.ac_values = None
+        if not self.positional and not n:
+            self.longest_runs = np.zeros(0, dtype=np.int32)
+            self.ac_values = np.zeros(0, dtype=np.int32)
+        elif not self.positional:
+            steps = np.diff(main, axis=1) == 1
+            run = np.zeros(n, dtype=np.int32)
+            best = np.zeros(n, dtype=np.int32)
+            for j in range(steps.shape[1]):
+                run = (run + 1) * steps[:, j]
+                np.maximum(best, run, out=best)
+            # 最长连号的号码个数（无连号为 1）
+            self.longest_runs = best + 1
+
+            # AC 值 = 不同正差值个数 - (号码个数 - 1)
+            i_idx, j_idx = np.triu_indices(k, k=1)
+            diffs = main[:, j_idx] - main[:, i_idx]
+            seen = np.zeros((n, size), dtype=bool)
+            seen[np.repeat(np.arange(n), diffs.shape[1]), diffs.ravel()] = True
+            self.ac_values = seen.sum(axis=1) - (k - 1)
+
+    def _ball_dict(self, counts: np.ndarray, base: int) -> Dict[int, int]:
+        """频率数组转为 {号码: 次数}，只保留出现过的号码"""
+        return {int(i) + base: int(c) for i, c in enumerate(counts) if c > 0}
+
+    def summary(self) -> Dict:
+        """汇总统计结果
+
+        Returns:
+            {
+                'draw_count': 期数,
+                'frequency': 主号码区频率 {号码: 次数}（七星彩为 {'position_1': {...}, ...}）,
+                'extra_frequency': 附加号码区频率（七星彩为 None）,
+                'consecutive': {最长连号个数: 期数}（七星彩为 None）,
+                'odd_even': {'3奇3偶': 期数, ...},
+                'sum': {'min', 'max', 'mean', 'distribution'},
+                'span': {'min', 'max', 'mean', 'distribution'},
+                'ac': {AC值: 期数}（七星彩为 None）,
+                'zone_ratio': {'2:2:2': 期数, ...},
+                'tail': {尾数: 出现次数},
+            }
+        """
+        history = self.history
+        k = history.main.shape[1]
+
+        if self.positional:
+            frequency = {
+                f'position_{pos + 1}': self._ball_dict(self.frequency[pos], history.main_min)
+                for pos in range(k)
+            }
+        else:
+            frequency = self._ball_dict(self.frequency, history.main_min)
+
+        extra_frequency = None
+        if self.extra_frequency is not None:
+            extra_frequency = self._ball_dict(self.extra_frequency, history.layout['extra_range'][0])
+
+        odd_even = {
+            f"{odd}奇{k - odd}偶": count
+            for odd, count in sorted(_distribution(self.odd_counts).items(), reverse=True)
+        }
+
+        # 区间比编码为 (k+1) 进制整数后统计，避免逐期拼接字符串
+        radix = k + 1
+        codes = self.zone_counts @ (radix ** np.arange(ZONE_COUNT - 1, -1, -1))
+        zone_ratio = Counter({
+            ':'.join(str(code // radix ** p % radix) for p in range(ZONE_COUNT - 1, -1, -1)): count
+            for code, count in _distribution(codes).items()
+        })
+
+        return {
+            'draw_count': len(history),
+            'frequency': frequency,
+            'extra_frequency': extra_frequency,
+            'consecutive': _distribution(self.longest_runs) if self.longest_runs is not None else None,
+            'odd_even': odd_even,
+            'sum': {**_describe(self.sums), 'distribution': _distribution(self.sums)},
+            'span': {**_describe(self.spans), 'distribution': _distribution(self.spans)},
+            'ac': _distribution(self.ac_values) if self.ac_values is not None else None,
+            'zone_ratio': dict(zone_ratio.most_common()),
+            'tail': {tail: int(c) for tail, c in enumerate(self.tail_frequency)},
+        }
+
+
+def analyze_history(lottery_type: str, lottery_data: List[Dict],
+                    history: Optional[DrawHistory] = None) -> Dict:
+    """一次遍历历史数据，返回全部统计指标
+
+    Args:
+        lottery_type: 彩票类型 ('ssq', 'dlt', 'qxc', 'qlc')
+        lottery_data: 历史中奖数据列表
+        history: 已构建好的号码矩阵（可选，避免重复转换）
+
+    Returns:
+        统计结果字典（见 HistoryAnalyzer.summary）
+    """
+    if history is None:
+        history = DrawHistory(lottery_type, lottery_data)
+    return HistoryAnalyzer(history).summary()
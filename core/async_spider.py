@@ -0,0 +1,264 @@
+"""
+异步爬虫引擎
+在一个事件循环中同时获取多种彩票的开奖数据，按域名限制并发请求数。
+开奖当晚从"开奖结果发布"到"开始预测"的等待只取决于最慢的一次请求，而不是四次请求之和
+
+- 已安装 aiohttp：所有请求共用一个 aiohttp 连接池（未安装或处于录制/回放模式时回退为在线程中调用同步爬虫，同样并发执行）
+- 请求地址、请求头、重试策略、响应缓存和解析规则都沿用各彩票的同步爬虫（BaseSpider），
+  fetch() 的参数和返回值与 BaseSpider.fetch() 一致
+- start() 后在后台线程中运行事件循环，smart_fetch(engine=...) 在各自的线程中持有爬取锁，
+  通过 fetch_sync() 把请求交给同一个事件循环，共用连接池和域名并发限制
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import CancelledError
+from typing import Dict, List, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+
+from core.error_handler import handle_network_error, handle_parse_error
+from core.html_parser import decode_chunks
+from core.response_cache import get_response_cache, discard_cached, is_closed_range
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+if AIOHTTP_AVAILABLE:
+    _NETWORK_ERRORS = (requests.RequestException, aiohttp.ClientError, asyncio.TimeoutError)
+else:
+    _NETWORK_ERRORS = (requests.RequestException,)
+
+
+def _describe(error: Exception) -> str:
+    """错误描述（超时等异常的 str() 为空时使用类名）"""
+    return str(error) or error.__class__.__name__
+
+
+def _error_code(error: Exception) -> str:
+    """网络错误对应的状态码（用于错误通知）"""
+    status = getattr(error, 'status', None)  # aiohttp.ClientResponseError
+    response = getattr(error, 'response', None)  # requests.HTTPError
+    if status is None and response is not None:
+        status = response.status_code
+    return str(status) if status else 'NETWORK'
+
+
+class AsyncSpiderEngine:
+    """异步爬虫引擎"""
+
+    def __init__(self, limit_per_host: int = None, use_aiohttp: bool = None):
+        """
+        Args:
+            limit_per_host: 每个域名同时进行的最大请求数（默认 SPIDER_CONFIG['async_limit_per_host']）
+            use_aiohttp: 是否使用 aiohttp（默认已安装时使用）
+        """
+        from core.config import SPIDER_CONFIG
+        if limit_per_host is None:
+            limit_per_host = SPIDER_CONFIG['async_limit_per_host']
+
+        self.limit_per_host = max(1, limit_per_host)
+        self.use_aiohttp = AIOHTTP_AVAILABLE if use_aiohttp is None else (use_aiohttp and AIOHTTP_AVAILABLE)
+        if SPIDER_CONFIG['fixtures']:
+            # 录制/回放传输层挂载在 requests Session 上，不使用 aiohttp
+            self.use_aiohttp = False
+        self._session = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._loop = None
+        self._thread = None
+
+    def _semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.limit_per_host)
+        return self._semaphores[host]
+
+    async def _request(self, spider, url: str, permanent: bool) -> str:
+        """aiohttp 请求（沿用爬虫的重试策略和响应缓存）"""
+        cache = get_response_cache()
+        meta = cache.load(url) if cache is not None else None
+        if meta and cache.is_fresh(meta, permanent):
+            cache._count('hit')
+            logger.info(f"使用响应缓存: {url}")
+            return cache.read_text(url, meta)
+
+        headers = spider._get_headers()
+        if cache is not None:
+            headers.update(cache.validators(meta))
+        timeout = aiohttp.ClientTimeout(total=spider.timeout)
+        policy = spider.retry_policy
+
+        for attempt in range(policy.retry_times):
+            if spider.limiter is not None:
+                # 与同步请求一样，每次发出请求前从域名限流器取一个令牌（在线程中等待，不阻塞事件循环）
+                await asyncio.to_thread(spider.limiter.acquire)
+            try:
+                async with self._session.get(url, headers=headers, timeout=timeout) as response:
+                    if meta and response.status == 304:
+                        cache.touch(url, meta, permanent)
+                        return cache.read_text(url, meta)
+                    response.raise_for_status()
+                    body = await response.read()
+                    content_type = response.headers.get('Content-Type', '')
+                    if cache is not None:
+                        cache.store(url, body, response.headers, permanent)
+                    return ''.join(decode_chunks([body], content_type))
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status = getattr(e, 'status', None)
+                retryable = status in policy.RETRY_STATUS if isinstance(e, aiohttp.ClientResponseError) else True
+                if attempt + 1 >= policy.retry_times or not retryable:
+                    if attempt > 0:
+                        logger.error(f"请求失败，已尝试 {attempt + 1} 次: {_describe(e)}")
+                    raise
+                retry_after = e.headers.get('Retry-After') if status == 429 and e.headers else None
+                wait_time = policy.backoff_time(attempt, retry_after)
+                logger.warning(f"第 {attempt + 1} 次请求失败，{wait_time:.1f} 秒后重试: {_describe(e)}")
+                await asyncio.sleep(wait_time)
+
+    async def _get_text(self, spider, url: str, permanent: bool) -> str:
+        async with self._semaphore(url):
+            if self.use_aiohttp:
+                return await self._request(spider, url, permanent)
+            # 未安装 aiohttp：在线程中执行同步请求（每个线程使用各自的共享 Session）
+            return await asyncio.to_thread(spider.get_text, url, permanent)
+
+    async def fetch(self, spider, start_issue: str = None, end_issue: str = None, count: int = None) -> List[Dict]:
+        """异步获取开奖数据（参数和返回值同 BaseSpider.fetch()）
+
+        Args:
+            spider: 彩票爬虫实例（提供地址、请求头、重试策略和解析规则）
+            start_issue: 起始期号（5位格式），可选
+            end_issue: 结束期号（5位格式），可选
+            count: 获取最新 N 条（仅当 start/end 都为 None 时使用），可选
+        """
+        latest = start_issue is None and end_issue is None
+        if latest:
+            url, permanent = spider.BASE_URL, False
+            logger.info(f"从 500.com 获取{spider.lottery_name}最新数据...")
+        else:
+            url, permanent = spider._range_url(start_issue, end_issue), is_closed_range(end_issue)
+            logger.info(f"从 500.com 获取{spider.lottery_name}期号范围数据: {start_issue} - {end_issue or '最新'}")
+
+        try:
+            html = await self._get_text(spider, url, permanent)
+            data = spider._parse_html(html)
+            if not data:
+                discard_cached(url)
+
+        except _NETWORK_ERRORS as e:
+            # 网络错误（重试用尽），发送通知
+            handle_network_error(_error_code(e), url, spider.LOTTERY_TYPE)
+            logger.error(f"网络请求失败: {_describe(e)}")
+            data = []
+        except Exception as e:
+            handle_parse_error(f"数据获取失败: {str(e)}", spider.LOTTERY_TYPE, '500.com')
+            logger.error(f"获取数据失败: {e}")
+            data = []
+
+        if latest:
+            if not data:
+                raise Exception("未获取到数据")
+            return data[:count] if count else data
+
+        logger.info(f"{spider.lottery_name}成功获取 {len(data)} 条数据")
+        return data
+
+    async def fetch_many(self, jobs: Dict[str, Tuple]) -> Dict[str, Union[List[Dict], Exception]]:
+        """并发执行多个获取任务
+
+        Args:
+            jobs: {名称: (爬虫实例, fetch() 的关键字参数)}，如
+                  {'ssq': (SSQSpider(), {'start_issue': '25120', 'end_issue': '25200'})}
+
+        Returns:
+            {名称: 数据列表}；获取最新数据失败时值为对应的异常
+        """
+        names = list(jobs)
+        self._semaphores = {}
+
+        async def run_all():
+            tasks = [self.fetch(spider, **kwargs) for spider, kwargs in (jobs[name] for name in names)]
+            return await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self.use_aiohttp:
+            connector = aiohttp.TCPConnector(limit_per_host=self.limit_per_host)
+            async with aiohttp.ClientSession(connector=connector) as session:
+                self._session = session
+                try:
+                    results = await run_all()
+                finally:
+                    self._session = None
+        else:
+            results = await run_all()
+
+        return dict(zip(names, results))
+
+    def start(self) -> 'AsyncSpiderEngine':
+        """在后台线程中启动事件循环（之后可在任意线程中调用 fetch_sync()）"""
+        if self._loop is not None:
+            return self
+        self._semaphores = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='async-spider', daemon=True)
+        self._thread.start()
+        if self.use_aiohttp:
+            asyncio.run_coroutine_threadsafe(self._open_session(), self._loop).result()
+        return self
+
+    async def _open_session(self):
+        connector = aiohttp.TCPConnector(limit_per_host=self.limit_per_host)
+        self._session = aiohttp.ClientSession(connector=connector)
+
+    async def _shutdown(self):
+        """取消未完成的请求（调用方的 fetch_sync() 抛出 CancelledError）并关闭连接池"""
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def fetch_sync(self, spider, start_issue: str = None, end_issue: str = None, count: int = None) -> List[Dict]:
+        """在调用方线程中同步执行 fetch()（请求在后台事件循环中进行，参数和返回值同 BaseSpider.fetch()）
+
+        Raises:
+            RuntimeError: 尚未 start()，或请求未完成时引擎已关闭
+        """
+        if self._loop is None:
+            raise RuntimeError("异步爬虫引擎尚未启动")
+        future = asyncio.run_coroutine_threadsafe(
+            self.fetch(spider, start_issue=start_issue, end_issue=end_issue, count=count), self._loop)
+        try:
+            return future.result()
+        except CancelledError:
+            raise RuntimeError("异步爬虫引擎已关闭，请求已取消") from None
+
+    def close(self):
+        """停止后台事件循环（未完成的请求被取消）"""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def run(self, jobs: Dict[str, Tuple]) -> Dict[str, Union[List[Dict], Exception]]:
+        """在新的事件循环中执行 fetch_many()（供同步代码调用）"""
+        return asyncio.run(self.fetch_many(jobs))
@@ -10,7 +10,7 @@ except ImportError as e:
 
 import logging
 import os
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +30,8 @@ class BaseDatabase:
                 'password': 'password',
                 'database': 'lottery_db',
                 'use_ssl': False,  # 可选
-                'ssl_ca': '/path/to/ca.pem'  # 可选
+                'ssl_ca': '/path/to/ca.pem',  # 可选
+                'engine': 'mysql'  # 可选，'sqlite' 时使用 SQLite 替身（database 为数据库文件路径）
             }
         """
         self.db_config = db_config
@@ -38,6 +39,12 @@ class BaseDatabase:
 
     def connect(self):
         """连接到数据库，使用连接池和安全配置"""
+        if self.db_config.get('engine') == 'sqlite':
+            # SQLite 替身（DB_ENGINE=sqlite），用于本地调试、基准测试和 CI
+            from core.sqlite_compat import connect_sqlite
+            self.connection = connect_sqlite(self.db_config.get('database'))
+            return
+
         try:
             params = {
                 'host': self.db_config['host'],
@@ -110,6 +117,48 @@ class BaseDatabase:
             logger.error(f"执行查询失败: {e}")
             raise
 
+    def get_all_lottery_nos(self) -> List[str]:
+        """获取表中全部期号（用于计算缺失期号，只查询期号列）"""
+        if not self.connection:
+            self.connect()
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(f"SELECT lottery_no FROM {self.table_name}")
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    def get_recent_draws(self, limit: int = 30) -> List[Tuple[str, str]]:
+        """获取最近若干期的期号和开奖日期（按开奖日期倒序，用于推算开奖日历）"""
+        if not self.connection:
+            self.connect()
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(
+                f"SELECT lottery_no, draw_date FROM {self.table_name} ORDER BY draw_date DESC LIMIT %s",
+                (limit,)
+            )
+            return [(row[0], str(row[1])) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    def get_year_last_draws(self) -> List[Tuple[str, str]]:
+        """获取每年最大期号的期号和开奖日期（用于判断往年数据是否已到年末）"""
+        if not self.connection:
+            self.connect()
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(
+                f"SELECT lottery_no, draw_date FROM {self.table_name} WHERE lottery_no IN "
+                f"(SELECT MAX(lottery_no) FROM {self.table_name} GROUP BY SUBSTR(lottery_no, 1, 4))"
+            )
+            return [(row[0], str(row[1])) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
     def get_total_count(self, table_name: str) -> int:
         """获取表中总记录数"""
         if not self.connection:
@@ -7,6 +7,7 @@ import logging
 from typing import List, Dict, Set
 from collections import Counter
 from abc import ABC, abstractmethod
+from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +15,8 @@ logger = logging.getLogger(__name__)
 class BasePredictor(ABC):
     """预测器基类"""
 
+    LOTTERY_TYPE = None  # 彩票类型（子类设置）
+
     def __init__(self, lottery_data: List[Dict]):
         """
         初始化预测器
@@ -52,10 +55,42 @@ class BasePredictor(ABC):
         """
         pass
 
+    def _predict_diverse(self, strategy_names: List[str], count: int,
+                         oversample: int, metric: str = 'hamming') -> List[Dict]:
+        """过采样后按多样性挑选预测结果
+
+        先用 iter_predictions 收集 count * oversample 个不重复候选（各策略轮流生成），
+        再按最大化最小距离挑选 count 注，避免多注号码高度重合。
+
+        Args:
+            strategy_names: 策略列表
+            count: 预测组合数
+            oversample: 过采样倍数
+            metric: 距离度量 ('hamming' 或 'jaccard')
+
+        Returns:
+            预测结果列表（已带 prediction_time，不含 rank）
+        """
+        from core.selection import collect_candidates, select_diverse
+
+        candidates = collect_candidates(
+            self.LOTTERY_TYPE,
+            self.iter_predictions(strategy_names, yield_rejected=True),
+            count * oversample
+        )
+        predictions = select_diverse(self.LOTTERY_TYPE, candidates, count, metric=metric)
+
+        prediction_time = datetime.now().isoformat()
+        for pred in predictions:
+            pred['prediction_time'] = prediction_time
+        return predictions
+
 
 class BaseStatistics(ABC):
     """统计分析基类"""
 
+    LOTTERY_TYPE = None  # 彩票类型（子类设置）
+
     def __init__(self, lottery_data: List[Dict]):
         """
         初始化统计器
@@ -64,6 +99,15 @@ class BaseStatistics(ABC):
             lottery_data: 历史中奖数据列表
         """
         self.lottery_data = lottery_data
+        self._summary = None
+
+    @property
+    def summary(self) -> Dict:
+        """全部统计指标（首次访问时在号码矩阵上一次性计算，之后复用）"""
+        if self._summary is None:
+            from core.analyzer import analyze_history
+            self._summary = analyze_history(self.LOTTERY_TYPE, self.lottery_data)
+        return self._summary
 
     @abstractmethod
     def get_frequency(self) -> Dict:
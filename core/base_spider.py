@@ -1,19 +1,173 @@
 """
 公共爬虫基类
-提供通用的HTTP请求、重试机制等功能
+提供通用的HTTP请求、重试机制，以及 500.com 历史数据页面的获取和解析流程，
+四种彩票爬虫只需定义数据地址、数据表格位置和每行的转换规则
+
+- 共享连接池：同一线程内的所有爬虫实例（不论彩票类型）共用一个带连接池的 Session，
+  访问 datachart.500.com 时复用 keep-alive 连接（Session 不是线程安全的，因此按线程共享）
+- 重试策略：连接错误、超时、429 和 5xx 在重试预算内按指数退避 + 随机抖动重试，
+  429 优先按 Retry-After 等待；其他 4xx 不重试。重试用尽后才发送错误通知
+- 请求间隔：延迟策略可替换，默认每次请求间隔 SPIDER_MIN_DELAY-SPIDER_MAX_DELAY 秒，
+  已由域名限流器控制速率的全量爬取使用 NoDelay 关闭
+- 域名限流：传入限流器时每次实际发出请求（含重试）前取一个令牌，命中响应缓存时不取
 """
 
 import requests
 import logging
 import time
 import random
-from typing import Dict
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Iterator, Callable
+from requests.adapters import HTTPAdapter
+
+from core.error_handler import handle_network_error, handle_parse_error
+from core.html_parser import extract_rows, iter_rows
+from core.response_cache import cached_get, cached_stream, discard_cached, is_cached, is_closed_range
 
 logger = logging.getLogger(__name__)
 
 
-class BaseSpider:
-    """爬虫基类，提供通用的请求和重试功能"""
+class NoDelay:
+    """不等待（请求速率已由域名限流器控制时使用）"""
+
+    def wait(self):
+        pass
+
+
+class RandomDelay:
+    """随机请求间隔，模拟人类浏览行为：相邻两次请求间隔 min_delay-max_delay 秒"""
+
+    def __init__(self, min_delay: float = 0.5, max_delay: float = 2.0):
+        """
+        Args:
+            min_delay: 最小请求间隔（秒）
+            max_delay: 最大请求间隔（秒）
+        """
+        self.min_delay = min_delay
+        self.max_delay = max(min_delay, max_delay)
+        self.last_request_time = 0.0
+
+    def wait(self):
+        interval = random.uniform(self.min_delay, self.max_delay)
+        remaining = self.last_request_time + interval - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+        self.last_request_time = time.monotonic()
+
+
+def default_delay():
+    """默认延迟策略（读取 SPIDER_CONFIG 的 min_delay / max_delay，都为 0 时不等待）"""
+    from core.config import SPIDER_CONFIG
+    if SPIDER_CONFIG['max_delay'] <= 0:
+        return NoDelay()
+    return RandomDelay(SPIDER_CONFIG['min_delay'], SPIDER_CONFIG['max_delay'])
+
+
+class RetryPolicy:
+    """重试策略：指数退避 + 随机抖动（第 n 次重试等待 0 ~ min(max_backoff, backoff × 2^n) 秒）"""
+
+    # 可重试的 HTTP 状态码
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(self, retry_times: int = 3, backoff: float = None, max_backoff: float = None,
+                 max_retry_after: float = 60):
+        """
+        Args:
+            retry_times: 最多请求次数（含首次请求）
+            backoff: 退避基数（秒，默认 SPIDER_CONFIG['retry_backoff']）
+            max_backoff: 单次最长等待（秒，默认 SPIDER_CONFIG['retry_max_backoff']）
+            max_retry_after: 429 响应 Retry-After 的最长等待（秒）
+        """
+        if backoff is None or max_backoff is None:
+            from core.config import SPIDER_CONFIG
+            backoff = SPIDER_CONFIG['retry_backoff'] if backoff is None else backoff
+            max_backoff = SPIDER_CONFIG['retry_max_backoff'] if max_backoff is None else max_backoff
+
+        self.retry_times = max(1, retry_times)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+
+    @staticmethod
+    def _status(error: Exception) -> Optional[int]:
+        response = getattr(error, 'response', None)
+        return response.status_code if response is not None else None
+
+    def should_retry(self, error: Exception) -> bool:
+        """错误是否值得重试（网络错误、超时、429、5xx）"""
+        if isinstance(error, requests.HTTPError):
+            return self._status(error) in self.RETRY_STATUS
+        return isinstance(error, (requests.ConnectionError, requests.Timeout,
+                                  requests.exceptions.ChunkedEncodingError))
+
+    def wait_time(self, attempt: int, error: Exception) -> float:
+        """第 attempt 次（从 0 开始）失败后的等待时间"""
+        retry_after = None
+        if self._status(error) == 429:
+            retry_after = error.response.headers.get('Retry-After')
+        return self.backoff_time(attempt, retry_after)
+
+    def backoff_time(self, attempt: int, retry_after: str = None) -> float:
+        """第 attempt 次（从 0 开始）失败后的等待时间
+
+        Args:
+            attempt: 已失败的次数 - 1
+            retry_after: 429 响应的 Retry-After 头（秒数），有则优先使用
+        """
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_retry_after)
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+
+_local = threading.local()
+
+
+def create_session() -> requests.Session:
+    """创建带连接池的 Session（录制/回放模式下挂载对应的传输层）"""
+    from core.config import SPIDER_CONFIG
+    session = requests.Session()
+    pool = {
+        'pool_connections': 4,
+        'pool_maxsize': SPIDER_CONFIG['pool_size'],
+        'max_retries': 0,  # 我们自己处理重试
+    }
+    if SPIDER_CONFIG['fixtures']:
+        # 录制/回放模式（SPIDER_FIXTURES）
+        from core.fixture_store import create_adapter
+        adapter = create_adapter(SPIDER_CONFIG['fixtures'], **pool)
+    else:
+        adapter = HTTPAdapter(**pool)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_shared_session() -> requests.Session:
+    """获取当前线程共享的 Session（带连接池，所有爬虫实例复用 keep-alive 连接）"""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = create_session()
+        _local.session = session
+    return session
+
+
+class BaseSpider(ABC):
+    """爬虫基类，提供通用的请求和重试功能以及 500.com 历史数据的获取流程
+
+    子类需要定义：
+    - BASE_URL: 历史数据地址
+    - LOTTERY_TYPE: 彩票类型（用于日志和错误通知）
+    - TABLE: 数据表格的 (标签名, id)
+    - HEADER_ROWS: 数据表格开头的表头行数
+    - _parse_row(): 把一行单元格文本转换为开奖记录
+    """
+
+    BASE_URL: str = None
+    LOTTERY_TYPE: str = None
+    TABLE = ('tbody', 'tdata')
+    HEADER_ROWS = 0
+    REFERER = 'https://www.500.com/'
 
     # 多个User-Agent轮换，模拟不同浏览器
     USER_AGENTS = [
@@ -24,58 +178,77 @@ class BaseSpider:
         'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
     ]
 
-    def __init__(self, timeout: int = 10, retry_times: int = 3, min_delay: float = 0.5, max_delay: float = 2.0):
+    def __init__(self, timeout: int = 10, retry_times: int = 3, delay=None, retry_policy: RetryPolicy = None,
+                 limiter=None, session: requests.Session = None):
         """
         初始化爬虫
 
         Args:
             timeout: 请求超时时间（秒）
-            retry_times: 失败重试次数
-            min_delay: 最小请求间隔（秒）
-            max_delay: 最大请求间隔（秒）
+            retry_times: 最多请求次数（含首次请求）
+            delay: 请求间隔策略（有 wait() 方法的对象，默认 default_delay()，NoDelay() 关闭）
+            retry_policy: 重试策略（默认按 retry_times 创建）
+            limiter: 域名限流器（TokenBucket，每次发出请求前 acquire()），可选
+            session: 爬虫专用的 Session（调用方保证同一时间只有一个线程使用，如常驻服务），
+                     默认使用当前线程共享的 Session
         """
         self.timeout = timeout
         self.retry_times = retry_times
-        self.min_delay = min_delay
-        self.max_delay = max_delay
-        self.session = requests.Session()
-        self.last_request_time = 0
-        
-        # 设置连接池
-        adapter = requests.adapters.HTTPAdapter(
-            pool_connections=10,
-            pool_maxsize=20,
-            max_retries=0  # 我们自己处理重试
-        )
-        self.session.mount('http://', adapter)
-        self.session.mount('https://', adapter)
+        self.delay = delay if delay is not None else default_delay()
+        self.retry_policy = retry_policy or RetryPolicy(retry_times)
+        self.limiter = limiter
+        self._session = session
+
+    @property
+    def session(self) -> requests.Session:
+        """爬虫专用的 Session，没有时为当前线程共享的 Session"""
+        return self._session or get_shared_session()
+
+    @property
+    def lottery_name(self) -> str:
+        from core.config import LOTTERY_NAMES
+        return LOTTERY_NAMES.get(self.LOTTERY_TYPE, self.LOTTERY_TYPE)
 
     def _get_headers(self) -> Dict:
         """获取随机请求头，模拟真实浏览器"""
         return {
             'User-Agent': random.choice(self.USER_AGENTS),
+            'Referer': self.REFERER,
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
             'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
+            'Accept-Encoding': 'gzip, deflate',
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
-            'Cache-Control': 'max-age=0',
             'DNT': '1',
         }
 
-    def _random_delay(self):
-        """随机延迟，模拟人类浏览行为"""
-        # 确保距离上次请求至少间隔min_delay
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_delay:
-            time.sleep(self.min_delay - elapsed)
-        
-        # 额外随机延迟
-        delay = random.uniform(0, self.max_delay - self.min_delay)
-        if delay > 0:
-            time.sleep(delay)
-        
-        self.last_request_time = time.time()
+    def _with_retry(self, send: Callable):
+        """按重试策略执行请求
+
+        Args:
+            send: 发送请求的函数，失败时抛出 requests.RequestException
+
+        Returns:
+            send() 的返回值
+
+        Raises:
+            requests.RequestException: 不可重试的错误，或重试次数用尽
+        """
+        attempts = self.retry_policy.retry_times
+        for attempt in range(attempts):
+            self.delay.wait()
+            if self.limiter is not None:
+                self.limiter.acquire()
+            try:
+                return send()
+            except requests.RequestException as e:
+                if attempt + 1 >= attempts or not self.retry_policy.should_retry(e):
+                    if attempt > 0:
+                        logger.error(f"请求失败，已尝试 {attempt + 1} 次: {e}")
+                    raise
+                wait_time = self.retry_policy.wait_time(attempt, e)
+                logger.warning(f"第 {attempt + 1} 次请求失败，{wait_time:.1f} 秒后重试: {e}")
+                time.sleep(wait_time)
 
     def fetch_with_retry(self, url: str, params: Dict = None, method: str = 'GET', referer: str = None) -> requests.Response:
         """
@@ -93,63 +266,241 @@ class BaseSpider:
         Raises:
             requests.RequestException: 请求失败
         """
-        for attempt in range(self.retry_times):
+        def send():
+            headers = self._get_headers()
+            if referer:
+                headers['Referer'] = referer
+            if method.upper() == 'GET':
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            else:
+                response = self.session.post(url, data=params, headers=headers, timeout=self.timeout)
+            response.raise_for_status()
+            return response
+
+        return self._with_retry(send)
+
+    def get_text(self, url: str, permanent: bool = False) -> str:
+        """获取页面文本（优先使用响应缓存，缓存命中时不等待、不重试）
+
+        Args:
+            url: 完整请求地址
+            permanent: 是否永久缓存（已结束年份的期号范围）
+        """
+        if is_cached(url, permanent):
+            return cached_get(self.session, url, permanent)
+        return self._with_retry(lambda: cached_get(
+            self.session, url, permanent, headers=self._get_headers(), timeout=self.timeout))
+
+    def iter_text(self, url: str, permanent: bool = False) -> Iterator[str]:
+        """流式获取页面文本块（优先使用响应缓存）
+
+        只有在收到第一块数据之前的失败会重试，之后的失败直接抛出。
+        """
+        if is_cached(url, permanent):
+            yield from cached_stream(self.session, url, permanent)
+            return
+
+        def open_stream():
+            stream = cached_stream(self.session, url, permanent, headers=self._get_headers(), timeout=self.timeout)
             try:
-                # 随机延迟，模拟人类浏览
-                self._random_delay()
-                
-                # 获取随机请求头
-                headers = self._get_headers()
-                if referer:
-                    headers['Referer'] = referer
-                
-                if method.upper() == 'GET':
-                    response = self.session.get(
-                        url,
-                        params=params,
-                        headers=headers,
-                        timeout=self.timeout,
-                        allow_redirects=True
-                    )
-                else:
-                    response = self.session.post(
-                        url,
-                        data=params,
-                        headers=headers,
-                        timeout=self.timeout,
-                        allow_redirects=True
-                    )
-                
-                # 检查响应状态
-                if response.status_code == 429:  # Too Many Requests
-                    wait_time = int(response.headers.get('Retry-After', 60))
-                    logger.warning(f"请求过于频繁，等待 {wait_time} 秒...")
-                    time.sleep(wait_time)
+                return next(stream, None), stream
+            except BaseException:
+                stream.close()
+                raise
+
+        first, stream = self._with_retry(open_stream)
+        try:
+            if first is not None:
+                yield first
+            yield from stream
+        finally:
+            stream.close()
+
+    def _range_url(self, start_issue: str, end_issue: str = None) -> str:
+        if end_issue is None:
+            return f"{self.BASE_URL}?start={start_issue}"
+        return f"{self.BASE_URL}?start={start_issue}&end={end_issue}"
+
+    def fetch(self, start_issue: str = None, end_issue: str = None, count: int = None,
+              raise_errors: bool = False) -> List[Dict]:
+        """
+        统一的爬取接口
+
+        Args:
+            start_issue: 起始期号（5位格式，如 '03001'），可选
+            end_issue: 结束期号（5位格式，如 '25200'），可选；
+                      只传 start_issue 时从该期开始获取全部数据
+            count: 获取最新 N 条（仅当 start/end 都为 None 时使用），可选
+            raise_errors: 按期号范围获取时，网络或解析错误在发送通知后抛出（默认返回空列表），
+                          调用方可据此区分"范围内没有数据"和"获取失败"
+
+        Returns:
+            中奖数据列表
+
+        使用场景：
+            1. 全量爬取: fetch(start_issue="03001", end_issue="25200")
+            2. 增量爬取: fetch(start_issue="25133", end_issue="25200")  # 获取所有新数据
+            3. 获取最新: fetch() 或 fetch(count=1)  # 不带参数返回所有可用数据（约30条）
+        """
+        # 场景1: 获取最新数据（不带参数）
+        if start_issue is None and end_issue is None:
+            logger.info(f"从 500.com 获取{self.lottery_name}最新数据...")
+            data = self._fetch_from_500com()
+            if data and len(data) > 0:
+                # 如果指定了 count，则限制返回数量；否则返回所有数据
+                result = data[:count] if count else data
+                logger.info(f"成功获取 {len(data)} 条数据，返回 {len(result)} 条")
+                return result
+            raise Exception("未获取到数据")
+
+        # 场景2: 按期号范围获取
+        url = self._range_url(start_issue, end_issue)
+        logger.info(f"从 500.com 获取{self.lottery_name}期号范围数据: {start_issue} - {end_issue or '最新'}")
+
+        try:
+            # 已结束年份的范围永久缓存，其余按 TTL 缓存并条件请求
+            html = self.get_text(url, permanent=is_closed_range(end_issue))
+
+            data = self._parse_html(html)
+            if not data:
+                discard_cached(url)
+            logger.info(f"成功获取 {len(data)} 条数据")
+            return data
+
+        except requests.exceptions.RequestException as e:
+            # 网络错误（重试用尽），发送通知
+            error_code = getattr(e.response, 'status_code', 'UNKNOWN') if hasattr(e, 'response') and e.response is not None else 'NETWORK'
+            handle_network_error(str(error_code), url, self.LOTTERY_TYPE)
+            logger.error(f"网络请求失败: {e}")
+            if raise_errors:
+                raise
+            return []
+        except Exception as e:
+            # 其他错误，发送通知
+            handle_parse_error(f"数据获取失败: {str(e)}", self.LOTTERY_TYPE, '500.com')
+            logger.error(f"获取数据失败: {e}")
+            if raise_errors:
+                raise
+            return []
+
+    # 兼容旧接口
+    def fetch_latest(self, count: int = 1) -> List[Dict]:
+        """获取最新数据（兼容旧接口）"""
+        return self.fetch(count=count)
+
+    def fetch_by_range(self, start_issue: str, end_issue: str) -> List[Dict]:
+        """按期号范围获取（兼容旧接口）"""
+        return self.fetch(start_issue=start_issue, end_issue=end_issue)
+
+    def fetch_500com_data(self, start_issue: str, end_issue: str) -> List[Dict]:
+        """按期号范围获取（兼容旧接口）"""
+        return self.fetch(start_issue=start_issue, end_issue=end_issue)
+
+    def iter_fetch(self, start_issue: str, end_issue: str) -> Iterator[Dict]:
+        """流式获取期号范围数据
+
+        以 stream=True 分块读取响应体，边下载边逐行解析，每解析出一期立即产出，
+        不在内存中保留完整页面和结果列表，适合全量爬取等大范围请求。
+        与 fetch() 不同，网络错误在发送通知后会抛出，调用方可据此判断数据是否完整。
+
+        Args:
+            start_issue: 起始期号（5位格式，如 '03001'）
+            end_issue: 结束期号（5位格式，如 '25200'）
+
+        Yields:
+            中奖数据（格式与 fetch() 相同）
+        """
+        url = self._range_url(start_issue, end_issue)
+        logger.info(f"从 500.com 流式获取{self.lottery_name}期号范围数据: {start_issue} - {end_issue}")
+
+        count = 0
+        try:
+            stream = self.iter_text(url, permanent=is_closed_range(end_issue))
+            rows = iter_rows(stream, *self.TABLE)
+            for _ in range(self.HEADER_ROWS):
+                next(rows, None)  # 跳过表头
+            for texts in rows:
+                try:
+                    record = self._parse_row(texts)
+                except Exception as e:
+                    logger.debug(f"解析行数据失败: {e}")
                     continue
-                
-                response.raise_for_status()
-                
-                # 成功后随机短暂延迟，模拟阅读时间
-                time.sleep(random.uniform(0.1, 0.3))
-                
-                return response
-                
-            except requests.Timeout as e:
-                logger.warning(f"第 {attempt + 1} 次请求超时: {e}")
-                if attempt < self.retry_times - 1:
-                    # 指数退避 + 随机抖动
-                    wait_time = (2 ** attempt) + random.uniform(0, 1)
-                    time.sleep(wait_time)
-                else:
-                    logger.error(f"请求超时，已重试 {self.retry_times} 次")
-                    raise
-                    
-            except requests.RequestException as e:
-                logger.warning(f"第 {attempt + 1} 次请求失败: {e}")
-                if attempt < self.retry_times - 1:
-                    # 指数退避 + 随机抖动
-                    wait_time = (2 ** attempt) + random.uniform(0, 1)
-                    time.sleep(wait_time)
-                else:
-                    logger.error(f"请求失败，已重试 {self.retry_times} 次")
-                    raise
+                if record:
+                    count += 1
+                    yield record
+            # 数据表格结束后页尾内容仍需读完写入缓存，在判断是否丢弃缓存之前关闭
+            stream.close()
+
+        except requests.exceptions.RequestException as e:
+            error_code = getattr(e.response, 'status_code', 'UNKNOWN') if hasattr(e, 'response') and e.response is not None else 'NETWORK'
+            handle_network_error(str(error_code), url, self.LOTTERY_TYPE)
+            logger.error(f"网络请求失败（已获取 {count} 条）: {e}")
+            raise
+
+        if not count:
+            discard_cached(url)
+        logger.info(f"成功获取 {count} 条数据")
+
+    def _fetch_from_500com(self) -> List[Dict]:
+        """从 500.com 获取数据（不带参数返回最近30期）"""
+        try:
+            html = self.get_text(self.BASE_URL)
+
+            data = self._parse_html(html)
+            if not data:
+                discard_cached(self.BASE_URL)
+            return data
+
+        except requests.exceptions.RequestException as e:
+            # 网络错误（重试用尽），发送通知
+            error_code = getattr(e.response, 'status_code', 'UNKNOWN') if hasattr(e, 'response') and e.response is not None else 'NETWORK'
+            handle_network_error(str(error_code), self.BASE_URL, self.LOTTERY_TYPE)
+            logger.error(f"从 500.com 网络请求失败: {e}")
+            return []
+        except Exception as e:
+            # 其他错误，发送通知
+            handle_parse_error(f"从 500.com 获取数据失败: {str(e)}", self.LOTTERY_TYPE, '500.com')
+            logger.error(f"从 500.com 获取数据失败: {e}")
+            return []
+
+    def _parse_html(self, html: str) -> List[Dict]:
+        """解析 500.com 的 HTML 数据
+
+        注意：500.com 返回的数据已按期号从新到旧排序
+        """
+        results = []
+        tag, table_id = self.TABLE
+
+        try:
+            rows = extract_rows(html, tag, table_id)
+
+            if rows is None:
+                logger.warning(f"未找到 id='{table_id}' 的数据表格")
+                return results
+            logger.info(f"找到 {len(rows)} 行数据")
+
+            for texts in rows[self.HEADER_ROWS:]:
+                try:
+                    record = self._parse_row(texts)
+                    if record:
+                        results.append(record)
+                except Exception as e:
+                    logger.debug(f"解析行数据失败: {e}")
+                    continue
+
+            logger.info(f"成功解析 {len(results)} 条数据")
+
+        except Exception as e:
+            logger.error(f"解析 HTML 失败: {e}")
+
+        return results
+
+    @abstractmethod
+    def _parse_row(self, texts: List[str]) -> Optional[Dict]:
+        """把一行单元格文本转换为开奖记录，数据不完整时返回 None"""
+        pass
+
+    def close(self):
+        """关闭爬虫（只关闭专用的 Session；线程共享的 Session 由同一线程的所有爬虫共享，不在这里关闭）"""
+        if self._session is not None:
+            self._session.close()
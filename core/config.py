@@ -32,6 +32,10 @@ BACKUP_DIR.mkdir(exist_ok=True)
 EXPORT_DIR = DATA_DIR / 'export'
 EXPORT_DIR.mkdir(exist_ok=True)
 
+# 缓存目录（分析结果等可重建的数据）
+CACHE_DIR = DATA_DIR / 'cache'
+CACHE_DIR.mkdir(exist_ok=True)
+
 # 日志配置
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -57,6 +61,29 @@ SPIDER_CONFIG = {
     'min_delay': float(os.getenv('SPIDER_MIN_DELAY', 0.5)),  # 最小请求间隔（秒）
     'max_delay': float(os.getenv('SPIDER_MAX_DELAY', 2.0)),  # 最大请求间隔（秒）
     'batch_size': int(os.getenv('SPIDER_BATCH_SIZE', 100)),  # 批量处理大小
+    'workers': int(os.getenv('SPIDER_WORKERS', 1)),  # 全量爬取并发数（1 为逐年顺序爬取）
+    'rate_limit': float(os.getenv('SPIDER_RATE_LIMIT', 1.0)),  # 每个域名每秒最多请求数
+    'rate_burst': int(os.getenv('SPIDER_RATE_BURST', 2)),  # 每个域名允许的突发请求数
+    'max_range_rows': int(os.getenv('SPIDER_MAX_RANGE_ROWS', 1000)),  # 单次请求的最大预计行数（超过则拆分）
+    'merge_slack': int(os.getenv('SPIDER_MERGE_SLACK', 30)),  # 两个缺口之间已有期数不超过该值时合并为一次请求
+    'parser': os.getenv('SPIDER_PARSER', 'lxml'),  # HTML 解析后端 (lxml / regex / bs4)
+    'stream': os.getenv('SPIDER_STREAM', 'false').lower() in ['1', 'true', 'yes'],  # 全量/年份爬取时边下载边解析边入库
+    'cache': os.getenv('SPIDER_CACHE', 'true').lower() in ['1', 'true', 'yes'],  # 响应磁盘缓存（data/cache/http）
+    'cache_ttl': float(os.getenv('SPIDER_CACHE_TTL', 60)),  # 当年/最新数据缓存有效期（秒），过期后条件请求
+    'pool_size': int(os.getenv('SPIDER_POOL_SIZE', 10)),  # 共享连接池每个域名保持的连接数
+    'retry_backoff': float(os.getenv('SPIDER_RETRY_BACKOFF', 1.0)),  # 重试退避基数（秒），第 n 次重试最多等待 基数×2^n
+    'retry_max_backoff': float(os.getenv('SPIDER_RETRY_MAX_BACKOFF', 30)),  # 单次重试最长等待（秒）
+    'async_limit_per_host': int(os.getenv('SPIDER_ASYNC_LIMIT_PER_HOST', 4)),  # 并发增量爬取时每个域名的最大并发请求数
+    'fixtures': os.getenv('SPIDER_FIXTURES', ''),  # HTTP 录制/回放模式 (record / replay，留空为正常访问网络)
+    'fixture_dir': Path(os.getenv('SPIDER_FIXTURE_DIR', DATA_DIR / 'fixtures')),  # 录制的响应存放目录
+    'draw_calendar': os.getenv('SPIDER_DRAW_CALENDAR', 'true').lower() in ['1', 'true', 'yes'],  # 增量爬取按开奖日历判断是否请求网络
+    'publish_delay': float(os.getenv('SPIDER_PUBLISH_DELAY', 10)),  # 开奖后多少分钟数据源发布结果
+    'pipeline': os.getenv('SPIDER_PIPELINE', 'false').lower() in ['1', 'true', 'yes'],  # 全量/年份爬取使用 下载->解析->规整->入库 流水线
+    'pipeline_queue_size': int(os.getenv('SPIDER_PIPELINE_QUEUE_SIZE', 4)),  # 流水线各阶段之间队列的容量（背压上限）
+    'journal': os.getenv('SPIDER_JOURNAL', 'true').lower() in ['1', 'true', 'yes'],  # 全量爬取记录爬取日志（data/journal），中断后断点续爬
+    # 同一种彩票同一时间只有一个进程爬取入库（MySQL GET_LOCK，SQLite 替身为 data/locks 文件锁），其他进程等待并使用其结果
+    'lock': os.getenv('SPIDER_LOCK', 'true').lower() in ['1', 'true', 'yes'],
+    'lock_wait': float(os.getenv('SPIDER_LOCK_WAIT', 900)),  # 等待其他进程爬取完成的最长时间（秒）
 }
 
 # 数据库性能配置
@@ -88,6 +115,50 @@ LOTTERY_NAMES = {
 # 预测配置
 DEFAULT_STRATEGIES = os.getenv('DEFAULT_STRATEGIES', 'frequency,balanced,coldHot').split(',')
 DEFAULT_PREDICTION_COUNT = int(os.getenv('DEFAULT_PREDICTION_COUNT', 5))
+# 多样性选号：先生成 预测条数 × 倍数 个候选，再挑选彼此差异最大的组合（1 表示不启用）
+PREDICTION_OVERSAMPLE = int(os.getenv('PREDICTION_OVERSAMPLE', 1))
+DIVERSITY_METRIC = os.getenv('DIVERSITY_METRIC', 'hamming')  # hamming 或 jaccard
+
+# 定时任务配置
+SCHEDULE_CONFIG = {
+    'io_workers': int(os.getenv('SCHEDULE_IO_WORKERS', 4)),  # 同时爬取入库的彩票数（线程）
+    'cpu_workers': int(os.getenv('SCHEDULE_CPU_WORKERS', min(4, os.cpu_count() or 1))),  # 预测进程数（0 为在线程中预测）
+    'deadline': float(os.getenv('SCHEDULE_DEADLINE', 600)),  # 整个任务的截止时间（秒），超时的彩票记为失败
+    # 记录已处理的期号和预测结果（data/state/run_state.json），没有新开奖时不重新预测、不重复通知
+    'run_state': os.getenv('SCHEDULE_RUN_STATE', 'true').lower() in ['true', '1', 'yes'],
+    # 开奖当晚轮询（schedule --mode adaptive）
+    'poll_start': float(os.getenv('SCHEDULE_POLL_START', 5)),  # 开奖后多少分钟开始轮询
+    'poll_initial': float(os.getenv('SCHEDULE_POLL_INITIAL', 60)),  # 第一次重试前的等待（秒）
+    'poll_factor': float(os.getenv('SCHEDULE_POLL_FACTOR', 2)),  # 指数退避的倍数
+    'poll_linear_after': float(os.getenv('SCHEDULE_POLL_LINEAR_AFTER', 480)),  # 等待达到该秒数后改为线性增加
+    'poll_step': float(os.getenv('SCHEDULE_POLL_STEP', 120)),  # 线性阶段每次增加的等待（秒）
+    'poll_max_attempts': int(os.getenv('SCHEDULE_POLL_MAX_ATTEMPTS', 12)),  # 每期最多请求次数
+}
+
+# 常驻服务配置（python lottery.py serve）
+SERVE_CONFIG = {
+    # 本地套接字：Unix 套接字文件路径，或 host:port（不支持 Unix 套接字的系统使用 127.0.0.1:端口）
+    'address': os.getenv('SERVE_ADDRESS', str(DATA_DIR / 'lottery.sock')),
+    'timeout': float(os.getenv('SERVE_TIMEOUT', 300)),  # 客户端等待响应的最长时间（秒），爬取请求可能较慢
+}
+
+# 本地 HTTP 接口配置（python lottery.py api）
+API_CONFIG = {
+    'host': os.getenv('API_HOST', '127.0.0.1'),  # 只供内部看板访问，默认只监听本机
+    'port': int(os.getenv('API_PORT', 8000)),
+    'refresh_interval': float(os.getenv('API_REFRESH_INTERVAL', 60)),  # 多少秒检查一次数据库最新期号（请求不访问数据库）
+    'max_tickets': int(os.getenv('API_MAX_TICKETS', 1000000)),  # 单次核对的最大注数
+}
+
+# 任务队列配置（python lottery.py queue / worker）
+QUEUE_CONFIG = {
+    'backend': os.getenv('QUEUE_BACKEND', 'sqlite'),  # sqlite: 本机多个 worker 进程；mysql: 多台机器共用 .env 中的数据库
+    'path': os.getenv('QUEUE_PATH', str(DATA_DIR / 'queue' / 'jobs.db')),  # sqlite 后端的数据库文件
+    'visibility_timeout': float(os.getenv('QUEUE_VISIBILITY_TIMEOUT', 300)),  # 租约时长（秒），worker 执行期间定时续租
+    'max_attempts': int(os.getenv('QUEUE_MAX_ATTEMPTS', 3)),  # 最大尝试次数
+    'retry_delay': float(os.getenv('QUEUE_RETRY_DELAY', 30)),  # 第一次重试前的等待（秒），之后每次加倍
+    'poll_interval': float(os.getenv('QUEUE_POLL_INTERVAL', 5)),  # 队列为空时 worker 的等待（秒）
+}
 
 # Telegram 配置
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
@@ -97,3 +168,13 @@ TELEGRAM_SEND_TO_BOT = os.getenv('TELEGRAM_SEND_TO_BOT', 'true').lower() in ['tr
 TELEGRAM_SEND_TO_CHANNEL = os.getenv('TELEGRAM_SEND_TO_CHANNEL', 'false').lower() in ['true', '1', 'yes']
 TELEGRAM_PROXY_HOST = os.getenv('TELEGRAM_PROXY_HOST')
 TELEGRAM_PROXY_PORT = int(os.getenv('TELEGRAM_PROXY_PORT', 0)) if os.getenv('TELEGRAM_PROXY_PORT') else None
+
+# Telegram 批量发送配置（core/telegram_delivery.py）
+TELEGRAM_DELIVERY_CONFIG = {
+    'global_rate': int(os.getenv('TELEGRAM_GLOBAL_RATE', 30)),  # 每个机器人每秒最多发送条数
+    'chat_rate': int(os.getenv('TELEGRAM_CHAT_RATE', 1)),  # 每个私聊每秒最多发送条数
+    'group_rate': int(os.getenv('TELEGRAM_GROUP_RATE', 20)),  # 每个群组/频道每分钟最多发送条数
+    'retries': int(os.getenv('TELEGRAM_RETRIES', 3)),  # 每条消息的最大尝试次数（限流、网络错误、5xx）
+    'timeout': float(os.getenv('TELEGRAM_TIMEOUT', 10)),  # 单次请求超时（秒）
+    'pool_size': int(os.getenv('TELEGRAM_POOL_SIZE', 8)),  # 连接池大小
+}
@@ -0,0 +1,313 @@
+"""
+号码关联（共现）分析
+基于历史出现矩阵的矩阵乘法构建号码对共现矩阵和稀疏三元组共现表，
+结果按最新期号缓存到磁盘，同一期数据只计算一次
+
+- 双色球红球 / 大乐透前区 / 七乐彩基本号：号码对矩阵 (N, N)，对角线为单号频次
+- 七星彩：相邻位置的数字对矩阵 (6, 10, 10) 和相邻三位的数字三元组
+"""
+
+import logging
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from core.draw_history import DrawHistory
+
+logger = logging.getLogger(__name__)
+
+# 进程内缓存：(彩票类型, 最新期号, 期数) -> CooccurrenceMatrix
+_memory_cache: Dict[Tuple[str, str, int], 'CooccurrenceMatrix'] = {}
+
+
+class CooccurrenceMatrix:
+    """号码共现统计结果"""
+
+    def __init__(self, lottery_type: str, latest_issue: str, draw_count: int, base: int,
+                 positional: bool, pairs: np.ndarray, triple_index: np.ndarray,
+                 triple_counts: np.ndarray):
+        """
+        Args:
+            lottery_type: 彩票类型
+            latest_issue: 统计数据的最新期号
+            draw_count: 统计的期数
+            base: 号码偏移（矩阵下标 0 对应的号码）
+            positional: 是否为位置型彩票（七星彩）
+            pairs: 号码对共现矩阵
+            triple_index: 三元组下标，组合型为 (m, 3)，位置型为 (m, 4) [起始位置, a, b, c]
+            triple_counts: 三元组共现次数 (m,)
+        """
+        self.lottery_type = lottery_type
+        self.latest_issue = latest_issue
+        self.draw_count = draw_count
+        self.base = base
+        self.positional = positional
+        self.pairs = pairs
+        self.triple_index = triple_index
+        self.triple_counts = triple_counts
+
+    @property
+    def frequency(self) -> np.ndarray:
+        """单号频次（仅组合型彩票，即号码对矩阵的对角线）"""
+        return np.diag(self.pairs)
+
+    def top_pairs(self, n: int = 10) -> List[Tuple]:
+        """共现次数最多的号码对
+
+        Returns:
+            组合型: [(号码a, 号码b, 次数), ...]
+            七星彩: [(第几位, 该位数字, 下一位数字, 次数), ...]
+        """
+        if self.positional:
+            flat = self.pairs.ravel()
+            order = np.argsort(flat, kind='stable')[::-1][:n]
+            result = []
+            for idx in order:
+                pos, a, b = np.unravel_index(idx, self.pairs.shape)
+                result.append((int(pos) + 1, int(a) + self.base, int(b) + self.base, int(flat[idx])))
+            return result
+
+        rows, cols = np.triu_indices(self.pairs.shape[0], k=1)
+        counts = self.pairs[rows, cols]
+        order = np.argsort(counts, kind='stable')[::-1][:n]
+        return [
+            (int(rows[i]) + self.base, int(cols[i]) + self.base, int(counts[i]))
+            for i in order
+        ]
+
+    def top_triples(self, n: int = 10) -> List[Tuple]:
+        """共现次数最多的三元组
+
+        Returns:
+            组合型: [(号码a, 号码b, 号码c, 次数), ...]
+            七星彩: [(起始位置, 数字a, 数字b, 数字c, 次数), ...]
+        """
+        order = np.argsort(self.triple_counts, kind='stable')[::-1][:n]
+        result = []
+        for i in order:
+            index = [int(v) for v in self.triple_index[i]]
+            if self.positional:
+                pos, balls = index[0] + 1, [v + self.base for v in index[1:]]
+                result.append((pos, *balls, int(self.triple_counts[i])))
+            else:
+                result.append((*[v + self.base for v in index], int(self.triple_counts[i])))
+        return result
+
+    def association_scores(self, selected: List[int]) -> Dict[int, float]:
+        """计算候选号码与已选号码的关联强度（组合型彩票）
+
+        关联强度为候选号码与每个已选号码共现次数相对独立期望值的提升度（lift）均值，
+        大于 1 表示比随机更常一起出现。策略可以用它对候选号码加权。
+
+        Args:
+            selected: 已选号码列表
+
+        Returns:
+            {候选号码: 关联强度}，不包含已选号码
+        """
+        if self.positional:
+            raise ValueError("七星彩请使用 adjacent_scores 计算相邻位置关联")
+
+        freq = self.frequency.astype(np.float64)
+        size = self.pairs.shape[0]
+        if not selected or self.draw_count == 0:
+            return {ball + self.base: 1.0 for ball in range(size)}
+
+        idx = np.array([int(b) - self.base for b in selected])
+        expected = np.outer(freq, freq[idx]) / self.draw_count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lift = np.where(expected > 0, self.pairs[:, idx] / expected, 0.0)
+        scores = lift.mean(axis=1)
+
+        selected_set = set(idx.tolist())
+        return {
+            ball + self.base: float(scores[ball])
+            for ball in range(size) if ball not in selected_set
+        }
+
+    def adjacent_scores(self, position: int, digit: int) -> Dict[int, float]:
+        """计算七星彩某一位数字与下一位各数字的关联强度（提升度）
+
+        Args:
+            position: 位置（1-6）
+            digit: 该位置的数字
+
+        Returns:
+            {下一位数字: 关联强度}
+        """
+        if not self.positional:
+            raise ValueError("组合型彩票请使用 association_scores")
+
+        pair = self.pairs[position - 1].astype(np.float64)
+        row_total = pair.sum(axis=1)
+        col_total = pair.sum(axis=0)
+        a = digit - self.base
+        expected = row_total[a] * col_total / max(self.draw_count, 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lift = np.where(expected > 0, pair[a] / expected, 0.0)
+        return {b + self.base: float(lift[b]) for b in range(pair.shape[1])}
+
+    def save(self, path: Path):
+        """保存到 npz 文件"""
+        np.savez_compressed(
+            path,
+            lottery_type=self.lottery_type,
+            latest_issue=self.latest_issue,
+            draw_count=self.draw_count,
+            base=self.base,
+            positional=self.positional,
+            pairs=self.pairs,
+            triple_index=self.triple_index,
+            triple_counts=self.triple_counts,
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> 'CooccurrenceMatrix':
+        """从 npz 文件加载"""
+        with np.load(path) as f:
+            return cls(
+                lottery_type=str(f['lottery_type']),
+                latest_issue=str(f['latest_issue']),
+                draw_count=int(f['draw_count']),
+                base=int(f['base']),
+                positional=bool(f['positional']),
+                pairs=f['pairs'],
+                triple_index=f['triple_index'],
+                triple_counts=f['triple_counts'],
+            )
+
+
+def _sparse_triples(blocks: List[Tuple[tuple, np.ndarray, int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """把按前缀分块的稠密计数矩阵转换为稀疏三元组表
+
+    Args:
+        blocks: [(前缀下标元组, 计数矩阵, 行列下标偏移), ...]，计数为 0 的位置会被丢弃
+
+    Returns:
+        (下标数组, 计数数组)
+    """
+    indices = []
+    counts = []
+    for prefix, matrix, offset in blocks:
+        rows, cols = np.nonzero(matrix)
+        if rows.size == 0:
+            continue
+        prefix_cols = np.tile(np.array(prefix, dtype=np.int16), (rows.size, 1))
+        indices.append(np.column_stack([prefix_cols, rows + offset, cols + offset]).astype(np.int16))
+        counts.append(matrix[rows, cols].astype(np.int32))
+
+    width = len(blocks[0][0]) + 2 if blocks else 3
+    if not indices:
+        return np.zeros((0, width), dtype=np.int16), np.zeros(0, dtype=np.int32)
+    return np.vstack(indices), np.concatenate(counts)
+
+
+def build_cooccurrence(history: DrawHistory) -> CooccurrenceMatrix:
+    """根据号码矩阵构建共现统计
+
+    号码对：X^T X（X 为期数 × 号码的出现矩阵）
+    三元组：对每个号码 a，取包含 a 的期构成子矩阵 X_a，X_a^T X_a 即 a 与其他号码对的共现次数，
+    只保留 a < b < c 的上三角部分，结果以稀疏形式保存
+
+    Args:
+        history: 号码矩阵
+
+    Returns:
+        共现统计结果
+    """
+    incidence = history.incidence_matrix()
+    positional = history.layout['positional']
+
+    if positional:
+        positions = incidence.shape[1]
+        pairs = np.stack([
+            incidence[:, p, :].T @ incidence[:, p + 1, :]
+            for p in range(positions - 1)
+        ])
+        blocks = []
+        for p in range(positions - 2):
+            for a in range(history.ball_count):
+                rows = incidence[:, p, a] == 1
+                if not rows.any():
+                    continue
+                sub = incidence[rows]
+                blocks.append(((p, a), sub[:, p + 1, :].T @ sub[:, p + 2, :], 0))
+        triple_index, triple_counts = _sparse_triples(blocks)
+    else:
+        pairs = incidence.T @ incidence
+        blocks = []
+        for a in range(history.ball_count - 2):
+            rows = incidence[:, a] == 1
+            if not rows.any():
+                continue
+            # 只取大于 a 的号码列，并保留 b < c 的上三角
+            sub = incidence[rows][:, a + 1:]
+            blocks.append(((a,), np.triu(sub.T @ sub, k=1), a + 1))
+        triple_index, triple_counts = _sparse_triples(blocks)
+
+    return CooccurrenceMatrix(
+        lottery_type=history.lottery_type,
+        latest_issue=history.latest_issue or '',
+        draw_count=len(history),
+        base=history.main_min,
+        positional=positional,
+        pairs=pairs.astype(np.int32),
+        triple_index=triple_index,
+        triple_counts=triple_counts,
+    )
+
+
+def get_cooccurrence(lottery_type: str, lottery_data: List[Dict],
+                     cache_dir: Optional[Path] = None, use_cache: bool = True) -> CooccurrenceMatrix:
+    """获取共现统计（优先读取缓存）
+
+    缓存以最新期号为键：同一期号的数据只会计算一次，之后从内存或磁盘直接读取。
+    缓存文件中同时记录期数，补录历史缺失期号后期数变化也会触发重算。
+
+    Args:
+        lottery_type: 彩票类型
+        lottery_data: 历史中奖数据列表
+        cache_dir: 缓存目录（默认 data/cache）
+        use_cache: 是否使用缓存
+
+    Returns:
+        共现统计结果
+    """
+    if cache_dir is None:
+        from core.config import CACHE_DIR
+        cache_dir = CACHE_DIR
+
+    latest_issue = max((str(d['lottery_no']) for d in lottery_data), default='')
+    key = (lottery_type, latest_issue, len(lottery_data))
+    cache_file = Path(cache_dir) / f"cooccurrence_{lottery_type}_{latest_issue}.npz"
+
+    if use_cache:
+        if key in _memory_cache:
+            return _memory_cache[key]
+
+        if cache_file.exists():
+            try:
+                matrix = CooccurrenceMatrix.load(cache_file)
+                if matrix.draw_count == len(lottery_data):
+                    logger.info(f"使用共现统计缓存: {cache_file.name}")
+                    _memory_cache[key] = matrix
+                    return matrix
+            except Exception as e:
+                logger.warning(f"读取共现统计缓存失败，重新计算: {e}")
+
+    matrix = build_cooccurrence(DrawHistory(lottery_type, lottery_data))
+    logger.info(f"共现统计计算完成: {len(lottery_data)} 期，三元组 {len(matrix.triple_counts)} 个")
+
+    if use_cache:
+        try:
+            # 清理同类型的旧缓存，只保留最新期号
+            for old in Path(cache_dir).glob(f"cooccurrence_{lottery_type}_*.npz"):
+                if old != cache_file:
+                    old.unlink()
+            matrix.save(cache_file)
+        except OSError as e:
+            logger.warning(f"保存共现统计缓存失败: {e}")
+        _memory_cache[key] = matrix
+
+    return matrix
@@ -0,0 +1,218 @@
+"""
+全量爬取日志（断点续爬）
+记录每次全量爬取规划的期号范围及各范围的进度，爬取中断（网络错误、容器重启）后重新执行
+`fetch --mode full` 时从日志继续，只重新请求失败或未完成的范围
+
+每个范围的状态依次为：
+- planned：已规划
+- fetched：已下载（流水线模式记录页面大小）
+- parsed：已解析（记录条数和内容摘要）
+- inserted：已入库（记录新增条数）
+- failed：失败（记录错误信息）
+
+日志保存在 data/journal/<彩票类型>.json（每次更新后整体写入临时文件再替换，中断时不会损坏）。
+已结束年份的范围入库完成后，只要数据库中该范围的期数不少于当时获取的条数（数据没有被删除），
+后续全量爬取不再请求，即使范围内仍有缺号（数据源本身没有这些期号）。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from core.fetch_planner import GapIndex, _issue_key
+from core.response_cache import is_closed_range
+
+logger = logging.getLogger(__name__)
+
+# 范围状态
+STATUSES = ('planned', 'fetched', 'parsed', 'inserted', 'failed')
+
+
+def range_key(item: Dict) -> str:
+    """范围的日志键：'03001-03200'"""
+    return f"{item['start']}-{item['end']}"
+
+
+def record_hash(record: Dict) -> str:
+    """单条开奖记录的摘要"""
+    canonical = json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def combine_hashes(hashes: List[str]) -> str:
+    """多条记录摘要合并为范围的内容摘要（与记录顺序无关，流式爬取时逐条累计即可）"""
+    return hashlib.sha256(''.join(sorted(hashes)).encode('ascii')).hexdigest()
+
+
+def records_digest(records: List[Dict]) -> str:
+    """开奖记录的内容摘要（用于判断重新获取的数据是否变化）"""
+    return combine_hashes([record_hash(record) for record in records])
+
+
+class CrawlJournal:
+    """单个彩票类型的全量爬取日志"""
+
+    def __init__(self, lottery_type: str, journal_dir: Path = None):
+        """
+        Args:
+            lottery_type: 彩票类型
+            journal_dir: 日志目录（默认 data/journal）
+        """
+        if journal_dir is None:
+            from core.config import DATA_DIR
+            journal_dir = DATA_DIR / 'journal'
+        self.lottery_type = lottery_type
+        self.path = Path(journal_dir) / f'{lottery_type}.json'
+        self._lock = threading.Lock()
+        self.state = self._load()
+
+    def _load(self) -> Dict:
+        if self.path.exists():
+            try:
+                return json.loads(self.path.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                logger.warning(f"爬取日志损坏，重新开始: {self.path} ({e})")
+        return {'lottery_type': self.lottery_type, 'run': None, 'ranges': {}}
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @property
+    def run(self) -> Optional[Dict]:
+        return self.state.get('run')
+
+    @property
+    def interrupted(self) -> bool:
+        """上一次全量爬取是否没有完成"""
+        return bool(self.run) and self.run.get('status') == 'running'
+
+    def _is_done(self, item: Dict, index: GapIndex, run_id: str = None) -> bool:
+        """范围是否已完成：入库成功、数据仍在数据库中，且是已结束年份或属于正在续爬的那次爬取"""
+        entry = self.state['ranges'].get(range_key(item))
+        if not entry or entry.get('status') != 'inserted':
+            return False
+        if not (is_closed_range(item['end']) or (run_id and entry.get('run_id') == run_id)):
+            return False
+        present = index.count_between(_issue_key(item['start']), _issue_key(item['end']))
+        return present >= entry.get('rows', 0)
+
+    def _covered(self, item: Dict, index: GapIndex) -> bool:
+        """新规划的范围是否落在某个已完成的已结束年份范围内（当时没有获取到数据的范围不算）"""
+        start, end = _issue_key(item['start']), _issue_key(item['end'])
+        for key, entry in self.state['ranges'].items():
+            done_start, done_end = key.split('-')
+            if not entry.get('rows'):
+                continue
+            if _issue_key(done_start) <= start and end <= _issue_key(done_end) and \
+                    self._is_done({'start': done_start, 'end': done_end}, index):
+                return True
+        return False
+
+    def plan(self, index: GapIndex, fresh_plan: List[Dict]) -> List[Dict]:
+        """确定本次要请求的范围并开始记录
+
+        - 上一次爬取中断：沿用当时的规划，跳过已入库的范围（断点续爬）
+        - 否则：使用新的规划，跳过已完成的已结束年份范围
+
+        Args:
+            index: 数据库已有期号的缺口索引
+            fresh_plan: 按缺口新规划的范围（plan_fetch_ranges() 的结果）
+        """
+        with self._lock:
+            if self.interrupted:
+                run_id = self.run['id']
+                plan = [item for item in self.run['plan'] if not self._is_done(item, index, run_id)]
+                logger.info(f"📒 从爬取日志继续 ({self.run['started_at']} 开始的全量爬取): "
+                            f"共 {len(self.run['plan'])} 段，剩余 {len(plan)} 段")
+            else:
+                run_id = datetime.now().strftime('%Y%m%d%H%M%S')
+                plan = [item for item in fresh_plan if not self._covered(item, index)]
+                if len(plan) < len(fresh_plan):
+                    logger.info(f"📒 爬取日志中已完成 {len(fresh_plan) - len(plan)} 段（数据源缺号），不再请求")
+                self.state['run'] = {
+                    'id': run_id,
+                    'status': 'running',
+                    'started_at': datetime.now().isoformat(timespec='seconds'),
+                    'plan': [{'start': item['start'], 'end': item['end'], 'rows': item.get('rows', 0)}
+                             for item in plan],
+                }
+
+            for item in plan:
+                previous = self.state['ranges'].get(range_key(item), {})
+                entry = {
+                    'run_id': run_id,
+                    'status': 'planned',
+                    'updated_at': datetime.now().isoformat(timespec='seconds'),
+                }
+                if previous.get('digest'):
+                    # 保留上次的内容摘要，重新获取后可判断内容是否变化
+                    entry['digest'] = previous['digest']
+                self.state['ranges'][range_key(item)] = entry
+            self._save()
+        return plan
+
+    def mark(self, item: Dict, status: str, **fields):
+        """更新范围状态
+
+        Args:
+            item: 范围 {'start': ..., 'end': ...}
+            status: 新状态（见 STATUSES）
+            **fields: 附加信息，如 rows / digest / inserted / size / error
+        """
+        if status not in STATUSES:
+            raise ValueError(f"不支持的范围状态: {status}。支持的状态: {list(STATUSES)}")
+
+        with self._lock:
+            entry = self.state['ranges'].setdefault(range_key(item), {})
+            if status == 'parsed' and entry.get('digest') and fields.get('digest') != entry['digest']:
+                logger.info(f"   📒 {range_key(item)} 内容与上次获取时不同")
+            if status != 'failed':
+                entry.pop('error', None)
+            entry.update(fields)
+            entry['status'] = status
+            entry['updated_at'] = datetime.now().isoformat(timespec='seconds')
+            if self.run:
+                entry.setdefault('run_id', self.run['id'])
+            self._save()
+
+    def finish(self) -> Dict:
+        """结束本次爬取：所有范围都已入库时标记为完成，否则保留为中断状态，下次继续
+
+        Returns:
+            {'status': 'complete' / 'running', 各状态的范围数...}
+        """
+        with self._lock:
+            if not self.run:
+                return {'status': None}
+
+            counts = {status: 0 for status in STATUSES}
+            for item in self.run['plan']:
+                entry = self.state['ranges'].get(range_key(item), {})
+                counts[entry.get('status', 'planned')] += 1
+
+            if counts['inserted'] == len(self.run['plan']):
+                self.run['status'] = 'complete'
+                self.run['finished_at'] = datetime.now().isoformat(timespec='seconds')
+            self._save()
+            return {'status': self.run['status'], **counts}
+
+    def reset(self):
+        """清空日志（下次全量爬取重新规划）"""
+        with self._lock:
+            self.state = {'lottery_type': self.lottery_type, 'run': None, 'ranges': {}}
+            if self.path.exists():
+                self.path.unlink()
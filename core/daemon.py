@@ -0,0 +1,106 @@
+"""
+常驻服务的通信协议和客户端
+客户端（CLI 命令、定时任务）通过本地套接字向 `python lottery.py serve` 发送请求，
+每个请求和响应都是一行 JSON：
+
+    请求: {"command": "predict", "lottery_type": "ssq", "count": 5}
+    响应: {"ok": true, "result": ...} 或 {"ok": false, "error": "..."}
+
+服务未启动时客户端抛出 DaemonUnavailable，调用方据此改为在本进程中执行。
+"""
+
+import json
+import logging
+import socket
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 单条消息的最大长度（字节），防止异常数据占满内存
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+
+class DaemonUnavailable(Exception):
+    """常驻服务未启动或无法连接"""
+
+
+class DaemonError(Exception):
+    """常驻服务处理请求失败"""
+
+
+def parse_address(address: str) -> Tuple[int, object]:
+    """服务地址 -> (地址族, 套接字地址)
+
+    'host:port' 为 TCP（只应监听本机地址），其他为 Unix 套接字文件路径
+    """
+    host, sep, port = str(address).rpartition(':')
+    if sep and port.isdigit() and '/' not in address and '\\' not in address:
+        return socket.AF_INET, (host or '127.0.0.1', int(port))
+    if not hasattr(socket, 'AF_UNIX'):
+        raise ValueError(f"当前系统不支持 Unix 套接字，请将 SERVE_ADDRESS 设置为 127.0.0.1:端口（当前: {address}）")
+    return socket.AF_UNIX, str(address)
+
+
+def encode_message(message: Dict) -> bytes:
+    return json.dumps(message, ensure_ascii=False, default=str).encode('utf-8') + b'\n'
+
+
+def read_message(stream) -> Dict:
+    """从文件对象读取一行 JSON（连接关闭时返回空字典）"""
+    line = stream.readline(MAX_MESSAGE_SIZE + 1)
+    if not line:
+        return {}
+    if len(line) > MAX_MESSAGE_SIZE:
+        raise ValueError(f"消息超过 {MAX_MESSAGE_SIZE} 字节")
+    return json.loads(line.decode('utf-8'))
+
+
+class DaemonClient:
+    """常驻服务客户端（每个请求一个连接）"""
+
+    def __init__(self, address: str = None, timeout: float = None):
+        """
+        Args:
+            address: 服务地址（默认 SERVE_CONFIG['address']）
+            timeout: 等待响应的最长时间（秒，默认 SERVE_CONFIG['timeout']）
+        """
+        from core.config import SERVE_CONFIG
+
+        self.address = address or SERVE_CONFIG['address']
+        self.timeout = timeout or SERVE_CONFIG['timeout']
+
+    def request(self, command: str, **params):
+        """发送请求并返回结果
+
+        Raises:
+            DaemonUnavailable: 服务未启动
+            DaemonError: 服务返回错误
+        """
+        family, address = parse_address(self.address)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            try:
+                sock.connect(address)
+            except (FileNotFoundError, ConnectionRefusedError, socket.timeout) as e:
+                raise DaemonUnavailable(f"常驻服务未启动: {self.address} ({e})") from e
+
+            sock.sendall(encode_message({'command': command, **params}))
+            with sock.makefile('rb') as stream:
+                response = read_message(stream)
+        finally:
+            sock.close()
+
+        if not response:
+            raise DaemonError("常驻服务关闭了连接")
+        if not response.get('ok'):
+            raise DaemonError(response.get('error', '未知错误'))
+        return response.get('result')
+
+    def is_running(self) -> bool:
+        """服务是否可用"""
+        try:
+            self.request('ping')
+            return True
+        except (DaemonUnavailable, DaemonError, OSError):
+            return False
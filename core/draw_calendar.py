@@ -0,0 +1,179 @@
+"""
+开奖日历
+根据各彩票配置中的开奖日（draw_days）、开奖时间（draw_time）和数据库中最近的开奖记录，
+推算下一期的期号、开奖时间和数据发布时间，供增量爬取判断是否需要访问网络：
+
+- 下一期尚未开奖（或结果尚未发布）：不发送请求
+- 只缺一期：只请求这一期（start = end = 预计期号）
+- 缺多期（如定时任务停了几天）：从下一期请求到最后一期所在年份末尾
+
+期号按开奖日期所在年份编号：下一次开奖落在新的一年时期号为 YY001，不再依据"期号超过 200"推断跨年。
+开奖时间均为北京时间（UTC+8），与服务器所在时区无关。
+"""
+
+import importlib
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 北京时间（没有夏令时，使用固定偏移即可）
+CHINA_TZ = timezone(timedelta(hours=8))
+
+# 配置中的开奖日：'周一'..'周日' 或 1..7（1 为周一）
+WEEKDAY_NAMES = {'周一': 0, '周二': 1, '周三': 2, '周四': 3, '周五': 4, '周六': 5, '周日': 6, '周天': 6}
+
+# 配置中没有开奖时间时的默认值
+DEFAULT_DRAW_TIME = '20:30'
+
+# 推算的最多期数（数据库很久没有更新时避免无限推算）
+MAX_PENDING_DRAWS = 400
+
+
+def _parse_weekday(day) -> int:
+    """开奖日 -> weekday()（0 为周一）"""
+    if isinstance(day, int):
+        return (day - 1) % 7
+    if day in WEEKDAY_NAMES:
+        return WEEKDAY_NAMES[day]
+    raise ValueError(f"无法识别的开奖日: {day}")
+
+
+def _parse_time(value: str) -> time:
+    hour, minute = str(value).split(':')[:2]
+    return time(int(hour), int(minute))
+
+
+def _parse_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+def load_draw_schedule(lottery_type: str) -> Dict:
+    """读取 lotteries/<彩票类型>/config.py 中的开奖日和开奖时间
+
+    兼容两种写法：模块常量 DRAW_DAYS / DRAW_TIME（大乐透），
+    或规则字典中的 'draw_days' / 'draw_time'（双色球、七星彩、七乐彩，按 'code' 匹配）
+
+    Returns:
+        {'draw_days': {weekday, ...}, 'draw_time': time}
+    """
+    module = importlib.import_module(f'lotteries.{lottery_type}.config')
+
+    days = getattr(module, 'DRAW_DAYS', None)
+    draw_time = getattr(module, 'DRAW_TIME', None)
+    if days is None:
+        for value in vars(module).values():
+            if isinstance(value, dict) and value.get('code') == lottery_type and 'draw_days' in value:
+                days = value['draw_days']
+                draw_time = value.get('draw_time')
+                break
+
+    if not days:
+        raise ValueError(f"{lottery_type} 配置中没有开奖日 (draw_days)")
+
+    return {
+        'draw_days': {_parse_weekday(day) for day in days},
+        'draw_time': _parse_time(draw_time or DEFAULT_DRAW_TIME),
+    }
+
+
+class DrawCalendar:
+    """开奖日历（单个彩票类型）"""
+
+    def __init__(self, lottery_type: str, recent_draws: Iterable[Tuple[str, str]] = (),
+                 publish_delay: float = None, schedule: Dict = None):
+        """
+        Args:
+            lottery_type: 彩票类型
+            recent_draws: 最近的开奖记录 [(期号, 开奖日期), ...]，开奖日以配置为准，
+                          并补充最近记录中出现过的开奖日（如配置未及时更新的开奖日调整）
+            publish_delay: 开奖后多少分钟数据源发布结果（默认 SPIDER_CONFIG['publish_delay']）
+            schedule: 开奖日和开奖时间（默认读取彩票配置，见 load_draw_schedule()）
+        """
+        if publish_delay is None:
+            from core.config import SPIDER_CONFIG
+            publish_delay = SPIDER_CONFIG['publish_delay']
+
+        schedule = schedule or load_draw_schedule(lottery_type)
+        self.lottery_type = lottery_type
+        self.draw_time = schedule['draw_time']
+        self.publish_delay = timedelta(minutes=publish_delay)
+
+        self.draw_days = set(schedule['draw_days'])
+        observed = {_parse_date(draw_date).weekday() for _, draw_date in recent_draws}
+        if observed - self.draw_days:
+            logger.info(f"{lottery_type} 最近的开奖记录中出现配置外的开奖日: "
+                        f"{sorted(observed - self.draw_days)}（0 为周一），一并计入")
+            self.draw_days |= observed
+
+    def draw_datetime(self, day: date) -> datetime:
+        """某天的开奖时间（北京时间）"""
+        return datetime.combine(day, self.draw_time, tzinfo=CHINA_TZ)
+
+    def next_draw_date(self, after: date) -> date:
+        """某天之后的第一个开奖日"""
+        day = after + timedelta(days=1)
+        while day.weekday() not in self.draw_days:
+            day += timedelta(days=1)
+        return day
+
+    def iter_expected(self, latest_no: str, latest_date, limit: int = MAX_PENDING_DRAWS):
+        """从最新一期之后依次推算的开奖
+
+        Args:
+            latest_no: 数据库最新期号（7 位或 5 位）
+            latest_date: 最新一期的开奖日期
+
+        Yields:
+            {'issue': 5 位期号, 'draw_date': 开奖日期, 'draw_time': 开奖时间, 'publish_time': 预计发布时间}
+        """
+        key = int(str(latest_no)[-5:])
+        year, number = divmod(key, 1000)
+        day = _parse_date(latest_date)
+
+        for _ in range(limit):
+            day = self.next_draw_date(day)
+            if day.year % 100 != year:
+                # 新的一年从第 001 期开始
+                year, number = day.year % 100, 0
+            number += 1
+            draw_at = self.draw_datetime(day)
+            yield {
+                'issue': f"{year:02d}{number:03d}",
+                'draw_date': day,
+                'draw_time': draw_at,
+                'publish_time': draw_at + self.publish_delay,
+            }
+
+    def next_expected(self, latest_no: str, latest_date) -> Dict:
+        """下一期的预计期号、开奖时间和发布时间"""
+        return next(self.iter_expected(latest_no, latest_date))
+
+    def pending_draws(self, latest_no: str, latest_date, now: datetime = None) -> List[Dict]:
+        """最新一期之后、到现在为止应已发布的各期（为空时不可能有新数据）"""
+        now = now or datetime.now(CHINA_TZ)
+        pending = []
+        for draw in self.iter_expected(latest_no, latest_date):
+            if draw['publish_time'] > now:
+                break
+            pending.append(draw)
+        return pending
+
+    def plan_incremental(self, latest_no: str, latest_date, now: datetime = None) -> Optional[Tuple[str, str]]:
+        """增量爬取的期号范围，没有可能的新数据时返回 None
+
+        Returns:
+            (起始期号, 结束期号)：只缺一期时起止相同；缺多期时结束期号为最后一期所在年份的 YY200
+            （休市等原因会使推算的期号偏大，取年末可以避免漏掉实际期号）
+        """
+        pending = self.pending_draws(latest_no, latest_date, now)
+        if not pending:
+            return None
+        if len(pending) == 1:
+            return pending[0]['issue'], pending[0]['issue']
+        return pending[0]['issue'], f"{pending[-1]['issue'][:2]}200"
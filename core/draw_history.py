@@ -0,0 +1,158 @@
+"""
+历史开奖数据矩阵
+将数据库返回的开奖记录列表转换为 numpy 号码矩阵，供统计分析和关联分析复用
+"""
+
+import logging
+from typing import List, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# 各彩票的号码布局
+# main: 主号码区（双色球红球、大乐透前区、七乐彩基本号、七星彩7位数字）
+# extra: 附加号码区（双色球蓝球、大乐透后区、七乐彩特别号）
+# positional: 是否为位置型彩票（七星彩每位独立，号码可重复）
+LOTTERY_LAYOUTS = {
+    'ssq': {
+        'main_key': 'red_balls',
+        'main_range': (1, 33),
+        'main_count': 6,
+        'extra_key': 'blue_ball',
+        'extra_range': (1, 16),
+        'extra_count': 1,
+        'positional': False,
+    },
+    'dlt': {
+        'main_key': 'front_balls',
+        'main_range': (1, 35),
+        'main_count': 5,
+        'extra_key': 'back_balls',
+        'extra_range': (1, 12),
+        'extra_count': 2,
+        'positional': False,
+    },
+    'qlc': {
+        'main_key': 'basic_balls',
+        'main_range': (1, 30),
+        'main_count': 7,
+        'extra_key': 'special_ball',
+        'extra_range': (1, 30),
+        'extra_count': 1,
+        'positional': False,
+    },
+    'qxc': {
+        'main_key': 'numbers',
+        'main_range': (0, 9),
+        'main_count': 7,
+        'extra_key': None,
+        'extra_range': None,
+        'extra_count': 0,
+        'positional': True,
+    },
+}
+
+
+def get_layout(lottery_type: str) -> Dict:
+    """获取彩票号码布局
+
+    Args:
+        lottery_type: 彩票类型
+
+    Returns:
+        号码布局字典
+
+    Raises:
+        ValueError: 不支持的彩票类型
+    """
+    if lottery_type not in LOTTERY_LAYOUTS:
+        raise ValueError(f"不支持的彩票类型: {lottery_type}。支持的类型: {list(LOTTERY_LAYOUTS.keys())}")
+    return LOTTERY_LAYOUTS[lottery_type]
+
+
+def _as_ints(value) -> List[int]:
+    """将号码字段统一转换为整数列表（数据库中可能是字符串或单个值）"""
+    if isinstance(value, (list, tuple)):
+        return [int(v) for v in value]
+    return [int(value)]
+
+
+class DrawHistory:
+    """历史开奖号码矩阵
+
+    只在构造时遍历一次原始数据，之后所有统计都基于矩阵运算完成。
+    行顺序与传入的 lottery_data 一致（数据库默认按开奖日期倒序）。
+    """
+
+    def __init__(self, lottery_type: str, lottery_data: List[Dict]):
+        """
+        初始化号码矩阵
+
+        Args:
+            lottery_type: 彩票类型 ('ssq', 'dlt', 'qxc', 'qlc')
+            lottery_data: 历史中奖数据列表
+        """
+        self.lottery_type = lottery_type
+        self.layout = get_layout(lottery_type)
+        self.main_min, self.main_max = self.layout['main_range']
+
+        main_key = self.layout['main_key']
+        extra_key = self.layout['extra_key']
+        positional = self.layout['positional']
+
+        main_rows = []
+        extra_rows = []
+        issues = []
+        for data in lottery_data:
+            balls = _as_ints(data[main_key])
+            main_rows.append(balls if positional else sorted(balls))
+            if extra_key:
+                extra_rows.append(sorted(_as_ints(data[extra_key])))
+            issues.append(str(data['lottery_no']))
+
+        main_count = self.layout['main_count']
+        self.main = np.array(main_rows, dtype=np.int16).reshape(-1, main_count)
+        self.extra = None
+        if extra_key:
+            self.extra = np.array(extra_rows, dtype=np.int16).reshape(-1, self.layout['extra_count'])
+        self.issues = issues
+
+    def __len__(self) -> int:
+        return self.main.shape[0]
+
+    @property
+    def latest_issue(self) -> Optional[str]:
+        """最新期号（数据为空时返回 None）"""
+        return max(self.issues) if self.issues else None
+
+    @property
+    def ball_count(self) -> int:
+        """主号码区可选号码个数（双色球红球为 33，七星彩每位为 10）"""
+        return self.main_max - self.main_min + 1
+
+    def incidence_matrix(self) -> np.ndarray:
+        """主号码区出现矩阵
+
+        组合型彩票返回 (期数, 号码数) 的 0/1 矩阵，第 j 列对应号码 main_min + j；
+        七星彩返回 (期数, 7, 10) 的按位独热矩阵。
+
+        Returns:
+            int32 矩阵（便于直接做矩阵乘法计数）
+        """
+        n = len(self)
+        offsets = self.main - self.main_min
+
+        if self.layout['positional']:
+            positions = self.main.shape[1]
+            matrix = np.zeros((n, positions, self.ball_count), dtype=np.int32)
+            rows = np.repeat(np.arange(n), positions)
+            cols = np.tile(np.arange(positions), n)
+            matrix[rows, cols, offsets.ravel()] = 1
+            return matrix
+
+        matrix = np.zeros((n, self.ball_count), dtype=np.int32)
+        rows = np.repeat(np.arange(n), self.main.shape[1])
+        matrix[rows, offsets.ravel()] = 1
+        return matrix
@@ -0,0 +1,268 @@
+"""
+爬取范围规划
+根据数据库已有期号计算缺失期号区间（缺口索引），再把相邻的缺口合并为尽量少的请求
+
+500.com 的历史数据接口接受任意 start/end 期号（可以跨年），因此：
+- 相邻年份之间连续的缺口（如上一年末尾到下一年开头）合并为一次请求
+- 两个缺口之间已有的期数不多时也合并，代价是少量已有数据被重复下载（入库时跳过）
+- 只有当一次请求的预计行数超过上限时才拆分
+
+缺号修复（fetch --mode repair）只请求已有数据内部的缺号和未到年末的往年末尾（holes()），不请求没有数据的年份。
+"""
+
+import logging
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import List, Dict, Iterable, Optional, Set, Tuple
+
+from core.draw_calendar import _parse_date
+
+logger = logging.getLogger(__name__)
+
+# 每年最大期号（与爬取逻辑中的 YY200 一致）
+MAX_ISSUE = 200
+
+# 没有历史数据可参考时，每年的预计期数（双色球/大乐透每年约 150 期）
+DEFAULT_YEAR_ISSUES = 160
+
+
+def _issue_key(lottery_no: str) -> int:
+    """期号转为可比较的整数：2015077 / 15077 -> 15077"""
+    lottery_no = str(lottery_no)
+    return int(lottery_no[-5:])
+
+
+def _format_issue(key: int) -> str:
+    """整数期号转为 5 位期号字符串"""
+    return f"{key:05d}"
+
+
+def _format_lottery_no(key: int) -> str:
+    """整数期号转为数据库中的 7 位期号：15077 -> '2015077'"""
+    return f"{2000 + key // 1000}{key % 1000:03d}"
+
+
+def _coalesce(keys: Iterable[int]) -> List[List[int]]:
+    """升序期号合并为连续区间：[1, 2, 3, 7] -> [[1, 3], [7, 7]]"""
+    result = []
+    for key in keys:
+        if result and key == result[-1][1] + 1:
+            result[-1][1] = key
+        else:
+            result.append([key, key])
+    return result
+
+
+class GapIndex:
+    """缺口索引：记录数据库已有期号，按年份计算缺失的期号区间"""
+
+    def __init__(self, lottery_nos: Iterable[str], last_issue: str, current_year: int = None,
+                 last_draws: Iterable[Tuple[str, str]] = (), calendar=None):
+        """
+        Args:
+            lottery_nos: 数据库中已有的全部期号
+            last_issue: 起始期号之前的一期（如 '03000'，即从 03001 开始）
+            current_year: 当前年份（默认今年）
+            last_draws: 各年份已有的最后一期 [(期号, 开奖日期), ...]（见 BaseDatabase.get_year_last_draws()）
+            calendar: 开奖日历（DrawCalendar），用于判断某年已有的最后一期是否为该年最后一次开奖
+        """
+        self.key_set: Set[int] = {_issue_key(no) for no in lottery_nos}
+        self.keys = sorted(self.key_set)
+        self.first_key = _issue_key(last_issue) + 1
+        self.current_year = current_year or datetime.now().year
+
+        # 每年已有期号的最大值（用于估算该年的期数）
+        self.year_max: Dict[int, int] = {}
+        for key in self.keys:
+            year, issue = divmod(key, 1000)
+            self.year_max[year] = max(self.year_max.get(year, 0), issue)
+
+        # 每年已有最后一期的开奖日期
+        self.year_last_date = {_issue_key(no) // 1000: _parse_date(draw_date) for no, draw_date in last_draws}
+        self.calendar = calendar
+
+    @property
+    def latest_year(self) -> Optional[int]:
+        """已有数据的最新年份（两位）"""
+        return self.keys[-1] // 1000 if self.keys else None
+
+    def year_complete(self, year: int) -> bool:
+        """某年的数据是否已到年末
+
+        早于已有数据的最新年份，且已有最后一期之后的下一个开奖日（按开奖日历）在下一年；
+        没有开奖日期或开奖日历时视为不完整（全量爬取中途失败会留下这样的年份）
+        """
+        if year not in self.year_max or self.latest_year is None or year >= self.latest_year:
+            return False
+        last_date = self.year_last_date.get(year)
+        if last_date is None or self.calendar is None:
+            return False
+        return self.calendar.next_draw_date(last_date).year > 2000 + year
+
+    def year_issues(self, year: int) -> int:
+        """估算某年的期数：数据已到年末时以该年最大期号为准，否则使用默认值"""
+        if self.year_complete(year):
+            return self.year_max[year]
+        return max(self.year_max.get(year, 0), DEFAULT_YEAR_ISSUES)
+
+    def count_between(self, start_key: int, end_key: int) -> int:
+        """区间 [start_key, end_key] 内已有的期数"""
+        return bisect_right(self.keys, end_key) - bisect_left(self.keys, start_key)
+
+    def estimate_rows(self, start_key: int, end_key: int) -> int:
+        """估算区间 [start_key, end_key] 的开奖期数"""
+        rows = 0
+        for year in range(start_key // 1000, end_key // 1000 + 1):
+            low = start_key % 1000 if year == start_key // 1000 else 1
+            high = end_key % 1000 if year == end_key // 1000 else MAX_ISSUE
+            rows += max(0, min(high, self.year_issues(year)) - low + 1)
+        return rows
+
+    def gaps(self, years: Iterable[int] = None) -> List[List[int]]:
+        """计算缺失的期号区间
+
+        - 已有数据之间的空缺：缺失
+        - 某年已有最大期号之后：除非该年数据已到年末（year_complete()），都视为缺失
+        - 没有任何数据的年份：整年缺失
+
+        Args:
+            years: 只计算这些年份（四位年份，默认从起始年份到当前年份）
+
+        Returns:
+            [[起始期号, 结束期号], ...]（整数期号，升序，同一年内）
+        """
+        first_year = self.first_key // 1000
+        last_year = self.current_year % 100
+        year_filter = {y % 100 for y in years} if years is not None else None
+
+        result = []
+        for year in range(first_year, last_year + 1):
+            if year_filter is not None and year not in year_filter:
+                continue
+
+            low = self.first_key if year == first_year else year * 1000 + 1
+            high = year * 1000 + MAX_ISSUE
+            if self.year_complete(year):
+                # 数据已到年末：最大期号之后不再有开奖
+                high = year * 1000 + self.year_max[year]
+
+            start = bisect_left(self.keys, low)
+            end = bisect_right(self.keys, high)
+            cursor = low
+            for key in self.keys[start:end]:
+                if key > cursor:
+                    result.append([cursor, key - 1])
+                cursor = key + 1
+            if cursor <= high:
+                result.append([cursor, high])
+
+        return result
+
+    def _year_filter(self, years: Iterable[int] = None) -> Optional[Set[int]]:
+        return {y % 100 for y in years} if years is not None else None
+
+    def missing_keys(self, years: Iterable[int] = None) -> List[int]:
+        """已有数据内部缺失的期号（整数期号，升序）
+
+        每个已有数据的年份，从第 1 期（起始年份从起始期号）到该年已有的最大期号，减去已有期号。
+        最大期号之后（年末或尚未开奖）和没有任何数据的年份不计入（由全量爬取处理）。
+
+        Args:
+            years: 只计算这些年份（四位年份，默认全部）
+        """
+        year_filter = self._year_filter(years)
+        first_year = self.first_key // 1000
+
+        missing = set()
+        for year, max_issue in self.year_max.items():
+            if year < first_year or (year_filter is not None and year not in year_filter):
+                continue
+            low = self.first_key if year == first_year else year * 1000 + 1
+            missing |= set(range(low, year * 1000 + max_issue + 1)) - self.key_set
+        return sorted(missing)
+
+    def incomplete_tails(self, years: Iterable[int] = None) -> List[List[int]]:
+        """数据未到年末的往年（year_complete() 为 False）最大期号之后的区间 [[起始期号, 结束期号], ...]
+
+        最新年份最大期号之后是尚未开奖的期号（由增量爬取处理），不计入。
+
+        Args:
+            years: 只计算这些年份（四位年份，默认全部）
+        """
+        year_filter = self._year_filter(years)
+        result = []
+        for year in sorted(self.year_max):
+            if year < self.first_key // 1000 or (year_filter is not None and year not in year_filter):
+                continue
+            if year < self.latest_year and not self.year_complete(year) and self.year_max[year] < MAX_ISSUE:
+                result.append([year * 1000 + self.year_max[year] + 1, year * 1000 + MAX_ISSUE])
+        return result
+
+    def holes(self, years: Iterable[int] = None) -> List[List[int]]:
+        """需要修复的区间 [[起始期号, 结束期号], ...]：已有数据内部的缺号（见 missing_keys()）和未到年末的往年末尾"""
+        return sorted(_coalesce(self.missing_keys(years)) + self.incomplete_tails(years))
+
+    def missing_issues(self, years: Iterable[int] = None) -> Dict[int, List[str]]:
+        """按年份列出已有数据内部缺失的期号：{2015: ['2015077', '2015078'], ...}"""
+        result: Dict[int, List[str]] = {}
+        for key in self.missing_keys(years):
+            result.setdefault(2000 + key // 1000, []).append(_format_lottery_no(key))
+        return result
+
+    def missing_count(self, years: Iterable[int] = None) -> int:
+        """估算缺失的期数"""
+        return sum(self.estimate_rows(start, end) for start, end in self.gaps(years))
+
+
+def plan_fetch_ranges(index: GapIndex, max_rows: int = None, merge_slack: int = None,
+                      years: Iterable[int] = None, gaps: List[List[int]] = None) -> List[Dict]:
+    """把缺口合并为尽量少的请求范围
+
+    Args:
+        index: 缺口索引
+        max_rows: 单次请求的最大预计行数（默认 SPIDER_CONFIG['max_range_rows']）
+        merge_slack: 两个缺口之间已有期数不超过该值时合并（默认 SPIDER_CONFIG['merge_slack']）
+        years: 只规划这些年份（四位年份，默认全部）
+        gaps: 要请求的缺口（默认 index.gaps(years)；缺号修复时为 index.holes(years)）
+
+    Returns:
+        [{'start': '15078', 'end': '17200', 'rows': 预计行数}, ...]
+
+    Raises:
+        ValueError: max_rows 小于 1
+    """
+    if max_rows is None or merge_slack is None:
+        from core.config import SPIDER_CONFIG
+        max_rows = SPIDER_CONFIG['max_range_rows'] if max_rows is None else max_rows
+        merge_slack = SPIDER_CONFIG['merge_slack'] if merge_slack is None else merge_slack
+    if max_rows < 1:
+        raise ValueError(f"单次请求的最大行数必须大于 0（SPIDER_MAX_RANGE_ROWS）: {max_rows}")
+
+    # 超过上限的单个缺口先拆开（每年最多约 160 期，上限较小时才会在年内拆分）
+    pieces = []
+    for start, end in (index.gaps(years) if gaps is None else gaps):
+        while index.estimate_rows(start, end) > max_rows:
+            split = start + max_rows - 1
+            pieces.append([start, split])
+            start = split + 1
+        pieces.append([start, end])
+
+    merged = []
+    for start, end in pieces:
+        if merged:
+            prev = merged[-1]
+            # 两个缺口之间：上一年末尾到下一年开头的空期号不计，只计已有的期数
+            overlap = index.count_between(prev[1] + 1, start - 1)
+            if overlap <= merge_slack and index.estimate_rows(prev[0], end) <= max_rows:
+                prev[1] = end
+                continue
+        merged.append([start, end])
+
+    return [
+        {
+            'start': _format_issue(start),
+            'end': _format_issue(end),
+            'rows': index.estimate_rows(start, end),
+        }
+        for start, end in merged
+    ]
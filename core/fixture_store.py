@@ -0,0 +1,177 @@
+"""
+HTTP 录制/回放
+把爬虫请求的响应按彩票类型和期号范围保存为夹具，之后可以不访问网络、用录制的响应完整运行
+爬取 -> 解析 -> 入库流程（离线调试、基准测试和 CI）
+
+通过 SPIDER_FIXTURES 启用（作用于所有爬虫共享的 Session，见 core/base_spider.py）：
+- record：正常请求 500.com，同时把每个成功的响应保存到夹具目录
+- replay：不访问网络，从夹具目录读取录制的响应；没有录制的请求抛出 FixtureNotFound（不重试）
+
+夹具目录（SPIDER_FIXTURE_DIR，默认 data/fixtures）结构：
+    <彩票类型>/<起始期号>-<结束期号>.json      请求地址、状态码和响应头
+    <彩票类型>/<起始期号>-<结束期号>.html.gz   响应体（已解压 Content-Encoding，gzip 存储）
+    <彩票类型>/latest.*                         不带期号参数的最新数据
+"""
+
+import gzip
+import io
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+logger = logging.getLogger(__name__)
+
+# 支持的模式
+FIXTURE_MODES = ('record', 'replay')
+
+# 保存的响应头（Content-Encoding / Content-Length 对应网络传输，响应体已解压，不保存）
+_SAVED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+class FixtureNotFound(requests.RequestException):
+    """回放模式下请求没有对应的录制响应"""
+
+
+class FixtureStore:
+    """夹具目录"""
+
+    def __init__(self, root: Path = None):
+        """
+        Args:
+            root: 夹具目录（默认 SPIDER_CONFIG['fixture_dir']）
+        """
+        if root is None:
+            from core.config import SPIDER_CONFIG
+            root = SPIDER_CONFIG['fixture_dir']
+        self.root = Path(root)
+
+    @staticmethod
+    def key(url: str) -> str:
+        """夹具名：<彩票类型>/<起始期号>-<结束期号>，不带期号参数时为 <彩票类型>/latest
+
+        彩票类型取 URL 路径的第一段（datachart.500.com/ssq/history/... -> ssq）。
+        """
+        parts = urlsplit(url)
+        lottery_type = parts.path.strip('/').split('/')[0] or parts.netloc
+        query = parse_qs(parts.query)
+        start = query.get('start', [''])[0]
+        end = query.get('end', [''])[0]
+        if not start and not end:
+            return f"{lottery_type}/latest"
+        return f"{lottery_type}/{start}-{end}"
+
+    def _paths(self, url: str):
+        base = self.root / self.key(url)
+        return base.with_suffix('.json'), base.with_suffix('.html.gz')
+
+    def save(self, url: str, body: bytes, headers=None, status: int = 200):
+        """保存一个响应
+
+        Args:
+            url: 完整请求地址
+            body: 响应体（已解压）
+            headers: 响应头（需支持 .get()）
+            status: 状态码
+        """
+        meta_path, body_path = self._paths(url)
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        headers = headers or {}
+        with gzip.open(body_path, 'wb') as f:
+            f.write(body)
+        meta_path.write_text(json.dumps({
+            'url': url,
+            'status': status,
+            'headers': {name: headers.get(name) for name in _SAVED_HEADERS if headers.get(name)},
+        }, ensure_ascii=False, indent=2), encoding='utf-8')
+        logger.debug(f"已录制: {url} -> {meta_path.with_suffix('')}")
+
+    def load(self, url: str) -> Optional[Tuple[Dict, bytes]]:
+        """读取录制的响应，没有时返回 None
+
+        Returns:
+            (元数据, 响应体)
+        """
+        meta_path, body_path = self._paths(url)
+        if not (meta_path.exists() and body_path.exists()):
+            return None
+        meta = json.loads(meta_path.read_text(encoding='utf-8'))
+        with gzip.open(body_path, 'rb') as f:
+            return meta, f.read()
+
+    def list(self, lottery_type: str) -> List[Dict]:
+        """某彩票类型录制的全部响应元数据（按夹具名排序）"""
+        directory = self.root / lottery_type
+        if not directory.exists():
+            return []
+        return [
+            json.loads(path.read_text(encoding='utf-8'))
+            for path in sorted(directory.glob('*.json'))
+        ]
+
+
+class RecordAdapter(HTTPAdapter):
+    """录制：正常发送请求，成功的响应同时保存到夹具目录"""
+
+    def __init__(self, store: FixtureStore, **kwargs):
+        self.store = store
+        super().__init__(**kwargs)
+
+    def send(self, request, stream=False, **kwargs):
+        response = super().send(request, stream=stream, **kwargs)
+        if response.status_code == 200:
+            # 读取完整响应体后 iter_content() 仍可按块读取，流式爬取不受影响
+            self.store.save(request.url, response.content, response.headers, response.status_code)
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """回放：不访问网络，返回录制的响应"""
+
+    def __init__(self, store: FixtureStore):
+        self.store = store
+        super().__init__()
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        fixture = self.store.load(request.url)
+        if fixture is None:
+            raise FixtureNotFound(f"没有录制的响应: {request.url}（夹具: {self.store.key(request.url)}）",
+                                  request=request)
+
+        meta, body = fixture
+        response = requests.Response()
+        response.status_code = meta.get('status', 200)
+        response.reason = 'OK' if response.status_code == 200 else ''
+        response.headers = CaseInsensitiveDict(meta.get('headers', {}))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def create_adapter(mode: str, store: FixtureStore = None, **kwargs) -> BaseAdapter:
+    """创建录制/回放传输层
+
+    Args:
+        mode: 'record' 或 'replay'
+        store: 夹具目录（默认 SPIDER_CONFIG['fixture_dir']）
+        **kwargs: 录制模式传给 HTTPAdapter 的参数（连接池大小等）
+    """
+    if mode not in FIXTURE_MODES:
+        raise ValueError(f"不支持的夹具模式: {mode}。支持的模式: {list(FIXTURE_MODES)}")
+
+    store = store or FixtureStore()
+    logger.info(f"HTTP {'录制' if mode == 'record' else '回放'}模式，夹具目录: {store.root}")
+    if mode == 'record':
+        return RecordAdapter(store, **kwargs)
+    return ReplayAdapter(store)
@@ -0,0 +1,323 @@
+"""
+开奖历史表格解析
+从 500.com 历史数据页面中提取数据表格每一行的单元格文本，供各彩票爬虫转换为开奖记录
+
+解析后端（SPIDER_PARSER 配置）：
+- lxml：C 实现的 HTML 解析器，直接遍历表格节点（默认）
+- regex：先截取数据表格所在片段，再用预编译正则逐行切分单元格，不建立文档树
+- bs4：BeautifulSoup + html.parser（原有实现，作为兜底）
+
+所有后端的单元格文本与 BeautifulSoup 的 get_text(strip=True) 一致：
+忽略注释，每段文本去除首尾空白后直接拼接。
+快速后端不可用（未安装 lxml）或解析出错时自动回退到 bs4。
+
+流式解析（iter_rows）：按块输入页面文本，每读到一个完整的 <tr> 就产出该行，
+已处理的行立即丢弃，内存占用与页面大小无关（使用 regex 分词；bs4 后端会先拼接完整页面）。
+"""
+
+import codecs
+import html as html_lib
+import logging
+import re
+from functools import lru_cache
+from typing import List, Optional, Iterable, Iterator
+
+try:
+    from lxml import html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# 支持的解析后端
+PARSERS = ('lxml', 'regex', 'bs4')
+
+# regex 后端使用的预编译正则
+_COMMENT_RE = re.compile(r'<!--.*?-->', re.S)
+_ROW_RE = re.compile(r'<tr\b[^>]*>(.*?)</tr\s*>', re.S | re.I)
+_CELL_RE = re.compile(r'<td\b[^>]*>(.*?)</td\s*>', re.S | re.I)
+_TAG_RE = re.compile(r'<[^>]*>')
+
+# 流式读取响应体的块大小（字节）
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_HEADER_CHARSET_RE = re.compile(r'charset=["\']?([\w-]+)', re.I)
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.I)
+
+_warned_fallback = False
+
+
+@lru_cache(maxsize=None)
+def _table_patterns(tag: str, table_id: str):
+    """数据表格的起止标签正则"""
+    start = re.compile(rf'<{tag}\b[^>]*\bid\s*=\s*["\']?{re.escape(table_id)}["\'\s>/]', re.I)
+    end = re.compile(rf'</{tag}\s*>', re.I)
+    return start, end
+
+
+def _cell_text(fragment: str) -> str:
+    """单元格 HTML 片段 -> 文本（等价于 get_text(strip=True)）"""
+    if '<' not in fragment:
+        text = html_lib.unescape(fragment) if '&' in fragment else fragment
+        return text.strip()
+
+    parts = []
+    for piece in _TAG_RE.split(fragment):
+        if '&' in piece:
+            piece = html_lib.unescape(piece)
+        piece = piece.strip()
+        if piece:
+            parts.append(piece)
+    return ''.join(parts)
+
+
+def _extract_regex(html: str, tag: str, table_id: str) -> Optional[List[List[str]]]:
+    start_re, end_re = _table_patterns(tag, table_id)
+    start = start_re.search(html)
+    if not start:
+        return None
+
+    end = end_re.search(html, start.end())
+    fragment = html[start.end():end.start() if end else len(html)]
+    if '<!--' in fragment:
+        fragment = _COMMENT_RE.sub('', fragment)
+
+    return [
+        [_cell_text(cell) for cell in _CELL_RE.findall(row)]
+        for row in _ROW_RE.findall(fragment)
+    ]
+
+
+def _lxml_text(cell) -> str:
+    """lxml 节点 -> 文本（跳过注释节点本身，但保留其后的文本）"""
+    if len(cell) == 0:
+        return (cell.text or '').strip()
+
+    parts = [cell.text]
+    for node in cell.iterdescendants():
+        if isinstance(node.tag, str):
+            parts.append(node.text)
+        parts.append(node.tail)
+    return ''.join(p.strip() for p in parts if p)
+
+
+def _extract_lxml(html: str, tag: str, table_id: str) -> Optional[List[List[str]]]:
+    if isinstance(html, str) and html.lstrip().startswith('<?xml'):
+        # 带编码声明的 unicode 字符串 lxml 不接受，转为字节
+        html = html.encode('utf-8')
+
+    root = lxml_html.document_fromstring(html)
+    tables = root.xpath(f'//{tag}[@id=$table_id]', table_id=table_id)
+    if not tables:
+        return None
+
+    return [
+        [_lxml_text(cell) for cell in row.iter('td')]
+        for row in tables[0].iter('tr')
+    ]
+
+
+def _extract_bs4(html: str, tag: str, table_id: str) -> Optional[List[List[str]]]:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find(tag, id=table_id)
+    if not table:
+        return None
+
+    return [
+        [cell.get_text(strip=True) for cell in row.find_all('td')]
+        for row in table.find_all('tr')
+    ]
+
+
+_BACKENDS = {
+    'lxml': _extract_lxml,
+    'regex': _extract_regex,
+    'bs4': _extract_bs4,
+}
+
+
+def resolve_parser(name: str = None) -> str:
+    """确定实际使用的解析后端
+
+    Args:
+        name: 后端名称（默认读取 SPIDER_CONFIG['parser']）
+
+    Returns:
+        后端名称（lxml 未安装时返回 'bs4'）
+    """
+    global _warned_fallback
+
+    if name is None:
+        from core.config import SPIDER_CONFIG
+        name = SPIDER_CONFIG['parser']
+
+    if name not in PARSERS:
+        raise ValueError(f"不支持的解析后端: {name}。支持的后端: {list(PARSERS)}")
+
+    if name == 'lxml' and not LXML_AVAILABLE:
+        if not _warned_fallback:
+            logger.warning("未安装 lxml，HTML 解析回退到 BeautifulSoup")
+            _warned_fallback = True
+        return 'bs4'
+    return name
+
+
+def extract_rows(html: str, tag: str, table_id: str, parser: str = None) -> Optional[List[List[str]]]:
+    """提取数据表格每一行的单元格文本
+
+    Args:
+        html: 页面 HTML
+        tag: 数据表格的标签名（'tbody' 或 'table'）
+        table_id: 数据表格的 id（如 'tdata'、'tablelist'）
+        parser: 解析后端（默认读取 SPIDER_CONFIG['parser']）
+
+    Returns:
+        [[单元格文本, ...], ...]，按页面顺序（包含表头行）；找不到表格时返回 None
+    """
+    parser = resolve_parser(parser)
+
+    if parser != 'bs4':
+        try:
+            return _BACKENDS[parser](html, tag, table_id)
+        except Exception as e:
+            logger.warning(f"{parser} 解析失败，回退到 BeautifulSoup: {e}")
+
+    return _extract_bs4(html, tag, table_id)
+
+
+def _detect_encoding(content_type: str, first_chunk: bytes) -> str:
+    """确定响应体编码：响应头 charset > 页面 meta charset > utf-8"""
+    match = _HEADER_CHARSET_RE.search(content_type or '')
+    if match:
+        encoding = match.group(1)
+    else:
+        match = _META_CHARSET_RE.search(first_chunk)
+        encoding = match.group(1).decode('ascii') if match else 'utf-8'
+
+    try:
+        return codecs.lookup(encoding).name
+    except LookupError:
+        return 'utf-8'
+
+
+def decode_chunks(chunks: Iterable[bytes], content_type: str = '') -> Iterator[str]:
+    """把字节块增量解码为文本块（多字节字符跨块时也能正确解码）
+
+    Args:
+        chunks: 响应体字节块
+        content_type: 响应头 Content-Type（用于确定编码）
+
+    Yields:
+        解码后的文本块
+    """
+    decoder = None
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder(_detect_encoding(content_type, chunk))(errors='replace')
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+
+    if decoder is not None:
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+
+
+def iter_response_text(response, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """按块读取响应体（需以 stream=True 请求）并增量解码为文本
+
+    Args:
+        response: requests 响应对象
+        chunk_size: 每块字节数
+
+    Yields:
+        解码后的文本块
+    """
+    return decode_chunks(response.iter_content(chunk_size=chunk_size), response.headers.get('Content-Type', ''))
+
+
+def _drain_rows(buffer: str, end_re):
+    """取出缓冲区中所有完整的行
+
+    Returns:
+        (行列表, 剩余缓冲区, 表格是否已结束)
+    """
+    if '<!--' in buffer:
+        buffer = _COMMENT_RE.sub('', buffer)
+    # 未闭合的注释之后的内容等下一块到达后再处理
+    pending = buffer.find('<!--')
+    scan_end = len(buffer) if pending < 0 else pending
+
+    table_end = end_re.search(buffer, 0, scan_end)
+    if table_end:
+        scan_end = table_end.start()
+
+    rows = []
+    consumed = 0
+    for match in _ROW_RE.finditer(buffer, 0, scan_end):
+        rows.append([_cell_text(cell) for cell in _CELL_RE.findall(match.group(1))])
+        consumed = match.end()
+
+    if table_end:
+        return rows, '', True
+    return rows, buffer[consumed:], False
+
+
+def _skip_to_table(chunks: Iterable[str], tag: str, table_id: str) -> Iterator[str]:
+    """跳过数据表格之前的内容，从表格起始标签开始输出文本块"""
+    start_re, _ = _table_patterns(tag, table_id)
+    chunks = iter(chunks)
+    buffer = ''
+
+    for chunk in chunks:
+        buffer += chunk
+        match = start_re.search(buffer)
+        if match:
+            yield buffer[match.start():]
+            yield from chunks
+            return
+        # 只保留最后一个 '<' 之后的内容，以防起始标签被分在两块中
+        cut = buffer.rfind('<')
+        buffer = buffer[cut:] if cut >= 0 else ''
+
+
+def _iter_regex(chunks: Iterable[str], tag: str, table_id: str) -> Iterator[List[str]]:
+    """增量分词：缓冲区中每凑齐一个完整的 <tr> 就产出，已处理的部分立即丢弃"""
+    _, end_re = _table_patterns(tag, table_id)
+    buffer = ''
+
+    for chunk in _skip_to_table(chunks, tag, table_id):
+        rows, buffer, finished = _drain_rows(buffer + chunk, end_re)
+        yield from rows
+        if finished:
+            return
+
+
+def iter_rows(chunks: Iterable[str], tag: str, table_id: str, parser: str = None) -> Iterator[List[str]]:
+    """流式提取数据表格每一行的单元格文本
+
+    Args:
+        chunks: 页面文本块（如 iter_response_text() 的输出）
+        tag: 数据表格的标签名（'tbody' 或 'table'）
+        table_id: 数据表格的 id
+        parser: 解析后端（默认读取 SPIDER_CONFIG['parser']）
+
+    Yields:
+        [单元格文本, ...]，按页面顺序（包含表头行）；找不到表格时不产出任何行
+    """
+    parser = resolve_parser(parser)
+
+    if parser == 'bs4':
+        logger.debug("BeautifulSoup 不支持流式解析，读取完整页面后解析")
+        yield from extract_rows(''.join(chunks), tag, table_id, parser) or []
+        return
+
+    # libxml2 的 HTML 增量解析器会缓冲大部分输入直到结束才产生事件，
+    # 不能做到逐行产出，因此 lxml / regex 配置下流式解析都使用增量分词
+    yield from _iter_regex(chunks, tag, table_id)
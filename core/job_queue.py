@@ -0,0 +1,316 @@
+"""
+任务队列
+爬取、预测、回测分片、批量生成、导出等任务写入数据库表 lottery_jobs，由一个或多个 worker 进程
+（`python lottery.py worker`，可以在不同机器上）领取执行：
+
+- 领取任务时加租约（lease_token + 租约到期时间），执行期间 worker 定时续租；
+  worker 崩溃或断网时租约到期，任务重新对其他 worker 可见（可见性超时）
+- 失败的任务按指数退避延迟后重试，达到最大尝试次数后标记为 failed
+- 领取使用 先查询候选任务 -> 按租约条件更新 的乐观方式，不依赖 SELECT ... FOR UPDATE SKIP LOCKED，
+  MySQL 和 SQLite 替身使用同一套语句
+
+后端（QUEUE_BACKEND）：
+- sqlite：本机 SQLite 文件（QUEUE_PATH，默认 data/queue/jobs.db），同一台机器上的多个 worker 进程共用
+- mysql：.env 中配置的 MySQL 数据库，多台机器共用
+其他后端可在 QUEUE_BACKENDS 中注册（返回 JobQueue 或实现相同方法的对象）。
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import pymysql
+
+from core.base_database import BaseDatabase
+
+logger = logging.getLogger(__name__)
+
+# 任务状态
+STATUSES = ('pending', 'running', 'done', 'failed')
+
+# 每次领取时查询的候选任务数（被其他 worker 抢先领取时依次尝试下一个）
+LEASE_CANDIDATES = 5
+
+
+def default_worker_id() -> str:
+    """worker 标识：主机名:进程号"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobQueue(BaseDatabase):
+    """基于数据库表的任务队列（MySQL 语法，DB_ENGINE=sqlite / sqlite 后端时使用 SQLite 替身）"""
+
+    def __init__(self, db_config: Dict, visibility_timeout: float = None, max_attempts: int = None,
+                 retry_delay: float = None):
+        """
+        Args:
+            db_config: 数据库配置
+            visibility_timeout: 租约时长（秒，默认 QUEUE_CONFIG['visibility_timeout']）
+            max_attempts: 默认最大尝试次数（默认 QUEUE_CONFIG['max_attempts']）
+            retry_delay: 第一次重试前的等待（秒，之后每次加倍，默认 QUEUE_CONFIG['retry_delay']）
+        """
+        from core.config import QUEUE_CONFIG
+
+        super().__init__(db_config)
+        self.table_name = 'lottery_jobs'
+        self.visibility_timeout = visibility_timeout or QUEUE_CONFIG['visibility_timeout']
+        self.max_attempts = max_attempts or QUEUE_CONFIG['max_attempts']
+        self.retry_delay = QUEUE_CONFIG['retry_delay'] if retry_delay is None else retry_delay
+        # 续租线程与 worker 主线程共用一个连接
+        self._lock = threading.RLock()
+
+    def _execute(self, sql: str, params: tuple = None, fetch: str = None):
+        """执行一条语句并提交（fetch: 'one' / 'all' 返回查询结果，否则返回影响行数）"""
+        with self._lock:
+            if not self.connection:
+                self.connect()
+            cursor = self.connection.cursor()
+            try:
+                cursor.execute(sql, params)
+                if fetch == 'one':
+                    result = cursor.fetchone()
+                elif fetch == 'all':
+                    result = cursor.fetchall()
+                elif fetch == 'id':
+                    result = cursor.lastrowid
+                else:
+                    result = cursor.rowcount
+                self.connection.commit()
+                return result
+            except Exception:
+                self.connection.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def create_table(self):
+        """创建任务表"""
+        self._execute(f"""
+        CREATE TABLE IF NOT EXISTS {self.table_name} (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            kind VARCHAR(32) NOT NULL COMMENT '任务类型',
+            payload MEDIUMTEXT NOT NULL COMMENT '任务参数（JSON）',
+            status VARCHAR(16) NOT NULL DEFAULT 'pending' COMMENT 'pending / running / done / failed',
+            priority INT NOT NULL DEFAULT 0 COMMENT '优先级（大的先执行）',
+            attempts INT NOT NULL DEFAULT 0 COMMENT '已尝试次数',
+            max_attempts INT NOT NULL DEFAULT 3 COMMENT '最大尝试次数',
+            available_at DOUBLE NOT NULL COMMENT '可领取时间（Unix 时间戳）',
+            lease_token VARCHAR(32) DEFAULT NULL COMMENT '当前租约',
+            leased_by VARCHAR(128) DEFAULT NULL COMMENT '领取的 worker',
+            lease_expires_at DOUBLE DEFAULT NULL COMMENT '租约到期时间（Unix 时间戳）',
+            result MEDIUMTEXT COMMENT '执行结果（JSON）',
+            error TEXT COMMENT '最近一次错误',
+            created_at DOUBLE NOT NULL COMMENT '创建时间（Unix 时间戳）',
+            updated_at DOUBLE NOT NULL COMMENT '更新时间（Unix 时间戳）',
+            INDEX idx_jobs_status (status, available_at),
+            INDEX idx_jobs_lease (status, lease_expires_at)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+        """)
+
+    # ---------- 生产者 ----------
+
+    def enqueue(self, kind: str, payload: Dict = None, priority: int = 0, max_attempts: int = None,
+                delay: float = 0) -> int:
+        """添加任务，返回任务 ID
+
+        Args:
+            kind: 任务类型（worker 按类型查找处理函数）
+            payload: 任务参数（可 JSON 序列化）
+            priority: 优先级（大的先执行）
+            max_attempts: 最大尝试次数（默认 self.max_attempts）
+            delay: 延迟多少秒后才可领取
+        """
+        now = time.time()
+        return self._execute(
+            f"INSERT INTO {self.table_name} "
+            f"(kind, payload, status, priority, attempts, max_attempts, available_at, created_at, updated_at) "
+            f"VALUES (%s, %s, 'pending', %s, 0, %s, %s, %s, %s)",
+            (kind, json.dumps(payload or {}, ensure_ascii=False, default=str), priority,
+             max_attempts or self.max_attempts, now + delay, now, now),
+            fetch='id'
+        )
+
+    # ---------- worker ----------
+
+    def _expire(self, now: float) -> int:
+        """租约到期且已达到最大尝试次数的任务标记为失败"""
+        count = self._execute(
+            f"UPDATE {self.table_name} SET status = 'failed', lease_token = NULL, updated_at = %s, "
+            f"error = %s WHERE status = 'running' AND lease_expires_at < %s AND attempts >= max_attempts",
+            (now, '租约到期（worker 超时或已退出），已达到最大尝试次数', now)
+        )
+        if count:
+            logger.warning(f"⚠️ {count} 个任务租约到期且已达到最大尝试次数，标记为失败")
+        return count
+
+    def lease(self, worker_id: str = None, kinds: List[str] = None, visibility_timeout: float = None) -> Optional[Dict]:
+        """领取一个可执行的任务（没有时返回 None）
+
+        可领取的任务：等待中且已到可领取时间，或租约已到期的执行中任务。
+
+        Args:
+            worker_id: worker 标识（默认 主机名:进程号）
+            kinds: 只领取这些类型的任务（默认全部）
+            visibility_timeout: 租约时长（秒，默认 self.visibility_timeout）
+        """
+        worker_id = worker_id or default_worker_id()
+        visibility_timeout = visibility_timeout or self.visibility_timeout
+        now = time.time()
+        self._expire(now)
+
+        available = "((status = 'pending' AND available_at <= %s) OR (status = 'running' AND lease_expires_at < %s))"
+        kind_filter, kind_params = '', ()
+        if kinds:
+            kind_filter = f" AND kind IN ({', '.join(['%s'] * len(kinds))})"
+            kind_params = tuple(kinds)
+
+        rows = self._execute(
+            f"SELECT id FROM {self.table_name} WHERE {available}{kind_filter} "
+            f"ORDER BY priority DESC, id LIMIT %s",
+            (now, now) + kind_params + (LEASE_CANDIDATES,),
+            fetch='all'
+        )
+        for (job_id,) in rows:
+            token = uuid.uuid4().hex
+            # 条件更新：其他 worker 已领取（状态或租约变化）时影响 0 行，尝试下一个候选
+            leased = self._execute(
+                f"UPDATE {self.table_name} SET status = 'running', lease_token = %s, leased_by = %s, "
+                f"lease_expires_at = %s, attempts = attempts + 1, updated_at = %s "
+                f"WHERE id = %s AND {available}",
+                (token, worker_id, now + visibility_timeout, now, job_id, now, now)
+            )
+            if leased == 1:
+                job = self.get(job_id)
+                if job and job['lease_token'] == token:
+                    return job
+        return None
+
+    def heartbeat(self, job: Dict, visibility_timeout: float = None) -> bool:
+        """续租（返回 False 表示租约已被其他 worker 接管）"""
+        now = time.time()
+        return self._execute(
+            f"UPDATE {self.table_name} SET lease_expires_at = %s, updated_at = %s "
+            f"WHERE id = %s AND lease_token = %s AND status = 'running'",
+            (now + (visibility_timeout or self.visibility_timeout), now, job['id'], job['lease_token'])
+        ) == 1
+
+    def complete(self, job: Dict, result=None) -> bool:
+        """标记任务完成（返回 False 表示租约已被其他 worker 接管，结果不记录）"""
+        return self._execute(
+            f"UPDATE {self.table_name} SET status = 'done', result = %s, error = NULL, lease_token = NULL, "
+            f"lease_expires_at = NULL, updated_at = %s WHERE id = %s AND lease_token = %s",
+            (json.dumps(result, ensure_ascii=False, default=str), time.time(), job['id'], job['lease_token'])
+        ) == 1
+
+    def fail(self, job: Dict, error: str) -> str:
+        """任务执行失败：未达到最大尝试次数时延迟后重试
+
+        Returns:
+            新状态（'pending' / 'failed'），租约已被其他 worker 接管时为 'lost'
+        """
+        now = time.time()
+        if job['attempts'] >= job['max_attempts']:
+            status, available_at = 'failed', now
+        else:
+            status, available_at = 'pending', now + self.retry_delay * (2 ** (job['attempts'] - 1))
+        updated = self._execute(
+            f"UPDATE {self.table_name} SET status = %s, error = %s, available_at = %s, lease_token = NULL, "
+            f"lease_expires_at = NULL, updated_at = %s WHERE id = %s AND lease_token = %s",
+            (status, str(error)[:2000], available_at, now, job['id'], job['lease_token'])
+        )
+        return status if updated == 1 else 'lost'
+
+    # ---------- 查询 ----------
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        """按 ID 查询任务（payload / result 已解析）"""
+        with self._lock:
+            if not self.connection:
+                self.connect()
+            cursor = self.connection.cursor(pymysql.cursors.DictCursor)
+            try:
+                cursor.execute(f"SELECT * FROM {self.table_name} WHERE id = %s", (job_id,))
+                job = cursor.fetchone()
+                self.connection.commit()
+            finally:
+                cursor.close()
+        if job:
+            job['payload'] = json.loads(job['payload'])
+            job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """各类型任务的状态计数 {kind: {status: count}}"""
+        rows = self._execute(
+            f"SELECT kind, status, COUNT(*) FROM {self.table_name} GROUP BY kind, status",
+            fetch='all'
+        )
+        stats: Dict[str, Dict[str, int]] = {}
+        for kind, status, count in rows:
+            stats.setdefault(kind, {})[status] = count
+        return stats
+
+    def retry_failed(self, kind: str = None) -> int:
+        """失败的任务重新排队（尝试次数清零）"""
+        sql = (f"UPDATE {self.table_name} SET status = 'pending', attempts = 0, available_at = %s, updated_at = %s "
+               f"WHERE status = 'failed'")
+        now = time.time()
+        params = (now, now)
+        if kind:
+            sql += " AND kind = %s"
+            params += (kind,)
+        return self._execute(sql, params)
+
+    def purge(self, older_than: float) -> int:
+        """删除 older_than 秒之前完成的任务"""
+        return self._execute(
+            f"DELETE FROM {self.table_name} WHERE status = 'done' AND updated_at < %s",
+            (time.time() - older_than,)
+        )
+
+
+def _sqlite_queue() -> JobQueue:
+    from core.config import QUEUE_CONFIG
+
+    path = Path(QUEUE_CONFIG['path'])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return JobQueue({'engine': 'sqlite', 'database': str(path)})
+
+
+def _mysql_queue() -> JobQueue:
+    from core.utils import load_db_config
+
+    return JobQueue(load_db_config())
+
+
+# 队列后端：名称 -> 创建函数
+QUEUE_BACKENDS: Dict[str, Callable[[], JobQueue]] = {
+    'sqlite': _sqlite_queue,
+    'mysql': _mysql_queue,
+}
+
+
+def get_job_queue(backend: str = None) -> JobQueue:
+    """创建任务队列并建表
+
+    Args:
+        backend: 后端名称（默认 QUEUE_CONFIG['backend']）
+
+    Raises:
+        ValueError: 不支持的后端
+    """
+    from core.config import QUEUE_CONFIG
+
+    backend = backend or QUEUE_CONFIG['backend']
+    if backend not in QUEUE_BACKENDS:
+        raise ValueError(f"不支持的任务队列后端: {backend}。支持的后端: {list(QUEUE_BACKENDS)}")
+    queue = QUEUE_BACKENDS[backend]()
+    queue.connect()
+    queue.create_table()
+    return queue
@@ -0,0 +1,293 @@
+"""
+跨进程命名锁
+多个定时任务实例、常驻服务和手动执行的 fetch 同时爬取同一种彩票时，只有一个进程实际请求和入库，
+其他进程等待它完成并直接使用它的结果（run_once），不再重复爬取同样的期号范围、在入库时发现全部重复。
+
+- MySQL：GET_LOCK / RELEASE_LOCK（会话级锁，持有锁的连接断开时自动释放，多台机器共用），
+  结果保存在 lottery_lock_results 表
+- SQLite 替身（DB_ENGINE=sqlite）：data/locks/<名称>.lock 文件锁（fcntl.flock，Windows 为 msvcrt.locking，
+  进程退出时自动释放），结果按执行内容分别保存在同目录的 <名称>.<摘要>.result.json，只在本机有效
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+# 文件锁等待时的轮询间隔（秒）
+POLL_INTERVAL = 0.1
+
+# 单次 GET_LOCK 的最长等待（秒），小于数据库连接的读取超时（30 秒）
+MYSQL_WAIT_CHUNK = 20
+
+
+class LockTimeout(Exception):
+    """等待锁超时"""
+
+
+def _key_hash(key: str) -> str:
+    """执行内容标识的摘要（每种执行内容各保存一份结果，互不覆盖）"""
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+class NamedLock(ABC):
+    """命名锁基类（子类实现 acquire / release / publish_result / read_result）"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    @abstractmethod
+    def acquire(self, timeout: float = 0) -> bool:
+        """获取锁（timeout 为 0 时不等待），返回是否获取成功"""
+        pass
+
+    @abstractmethod
+    def release(self):
+        """释放锁"""
+        pass
+
+    @abstractmethod
+    def publish_result(self, key: str, result: Dict):
+        """发布本次执行的结果（key 标识执行内容，参数不同的等待者不使用该结果）"""
+        pass
+
+    @abstractmethod
+    def read_result(self, key: str, since: float) -> Optional[Dict]:
+        """since 之后发布的、key 相同的结果（没有时返回 None）"""
+        pass
+
+    def now(self) -> float:
+        """发布结果时记录的时间（since 使用同一时钟）"""
+        return time.time()
+
+    def run_once(self, func: Callable[[], Dict], key: str, wait: float) -> Dict:
+        """同一时间只有一个进程执行 func
+
+        锁空闲时执行 func 并发布结果；锁被其他进程持有时等待它完成，使用它发布的结果
+        （返回值带 'shared': True）。持有者失败或执行的内容不同（key 不同）时，拿到锁后自己执行。
+
+        Args:
+            func: 要执行的函数（返回可 JSON 序列化的字典，'success' 为 False 的结果不发布）
+            key: 执行内容的标识
+            wait: 等待其他进程的最长时间（秒）
+
+        Raises:
+            LockTimeout: 等待超时
+        """
+        if self.acquire(0):
+            return self._run_locked(func, key)
+
+        logger.info(f"⏳ {self.name} 正在由其他进程执行，等待其结果（最多 {wait:.0f}s）")
+        waiting_since = self.now()
+        started = time.monotonic()
+        if not self.acquire(wait):
+            raise LockTimeout(f"等待 {self.name} 超时（{wait:.0f}s）")
+        try:
+            shared = self.read_result(key, waiting_since)
+        except Exception:
+            self.release()
+            raise
+        if shared is not None:
+            self.release()
+            logger.info(f"♻️ {self.name} 已由其他进程完成，使用其结果（等待 {time.monotonic() - started:.1f}s）")
+            return {**shared, 'shared': True}
+        return self._run_locked(func, key)
+
+    def _run_locked(self, func: Callable[[], Dict], key: str) -> Dict:
+        """已持有锁：执行并发布结果后释放"""
+        try:
+            result = func()
+            if result.get('success', True):
+                try:
+                    self.publish_result(key, result)
+                except Exception as e:
+                    logger.warning(f"{self.name} 发布结果失败: {e}")
+            return result
+        finally:
+            self.release()
+
+
+class FileLock(NamedLock):
+    """文件锁（本机多个进程、同一进程内多个线程之间互斥）"""
+
+    def __init__(self, name: str, lock_dir: Path = None):
+        """
+        Args:
+            name: 锁名称
+            lock_dir: 锁文件目录（默认 data/locks）
+        """
+        super().__init__(name)
+        if lock_dir is None:
+            from core.config import DATA_DIR
+            lock_dir = DATA_DIR / 'locks'
+        self.lock_dir = Path(lock_dir)
+        safe_name = re.sub(r'[^\w.-]', '_', name)
+        self.path = self.lock_dir / f'{safe_name}.lock'
+        self.safe_name = safe_name
+        self._fd = None
+
+    def _result_path(self, key: str) -> Path:
+        return self.lock_dir / f'{self.safe_name}.{_key_hash(key)[:16]}.result.json'
+
+    def _try_lock(self, fd) -> bool:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self, timeout: float = 0) -> bool:
+        if self._fd is not None:
+            raise RuntimeError(f"{self.name} 已持有锁")
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        # 每次获取都使用新的文件描述符（flock 按打开的文件互斥，同一进程的不同线程也能互斥）
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        deadline = time.monotonic() + timeout
+        while not self._try_lock(fd):
+            if time.monotonic() >= deadline:
+                os.close(fd)
+                return False
+            time.sleep(POLL_INTERVAL)
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        fd, self._fd = self._fd, None
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+    def publish_result(self, key: str, result: Dict):
+        fd, tmp = tempfile.mkstemp(dir=self.lock_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'finished_at': time.time(), 'result': result}, f,
+                          ensure_ascii=False, default=str)
+            os.replace(tmp, self._result_path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def read_result(self, key: str, since: float) -> Optional[Dict]:
+        try:
+            published = json.loads(self._result_path(key).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        if published.get('key') == key and published.get('finished_at', 0) >= since:
+            return published['result']
+        return None
+
+
+class MySQLLock(NamedLock):
+    """MySQL GET_LOCK 锁（同一 MySQL 服务器上的所有客户端之间互斥，每个锁使用一个独立连接）"""
+
+    def __init__(self, name: str, db_config: Dict):
+        super().__init__(name)
+        from core.base_database import BaseDatabase
+
+        self.db = BaseDatabase(db_config)
+        # GET_LOCK 在整个 MySQL 服务器范围内生效，加上数据库名区分不同项目；名称最长 64 个字符
+        self.lock_name = f"lottery:{db_config.get('database')}:{name}"[:64]
+        self._held = False
+
+    def _query(self, sql: str, params: tuple = ()):
+        if not self.db.connection:
+            self.db.connect()
+        with self.db.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        self.db.connection.commit()
+        return row
+
+    def acquire(self, timeout: float = 0) -> bool:
+        if self._held:
+            raise RuntimeError(f"{self.name} 已持有锁")
+        # GET_LOCK 超时为整数秒，0 为不等待；返回 1 成功，0 超时。长时间等待分多次执行，避免连接读取超时
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = max(0, min(MYSQL_WAIT_CHUNK, math.ceil(deadline - time.monotonic())))
+            row = self._query("SELECT GET_LOCK(%s, %s)", (self.lock_name, wait))
+            self._held = bool(row and row[0] == 1)
+            if self._held or time.monotonic() >= deadline:
+                break
+        if not self._held:
+            self.db.close()
+            self.db.connection = None
+        return self._held
+
+    def release(self):
+        if not self._held:
+            return
+        self._held = False
+        try:
+            self._query("SELECT RELEASE_LOCK(%s)", (self.lock_name,))
+        finally:
+            # 断开连接也会释放锁
+            self.db.close()
+            self.db.connection = None
+
+    def _ensure_results_table(self):
+        self._query("""
+        CREATE TABLE IF NOT EXISTS lottery_lock_results (
+            name VARCHAR(64) NOT NULL COMMENT '锁名称',
+            share_key CHAR(40) NOT NULL COMMENT '执行内容标识的摘要',
+            result MEDIUMTEXT NOT NULL COMMENT '执行结果（JSON）',
+            finished_at DOUBLE NOT NULL COMMENT '完成时间（Unix 时间戳）',
+            PRIMARY KEY (name, share_key)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """)
+
+    def now(self) -> float:
+        # 使用 MySQL 服务器的时间，不同机器的时钟不一致时也能正确判断结果是否在等待开始之后发布
+        return float(self._query("SELECT UNIX_TIMESTAMP(NOW(6))")[0])
+
+    def publish_result(self, key: str, result: Dict):
+        self._ensure_results_table()
+        self._query(
+            "INSERT INTO lottery_lock_results (name, share_key, result, finished_at) "
+            "VALUES (%s, %s, %s, UNIX_TIMESTAMP(NOW(6))) "
+            "ON DUPLICATE KEY UPDATE result = VALUES(result), finished_at = VALUES(finished_at)",
+            (self.name, _key_hash(key), json.dumps(result, ensure_ascii=False, default=str))
+        )
+
+    def read_result(self, key: str, since: float) -> Optional[Dict]:
+        self._ensure_results_table()
+        row = self._query(
+            "SELECT result FROM lottery_lock_results WHERE name = %s AND share_key = %s AND finished_at >= %s",
+            (self.name, _key_hash(key), since)
+        )
+        return json.loads(row[0]) if row else None
+
+
+def named_lock(name: str) -> NamedLock:
+    """按数据库配置创建命名锁（MySQL 使用 GET_LOCK，SQLite 替身使用文件锁）"""
+    from core.utils import load_db_config
+
+    db_config = load_db_config()
+    if db_config.get('engine') == 'sqlite':
+        return FileLock(name)
+    return MySQLLock(name, db_config)
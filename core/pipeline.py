@@ -0,0 +1,354 @@
+"""
+爬取流水线
+下载 -> 解析 -> 规整 -> 批量入库 四个阶段通过有界队列连接，各自在线程中运行，
+全量/多年份爬取时网络等待与解析、入库同时进行，而不是逐段"下载完 -> 解析完 -> 入库完"
+
+- 下载：workers 个线程按规划的期号范围请求（经过域名限流器），得到页面文本
+- 解析：页面文本 -> 开奖记录
+- 规整：去掉数据库已有、本次已处理过（合并后的范围可能重叠）和缺少必要字段的记录
+- 入库：在调用线程中每凑满 batch_size 条写入一次（数据库连接不跨线程使用）
+
+队列已满时上游阻塞等待（背压），下载最多超前 queue_size 页，内存占用有上限；
+每个阶段统计处理数、耗时、等待上游和等待下游（背压）的时间，用于判断瓶颈。
+传入爬取日志时各阶段记录范围的进度（某个范围的记录全部写入后才标记为已入库）。
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Iterable, List
+
+import requests
+
+from core.crawl_journal import range_key, records_digest
+from core.error_handler import handle_network_error, handle_parse_error
+from core.response_cache import discard_cached, is_closed_range
+
+logger = logging.getLogger(__name__)
+
+# 队列结束标记
+_DONE = object()
+
+# 阻塞的队列操作检查停止信号的间隔（秒）
+_POLL_INTERVAL = 0.1
+
+# 规整阶段要求的字段
+REQUIRED_FIELDS = ('lottery_no', 'draw_date')
+
+
+class StageStats:
+    """单个阶段的计数器（下载阶段由多个线程共同更新）"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0      # 处理的任务数（页面 / 批次）
+        self.rows = 0       # 产出的记录数
+        self.busy = 0.0     # 处理耗时（秒）
+        self.idle = 0.0     # 等待上游的时间（秒）
+        self.blocked = 0.0  # 下游队列已满、等待写入的时间（秒）
+        self._lock = threading.Lock()
+
+    def add(self, **values):
+        with self._lock:
+            for field, value in values.items():
+                setattr(self, field, getattr(self, field) + value)
+
+    def as_dict(self) -> Dict:
+        return {
+            'items': self.items,
+            'rows': self.rows,
+            'busy': round(self.busy, 3),
+            'idle': round(self.idle, 3),
+            'blocked': round(self.blocked, 3),
+        }
+
+
+class FetchPipeline:
+    """下载 -> 解析 -> 规整 -> 入库 流水线（单个彩票类型）"""
+
+    STAGES = ('download', 'parse', 'normalize', 'insert')
+
+    def __init__(self, spider, db, workers: int = 1, queue_size: int = None,
+                 batch_size: int = None, known_nos: Iterable[str] = (), journal=None):
+        """
+        Args:
+            spider: 彩票爬虫实例（各下载线程共用，连接池 Session 按线程共享；请求速率由爬虫的域名限流器控制）
+            db: 数据库实例（只在调用 run() 的线程中使用）
+            workers: 下载线程数
+            queue_size: 各阶段之间队列的容量（默认 SPIDER_CONFIG['pipeline_queue_size']）
+            batch_size: 每次入库的条数（默认 SPIDER_CONFIG['batch_size']）
+            known_nos: 数据库中已有的期号（规整阶段直接丢弃，入库时不再逐批查询）
+            journal: 爬取日志（CrawlJournal），可选
+        """
+        from core.config import SPIDER_CONFIG
+
+        self.spider = spider
+        self.db = db
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size or SPIDER_CONFIG['pipeline_queue_size'])
+        self.batch_size = max(1, batch_size or SPIDER_CONFIG['batch_size'])
+        self.known_nos = set(known_nos)
+        self.journal = journal
+
+        self.stats = {name: StageStats(name) for name in self.STAGES}
+        self.failed_ranges: List[str] = []
+        self._failed_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._error = None
+
+    # ---------- 队列操作（计入等待时间，收到停止信号时放弃） ----------
+
+    def _put(self, q: queue.Queue, item, stats: StageStats) -> bool:
+        start = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                try:
+                    q.put(item, timeout=_POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            stats.add(blocked=time.perf_counter() - start)
+
+    def _get(self, q: queue.Queue, stats: StageStats):
+        start = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                try:
+                    return q.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+            return _DONE
+        finally:
+            stats.add(idle=time.perf_counter() - start)
+
+    def _fail(self, item: Dict, error: Exception):
+        with self._failed_lock:
+            self.failed_ranges.append(range_key(item))
+        self._mark(item, 'failed', error=str(error))
+
+    def _mark(self, item: Dict, status: str, **fields):
+        if self.journal is not None:
+            self.journal.mark(item, status, **fields)
+
+    # ---------- 各阶段 ----------
+
+    def _guard(self, stage, *args):
+        """运行一个阶段线程：意外错误时记录并通知所有阶段停止（run() 中重新抛出），线程退出不会让下游一直等待"""
+        try:
+            stage(*args)
+        except Exception as e:
+            logger.error(f"   ❌ 流水线线程 {threading.current_thread().name} 出错: {e}", exc_info=True)
+            if self._error is None:
+                self._error = e
+            self._stop.set()
+
+    def _download(self, ranges: queue.Queue, pages: queue.Queue):
+        stats = self.stats['download']
+        try:
+            while True:
+                item = self._get(ranges, stats)
+                if item is _DONE:
+                    return
+
+                url = self.spider._range_url(item['start'], item['end'])
+                start = time.perf_counter()
+                try:
+                    html = self.spider.get_text(url, permanent=is_closed_range(item['end']))
+                except requests.exceptions.RequestException as e:
+                    error_code = e.response.status_code if e.response is not None else 'NETWORK'
+                    handle_network_error(str(error_code), url, self.spider.LOTTERY_TYPE)
+                    logger.error(f"   ❌ {item['start']}-{item['end']} 下载失败: {e}")
+                    self._fail(item, e)
+                    continue
+                except Exception as e:
+                    # 缓存写入等非网络错误：该范围记为失败，继续下载其他范围
+                    logger.error(f"   ❌ {item['start']}-{item['end']} 下载失败: {e}")
+                    self._fail(item, e)
+                    continue
+                finally:
+                    stats.add(busy=time.perf_counter() - start)
+
+                stats.add(items=1)
+                self._mark(item, 'fetched', size=len(html))
+                if not self._put(pages, (item, url, html), stats):
+                    return
+        finally:
+            # 每个下载线程退出时都发送结束标记，解析阶段按下载线程数计数
+            self._put(pages, _DONE, stats)
+
+    def _parse(self, pages: queue.Queue, records: queue.Queue):
+        stats = self.stats['parse']
+        try:
+            self._parse_pages(pages, records, stats)
+        finally:
+            self._put(records, _DONE, stats)
+
+    def _parse_pages(self, pages: queue.Queue, records: queue.Queue, stats: StageStats):
+        remaining = self.workers
+        while remaining:
+            page = self._get(pages, stats)
+            if page is _DONE:
+                remaining -= 1
+                continue
+
+            item, url, html = page
+            start = time.perf_counter()
+            try:
+                data = self.spider._parse_html(html)
+            except Exception as e:
+                handle_parse_error(f"数据解析失败: {str(e)}", self.spider.LOTTERY_TYPE, '500.com')
+                logger.error(f"   ❌ {item['start']}-{item['end']} 解析失败: {e}")
+                self._fail(item, e)
+                continue
+            finally:
+                stats.add(busy=time.perf_counter() - start)
+
+            self._mark(item, 'parsed', rows=len(data), digest=records_digest(data))
+            if not data:
+                discard_cached(url)
+                logger.warning(f"   ⚠️ {item['start']}-{item['end']} 无数据，跳过")
+                self._mark(item, 'inserted', inserted=0)
+                continue
+
+            stats.add(items=1, rows=len(data))
+            if not self._put(records, (item, data), stats):
+                return
+
+    def _normalize(self, records: queue.Queue, rows: queue.Queue):
+        stats = self.stats['normalize']
+        try:
+            self._normalize_records(records, rows, stats)
+        finally:
+            self._put(rows, _DONE, stats)
+
+    def _normalize_records(self, records: queue.Queue, rows: queue.Queue, stats: StageStats):
+        seen = set(self.known_nos)
+        while True:
+            message = self._get(records, stats)
+            if message is _DONE:
+                return
+
+            item, data = message
+            start = time.perf_counter()
+            fresh = []
+            for record in data:
+                if any(not record.get(field) for field in REQUIRED_FIELDS):
+                    logger.debug(f"数据缺少必要字段，跳过: {record}")
+                    continue
+                if record['lottery_no'] in seen:
+                    continue
+                seen.add(record['lottery_no'])
+                fresh.append(record)
+            stats.add(items=1, rows=len(fresh), busy=time.perf_counter() - start)
+
+            if not fresh:
+                # 全部已在数据库中，无需入库
+                self._mark(item, 'inserted', inserted=0)
+            elif not self._put(rows, (item, fresh), stats):
+                return
+
+    def _insert(self, rows: queue.Queue) -> int:
+        """入库阶段（在调用线程中运行）"""
+        stats = self.stats['insert']
+        inserted = 0
+        batch = []   # [(范围键, 记录), ...]，一批可能包含多个范围的记录
+        pending = {}  # 范围键 -> [范围, 尚未写入的条数, 已写入的条数]
+
+        def flush(data: List) -> int:
+            start = time.perf_counter()
+            # 已有期号在规整阶段去掉，不再逐批查询是否存在（重复时由唯一键兜底）
+            count, _, _ = self.db.insert_lottery_data([record for _, record in data], skip_existing=False)
+            stats.add(items=1, rows=len(data), busy=time.perf_counter() - start)
+
+            for key, _ in data:
+                pending[key][1] -= 1
+                pending[key][2] += 1
+                if not pending[key][1]:
+                    item, _, written = pending.pop(key)
+                    self._mark(item, 'inserted', inserted=written)
+            return count
+
+        while True:
+            message = self._get(rows, stats)
+            if message is _DONE:
+                break
+            item, data = message
+            key = range_key(item)
+            pending[key] = [item, len(data), 0]
+            batch.extend((key, record) for record in data)
+            while len(batch) >= self.batch_size:
+                inserted += flush(batch[:self.batch_size])
+                batch = batch[self.batch_size:]
+        if batch:
+            inserted += flush(batch)
+        return inserted
+
+    # ---------- 运行 ----------
+
+    def run(self, plan: List[Dict]) -> Dict:
+        """按规划的期号范围运行流水线
+
+        Args:
+            plan: plan_fetch_ranges() 的结果 [{'start': ..., 'end': ...}, ...]
+
+        Returns:
+            {'fetched': 解析出的条数, 'inserted': 新增条数, 'skipped': 规整阶段丢弃的条数,
+             'failed_ranges': 失败的范围, 'elapsed': 总耗时, 'stages': 各阶段计数}
+        """
+        ranges = queue.Queue()
+        for item in plan:
+            ranges.put(item)
+        for _ in range(self.workers):
+            ranges.put(_DONE)
+
+        pages = queue.Queue(self.queue_size)
+        records = queue.Queue(self.queue_size)
+        rows = queue.Queue(self.queue_size)
+
+        lottery_type = self.spider.LOTTERY_TYPE
+        threads = [
+            threading.Thread(target=self._guard, args=(self._download, ranges, pages),
+                             name=f'pipeline-{lottery_type}-download-{i}', daemon=True)
+            for i in range(self.workers)
+        ]
+        threads.append(threading.Thread(target=self._guard, args=(self._parse, pages, records),
+                                        name=f'pipeline-{lottery_type}-parse', daemon=True))
+        threads.append(threading.Thread(target=self._guard, args=(self._normalize, records, rows),
+                                        name=f'pipeline-{lottery_type}-normalize', daemon=True))
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        try:
+            inserted = self._insert(rows)
+        except BaseException:
+            # 入库出错时通知上游线程停止，不再阻塞在已满的队列上
+            self._stop.set()
+            raise
+        finally:
+            for thread in threads:
+                thread.join()
+        if self._error is not None:
+            raise self._error
+        elapsed = time.perf_counter() - start
+
+        fetched = self.stats['parse'].rows
+        return {
+            'fetched': fetched,
+            'inserted': inserted,
+            'skipped': fetched - self.stats['normalize'].rows,
+            'failed_ranges': sorted(self.failed_ranges),
+            'elapsed': elapsed,
+            'stages': {name: stats.as_dict() for name, stats in self.stats.items()},
+        }
+
+    def log_stats(self):
+        """输出各阶段计数（耗时最长的阶段即瓶颈）"""
+        labels = {'download': '下载', 'parse': '解析', 'normalize': '规整', 'insert': '入库'}
+        for name in self.STAGES:
+            stats = self.stats[name]
+            logger.info(f"   {labels[name]}: {stats.items} 次, {stats.rows} 条, 处理 {stats.busy:.2f}s, "
+                        f"等待上游 {stats.idle:.2f}s, 等待下游 {stats.blocked:.2f}s")
@@ -0,0 +1,96 @@
+"""
+请求限流
+令牌桶限流器，按域名共享：同一进程内访问同一域名的所有线程共用一个令牌桶，
+并发爬取时总请求速率仍受控
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """令牌桶（线程安全）
+
+    令牌以 rate 个/秒的速度补充，最多积累 capacity 个；
+    每次请求消耗一个令牌，没有令牌时等待。
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        """
+        Args:
+            rate: 每秒补充的令牌数（即长期平均请求速率）
+            capacity: 桶容量（允许的突发请求数）
+        """
+        if rate <= 0:
+            raise ValueError(f"限流速率必须大于 0: {rate}")
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """获取一个令牌（必要时阻塞等待）
+
+        Args:
+            timeout: 最长等待时间（秒），None 表示一直等待
+
+        Returns:
+            True 表示获取成功，False 表示超时
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+# 域名 -> 令牌桶
+_host_limiters: Dict[str, TokenBucket] = {}
+_registry_lock = threading.Lock()
+
+
+def get_host_limiter(url: str, rate: float = None, capacity: int = None) -> TokenBucket:
+    """获取域名对应的限流器（同一域名只创建一次）
+
+    Args:
+        url: 请求地址或域名
+        rate: 每秒请求数（默认读取 SPIDER_CONFIG['rate_limit']）
+        capacity: 突发请求数（默认读取 SPIDER_CONFIG['rate_burst']）
+
+    Returns:
+        令牌桶
+    """
+    host = urlparse(url).netloc or url
+
+    with _registry_lock:
+        limiter = _host_limiters.get(host)
+        if limiter is None:
+            from core.config import SPIDER_CONFIG
+            rate = rate or SPIDER_CONFIG['rate_limit']
+            capacity = capacity or SPIDER_CONFIG['rate_burst']
+            limiter = TokenBucket(rate, capacity)
+            _host_limiters[host] = limiter
+            logger.info(f"创建限流器: {host}，{rate} 次/秒，突发 {capacity} 次")
+        return limiter
@@ -0,0 +1,320 @@
+"""
+HTTP 响应磁盘缓存
+按 URL（含查询参数）缓存爬虫请求的响应体，避免全量爬取时反复下载不会再变化的历史数据页面
+
+- 已结束年份的期号范围（结束期号所在年份早于今年）：开奖结果不会再变，永久缓存
+- 其他请求（当年范围、最新数据）：TTL（SPIDER_CACHE_TTL）内直接使用缓存，
+  过期后带 If-None-Match / If-Modified-Since 条件请求，服务器返回 304 时继续使用缓存
+- 每条缓存由元数据 <key>.json 和 gzip 压缩的响应体 <key>.body.gz 组成，
+  先写临时文件再替换，中途失败或被中断不会留下不完整的缓存
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+import requests
+
+from core.html_parser import decode_chunks, iter_response_text, STREAM_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+def is_closed_range(end_issue: Optional[str], current_year: int = None) -> bool:
+    """期号范围是否已结束（结束期号所在年份早于今年，该范围的开奖结果不会再变化）
+
+    Args:
+        end_issue: 结束期号（5 位或 7 位），None 表示不限
+        current_year: 当前年份（默认今年）
+    """
+    if not end_issue:
+        return False
+    end_issue = str(end_issue)
+    year = 2000 + int(end_issue[-5:-3])
+    return year < (current_year or datetime.now().year)
+
+
+class ResponseCache:
+    """HTTP 响应磁盘缓存（线程安全：每条缓存独立文件，原子替换）"""
+
+    def __init__(self, cache_dir: Path = None, ttl: float = None):
+        """
+        Args:
+            cache_dir: 缓存目录（默认 data/cache/http）
+            ttl: 非永久缓存的有效期（秒，默认 SPIDER_CONFIG['cache_ttl']）
+        """
+        if cache_dir is None:
+            from core.config import CACHE_DIR
+            cache_dir = CACHE_DIR / 'http'
+        if ttl is None:
+            from core.config import SPIDER_CONFIG
+            ttl = SPIDER_CONFIG['cache_ttl']
+
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.stats = {'hit': 0, 'revalidated': 0, 'miss': 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url: str) -> str:
+        """缓存键（URL 的 SHA-1）"""
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def _paths(self, key: str):
+        return self.cache_dir / f'{key}.json', self.cache_dir / f'{key}.body.gz'
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def load(self, url: str) -> Optional[Dict]:
+        """读取缓存元数据（不存在或已损坏时返回 None）"""
+        meta_path, body_path = self._paths(self.key(url))
+        if not (meta_path.exists() and body_path.exists()):
+            return None
+        try:
+            return json.loads(meta_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, meta: Dict, permanent: bool = False) -> bool:
+        """缓存是否可以不经请求直接使用
+
+        当年写入的非永久缓存在年份结束后可能不完整，以永久方式请求时需要先重新验证。
+        """
+        if meta.get('permanent'):
+            return True
+        if permanent:
+            return False
+        return time.time() - meta.get('fetched_at', 0) < self.ttl
+
+    def discard(self, url: str):
+        """删除一条缓存（如响应中没有解析出数据时）"""
+        for path in self._paths(self.key(url)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def validators(meta: Optional[Dict]) -> Dict:
+        """条件请求头（If-None-Match / If-Modified-Since）"""
+        headers = {}
+        if meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def touch(self, url: str, meta: Dict, permanent: bool = False):
+        """服务器返回 304 时刷新缓存时间（以永久方式请求时升级为永久缓存）"""
+        self._count('revalidated')
+        logger.info(f"响应未变化，使用缓存: {url}")
+        meta.update(fetched_at=time.time(), permanent=meta.get('permanent') or permanent)
+        self._write_meta(self.key(url), meta)
+
+    def read_text(self, url: str, meta: Dict) -> str:
+        """读取缓存的响应文本"""
+        chunks = self._iter_body(self.key(url), STREAM_CHUNK_SIZE)
+        return ''.join(decode_chunks(chunks, meta.get('content_type', '')))
+
+    @staticmethod
+    def _meta(url: str, headers, permanent: bool) -> Dict:
+        return {
+            'url': url,
+            'permanent': permanent,
+            'fetched_at': time.time(),
+            'content_type': headers.get('Content-Type', ''),
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+        }
+
+    def store(self, url: str, body: bytes, headers, permanent: bool = False):
+        """写入一条完整的响应（供不经过 requests 的请求方式使用，如异步爬虫引擎）
+
+        Args:
+            url: 完整请求地址
+            body: 响应体
+            headers: 响应头（需支持 .get()）
+            permanent: 是否永久缓存
+        """
+        self._count('miss')
+        key = self.key(url)
+        _, body_path = self._paths(key)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                f.write(body)
+            os.replace(tmp, body_path)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        self._write_meta(key, self._meta(url, headers, permanent))
+
+    def _write_meta(self, key: str, meta: Dict):
+        meta_path, _ = self._paths(key)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, meta_path)
+
+    def _iter_body(self, key: str, chunk_size: int) -> Iterator[bytes]:
+        _, body_path = self._paths(key)
+        with gzip.open(body_path, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def _tee(self, url: str, response: requests.Response, permanent: bool, chunk_size: int) -> Iterator[bytes]:
+        """边读取响应体边写入临时文件，读取完整后才替换为正式缓存
+
+        调用方提前停止读取（如解析到数据表格结束）时，剩余内容仍会读完写入缓存；
+        读取出错时丢弃临时文件。
+        """
+        key = self.key(url)
+        _, body_path = self._paths(key)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        completed = False
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                chunks = response.iter_content(chunk_size=chunk_size)
+                try:
+                    for chunk in chunks:
+                        f.write(chunk)
+                        yield chunk
+                except GeneratorExit:
+                    try:
+                        for chunk in chunks:
+                            f.write(chunk)
+                    except requests.RequestException:
+                        return
+            os.replace(tmp, body_path)
+            completed = True
+            self._write_meta(key, self._meta(url, response.headers, permanent))
+        finally:
+            if not completed and os.path.exists(tmp):
+                os.unlink(tmp)
+
+    def iter_text(self, session: requests.Session, url: str, permanent: bool = False,
+                  chunk_size: int = STREAM_CHUNK_SIZE, **kwargs) -> Iterator[str]:
+        """按块获取响应文本（优先使用缓存）
+
+        Args:
+            session: requests 会话
+            url: 完整请求地址（含查询参数）
+            permanent: 是否永久缓存（已结束年份的期号范围）
+            chunk_size: 每块字节数
+            **kwargs: 传给 session.get() 的其他参数（headers、timeout 等）
+
+        Yields:
+            解码后的文本块
+
+        Raises:
+            requests.RequestException: 请求失败
+        """
+        key = self.key(url)
+        meta = self.load(url)
+
+        if meta and self.is_fresh(meta, permanent):
+            self._count('hit')
+            logger.info(f"使用响应缓存: {url}")
+            yield from decode_chunks(self._iter_body(key, chunk_size), meta.get('content_type', ''))
+            return
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        headers.update(self.validators(meta))
+
+        with session.get(url, headers=headers, stream=True, **kwargs) as response:
+            if meta and response.status_code == 304:
+                self.touch(url, meta, permanent)
+                yield from decode_chunks(self._iter_body(key, chunk_size), meta.get('content_type', ''))
+                return
+
+            response.raise_for_status()
+            self._count('miss')
+            body = self._tee(url, response, permanent, chunk_size)
+            try:
+                yield from decode_chunks(body, response.headers.get('Content-Type', ''))
+            finally:
+                body.close()
+
+    def get_text(self, session: requests.Session, url: str, permanent: bool = False, **kwargs) -> str:
+        """获取完整响应文本（优先使用缓存），参数同 iter_text()"""
+        return ''.join(self.iter_text(session, url, permanent, **kwargs))
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """获取进程内共享的响应缓存（SPIDER_CACHE 关闭或处于录制/回放模式时返回 None）"""
+    global _default_cache
+    from core.config import SPIDER_CONFIG
+
+    # 录制/回放模式下每个请求都要经过传输层
+    if not SPIDER_CONFIG['cache'] or SPIDER_CONFIG['fixtures']:
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
+
+
+def cached_get(session: requests.Session, url: str, permanent: bool = False, **kwargs) -> str:
+    """GET 请求并返回响应文本，启用缓存时优先使用缓存
+
+    Raises:
+        requests.RequestException: 请求失败
+    """
+    cache = get_response_cache()
+    if cache is not None:
+        return cache.get_text(session, url, permanent, **kwargs)
+
+    response = session.get(url, **kwargs)
+    response.raise_for_status()
+    return response.text
+
+
+def cached_stream(session: requests.Session, url: str, permanent: bool = False, **kwargs) -> Iterator[str]:
+    """流式 GET 请求并按块产出响应文本，启用缓存时优先使用缓存
+
+    Raises:
+        requests.RequestException: 请求失败
+    """
+    cache = get_response_cache()
+    if cache is not None:
+        yield from cache.iter_text(session, url, permanent, **kwargs)
+        return
+
+    with session.get(url, stream=True, **kwargs) as response:
+        response.raise_for_status()
+        yield from iter_response_text(response)
+
+
+def is_cached(url: str, permanent: bool = False) -> bool:
+    """是否有可以不经请求直接使用的缓存（缓存关闭时返回 False）"""
+    cache = get_response_cache()
+    if cache is None:
+        return False
+    meta = cache.load(url)
+    return meta is not None and cache.is_fresh(meta, permanent)
+
+
+def discard_cached(url: str):
+    """删除一条缓存（缓存关闭时不做任何事）"""
+    cache = get_response_cache()
+    if cache is not None:
+        cache.discard(url)
@@ -0,0 +1,126 @@
+"""
+运行状态
+记录每种彩票最近一次处理到的期号、该期的预测结果和已发送通知的期号，保存在 data/state/run_state.json：
+
+- 预测结果按 最新期号 + 预测配置（策略、条数、多样性选号参数）缓存，没有新开奖时直接使用缓存，
+  不再读取全部历史数据重新预测
+- 同一期的预测只发送一次 Telegram 通知，定时任务重复执行不会重复发送
+
+多个线程（定时任务并行执行）共用同一个实例；每次更新前重新读取文件，再整体写入临时文件后替换，
+另一个进程（手动执行的命令）同时更新时不会损坏文件。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def prediction_config_key() -> str:
+    """当前预测配置的摘要（配置变化后缓存的预测失效）"""
+    from core.config import DEFAULT_STRATEGIES, DEFAULT_PREDICTION_COUNT, PREDICTION_OVERSAMPLE, DIVERSITY_METRIC
+
+    config = {
+        'strategies': DEFAULT_STRATEGIES,
+        'count': DEFAULT_PREDICTION_COUNT,
+        'oversample': PREDICTION_OVERSAMPLE,
+        'metric': DIVERSITY_METRIC,
+    }
+    canonical = json.dumps(config, sort_keys=True)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+class RunState:
+    """各彩票类型的运行状态"""
+
+    def __init__(self, path: Path = None):
+        """
+        Args:
+            path: 状态文件（默认 data/state/run_state.json）
+        """
+        if path is None:
+            from core.config import DATA_DIR
+            path = DATA_DIR / 'state' / 'run_state.json'
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict:
+        if self.path.exists():
+            try:
+                return json.loads(self.path.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                logger.warning(f"运行状态文件损坏，重新记录: {self.path} ({e})")
+        return {}
+
+    def _save(self, state: Dict):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False, indent=2, default=str)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _update(self, lottery_type: str, **fields):
+        with self._lock:
+            state = self._load()
+            entry = state.setdefault(lottery_type, {})
+            entry.update(fields)
+            entry['updated_at'] = datetime.now().isoformat(timespec='seconds')
+            self._save(state)
+
+    def get(self, lottery_type: str) -> Dict:
+        """某种彩票的运行状态（没有记录时为空字典）"""
+        with self._lock:
+            return self._load().get(lottery_type, {})
+
+    def get_predictions(self, lottery_type: str, issue: str) -> Optional[List[Dict]]:
+        """缓存的预测结果（期号或预测配置不同时返回 None）"""
+        cached = self.get(lottery_type).get('prediction')
+        if cached and cached.get('issue') == issue and cached.get('config') == prediction_config_key():
+            return cached['predictions']
+        return None
+
+    def save_predictions(self, lottery_type: str, issue: str, predictions: List[Dict]):
+        """缓存某一期的预测结果（空结果不缓存，下次重新预测）"""
+        if not predictions:
+            return
+        self._update(lottery_type, last_issue=issue, prediction={
+            'issue': issue,
+            'config': prediction_config_key(),
+            'predictions': predictions,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+        })
+
+    def is_notified(self, lottery_type: str, issue: str) -> bool:
+        """该期的预测是否已发送通知"""
+        return self.get(lottery_type).get('notified_issue') == issue
+
+    def mark_notified(self, lottery_type: str, issue: str):
+        self._update(lottery_type, notified_issue=issue)
+
+
+_run_state: Optional[RunState] = None
+_run_state_lock = threading.Lock()
+
+
+def get_run_state() -> Optional[RunState]:
+    """共用的运行状态（SCHEDULE_RUN_STATE=false 时返回 None，每次都重新预测和通知）"""
+    global _run_state
+    from core.config import SCHEDULE_CONFIG
+
+    if not SCHEDULE_CONFIG['run_state']:
+        return None
+    with _run_state_lock:
+        if _run_state is None:
+            _run_state = RunState()
+        return _run_state
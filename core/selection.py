@@ -0,0 +1,154 @@
+"""
+多样性选号
+从过采样的候选号码中挑选彼此差异最大的若干注（最大化最小距离），
+避免多注号码共享大部分号码
+
+- 每注号码编码为位掩码（组合型：主号码区 + 附加号码区；七星彩：位置 × 数字，共 70 位）
+- 距离：汉明距离（异或后计数）或 Jaccard 距离（1 - 交集/并集）
+- 贪心最远点：每选一注只需计算它到全部候选的距离并更新最小距离，
+  复杂度 O(选出注数 × 候选数)，10 万候选也能快速完成
+"""
+
+import logging
+from typing import List, Dict, Iterator, Optional
+
+import numpy as np
+
+from core.draw_history import get_layout, _as_ints
+from core.ticket_codec import TicketCodec, popcount
+
+logger = logging.getLogger(__name__)
+
+# 支持的距离度量
+METRICS = ('hamming', 'jaccard')
+
+
+def ticket_masks(lottery_type: str, tickets: List[Dict]) -> np.ndarray:
+    """把号码编码为位掩码
+
+    Args:
+        lottery_type: 彩票类型
+        tickets: 号码列表（预测结果字典）
+
+    Returns:
+        (注数, 字数) 的 uint64 矩阵
+    """
+    layout = get_layout(lottery_type)
+    main_low, main_high = layout['main_range']
+    main_size = main_high - main_low + 1
+
+    bits = []
+    for ticket in tickets:
+        main = _as_ints(ticket[layout['main_key']])
+        if layout['positional']:
+            # 第 p 位数字 d 对应第 p * 10 + d 位
+            row = [pos * main_size + (d - main_low) for pos, d in enumerate(main)]
+        else:
+            row = [b - main_low for b in main]
+            if layout['extra_key']:
+                extra_low = layout['extra_range'][0]
+                row += [main_size + b - extra_low for b in _as_ints(ticket[layout['extra_key']])]
+        bits.append(row)
+
+    if layout['positional']:
+        total_bits = main_size * layout['main_count']
+    else:
+        extra_low, extra_high = layout['extra_range']
+        total_bits = main_size + extra_high - extra_low + 1
+    words = (total_bits + 63) // 64
+
+    index = np.array(bits, dtype=np.int64).reshape(len(tickets), -1)
+    masks = np.zeros((len(tickets), words), dtype=np.uint64)
+    rows = np.repeat(np.arange(len(tickets)), index.shape[1])
+    values = np.left_shift(np.uint64(1), (index % 64).astype(np.uint64)).ravel()
+    np.bitwise_or.at(masks, (rows, (index // 64).ravel()), values)
+    return masks
+
+
+def _distances(masks: np.ndarray, i: int, metric: str) -> np.ndarray:
+    """第 i 注到所有候选的距离"""
+    target = masks[i]
+    if metric == 'hamming':
+        return popcount(masks ^ target).sum(axis=1)
+    inter = popcount(masks & target).sum(axis=1)
+    union = popcount(masks | target).sum(axis=1)
+    return 1.0 - inter / np.maximum(union, 1)
+
+
+def select_diverse(lottery_type: str, candidates: List[Dict], count: int,
+                   metric: str = 'hamming') -> List[Dict]:
+    """从候选号码中挑选彼此差异最大的若干注
+
+    第一注取候选列表的第一注（保留策略给出的顺序），之后每次选择
+    与已选号码最小距离最大的候选，同距离时取靠前的候选。
+
+    Args:
+        lottery_type: 彩票类型
+        candidates: 候选号码（预测结果字典，应已去重）
+        count: 选出注数
+        metric: 距离度量 ('hamming' 或 'jaccard')
+
+    Returns:
+        选中的号码（按选择顺序）
+    """
+    if metric not in METRICS:
+        raise ValueError(f"不支持的距离度量: {metric}。支持的度量: {list(METRICS)}")
+    if count >= len(candidates):
+        return list(candidates)
+    if count <= 0:
+        return []
+
+    masks = ticket_masks(lottery_type, candidates)
+    selected = [0]
+    min_dist = _distances(masks, 0, metric).astype(np.float64)
+    min_dist[0] = -1
+
+    while len(selected) < count:
+        best = int(np.argmax(min_dist))
+        selected.append(best)
+        np.minimum(min_dist, _distances(masks, best, metric), out=min_dist)
+        min_dist[selected] = -1
+
+    # 对比直接截取前 count 注的最小距离
+    def min_pairwise(indices):
+        sub = masks[indices]
+        return min(float(_distances(sub, j, metric)[j + 1:].min()) for j in range(len(indices) - 1))
+
+    if count > 1:
+        logger.info(f"多样性选号: 候选 {len(candidates)} 注，选出 {count} 注，"
+                    f"最小{metric}距离 {min_pairwise(selected):.2f}（直接截取为 {min_pairwise(list(range(count))):.2f}）")
+
+    return [candidates[i] for i in selected]
+
+
+def collect_candidates(lottery_type: str, tickets: Iterator[Dict], size: int,
+                       max_attempts: Optional[int] = None) -> List[Dict]:
+    """从号码生成器中收集指定数量的不重复候选号码
+
+    Args:
+        lottery_type: 彩票类型
+        tickets: 号码生成器（如预测器的 iter_predictions()，产出的 None 表示被排除的号码，只计入尝试次数）
+        size: 候选数量
+        max_attempts: 最多尝试次数（默认 size * 20）
+
+    Returns:
+        候选号码列表（按生成顺序）
+    """
+    codec = TicketCodec(lottery_type)
+    max_attempts = max_attempts or size * 20
+    seen = set()
+    candidates = []
+
+    for attempts, ticket in enumerate(tickets, 1):
+        if ticket is not None:
+            code = codec.encode(ticket)
+            if code not in seen:
+                seen.add(code)
+                candidates.append(ticket)
+                if len(candidates) >= size:
+                    break
+        if attempts >= max_attempts:
+            logger.warning(f"尝试 {attempts} 次只收集到 {len(candidates)} 个不重复候选")
+            break
+
+    return candidates
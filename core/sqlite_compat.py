@@ -0,0 +1,160 @@
+"""
+SQLite 替身数据库
+提供与 pymysql 连接相同接口的 SQLite 连接，各彩票的数据库类（按 MySQL 语法编写）无需修改即可在
+SQLite 上运行，用于没有 MySQL 服务的本地调试、基准测试和 CI
+
+在 .env 中设置 DB_ENGINE=sqlite 启用（数据库文件为 SQLITE_PATH，默认 data/lottery.db）。
+只转换本项目用到的 MySQL 语法：
+- %s 占位符 -> ?
+- 建表语句：AUTO_INCREMENT 主键、COMMENT、ENGINE/CHARSET 表选项、ON UPDATE 子句，
+  表内 INDEX 定义拆分为独立的 CREATE INDEX
+- INSERT ... ON DUPLICATE KEY UPDATE -> INSERT OR IGNORE（期号已存在时不插入）
+- NOW() -> CURRENT_TIMESTAMP
+- SET SESSION 语句忽略
+"""
+
+import logging
+import re
+import sqlite3
+from datetime import date, datetime
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+_SET_SESSION_RE = re.compile(r'^\s*SET\s+SESSION\b', re.I)
+_CREATE_TABLE_RE = re.compile(r'CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)', re.I)
+_INDEX_RE = re.compile(r',?\s*\bINDEX\s+(\w+)\s*\(([^)]*)\)', re.I)
+_TABLE_OPTIONS_RE = re.compile(r'\)\s*ENGINE\s*=.*$', re.I | re.S)
+_COMMENT_RE = re.compile(r"\s+COMMENT\s+'(?:[^'\\]|\\.)*'", re.I)
+_AUTO_INCREMENT_RE = re.compile(r'\bINT\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b', re.I)
+_ON_UPDATE_RE = re.compile(r'\s+ON\s+UPDATE\s+CURRENT_TIMESTAMP\b', re.I)
+_ON_DUPLICATE_RE = re.compile(r'\s+ON\s+DUPLICATE\s+KEY\s+UPDATE\b.*$', re.I | re.S)
+_INSERT_RE = re.compile(r'^\s*INSERT\s+INTO\b', re.I)
+_NOW_RE = re.compile(r'\bNOW\(\)', re.I)
+
+
+def translate_sql(sql: str) -> List[str]:
+    """MySQL 语句 -> SQLite 语句列表（SET SESSION 返回空列表）"""
+    if _SET_SESSION_RE.match(sql):
+        return []
+
+    sql = _NOW_RE.sub('CURRENT_TIMESTAMP', sql.replace('%s', '?'))
+
+    create = _CREATE_TABLE_RE.search(sql)
+    if create:
+        table = create.group(1)
+        indexes = [f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({cols})"
+                   for name, cols in _INDEX_RE.findall(sql)]
+        sql = _INDEX_RE.sub('', sql)
+        sql = _TABLE_OPTIONS_RE.sub(')', sql)
+        sql = _COMMENT_RE.sub('', sql)
+        sql = _AUTO_INCREMENT_RE.sub('INTEGER PRIMARY KEY AUTOINCREMENT', sql)
+        sql = _ON_UPDATE_RE.sub('', sql)
+        return [sql.strip().rstrip(';')] + indexes
+
+    if _ON_DUPLICATE_RE.search(sql):
+        sql = _INSERT_RE.sub('INSERT OR IGNORE INTO', _ON_DUPLICATE_RE.sub('', sql))
+
+    return [sql]
+
+
+def _adapt(params):
+    """参数转换（日期时间转为字符串，与 MySQL 返回的格式一致）"""
+    if params is None:
+        return ()
+    return tuple(
+        value.strftime('%Y-%m-%d %H:%M:%S') if isinstance(value, datetime)
+        else value.isoformat() if isinstance(value, date)
+        else value
+        for value in params
+    )
+
+
+class SQLiteCursor:
+    """pymysql 游标的 SQLite 替身（支持元组行和字典行）"""
+
+    def __init__(self, cursor: sqlite3.Cursor, as_dict: bool = False):
+        self._cursor = cursor
+        self._as_dict = as_dict
+        self.rowcount = -1
+
+    def _row(self, row):
+        if row is None or not self._as_dict:
+            return row
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+    def execute(self, sql: str, params=None) -> int:
+        statements = translate_sql(sql)
+        for i, statement in enumerate(statements):
+            # 建表语句拆分出的 CREATE INDEX 不带参数
+            self._cursor.execute(statement, _adapt(params) if i == 0 else ())
+        self.rowcount = self._cursor.rowcount if statements else 0
+        return self.rowcount
+
+    def executemany(self, sql: str, seq_of_params) -> int:
+        (statement,) = translate_sql(sql)
+        self._cursor.executemany(statement, [_adapt(params) for params in seq_of_params])
+        self.rowcount = self._cursor.rowcount
+        return self.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchall(self) -> list:
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SQLiteConnection:
+    """pymysql 连接的 SQLite 替身"""
+
+    def __init__(self, path: str = ':memory:'):
+        """
+        Args:
+            path: 数据库文件路径（':memory:' 为内存数据库）
+        """
+        self.path = str(path)
+        # 与 pymysql 一致，连接可在其他线程中使用（调用方负责不并发使用）
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL 模式下每次提交不必等待整库 fsync（内存数据库忽略该设置）
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+
+    def cursor(self, cursor_class=None) -> SQLiteCursor:
+        """创建游标（cursor_class 为 pymysql.cursors.DictCursor 时返回字典行）"""
+        as_dict = cursor_class is not None and 'Dict' in getattr(cursor_class, '__name__', '')
+        return SQLiteCursor(self._conn.cursor(), as_dict)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self, reconnect: bool = True):
+        pass
+
+    def close(self):
+        self._conn.close()
+
+
+def connect_sqlite(path: Optional[str] = None) -> SQLiteConnection:
+    """连接 SQLite 替身数据库（默认 data/lottery.db）"""
+    if path is None:
+        from core.config import DATA_DIR
+        path = DATA_DIR / 'lottery.db'
+    connection = SQLiteConnection(path)
+    logger.info(f"SQLite 数据库连接成功: {path}")
+    return connection
@@ -2,10 +2,12 @@
 Telegram 机器人通知模块
 """
 
-import requests
 import logging
-from typing import List, Dict, Optional
 import os
+import time
+from typing import List, Dict, Optional, Tuple
+
+from core.telegram_delivery import TelegramDelivery, get_telegram_session
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +15,9 @@ logger = logging.getLogger(__name__)
 class TelegramBot:
     """Telegram 机器人类 - 支持机器人和频道发送"""
 
+    # 本进程内已测试通过的机器人 Token（每个进程只测试一次连接）
+    _verified_tokens = set()
+
     def __init__(self, bot_token: str = None, chat_id: str = None, channel_id: str = None):
         """
         初始化 Telegram 机器人
@@ -43,6 +48,7 @@ class TelegramBot:
                 'https': proxy_url
             }
             logger.info(f"使用代理: {proxy_url}")
+        self.delivery = TelegramDelivery(self.bot_token, self.api_url, proxy_url)
 
         # 检查配置
         if not self.bot_token:
@@ -60,6 +66,15 @@ class TelegramBot:
         else:
             logger.warning("未配置有效的 Telegram 发送目标")
 
+    def _targets(self) -> List[Tuple[str, str]]:
+        """配置的发送目标 [(聊天 ID, 目标类型), ...]"""
+        targets = []
+        if self.send_to_bot and self.chat_id:
+            targets.append((self.chat_id, "机器人"))
+        if self.send_to_channel and self.channel_id:
+            targets.append((self.channel_id, "频道"))
+        return targets
+
     def send_message(self, text: str, parse_mode: str = 'HTML') -> bool:
         """
         发送消息到配置的目标（机器人和/或频道）
@@ -71,31 +86,38 @@ class TelegramBot:
         Returns:
             是否至少有一个目标发送成功
         """
-        if not self.bot_token:
-            logger.warning("Telegram Bot Token 未配置，跳过发送")
-            return False
+        return self.send_messages([text], parse_mode)[0]
 
-        success_count = 0
-        total_targets = 0
+    def send_messages(self, texts: List[str], parse_mode: str = 'HTML') -> List[bool]:
+        """
+        批量发送多条消息到配置的目标（各目标同时发送，同一目标内按顺序发送，遵守频率限制）
 
-        # 发送给机器人
-        if self.send_to_bot and self.chat_id:
-            total_targets += 1
-            if self._send_to_target(self.chat_id, text, parse_mode, "机器人"):
-                success_count += 1
+        Args:
+            texts: 消息列表
+            parse_mode: 解析模式 (HTML/Markdown)
 
-        # 发送给频道
-        if self.send_to_channel and self.channel_id:
-            total_targets += 1
-            if self._send_to_target(self.channel_id, text, parse_mode, "频道"):
-                success_count += 1
+        Returns:
+            每条消息是否至少有一个目标发送成功
+        """
+        if not texts:
+            return []
+        if not self.bot_token:
+            logger.warning("Telegram Bot Token 未配置，跳过发送")
+            return [False] * len(texts)
 
-        if total_targets == 0:
+        targets = self._targets()
+        if not targets:
             logger.warning("未配置有效的 Telegram 发送目标")
-            return False
+            return [False] * len(texts)
 
-        logger.info(f"Telegram 消息发送完成: {success_count}/{total_targets} 成功")
-        return success_count > 0
+        start = time.perf_counter()
+        delivered = self.delivery.deliver(targets, texts, parse_mode)
+        results = [any(delivered[chat_id][i] for chat_id, _ in targets) for i in range(len(texts))]
+
+        sent = sum(ok for target in delivered.values() for ok in target)
+        logger.info(f"Telegram 消息发送完成: {sent}/{len(texts) * len(targets)} 成功"
+                    f"（{len(texts)} 条 × {len(targets)} 个目标，{time.perf_counter() - start:.1f}s）")
+        return results
 
     def _send_to_target(self, target_id: str, text: str, parse_mode: str, target_type: str) -> bool:
         """
@@ -110,23 +132,7 @@ class TelegramBot:
         Returns:
             是否发送成功
         """
-        try:
-            url = f"{self.api_url}/sendMessage"
-            data = {
-                'chat_id': target_id,
-                'text': text,
-                'parse_mode': parse_mode
-            }
-
-            response = requests.post(url, json=data, timeout=10, proxies=self.proxies)
-            response.raise_for_status()
-
-            logger.info(f"Telegram 消息发送成功 -> {target_type}({target_id})")
-            return True
-
-        except Exception as e:
-            logger.error(f"Telegram 消息发送失败 -> {target_type}({target_id}): {e}")
-            return False
+        return self.delivery.deliver([(target_id, target_type)], [text], parse_mode)[target_id][0]
 
     def send_lottery_result(self, lottery_type: str, lottery_no: str, 
                            draw_date: str, numbers: Dict) -> bool:
@@ -398,7 +404,7 @@ class TelegramBot:
             url = f"{self.api_url}/getChat"
             data = {'chat_id': self.channel_id}
             
-            response = requests.post(url, json=data, timeout=10, proxies=self.proxies)
+            response = get_telegram_session().post(url, json=data, timeout=10, proxies=self.proxies)
             response.raise_for_status()
             
             result = response.json()
@@ -412,16 +418,22 @@ class TelegramBot:
             logger.error(f"获取频道信息失败: {e}")
             return None
 
-    def test_connection(self) -> bool:
+    def test_connection(self, refresh: bool = False) -> bool:
         """
-        测试连接
+        测试连接（同一个机器人在本进程内测试成功后不再重复请求）
+
+        Args:
+            refresh: 忽略之前的测试结果，重新测试
 
         Returns:
             是否连接成功
         """
+        if not refresh and self.bot_token in self._verified_tokens:
+            return True
+
         try:
             url = f"{self.api_url}/getMe"
-            response = requests.get(url, timeout=10, proxies=self.proxies)
+            response = get_telegram_session().get(url, timeout=10, proxies=self.proxies)
             response.raise_for_status()
             
             data = response.json()
@@ -442,6 +454,7 @@ class TelegramBot:
                     else:
                         logger.warning("频道连接失败或无权限")
                 
+                self._verified_tokens.add(self.bot_token)
                 return True
             else:
                 logger.error("Telegram 机器人连接失败")
@@ -0,0 +1,316 @@
+"""
+Telegram 批量发送引擎
+一次发送多条消息到多个目标（机器人私聊、群组、频道）：不同目标同时发送，同一目标内按顺序发送，
+总耗时不再随 目标数 × 彩票数 线性增长，同时遵守 Telegram 的发送频率限制：
+
+- 全局：每个机器人每秒最多 30 条（TELEGRAM_GLOBAL_RATE）
+- 私聊：每个聊天每秒最多 1 条（TELEGRAM_CHAT_RATE）
+- 群组/频道：每个聊天每分钟最多 20 条（TELEGRAM_GROUP_RATE）
+- 仍收到 429 时按返回的 retry_after 暂停该聊天后重试
+
+超过 4096 个字符的消息按段落/行拆分为多条（split_message）。
+已安装 aiohttp 时所有请求共用一个 aiohttp 连接池；未安装（或使用 SOCKS 代理）时回退为在线程中
+调用 requests，共用一个带连接池的 Session。频率限制在进程内共享，多次发送之间同样生效。
+"""
+
+import asyncio
+import bisect
+import concurrent.futures
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# 单条消息的最大长度（字符）
+MESSAGE_LIMIT = 4096
+
+
+def split_message(text: str, limit: int = MESSAGE_LIMIT) -> List[str]:
+    """把超长消息拆分为多条（优先在空行处拆分，其次在换行处，单行超长时按长度截断）
+
+    消息中的 HTML 标签不跨行，按行拆分不会拆开标签。
+
+    Raises:
+        ValueError: limit 不合法
+    """
+    if limit < 1:
+        raise ValueError(f"消息长度上限必须大于 0: {limit}")
+    if len(text) <= limit:
+        return [text]
+
+    parts = []
+    rest = text
+    while len(rest) > limit:
+        cut = rest.rfind('\n\n', 0, limit + 1)
+        if cut <= 0:
+            cut = rest.rfind('\n', 0, limit + 1)
+        if cut <= 0:
+            cut = limit
+        part = rest[:cut].rstrip('\n')
+        if part:
+            parts.append(part)
+        rest = rest[cut:].lstrip('\n')
+    if rest:
+        parts.append(rest)
+    return parts
+
+
+class SlidingWindow:
+    """滑动窗口限流：任意 period 秒内最多 max_calls 次（按预约的发送时间记录）
+
+    ordered 为 True 时（单个聊天）预约时间不早于之前的预约，同一聊天内按顺序发送；
+    全局窗口不保证顺序，某个聊天受限时其他聊天仍可使用前面的空闲时间。
+    """
+
+    def __init__(self, max_calls: int, period: float, ordered: bool = True):
+        if max_calls < 1 or period <= 0:
+            raise ValueError(f"限流参数不合法: {max_calls} 次 / {period} 秒")
+        self.max_calls = max_calls
+        self.period = period
+        self.ordered = ordered
+        self._sent = []  # 预约的发送时间（升序）
+        self._blocked_until = 0.0
+
+    def _fits(self, at: float) -> bool:
+        """在 at 发送后，包含 at 的任意 period 秒窗口内都不超过 max_calls 次"""
+        sent = self._sent
+        # 窗口 (at - period, at]
+        if bisect.bisect_right(sent, at) - bisect.bisect_right(sent, at - self.period) >= self.max_calls:
+            return False
+        # 以 at 之前 period 秒内的各次发送为起点的窗口 [t, t + period)
+        first = bisect.bisect_right(sent, at - self.period)
+        for i in range(first, bisect.bisect_right(sent, at)):
+            if bisect.bisect_left(sent, sent[i] + self.period) - i >= self.max_calls:
+                return False
+        # 以 at 为起点的窗口 [at, at + period)
+        return bisect.bisect_left(sent, at + self.period) - bisect.bisect_left(sent, at) < self.max_calls
+
+    def earliest(self, now: float, not_before: float = 0.0) -> float:
+        """不早于 not_before、不超过限制的最早发送时间"""
+        expired = bisect.bisect_right(self._sent, now - self.period)
+        del self._sent[:expired]
+        at = max(now, not_before, self._blocked_until)
+        if self.ordered and self._sent:
+            at = max(at, self._sent[-1])
+        # 可行的时间点只可能是 at 本身或某次发送移出窗口的时刻
+        for candidate in [at] + [t + self.period for t in self._sent if t + self.period > at]:
+            if self._fits(candidate):
+                return candidate
+        return at
+
+    def record(self, at: float):
+        bisect.insort(self._sent, at)
+
+    def block(self, until: float):
+        """收到 429 后在 until 之前不再发送"""
+        self._blocked_until = max(self._blocked_until, until)
+
+
+# (机器人 Token, 聊天 ID) -> 限流窗口，进程内共享（聊天 ID 为 None 时为该机器人的全局限制）
+_windows: Dict[Tuple[str, Optional[str]], SlidingWindow] = {}
+_windows_lock = threading.Lock()
+
+
+def _is_private(chat_id: str) -> bool:
+    """私聊的 ID 为正整数，群组/频道为负数或 @用户名"""
+    return str(chat_id).lstrip().isdigit()
+
+
+def _window(bot_token: str, chat_id: Optional[str]) -> SlidingWindow:
+    """调用方持有 _windows_lock"""
+    key = (bot_token, None if chat_id is None else str(chat_id))
+    window = _windows.get(key)
+    if window is None:
+        from core.config import TELEGRAM_DELIVERY_CONFIG as config
+        if chat_id is None:
+            window = SlidingWindow(config['global_rate'], 1, ordered=False)
+        elif _is_private(chat_id):
+            window = SlidingWindow(config['chat_rate'], 1)
+        else:
+            window = SlidingWindow(config['group_rate'], 60)
+        _windows[key] = window
+    return window
+
+
+def reserve_slot(bot_token: str, chat_id: str) -> float:
+    """预约一次发送，返回需要等待的秒数（同时满足全局和该聊天的限制）"""
+    with _windows_lock:
+        chat = _window(bot_token, chat_id)
+        total = _window(bot_token, None)
+        now = time.monotonic()
+        at = total.earliest(now, chat.earliest(now))
+        chat.record(at)
+        total.record(at)
+    return at - now
+
+
+def block_chat(bot_token: str, chat_id: str, seconds: float):
+    """暂停向该聊天发送 seconds 秒"""
+    with _windows_lock:
+        _window(bot_token, chat_id).block(time.monotonic() + seconds)
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_telegram_session() -> requests.Session:
+    """进程内共享的 requests Session（带连接池，复用到 api.telegram.org 的 keep-alive 连接）
+
+    urllib3 连接池是线程安全的，发送消息也不依赖 Cookie，多个线程共用同一个 Session。
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            from core.config import TELEGRAM_DELIVERY_CONFIG
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=TELEGRAM_DELIVERY_CONFIG['pool_size'],
+                                  max_retries=0)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+class TelegramDelivery:
+    """批量发送消息（每个目标一个协程按顺序发送，所有目标同时进行）"""
+
+    def __init__(self, bot_token: str, api_url: str, proxy: str = None, use_aiohttp: bool = None):
+        """
+        Args:
+            bot_token: 机器人 Token（区分不同机器人的频率限制）
+            api_url: https://api.telegram.org/bot<Token>
+            proxy: 代理地址（http://host:port 或 socks5://host:port）
+            use_aiohttp: 是否使用 aiohttp（默认已安装时使用；aiohttp 不支持 SOCKS 代理，此时使用 requests）
+        """
+        from core.config import TELEGRAM_DELIVERY_CONFIG
+
+        self.bot_token = bot_token
+        self.api_url = api_url
+        self.proxy = proxy
+        self.timeout = TELEGRAM_DELIVERY_CONFIG['timeout']
+        self.retries = TELEGRAM_DELIVERY_CONFIG['retries']
+        self.use_aiohttp = AIOHTTP_AVAILABLE if use_aiohttp is None else (use_aiohttp and AIOHTTP_AVAILABLE)
+        if proxy and not proxy.startswith('http'):
+            self.use_aiohttp = False
+
+    def _post_sync(self, payload: Dict) -> Tuple[int, Dict]:
+        proxies = {'http': self.proxy, 'https': self.proxy} if self.proxy else None
+        response = get_telegram_session().post(f"{self.api_url}/sendMessage", json=payload,
+                                               timeout=self.timeout, proxies=proxies)
+        try:
+            body = response.json()
+        except ValueError:
+            body = {'description': response.text[:200]}
+        return response.status_code, body
+
+    async def _post(self, session, payload: Dict) -> Tuple[int, Dict]:
+        """发送一次 sendMessage 请求，返回 (状态码, 响应 JSON)"""
+        if session is None:
+            return await asyncio.to_thread(self._post_sync, payload)
+        async with session.post(f"{self.api_url}/sendMessage", json=payload, proxy=self.proxy) as response:
+            try:
+                body = await response.json(content_type=None)
+            except ValueError:
+                body = {'description': (await response.text())[:200]}
+            return response.status, body
+
+    async def _send_one(self, session, chat_id: str, text: str, parse_mode: str, label: str) -> bool:
+        """发送一条消息（遵守频率限制，429 按 retry_after 等待、网络错误和 5xx 退避后重试）"""
+        payload = {'chat_id': chat_id, 'text': text, 'parse_mode': parse_mode}
+        for attempt in range(1, self.retries + 1):
+            wait = reserve_slot(self.bot_token, chat_id)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                status, body = await self._post(session, payload)
+            except Exception as e:
+                error = str(e) or e.__class__.__name__
+                if attempt < self.retries:
+                    logger.warning(f"Telegram 发送失败 -> {label}({chat_id})，第 {attempt} 次: {error}")
+                    await asyncio.sleep(attempt)
+                    continue
+                logger.error(f"Telegram 消息发送失败 -> {label}({chat_id}): {error}")
+                return False
+
+            if status == 200 and body.get('ok', True):
+                return True
+            description = body.get('description', f'HTTP {status}')
+            if status == 429 and attempt < self.retries:
+                retry_after = float((body.get('parameters') or {}).get('retry_after', 1))
+                logger.warning(f"⏳ Telegram 限流 -> {label}({chat_id})，{retry_after:.0f}s 后重试")
+                block_chat(self.bot_token, chat_id, retry_after)
+                continue
+            if status >= 500 and attempt < self.retries:
+                logger.warning(f"Telegram 发送失败 -> {label}({chat_id})，第 {attempt} 次: {description}")
+                await asyncio.sleep(attempt)
+                continue
+            logger.error(f"Telegram 消息发送失败 -> {label}({chat_id}): {description}")
+            return False
+        return False
+
+    async def _send_target(self, session, chat_id: str, label: str, texts: List[str], parse_mode: str) -> List[bool]:
+        """按顺序发送到一个目标（超长消息拆分后逐条发送，任一部分失败即视为该消息失败）"""
+        results = []
+        for text in texts:
+            parts = split_message(text)
+            if len(parts) > 1:
+                logger.info(f"消息超过 {MESSAGE_LIMIT} 字符，拆分为 {len(parts)} 条 -> {label}({chat_id})")
+            ok = True
+            for part in parts:
+                if not await self._send_one(session, chat_id, part, parse_mode, label):
+                    ok = False
+                    break
+            if ok:
+                logger.info(f"Telegram 消息发送成功 -> {label}({chat_id})")
+            results.append(ok)
+        return results
+
+    async def deliver_async(self, targets: List[Tuple[str, str]], texts: List[str],
+                            parse_mode: str = 'HTML') -> Dict[str, List[bool]]:
+        """把 texts 依次发送到每个目标
+
+        Args:
+            targets: [(聊天 ID, 目标类型), ...]（目标类型用于日志）
+            texts: 消息列表
+            parse_mode: 解析模式
+
+        Returns:
+            {聊天 ID: [每条消息是否发送成功]}
+        """
+        async def send_all(session):
+            results = await asyncio.gather(*[
+                self._send_target(session, chat_id, label, texts, parse_mode)
+                for chat_id, label in targets
+            ])
+            return {chat_id: result for (chat_id, _), result in zip(targets, results)}
+
+        if not self.use_aiohttp:
+            return await send_all(None)
+        from core.config import TELEGRAM_DELIVERY_CONFIG
+        connector = aiohttp.TCPConnector(limit=TELEGRAM_DELIVERY_CONFIG['pool_size'])
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            return await send_all(session)
+
+    def deliver(self, targets: List[Tuple[str, str]], texts: List[str],
+                parse_mode: str = 'HTML') -> Dict[str, List[bool]]:
+        """deliver_async 的同步版本（在已有事件循环的线程中调用时，在新线程中执行）"""
+        coro = self.deliver_async(targets, texts, parse_mode)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coro).result()
@@ -0,0 +1,221 @@
+"""
+号码组合编码
+把一注号码映射为 [0, 组合总数) 内的唯一整数（组合数排名），
+并提供基于位图的去重集合，内存占用只与彩票玩法有关，与生成注数无关；
+另提供号码位掩码与按位计数工具，供旋转矩阵等按号码重叠度计算的模块使用
+
+- 双色球：红球 C(33,6) × 蓝球 16 ≈ 1772 万，位图约 2.1 MB
+- 大乐透：前区 C(35,5) × 后区 C(12,2) ≈ 2142 万，位图约 2.6 MB
+- 七乐彩：基本号 C(30,7) × 特别号 30 ≈ 6107 万，位图约 7.3 MB
+- 七星彩：7 位十进制数 10^7，位图约 1.2 MB
+"""
+
+import logging
+from math import comb
+from typing import List, Dict
+
+import numpy as np
+
+from core.draw_history import get_layout, _as_ints
+
+logger = logging.getLogger(__name__)
+
+
+# 0-255 每个字节值中 1 的个数（numpy 1.24 没有 bitwise_count）
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def ball_masks(offsets: np.ndarray) -> np.ndarray:
+    """把号码下标矩阵转换为位掩码
+
+    Args:
+        offsets: (注数, k) 的号码下标矩阵（0-63），每行一注
+
+    Returns:
+        (注数,) 的 uint64 位掩码，第 i 位表示下标 i 的号码被选中
+    """
+    bits = np.left_shift(np.uint64(1), np.asarray(offsets, dtype=np.uint64))
+    return np.bitwise_or.reduce(bits, axis=-1)
+
+
+def popcount(masks: np.ndarray) -> np.ndarray:
+    """统计每个位掩码中 1 的个数（查表法）
+
+    Args:
+        masks: 任意形状的 uint64 数组
+
+    Returns:
+        同形状的计数数组
+    """
+    masks = np.ascontiguousarray(masks, dtype=np.uint64)
+    bytes_view = masks.view(np.uint8).reshape(masks.shape + (8,))
+    return _POPCOUNT_TABLE[bytes_view].sum(axis=-1, dtype=np.int32)
+
+
+class CombinationRanker:
+    """组合数排名（colex 序）
+
+    从 n 个号码中选 k 个的有序组合 c_1 < c_2 < ... < c_k（下标从 0 开始），
+    排名为 sum(C(c_i, i))，i 从 1 到 k，结果恰好覆盖 [0, C(n, k))。
+    """
+
+    def __init__(self, low: int, high: int, k: int):
+        """
+        Args:
+            low: 最小号码
+            high: 最大号码
+            k: 每注选出的号码个数
+        """
+        self.low = low
+        self.n = high - low + 1
+        self.k = k
+        self.size = comb(self.n, k)
+        # 预计算 C(v, i)，避免每次排名都调用 comb
+        self._table = [[comb(v, i) for i in range(k + 1)] for v in range(self.n)]
+
+    def rank(self, balls: List[int]) -> int:
+        """计算组合排名
+
+        Raises:
+            ValueError: 号码个数不符、越界或有重复
+        """
+        offsets = sorted(b - self.low for b in balls)
+        if len(offsets) != self.k or offsets[0] < 0 or offsets[-1] >= self.n:
+            raise ValueError(f"号码组合无效: {balls}")
+
+        table = self._table
+        result = 0
+        previous = -1
+        for i, offset in enumerate(offsets, 1):
+            if offset == previous:
+                raise ValueError(f"号码组合有重复: {balls}")
+            result += table[offset][i]
+            previous = offset
+        return result
+
+    def unrank(self, rank: int) -> List[int]:
+        """由排名还原组合（升序）"""
+        balls = []
+        value = self.n - 1
+        for i in range(self.k, 0, -1):
+            while self._table[value][i] > rank:
+                value -= 1
+            balls.append(value + self.low)
+            rank -= self._table[value][i]
+            value -= 1
+        return balls[::-1]
+
+
+class TicketCodec:
+    """整注号码编码器
+
+    组合型彩票：主号码区排名 × 附加号码区组合数 + 附加号码区排名；
+    七星彩：7 位数字直接按十进制编码。
+    """
+
+    def __init__(self, lottery_type: str):
+        """
+        Args:
+            lottery_type: 彩票类型 ('ssq', 'dlt', 'qxc', 'qlc')
+        """
+        self.lottery_type = lottery_type
+        self.layout = get_layout(lottery_type)
+        self.main_key = self.layout['main_key']
+        self.extra_key = self.layout['extra_key']
+
+        main_low, main_high = self.layout['main_range']
+        if self.layout['positional']:
+            self.main = None
+            self.extra = None
+            self._radix = main_high - main_low + 1
+            self.size = self._radix ** self.layout['main_count']
+        else:
+            self.main = CombinationRanker(main_low, main_high, self.layout['main_count'])
+            extra_low, extra_high = self.layout['extra_range']
+            self.extra = CombinationRanker(extra_low, extra_high, self.layout['extra_count'])
+            self.size = self.main.size * self.extra.size
+
+    def encode(self, ticket: Dict) -> int:
+        """把一注号码（预测结果字典）编码为整数
+
+        Raises:
+            ValueError: 号码不符合玩法规则
+        """
+        if self.main is None:
+            low = self.layout['main_range'][0]
+            digits = _as_ints(ticket[self.main_key])
+            if len(digits) != self.layout['main_count']:
+                raise ValueError(f"号码组合无效: {digits}")
+            code = 0
+            for digit in digits:
+                offset = digit - low
+                if not 0 <= offset < self._radix:
+                    raise ValueError(f"号码组合无效: {digits}")
+                code = code * self._radix + offset
+            return code
+
+        main_rank = self.main.rank(_as_ints(ticket[self.main_key]))
+        extra_rank = self.extra.rank(_as_ints(ticket[self.extra_key]))
+        return main_rank * self.extra.size + extra_rank
+
+    def decode(self, code: int) -> Dict:
+        """由编码还原号码（组合型返回升序号码）"""
+        if self.main is None:
+            low = self.layout['main_range'][0]
+            digits = []
+            for _ in range(self.layout['main_count']):
+                code, offset = divmod(code, self._radix)
+                digits.append(offset + low)
+            return {self.main_key: digits[::-1]}
+
+        main_rank, extra_rank = divmod(code, self.extra.size)
+        extra = self.extra.unrank(extra_rank)
+        return {
+            self.main_key: self.main.unrank(main_rank),
+            self.extra_key: extra if self.layout['extra_count'] > 1 else extra[0],
+        }
+
+
+class TicketSeenSet:
+    """基于位图的号码去重集合
+
+    每个可能的组合占 1 bit，大小在创建时就固定，适合生成大量号码时的去重。
+    """
+
+    def __init__(self, codec: TicketCodec):
+        """
+        Args:
+            codec: 号码编码器
+        """
+        self.codec = codec
+        self._bits = bytearray((codec.size + 7) // 8)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """位图占用的字节数"""
+        return len(self._bits)
+
+    def add(self, ticket: Dict) -> bool:
+        """加入一注号码
+
+        Returns:
+            True 表示是新号码，False 表示已存在
+        """
+        return self.add_code(self.codec.encode(ticket))
+
+    def add_code(self, code: int) -> bool:
+        """按编码加入（已编码时使用，避免重复计算）"""
+        index, bit = code >> 3, 1 << (code & 7)
+        if self._bits[index] & bit:
+            return False
+        self._bits[index] |= bit
+        self._count += 1
+        return True
+
+    def __contains__(self, ticket: Dict) -> bool:
+        code = self.codec.encode(ticket)
+        return bool(self._bits[code >> 3] & (1 << (code & 7)))
@@ -16,6 +16,13 @@ def load_db_config() -> Dict:
     """
     load_dotenv()
     
+    # SQLite 替身（本地调试、基准测试和 CI，无需 MySQL 服务）
+    if os.getenv('DB_ENGINE', 'mysql').lower() == 'sqlite':
+        return {
+            'engine': 'sqlite',
+            'database': os.getenv('SQLITE_PATH') or None
+        }
+    
     db_config = {
         'host': os.getenv('MYSQL_HOST'),
         'port': int(os.getenv('MYSQL_PORT', 3306)),
@@ -0,0 +1,206 @@
+"""
+旋转矩阵（号码覆盖优化）
+从候选号码池中挑选指定注数，使池内所有 t 个号码的子组合（二码/三码/四码）被尽可能多地覆盖
+
+- 候选注：号码池内所有 k 个号码的组合，以号码池下标的位掩码表示
+- 覆盖目标：号码池内所有 t 个号码的子组合，按组合数排名编号
+- 贪心：每轮向量化计算所有候选注的新增覆盖数，选增益最大者
+- 局部搜索：逐注尝试替换为其他候选注，覆盖数增加则交换，直到无改进
+"""
+
+import logging
+from itertools import combinations
+from math import comb
+from typing import List, Dict, Optional, Callable
+
+import numpy as np
+
+from core.ticket_codec import ball_masks, popcount
+
+logger = logging.getLogger(__name__)
+
+# 候选注数量上限（号码池过大时组合数爆炸）
+MAX_CANDIDATES = 300000
+
+# 局部搜索最多进行的轮数
+MAX_SEARCH_PASSES = 5
+
+
+def _subset_ranks(candidates: np.ndarray, t: int) -> np.ndarray:
+    """计算每个候选注包含的 t 码子组合的排名（colex 序）
+
+    Args:
+        candidates: (候选注数, k) 的号码池下标矩阵，每行升序
+        t: 子组合大小
+
+    Returns:
+        (候选注数, C(k, t)) 的排名矩阵
+    """
+    pool_size = int(candidates.max()) + 1 if candidates.size else 0
+    binom = np.array([[comb(v, i) for i in range(t + 1)] for v in range(pool_size)], dtype=np.int64)
+    patterns = np.array(list(combinations(range(candidates.shape[1]), t)))
+
+    # subsets: (候选注数, C(k, t), t)
+    subsets = candidates[:, patterns]
+    ranks = np.zeros(subsets.shape[:2], dtype=np.int64)
+    for i in range(t):
+        ranks += binom[subsets[:, :, i], i + 1]
+    return ranks
+
+
+class Wheel:
+    """旋转矩阵求解器"""
+
+    def __init__(self, pool: List[int], pick: int, cover: int = 3,
+                 is_valid: Optional[Callable[[List[int]], bool]] = None, seed: Optional[int] = None):
+        """
+        Args:
+            pool: 候选号码池
+            pick: 每注号码个数（双色球红球 6、大乐透前区 5、七乐彩基本号 7）
+            cover: 覆盖目标的子组合大小（2=二码、3=三码、4=四码）
+            is_valid: 候选注过滤函数（如排除历史中奖组合），参数为升序号码列表
+            seed: 随机种子（用于打乱候选注顺序，使同分时的选择随机）
+
+        Raises:
+            ValueError: 参数不合法或候选注过多
+        """
+        self.pool = sorted(set(int(b) for b in pool))
+        self.pick = pick
+        self.cover = cover
+        m = len(self.pool)
+
+        if not 2 <= cover <= pick:
+            raise ValueError(f"覆盖大小必须在 2 到 {pick} 之间: {cover}")
+        if m < pick:
+            raise ValueError(f"号码池至少需要 {pick} 个号码，当前 {m} 个")
+        if m > 64:
+            raise ValueError(f"号码池最多 64 个号码，当前 {m} 个")
+        if comb(m, pick) > MAX_CANDIDATES:
+            raise ValueError(f"候选注数 C({m},{pick})={comb(m, pick)} 超过上限 {MAX_CANDIDATES}，请缩小号码池")
+
+        rng = np.random.default_rng(seed)
+        candidates = np.array(list(combinations(range(m), pick)), dtype=np.int64)
+        if is_valid is not None:
+            balls = np.array(self.pool)[candidates]
+            keep = np.array([is_valid(row.tolist()) for row in balls], dtype=bool)
+            candidates = candidates[keep]
+        if len(candidates) == 0:
+            raise ValueError("号码池内没有有效的候选注")
+
+        self.candidates = candidates[rng.permutation(len(candidates))]
+        # 候选注的位掩码（第 i 位表示号码池第 i 个号码）
+        self.masks = ball_masks(self.candidates)
+        self.target_count = comb(m, cover)
+        self.cover_index = _subset_ranks(self.candidates, cover)
+
+    def _gains(self, counts: np.ndarray) -> np.ndarray:
+        """所有候选注加入后新增的覆盖数"""
+        return (counts[self.cover_index] == 0).sum(axis=1)
+
+    def solve(self, budget: int) -> Dict:
+        """求解旋转矩阵
+
+        Args:
+            budget: 注数
+
+        Returns:
+            {
+                'tickets': [[号码...], ...]（升序）,
+                'covered': 已覆盖的子组合数,
+                'total': 子组合总数,
+                'coverage': 覆盖率,
+                'max_overlap': 任意两注的最大重复号码数,
+            }
+        """
+        budget = min(budget, len(self.candidates))
+        counts = np.zeros(self.target_count, dtype=np.int32)
+        selected = []
+
+        # 贪心（同一注内的子组合互不相同，可直接用花式索引增减计数）
+        for _ in range(budget):
+            gains = self._gains(counts)
+            if selected:
+                gains[selected] = -1
+            best = int(np.argmax(gains))
+            selected.append(best)
+            counts[self.cover_index[best]] += 1
+
+        # 局部搜索：逐注尝试替换
+        for search_pass in range(MAX_SEARCH_PASSES):
+            improved = False
+            for slot, current in enumerate(selected):
+                counts[self.cover_index[current]] -= 1
+                loss = int((counts[self.cover_index[current]] == 0).sum())
+
+                gains = self._gains(counts)
+                gains[selected] = -1
+                best = int(np.argmax(gains))
+
+                if gains[best] > loss:
+                    selected[slot] = best
+                    current = best
+                    improved = True
+                counts[self.cover_index[current]] += 1
+
+            if not improved:
+                break
+
+        covered = int((counts > 0).sum())
+        pool = np.array(self.pool)
+        tickets = [pool[self.candidates[i]].tolist() for i in selected]
+
+        # 任意两注之间的最大重复号码数（位掩码按位与后计数）
+        masks = self.masks[selected]
+        rows, cols = np.triu_indices(len(selected), k=1)
+        max_overlap = int(popcount(masks[rows] & masks[cols]).max()) if rows.size else 0
+
+        logger.info(f"旋转矩阵: 号码池 {len(self.pool)} 个，{budget} 注，"
+                    f"{self.cover} 码覆盖 {covered}/{self.target_count}（{covered / self.target_count:.1%}），"
+                    f"两注最多重复 {max_overlap} 个号码")
+
+        return {
+            'tickets': tickets,
+            'covered': covered,
+            'total': self.target_count,
+            'coverage': covered / self.target_count,
+            'max_overlap': max_overlap,
+        }
+
+
+def build_wheel(pool: List[int], pick: int, budget: int, cover: int = 3,
+                is_valid: Optional[Callable[[List[int]], bool]] = None,
+                seed: Optional[int] = None) -> Dict:
+    """从号码池生成覆盖最优的号码组合
+
+    Args:
+        pool: 候选号码池
+        pick: 每注号码个数
+        budget: 注数
+        cover: 覆盖目标的子组合大小
+        is_valid: 候选注过滤函数
+        seed: 随机种子
+
+    Returns:
+        求解结果（见 Wheel.solve）
+    """
+    return Wheel(pool, pick, cover=cover, is_valid=is_valid, seed=seed).solve(budget)
+
+
+def select_pool(tickets: List[Dict], key: str, size: int) -> List[int]:
+    """按策略生成的号码中出现次数最多的号码组成号码池
+
+    Args:
+        tickets: 策略生成的号码（预测结果字典）
+        key: 号码字段名
+        size: 号码池大小
+
+    Returns:
+        号码池（升序）
+    """
+    counter = {}
+    for ticket in tickets:
+        value = ticket[key]
+        for ball in (value if isinstance(value, (list, tuple)) else [value]):
+            counter[int(ball)] = counter.get(int(ball), 0) + 1
+    ranked = sorted(counter, key=lambda b: (-counter[b], b))
+    return sorted(ranked[:size])
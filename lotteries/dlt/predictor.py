@@ -6,10 +6,11 @@
 from core.base_predictor import BasePredictor, BaseStatistics
 from core.utils import has_consecutive_numbers, format_number
 import logging
-from typing import List, Tuple, Set, Dict
+from typing import List, Tuple, Set, Dict, Iterator
 from collections import Counter
 import itertools
 from datetime import datetime
+from core.wheel import build_wheel, select_pool
 from .strategies import get_strategy, get_all_strategies
 
 logger = logging.getLogger(__name__)
@@ -18,6 +19,8 @@ logger = logging.getLogger(__name__)
 class DLTPredictor(BasePredictor):
     """大乐透预测类（支持策略模式）"""
 
+    LOTTERY_TYPE = 'dlt'
+
     FRONT_RANGE = range(1, 36)  # 前区范围 1-35
     BACK_RANGE = range(1, 13)   # 后区范围 1-12
     FRONT_COUNT = 5  # 前区号码数量
@@ -94,13 +97,16 @@ class DLTPredictor(BasePredictor):
 
         return True
 
-    def predict(self, count: int = 5, strategies: List[str] = None) -> List[Dict]:
+    def predict(self, count: int = 5, strategies: List[str] = None,
+                oversample: int = 1, metric: str = 'hamming') -> List[Dict]:
         """
         执行预测
 
         Args:
             count: 预测组合数
             strategies: 使用的策略列表（可选）
+            oversample: 过采样倍数（大于 1 时先生成 count * oversample 个候选，再按多样性挑选）
+            metric: 多样性距离度量 ('hamming' 或 'jaccard')
 
         Returns:
             预测结果列表
@@ -110,13 +116,16 @@ class DLTPredictor(BasePredictor):
         
         logger.info(f"使用策略: {', '.join(strategy_names)}")
         
+        if oversample > 1:
+            predictions = self._predict_diverse(strategy_names, count, oversample, metric)
+            for pred in predictions:
+                pred['sorted_code'] = ','.join(f"{x:02d}" for x in sorted(pred['front_balls'])) + '-' + \
+                    ','.join(f"{x:02d}" for x in sorted(pred['back_balls']))
+            logger.info(f"生成了 {len(predictions)} 个预测组合（多样性选号）")
+            return predictions
+        
         # 构建上下文数据
-        context = {
-            'front_frequency': dict(self.front_ball_frequency),
-            'back_frequency': dict(self.back_ball_frequency),
-            'historical_combinations': self.historical_combinations,
-            'history_data': self.lottery_data  # 添加历史数据用于智能后区选择
-        }
+        context = self._build_context()
 
         # 计算每个策略生成的组合数
         count_per_strategy = count // len(strategy_names)
@@ -155,6 +164,88 @@ class DLTPredictor(BasePredictor):
         
         return final_predictions
 
+    def _build_context(self) -> Dict:
+        """构建策略使用的上下文数据"""
+        return {
+            'front_frequency': dict(self.front_ball_frequency),
+            'back_frequency': dict(self.back_ball_frequency),
+            'historical_combinations': self.historical_combinations,
+            'history_data': self.lottery_data  # 添加历史数据用于智能后区选择
+        }
+
+    def iter_predictions(self, strategies: List[str] = None, yield_rejected: bool = False) -> Iterator[Dict]:
+        """按策略轮流无限生成号码（批量生成使用）
+
+        只做有效性检查（历史中奖号码、前区连号），不做结果之间的去重（由调用方负责），
+        也不受 predict 的尝试次数和超时限制。
+
+        Args:
+            strategies: 使用的策略列表（可选）
+            yield_rejected: 被排除的号码也产出一个 None（调用方据此计数，策略只生成历史号码时不会无限循环）
+
+        Yields:
+            预测结果（不含 sorted_code 和 prediction_time）
+        """
+        strategy_names = strategies or self.default_strategies
+        context = self._build_context()
+        loaded = [(name, get_strategy(name)) for name in strategy_names]
+
+        while True:
+            for strategy_name, strategy in loaded:
+                front_balls = strategy.generate_front_balls(context)
+                back_balls = strategy.generate_back_balls(context)
+                if not self._is_valid_combination(front_balls, back_balls):
+                    if yield_rejected:
+                        yield None
+                    continue
+                yield {
+                    'front_balls': front_balls,
+                    'back_balls': back_balls,
+                    'strategy': strategy_name,
+                    'strategy_name': strategy.name
+                }
+
+    def predict_wheel(self, budget: int = 10, pool_size: int = 10, cover: int = 3,
+                      strategies: List[str] = None, sample_size: int = 500,
+                      seed: int = None) -> List[Dict]:
+        """旋转矩阵预测：用策略选出号码池，再挑选覆盖最多前区子组合的若干注
+
+        Args:
+            budget: 注数
+            pool_size: 前区号码池大小
+            cover: 覆盖目标（2=二码、3=三码、4=四码）
+            strategies: 用于选号码池的策略列表（可选）
+            sample_size: 从策略中采样的注数
+            seed: 随机种子
+
+        Returns:
+            预测结果列表
+        """
+        samples = list(itertools.islice(self.iter_predictions(strategies), sample_size))
+        front_pool = select_pool(samples, 'front_balls', pool_size)
+        # 后区从高频号码中两两组合轮流搭配
+        back_pairs = list(itertools.combinations(select_pool(samples, 'back_balls', 4), self.BACK_COUNT))
+        logger.info(f"旋转矩阵号码池: 前区 {front_pool}，后区组合 {back_pairs}")
+
+        result = build_wheel(
+            front_pool, self.FRONT_COUNT, budget, cover=cover,
+            is_valid=lambda balls: not has_consecutive_numbers(balls, max_consecutive=3),
+            seed=seed
+        )
+
+        predictions = []
+        for i, front_balls in enumerate(result['tickets']):
+            back_balls = list(back_pairs[i % len(back_pairs)])
+            predictions.append({
+                'front_balls': front_balls,
+                'back_balls': back_balls,
+                'sorted_code': ','.join(f"{x:02d}" for x in front_balls) + '-' + ','.join(f"{x:02d}" for x in back_balls),
+                'strategy': 'wheel',
+                'strategy_name': '旋转矩阵',
+                'prediction_time': datetime.now().isoformat()
+            })
+        return predictions
+
     def _predict_with_strategy(self, strategy_name: str, count: int, context: Dict, existing_predictions: List[Dict] = None) -> List[Dict]:
         """
         使用指定策略生成预测
@@ -228,78 +319,22 @@ class DLTPredictor(BasePredictor):
 class DLTStatistics(BaseStatistics):
     """大乐透统计类"""
 
+    LOTTERY_TYPE = 'dlt'
+
     def __init__(self, lottery_data: List[dict]):
         super().__init__(lottery_data)
 
     def get_frequency(self) -> Dict:
         """获取号码频率统计"""
-        front_frequency = Counter()
-        back_frequency = Counter()
-
-        for data in self.lottery_data:
-            # 处理前区号码
-            if isinstance(data['front_balls'][0], str):
-                front_balls = [int(b) for b in data['front_balls']]
-            else:
-                front_balls = data['front_balls']
-            
-            # 处理后区号码
-            if isinstance(data['back_balls'][0], str):
-                back_balls = [int(b) for b in data['back_balls']]
-            else:
-                back_balls = data['back_balls']
-
-            for ball in front_balls:
-                front_frequency[ball] += 1
-
-            for ball in back_balls:
-                back_frequency[ball] += 1
-
         return {
-            'front_balls': dict(front_frequency),
-            'back_balls': dict(back_frequency)
+            'front_balls': self.summary['frequency'],
+            'back_balls': self.summary['extra_frequency']
         }
 
     def get_consecutive_analysis(self) -> Dict:
-        """获取连号分析"""
-        consecutive_counts = Counter()
-
-        for data in self.lottery_data:
-            # 处理前区号码
-            if isinstance(data['front_balls'][0], str):
-                front_balls = sorted([int(b) for b in data['front_balls']])
-            else:
-                front_balls = sorted(data['front_balls'])
-
-            # 统计连号
-            max_consecutive = 1
-            current_consecutive = 1
-
-            for i in range(1, len(front_balls)):
-                if front_balls[i] - front_balls[i-1] == 1:
-                    current_consecutive += 1
-                    max_consecutive = max(max_consecutive, current_consecutive)
-                else:
-                    current_consecutive = 1
-
-            consecutive_counts[max_consecutive] += 1
-
-        return dict(consecutive_counts)
+        """获取连号分析（键为最长连号的号码个数）"""
+        return dict(self.summary['consecutive'])
 
     def get_odd_even_analysis(self) -> Dict:
         """获取奇偶分析"""
-        odd_even_counts = Counter()
-
-        for data in self.lottery_data:
-            # 处理前区号码
-            if isinstance(data['front_balls'][0], str):
-                front_balls = [int(b) for b in data['front_balls']]
-            else:
-                front_balls = data['front_balls']
-
-            odd_count = sum(1 for ball in front_balls if ball % 2 == 1)
-            even_count = len(front_balls) - odd_count
-
-            odd_even_counts[f"{odd_count}奇{even_count}偶"] += 1
-
-        return dict(odd_even_counts)
+        return dict(self.summary['odd_even'])
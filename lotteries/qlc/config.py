@@ -11,4 +11,5 @@ QLC_CONFIG = {
     'special_count': 1,  # 1个特别号
     'start_year': 2007,  # 开始年份
     'draw_days': [1, 3, 5],  # 每周一、三、五开奖
+    'draw_time': '21:15',  # 开奖时间（北京时间）
 }
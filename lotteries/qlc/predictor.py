@@ -3,10 +3,12 @@
 """
 
 from core.base_predictor import BasePredictor, BaseStatistics
+import itertools
 import logging
-from typing import List, Dict
+from typing import List, Dict, Iterator
 from collections import Counter
 from datetime import datetime
+from core.wheel import build_wheel, select_pool
 from .strategies import get_strategy, get_all_strategies
 
 logger = logging.getLogger(__name__)
@@ -15,6 +17,8 @@ logger = logging.getLogger(__name__)
 class QLCPredictor(BasePredictor):
     """七乐彩预测类"""
 
+    LOTTERY_TYPE = 'qlc'
+
     BASIC_RANGE = range(1, 31)  # 基本号范围 1-30
     BASIC_COUNT = 7  # 基本号个数
 
@@ -62,13 +66,16 @@ class QLCPredictor(BasePredictor):
             return False
         return True
 
-    def predict(self, count: int = 5, strategies: List[str] = None) -> List[dict]:
+    def predict(self, count: int = 5, strategies: List[str] = None,
+                oversample: int = 1, metric: str = 'hamming') -> List[dict]:
         """
         完整预测（支持多策略）
         
         Args:
             count: 预测组合总数
             strategies: 使用的策略列表（可选）
+            oversample: 过采样倍数（大于 1 时先生成 count * oversample 个候选，再按多样性挑选）
+            metric: 多样性距离度量 ('hamming' 或 'jaccard')
             
         Returns:
             预测结果列表
@@ -77,15 +84,15 @@ class QLCPredictor(BasePredictor):
         
         logger.info(f"使用策略: {', '.join(strategy_names)}")
         
+        if oversample > 1:
+            predictions = self._predict_diverse(strategy_names, count, oversample, metric)
+            for i, pred in enumerate(predictions):
+                pred['rank'] = i + 1
+            logger.info(f"生成了 {len(predictions)} 个预测组合（多样性选号）")
+            return predictions
+        
         # 构建上下文数据
-        context = {
-            'history_data': self.lottery_data,
-            'basic_frequency': dict(self.basic_ball_frequency),
-            'special_frequency': dict(self.special_ball_frequency),
-            'historical_combinations': self.historical_combinations,
-            'basic_range': self.BASIC_RANGE,
-            'basic_count': self.BASIC_COUNT
-        }
+        context = self._build_context()
         
         # 计算每个策略生成的组合数
         count_per_strategy = max(1, count // len(strategy_names))
@@ -115,6 +122,87 @@ class QLCPredictor(BasePredictor):
         logger.info(f"生成了 {len(final_predictions)} 个预测组合")
         return final_predictions
     
+    def _build_context(self) -> Dict:
+        """构建策略使用的上下文数据"""
+        return {
+            'history_data': self.lottery_data,
+            'basic_frequency': dict(self.basic_ball_frequency),
+            'special_frequency': dict(self.special_ball_frequency),
+            'historical_combinations': self.historical_combinations,
+            'basic_range': self.BASIC_RANGE,
+            'basic_count': self.BASIC_COUNT
+        }
+
+    def iter_predictions(self, strategies: List[str] = None, yield_rejected: bool = False) -> Iterator[dict]:
+        """按策略轮流无限生成号码（批量生成使用）
+
+        只排除历史中奖组合和无效组合，不做结果之间的去重（由调用方负责），
+        也不受 predict 的尝试次数和超时限制。
+
+        Args:
+            strategies: 使用的策略列表（可选）
+            yield_rejected: 被排除的号码也产出一个 None（调用方据此计数，策略只生成历史号码时不会无限循环）
+
+        Yields:
+            预测结果（不含 rank 和 prediction_time）
+        """
+        strategy_names = strategies or self.default_strategies
+        context = self._build_context()
+        loaded = [(name, get_strategy(name)) for name in strategy_names]
+
+        while True:
+            for strategy_name, strategy in loaded:
+                basic_balls, special_ball = strategy.generate_balls(context)
+                combo = (tuple(sorted(basic_balls)), special_ball)
+                if combo in context['historical_combinations'] or not self._is_valid_combination(basic_balls):
+                    if yield_rejected:
+                        yield None
+                    continue
+                yield {
+                    'basic_balls': basic_balls,
+                    'special_ball': special_ball,
+                    'strategy': strategy_name,
+                    'strategy_name': strategy.name
+                }
+
+    def predict_wheel(self, budget: int = 10, pool_size: int = 12, cover: int = 3,
+                      strategies: List[str] = None, sample_size: int = 500,
+                      seed: int = None) -> List[dict]:
+        """旋转矩阵预测：用策略选出号码池，再挑选覆盖最多基本号子组合的若干注
+
+        Args:
+            budget: 注数
+            pool_size: 基本号号码池大小
+            cover: 覆盖目标（2=二码、3=三码、4=四码）
+            strategies: 用于选号码池的策略列表（可选）
+            sample_size: 从策略中采样的注数
+            seed: 随机种子
+
+        Returns:
+            预测结果列表
+        """
+        samples = list(itertools.islice(self.iter_predictions(strategies), sample_size))
+        basic_pool = select_pool(samples, 'basic_balls', pool_size)
+        special_pool = select_pool(samples, 'special_ball', min(budget, 4))
+        logger.info(f"旋转矩阵号码池: 基本号 {basic_pool}，特别号 {special_pool}")
+
+        result = build_wheel(basic_pool, self.BASIC_COUNT, budget, cover=cover, seed=seed)
+
+        predictions = []
+        for i, basic_balls in enumerate(result['tickets']):
+            # 特别号不能与基本号重复
+            specials = [b for b in special_pool if b not in basic_balls] or \
+                [b for b in self.BASIC_RANGE if b not in basic_balls]
+            predictions.append({
+                'basic_balls': basic_balls,
+                'special_ball': specials[i % len(specials)],
+                'strategy': 'wheel',
+                'strategy_name': '旋转矩阵',
+                'rank': i + 1,
+                'prediction_time': datetime.now().isoformat()
+            })
+        return predictions
+
     def _predict_with_strategy(
         self, 
         strategy_name: str, 
@@ -175,22 +263,16 @@ class QLCPredictor(BasePredictor):
 class QLCStatistics(BaseStatistics):
     """七乐彩统计类"""
 
+    LOTTERY_TYPE = 'qlc'
+
     def __init__(self, lottery_data: List[dict]):
         super().__init__(lottery_data)
 
     def get_frequency(self) -> dict:
         """获取号码频率统计"""
-        basic_freq = Counter()
-        special_freq = Counter()
-        
-        for data in self.lottery_data:
-            for ball in data['basic_balls']:
-                basic_freq[ball] += 1
-            special_freq[data['special_ball']] += 1
-        
         return {
-            'basic_balls': dict(sorted(basic_freq.items())),
-            'special_ball': dict(sorted(special_freq.items()))
+            'basic_balls': self.summary['frequency'],
+            'special_ball': self.summary['extra_frequency']
         }
     
     def get_ball_frequency(self) -> dict:
@@ -206,35 +288,17 @@ class QLCStatistics(BaseStatistics):
             '3个以上连号': 0
         }
         
-        for data in self.lottery_data:
-            sorted_balls = sorted(data['basic_balls'])
-            max_consecutive = self._find_max_consecutive(sorted_balls)
+        # summary 中的键为最长连号的号码个数
+        for run_length, count in self.summary['consecutive'].items():
+            max_consecutive = run_length - 1
             
             if max_consecutive == 0:
-                consecutive_stats['无连号'] += 1
+                consecutive_stats['无连号'] += count
             elif max_consecutive == 1:
-                consecutive_stats['2个连号'] += 1
+                consecutive_stats['2个连号'] += count
             elif max_consecutive == 2:
-                consecutive_stats['3个连号'] += 1
+                consecutive_stats['3个连号'] += count
             else:
-                consecutive_stats['3个以上连号'] += 1
+                consecutive_stats['3个以上连号'] += count
         
         return consecutive_stats
-    
-    @staticmethod
-    def _find_max_consecutive(balls: List[int]) -> int:
-        """找出最长连号个数"""
-        if not balls:
-            return 0
-        sorted_balls = sorted(balls)
-        max_consecutive = 0
-        current_consecutive = 0
-        
-        for i in range(1, len(sorted_balls)):
-            if sorted_balls[i] - sorted_balls[i-1] == 1:
-                current_consecutive += 1
-            else:
-                max_consecutive = max(max_consecutive, current_consecutive)
-                current_consecutive = 0
-        
-        return max(max_consecutive, current_consecutive)
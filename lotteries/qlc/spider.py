@@ -8,204 +8,68 @@
 - 每周一、三、五开奖
 """
 
-import requests
-from bs4 import BeautifulSoup
 import logging
-from typing import List, Dict
 import re
-from core.error_handler import handle_network_error, handle_parse_error
+from typing import List, Dict, Optional
+from core.base_spider import BaseSpider
 
 logger = logging.getLogger(__name__)
 
+# 单元格格式
+_ISSUE_RE = re.compile(r'\d{5,7}')
+_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
 
-class QLCSpider:
+
+class QLCSpider(BaseSpider):
     """七乐彩爬虫类 - 使用 500.com"""
 
     BASE_URL = "https://datachart.500.com/qlc/history/newinc/history.php"
+    LOTTERY_TYPE = 'qlc'
+    TABLE = ('table', 'tablelist')
+    HEADER_ROWS = 1  # 跳过表头（第一行）
 
-    HEADERS = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-        'Referer': 'https://www.500.com/',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
-    }
-
-    def __init__(self, timeout: int = 10, retry_times: int = 3):
-        self.timeout = timeout
-        self.retry_times = retry_times
-        self.session = requests.Session()
-
-    def fetch(self, start_issue: str = None, end_issue: str = None, count: int = None) -> List[Dict]:
-        """
-        统一的爬取接口
+    def _parse_row(self, texts: List[str]) -> Optional[Dict]:
+        """把一行单元格文本转换为开奖记录，数据不完整时返回 None"""
+        if len(texts) < 6:
+            return None
         
-        Args:
-            start_issue: 起始期号（5位格式，如 '04001'）
-            end_issue: 结束期号（5位格式，如 '25133'）
-            count: 获取最新 N 条（仅当 start/end 都为 None 时使用）
-            
-        Returns:
-            中奖数据列表
-        """
-        # 场景1: 获取最新数据
-        if start_issue is None and end_issue is None:
-            logger.info("从 500.com 获取七乐彩最新数据...")
-            data = self._fetch_from_500com()
-            if data and len(data) > 0:
-                result = data[:count] if count else data
-                logger.info(f"成功获取 {len(data)} 条数据，返回 {len(result)} 条")
-                return result
-            raise Exception("未获取到数据")
+        # 第0列：期号
+        lottery_no = texts[0]
+        if not _ISSUE_RE.fullmatch(lottery_no):
+            return None
         
-        # 场景2: 按期号范围获取
-        url = f"{self.BASE_URL}?start={start_issue}&end={end_issue}"
-        logger.info(f"从 500.com 获取七乐彩期号范围数据: {start_issue} - {end_issue}")
+        # 补全期号为7位
+        if len(lottery_no) == 5:
+            lottery_no = '20' + lottery_no
         
-        try:
-            response = self.session.get(url, headers=self.HEADERS, timeout=self.timeout)
-            response.raise_for_status()
-            
-            data = self._parse_html(response.text)
-            logger.info(f"成功获取 {len(data)} 条数据")
-            return data
-            
-        except requests.exceptions.RequestException as e:
-            error_code = getattr(e.response, 'status_code', 'UNKNOWN') if hasattr(e, 'response') and e.response else 'NETWORK'
-            handle_network_error(str(error_code), url, 'qlc')
-            logger.error(f"网络请求失败: {e}")
-            return []
-        except Exception as e:
-            handle_parse_error(f"数据获取失败: {str(e)}", 'qlc', '500.com')
-            logger.error(f"获取数据失败: {e}")
-            return []
-    
-    def fetch_latest(self, count: int = 1) -> List[Dict]:
-        """获取最新数据（兼容旧接口）"""
-        return self.fetch(count=count)
-    
-    def fetch_by_range(self, start_issue: str, end_issue: str) -> List[Dict]:
-        """按期号范围获取（兼容旧接口）"""
-        return self.fetch(start_issue=start_issue, end_issue=end_issue)
-
-    def _fetch_from_500com(self) -> List[Dict]:
-        """从 500.com 获取数据"""
-        try:
-            response = self.session.get(
-                self.BASE_URL,
-                headers=self.HEADERS,
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            
-            return self._parse_html(response.text)
-            
-        except requests.exceptions.RequestException as e:
-            error_code = getattr(e.response, 'status_code', 'UNKNOWN') if hasattr(e, 'response') and e.response else 'NETWORK'
-            handle_network_error(str(error_code), self.BASE_URL, 'qlc')
-            logger.error(f"从 500.com 网络请求失败: {e}")
-            return []
-        except Exception as e:
-            handle_parse_error(f"从 500.com 获取数据失败: {str(e)}", 'qlc', '500.com')
-            logger.error(f"从 500.com 获取数据失败: {e}")
-            return []
-
-    def _parse_html(self, html: str) -> List[Dict]:
-        """解析 500.com 的 HTML 数据
+        # 第1列：中奖号码（格式如 "04 09 15 20 23 25 2721"，最后两个数字连在一起）
+        numbers_text = texts[1]
+        numbers = []
         
-        七乐彩的 HTML 结构：
-        - 数据表格的 id="tablelist"
-        - 第0列：期号
-        - 第1列：中奖号码（7个基本号 + 1个特别号，空格分隔）
-        - 第5列：开奖日期
-        """
-        results = []
+        for part in numbers_text.split():
+            if not part.isdigit():
+                continue
+            # 4位数字拆分成两个2位数字（特别号连在一起的情况）
+            if len(part) == 4:
+                numbers.append(int(part[:2]))
+                numbers.append(int(part[2:]))
+            else:
+                numbers.append(int(part))
         
-        try:
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # 查找 id="tablelist" 的数据表格
-            data_table = soup.find('table', {'id': 'tablelist'})
-            
-            if not data_table:
-                logger.warning("未找到 id='tablelist' 的数据表格")
-                return results
-            rows = data_table.find_all('tr')
-            logger.info(f"找到 {len(rows)} 行数据")
-            
-            # 跳过表头（第一行）
-            for row in rows[1:]:
-                try:
-                    cells = row.find_all('td')
-                    if len(cells) < 6:
-                        continue
-                    
-                    # 第0列：期号
-                    lottery_no = cells[0].get_text(strip=True)
-                    if not lottery_no or not re.match(r'^\d{5,7}$', lottery_no):
-                        continue
-                    
-                    # 补全期号为7位
-                    if len(lottery_no) == 5:
-                        lottery_no = '20' + lottery_no
-                    
-                    # 第1列：中奖号码（格式如 "04 09 15 20 23 25 2721"，最后两个数字连在一起）
-                    numbers_text = cells[1].get_text(strip=True)
-                    
-                    # 先按空格分割
-                    parts = numbers_text.split()
-                    numbers = []
-                    
-                    for part in parts:
-                        # 如果是2位数字，直接添加
-                        if len(part) == 2 and part.isdigit():
-                            numbers.append(int(part))
-                        # 如果是4位数字，拆分成两个2位数字（特别号连在一起的情况）
-                        elif len(part) == 4 and part.isdigit():
-                            numbers.append(int(part[:2]))
-                            numbers.append(int(part[2:]))
-                        # 其他情况尝试解析
-                        elif part.isdigit():
-                            numbers.append(int(part))
-                    
-                    if len(numbers) != 8:
-                        logger.debug(f"期号 {lottery_no} 号码数量不对: {len(numbers)}, 原文: {numbers_text}")
-                        continue
-                    
-                    # 前7个是基本号，最后1个是特别号
-                    basic_balls = numbers[:7]
-                    special_ball = numbers[7]
-                    
-                    # 第5列：开奖日期
-                    draw_date = cells[5].get_text(strip=True)
-                    if not re.match(r'^\d{4}-\d{2}-\d{2}$', draw_date):
-                        logger.debug(f"期号 {lottery_no} 日期格式不对: {draw_date}")
-                        continue
-                    
-                    results.append({
-                        'lottery_no': lottery_no,
-                        'draw_date': draw_date,
-                        'basic_balls': basic_balls,
-                        'special_ball': special_ball,
-                        'basic1': basic_balls[0],
-                        'basic2': basic_balls[1],
-                        'basic3': basic_balls[2],
-                        'basic4': basic_balls[3],
-                        'basic5': basic_balls[4],
-                        'basic6': basic_balls[5],
-                        'basic7': basic_balls[6],
-                        'special': special_ball
-                    })
-                    
-                except Exception as e:
-                    logger.debug(f"解析行数据失败: {e}")
-                    continue
-            
-            logger.info(f"成功解析 {len(results)} 条数据")
-            
-        except Exception as e:
-            logger.error(f"解析 HTML 失败: {e}")
+        if len(numbers) != 8:
+            logger.debug(f"期号 {lottery_no} 号码数量不对: {len(numbers)}, 原文: {numbers_text}")
+            return None
         
-        return results
-
-    def close(self):
-        """关闭会话"""
-        self.session.close()
+        # 第5列：开奖日期
+        draw_date = texts[5]
+        if not _DATE_RE.fullmatch(draw_date):
+            logger.debug(f"期号 {lottery_no} 日期格式不对: {draw_date}")
+            return None
+        
+        # 前7个是基本号，最后1个是特别号
+        return {
+            'lottery_no': lottery_no,
+            'draw_date': draw_date,
+            'basic_balls': numbers[:7],
+            'special_ball': numbers[7]
+        }
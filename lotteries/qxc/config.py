@@ -10,4 +10,5 @@ QXC_CONFIG = {
     'number_range': (0, 9),  # 每位数字范围 0-9
     'start_year': 2004,  # 开始年份
     'draw_days': [2, 5],  # 每周二、五开奖
+    'draw_time': '20:30',  # 开奖时间（北京时间）
 }
@@ -4,7 +4,7 @@
 
 from core.base_predictor import BasePredictor, BaseStatistics
 import logging
-from typing import List, Dict
+from typing import List, Dict, Iterator
 from collections import Counter
 from datetime import datetime
 from .strategies import get_strategy, get_all_strategies
@@ -15,6 +15,8 @@ logger = logging.getLogger(__name__)
 class QXCPredictor(BasePredictor):
     """七星彩预测类"""
 
+    LOTTERY_TYPE = 'qxc'
+
     def __init__(self, lottery_data: List[dict], strategies: List[str] = None):
         """
         初始化预测器
@@ -51,13 +53,16 @@ class QXCPredictor(BasePredictor):
         """验证组合是否有效（七星彩没有特殊限制，总是有效）"""
         return True
 
-    def predict(self, count: int = 5, strategies: List[str] = None) -> List[dict]:
+    def predict(self, count: int = 5, strategies: List[str] = None,
+                oversample: int = 1, metric: str = 'hamming') -> List[dict]:
         """
         完整预测（支持多策略）
         
         Args:
             count: 预测组合总数
             strategies: 使用的策略列表（可选）
+            oversample: 过采样倍数（大于 1 时先生成 count * oversample 个候选，再按多样性挑选）
+            metric: 多样性距离度量 ('hamming' 或 'jaccard')
             
         Returns:
             预测结果列表
@@ -66,14 +71,15 @@ class QXCPredictor(BasePredictor):
         
         logger.info(f"使用策略: {', '.join(strategy_names)}")
         
+        if oversample > 1:
+            predictions = self._predict_diverse(strategy_names, count, oversample, metric)
+            for i, pred in enumerate(predictions):
+                pred['rank'] = i + 1
+            logger.info(f"生成了 {len(predictions)} 个预测组合（多样性选号）")
+            return predictions
+        
         # 构建上下文数据
-        context = {
-            'history_data': self.lottery_data,
-            'position_frequency': {
-                pos: dict(freq) for pos, freq in self.position_frequency.items()
-            },
-            'historical_combinations': self.historical_combinations
-        }
+        context = self._build_context()
         
         # 计算每个策略生成的组合数
         count_per_strategy = max(1, count // len(strategy_names))
@@ -103,6 +109,46 @@ class QXCPredictor(BasePredictor):
         logger.info(f"生成了 {len(final_predictions)} 个预测组合")
         return final_predictions
     
+    def _build_context(self) -> Dict:
+        """构建策略使用的上下文数据"""
+        return {
+            'history_data': self.lottery_data,
+            'position_frequency': {
+                pos: dict(freq) for pos, freq in self.position_frequency.items()
+            },
+            'historical_combinations': self.historical_combinations
+        }
+
+    def iter_predictions(self, strategies: List[str] = None, yield_rejected: bool = False) -> Iterator[dict]:
+        """按策略轮流无限生成号码（批量生成使用）
+
+        只排除历史中奖组合，不做结果之间的去重（由调用方负责），
+        也不受 predict 的尝试次数和超时限制。
+
+        Args:
+            strategies: 使用的策略列表（可选）
+            yield_rejected: 被排除的号码也产出一个 None（调用方据此计数，策略只生成历史号码时不会无限循环）
+
+        Yields:
+            预测结果（不含 rank 和 prediction_time）
+        """
+        strategy_names = strategies or self.default_strategies
+        context = self._build_context()
+        loaded = [(name, get_strategy(name)) for name in strategy_names]
+
+        while True:
+            for strategy_name, strategy in loaded:
+                numbers = strategy.generate_numbers(context)
+                if tuple(numbers) in context['historical_combinations']:
+                    if yield_rejected:
+                        yield None
+                    continue
+                yield {
+                    'numbers': numbers,
+                    'strategy': strategy_name,
+                    'strategy_name': strategy.name
+                }
+
     def _predict_with_strategy(
         self, 
         strategy_name: str, 
@@ -161,24 +207,14 @@ class QXCPredictor(BasePredictor):
 class QXCStatistics(BaseStatistics):
     """七星彩统计类"""
 
+    LOTTERY_TYPE = 'qxc'
+
     def __init__(self, lottery_data: List[dict]):
         super().__init__(lottery_data)
 
     def get_frequency(self) -> dict:
         """获取号码频率统计"""
-        position_freq = {}
-        
-        for pos in range(1, 8):
-            position_freq[pos] = Counter()
-        
-        for data in self.lottery_data:
-            for pos, num in enumerate(data['numbers'], 1):
-                position_freq[pos][num] += 1
-        
-        return {
-            f'position_{pos}': dict(sorted(freq.items()))
-            for pos, freq in position_freq.items()
-        }
+        return self.summary['frequency']
     
     def get_ball_frequency(self) -> dict:
         """获取号码频率统计（兼容旧接口）"""
@@ -6,10 +6,11 @@
 from core.base_predictor import BasePredictor, BaseStatistics
 from core.utils import has_consecutive_numbers, format_number
 import logging
-from typing import List, Tuple, Set, Dict
+from typing import List, Tuple, Set, Dict, Iterator
 from collections import Counter
 import itertools
 from datetime import datetime
+from core.wheel import build_wheel, select_pool
 from .strategies import get_strategy, get_all_strategies
 
 logger = logging.getLogger(__name__)
@@ -18,6 +19,8 @@ logger = logging.getLogger(__name__)
 class SSQPredictor(BasePredictor):
     """双色球预测类（支持策略模式）"""
 
+    LOTTERY_TYPE = 'ssq'
+
     RED_RANGE = range(1, 34)  # 红球范围 1-33
     BLUE_RANGE = range(1, 17)  # 蓝球范围 1-16
     RED_COUNT = 6  # 红球个数
@@ -179,13 +182,16 @@ class SSQPredictor(BasePredictor):
         logger.info(f"预测的蓝球: {top_blue_balls}")
         return top_blue_balls
 
-    def predict(self, count: int = 5, strategies: List[str] = None) -> List[dict]:
+    def predict(self, count: int = 5, strategies: List[str] = None,
+                oversample: int = 1, metric: str = 'hamming') -> List[dict]:
         """
         完整预测（支持多策略）
 
         Args:
             count: 预测组合总数
             strategies: 使用的策略列表（可选）
+            oversample: 过采样倍数（大于 1 时先生成 count * oversample 个候选，再按多样性挑选）
+            metric: 多样性距离度量 ('hamming' 或 'jaccard')
 
         Returns:
             预测结果列表
@@ -195,13 +201,15 @@ class SSQPredictor(BasePredictor):
         
         logger.info(f"使用策略: {', '.join(strategy_names)}")
         
+        if oversample > 1:
+            predictions = self._predict_diverse(strategy_names, count, oversample, metric)
+            for i, pred in enumerate(predictions):
+                pred['rank'] = i + 1
+            logger.info(f"生成了 {len(predictions)} 个预测组合（多样性选号）")
+            return predictions
+        
         # 构建上下文数据
-        context = {
-            'history_data': self.lottery_data,
-            'red_frequency': dict(self.red_ball_frequency),
-            'blue_frequency': dict(self.blue_ball_frequency),
-            'historical_combinations': self.historical_red_combinations
-        }
+        context = self._build_context()
         
         # 计算每个策略生成的组合数
         count_per_strategy = max(1, count // len(strategy_names))
@@ -232,6 +240,82 @@ class SSQPredictor(BasePredictor):
         logger.info(f"生成了 {len(final_predictions)} 个预测组合")
         return final_predictions
     
+    def _build_context(self) -> Dict:
+        """构建策略使用的上下文数据"""
+        return {
+            'history_data': self.lottery_data,
+            'red_frequency': dict(self.red_ball_frequency),
+            'blue_frequency': dict(self.blue_ball_frequency),
+            'historical_combinations': self.historical_red_combinations
+        }
+
+    def iter_predictions(self, strategies: List[str] = None, yield_rejected: bool = False) -> Iterator[dict]:
+        """按策略轮流无限生成号码（批量生成使用）
+
+        只排除历史中奖组合，不做结果之间的去重（由调用方负责），
+        也不受 predict 的尝试次数和超时限制。
+
+        Args:
+            strategies: 使用的策略列表（可选）
+            yield_rejected: 被排除的号码也产出一个 None（调用方据此计数，策略只生成历史号码时不会无限循环）
+
+        Yields:
+            预测结果（不含 rank 和 prediction_time）
+        """
+        strategy_names = strategies or self.default_strategies
+        context = self._build_context()
+        loaded = [(name, get_strategy(name)) for name in strategy_names]
+
+        while True:
+            for strategy_name, strategy in loaded:
+                red_balls = strategy.generate_red_balls(context)
+                if tuple(sorted(red_balls)) in context['historical_combinations']:
+                    if yield_rejected:
+                        yield None
+                    continue
+                yield {
+                    'red_balls': red_balls,
+                    'blue_ball': strategy.generate_blue_ball(context),
+                    'strategy': strategy_name,
+                    'strategy_name': strategy.name
+                }
+
+    def predict_wheel(self, budget: int = 10, pool_size: int = 12, cover: int = 3,
+                      strategies: List[str] = None, sample_size: int = 500,
+                      seed: int = None) -> List[dict]:
+        """旋转矩阵预测：用策略选出号码池，再挑选覆盖最多红球子组合的若干注
+
+        Args:
+            budget: 注数
+            pool_size: 红球号码池大小
+            cover: 覆盖目标（2=二码、3=三码、4=四码）
+            strategies: 用于选号码池的策略列表（可选）
+            sample_size: 从策略中采样的注数
+            seed: 随机种子
+
+        Returns:
+            预测结果列表
+        """
+        samples = list(itertools.islice(self.iter_predictions(strategies), sample_size))
+        red_pool = select_pool(samples, 'red_balls', pool_size)
+        blue_pool = select_pool(samples, 'blue_ball', min(budget, 4))
+        logger.info(f"旋转矩阵号码池: 红球 {red_pool}，蓝球 {blue_pool}")
+
+        result = build_wheel(red_pool, self.RED_COUNT, budget, cover=cover,
+                             is_valid=self._is_valid_combination, seed=seed)
+
+        predictions = []
+        for i, red_balls in enumerate(result['tickets']):
+            predictions.append({
+                'red_balls': red_balls,
+                'blue_ball': blue_pool[i % len(blue_pool)],
+                'strategy': 'wheel',
+                'strategy_name': '旋转矩阵',
+                'rank': i + 1,
+                'prediction_time': datetime.now().isoformat()
+            })
+        return predictions
+
     def _predict_with_strategy(
         self, 
         strategy_name: str, 
@@ -307,22 +391,16 @@ class SSQPredictor(BasePredictor):
 class SSQStatistics(BaseStatistics):
     """双色球统计类"""
 
+    LOTTERY_TYPE = 'ssq'
+
     def __init__(self, lottery_data: List[dict]):
         super().__init__(lottery_data)
 
     def get_frequency(self) -> dict:
         """获取号码频率统计"""
-        red_freq = Counter()
-        blue_freq = Counter()
-
-        for data in self.lottery_data:
-            for ball in data['red_balls']:
-                red_freq[ball] += 1
-            blue_freq[data['blue_ball']] += 1
-
         return {
-            'red_balls': dict(sorted(red_freq.items())),
-            'blue_ball': dict(sorted(blue_freq.items()))
+            'red_balls': self.summary['frequency'],
+            'blue_ball': self.summary['extra_frequency']
         }
     
     def get_ball_frequency(self) -> dict:
@@ -338,35 +416,20 @@ class SSQStatistics(BaseStatistics):
             '无连号': 0
         }
 
-        for data in self.lottery_data:
-            consecutive_count = self._find_max_consecutive(data['red_balls'])
+        # summary 中的键为最长连号的号码个数，减 1 即相邻连号对数
+        for run_length, count in self.summary['consecutive'].items():
+            consecutive_count = run_length - 1
             if consecutive_count == 0:
-                consecutive_stats['无连号'] += 1
+                consecutive_stats['无连号'] += count
             elif consecutive_count == 1:
-                consecutive_stats['1个连号'] += 1
+                consecutive_stats['1个连号'] += count
             elif consecutive_count == 2:
-                consecutive_stats['2个连号'] += 1
+                consecutive_stats['2个连号'] += count
             else:
-                consecutive_stats['3个连号'] += 1
+                consecutive_stats['3个连号'] += count
 
         return consecutive_stats
 
-    @staticmethod
-    def _find_max_consecutive(balls: List[int]) -> int:
-        """找出最长连号个数"""
-        sorted_balls = sorted(balls)
-        max_consecutive = 0
-        current_consecutive = 0
-
-        for i in range(1, len(sorted_balls)):
-            if sorted_balls[i] - sorted_balls[i-1] == 1:
-                current_consecutive += 1
-            else:
-                max_consecutive = max(max_consecutive, current_consecutive)
-                current_consecutive = 0
-
-        return max(max_consecutive, current_consecutive)
-
 
 if __name__ == '__main__':
     logging.basicConfig(level=logging.INFO)
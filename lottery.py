@@ -5,6 +5,7 @@
 
 import sys
 import argparse
+import json
 from pathlib import Path
 
 # 添加项目根目录到路径
@@ -15,7 +16,7 @@ from core.error_handler import setup_global_exception_handler
 setup_global_exception_handler()
 
 from core.config import SUPPORTED_LOTTERIES, LOTTERY_NAMES
-from cli import fetch, predict, schedule
+from cli import fetch, predict, schedule, generate, wheel, serve, api, worker
 from cli.export import export_lottery, export_all_lotteries
 
 
@@ -32,18 +33,37 @@ def main():
   python lottery.py predict                   # 预测所有类型
   python lottery.py export                    # 导出所有类型的数据
   python lottery.py schedule                  # 启动定时任务（所有类型）
+  python lottery.py schedule --mode adaptive  # 开奖当晚轮询，获取到新一期立即预测并通知
+  python lottery.py serve --schedule cron     # 启动常驻服务（保持数据库连接、历史数据和预测器），并运行定时任务
+  python lottery.py predict ssq --daemon      # 通过常驻服务预测（未启动时在本进程中预测）
+  python lottery.py api --port 8000           # 启动本地 HTTP 接口（预测、最新开奖、统计、号码核对）
+  python lottery.py queue add backtest ssq --issues 500   # 回测最近 500 期，拆分为多个任务放入任务队列
+  python lottery.py worker --kinds fetch,predict          # 启动 worker，只执行爬取和预测任务
   
   # 处理指定彩票类型（带参数）
   python lottery.py fetch ssq --mode full     # 仅爬取双色球全量数据
   python lottery.py fetch dlt --mode latest   # 仅爬取大乐透最新数据
   python lottery.py fetch qxc --mode full     # 仅爬取七星彩全量数据
   python lottery.py fetch qlc --mode full     # 仅爬取七乐彩全量数据
+  python lottery.py fetch ssq --mode full --workers 4  # 4 个线程并发爬取全量数据
+  python lottery.py fetch ssq --mode full --stream     # 流式爬取（边下载边解析边入库）
+  python lottery.py fetch ssq --mode full --pipeline   # 流水线爬取（下载、解析、入库同时进行）
+  python lottery.py fetch ssq --mode repair            # 检查并修复缺号（只请求缺失的期号）
+  python lottery.py fetch ssq --mode repair --year 2015  # 只修复 2015 年的缺号
+  python lottery.py fetch ssq --force                  # 增量爬取，忽略开奖日历（未到开奖时间也请求）
   python lottery.py predict ssq               # 仅预测双色球
   python lottery.py predict dlt               # 仅预测大乐透
   python lottery.py predict qxc               # 仅预测七星彩
   python lottery.py predict qlc               # 仅预测七乐彩
   python lottery.py export ssq                # 仅导出双色球数据
   python lottery.py export dlt                # 仅导出大乐透数据
+  
+  # 批量生成号码（逐注写入文件，自动去重）
+  python lottery.py generate ssq --count 10000 --out tickets.csv
+  python lottery.py generate dlt --count 50000 --strategy frequency,random --out tickets.ndjson
+  
+  # 旋转矩阵（从号码池中挑选覆盖最多三码组合的注数）
+  python lottery.py wheel ssq --budget 20 --pool-size 12 --cover 3
 
 支持的彩票类型:
   ssq  - 双色球
@@ -65,9 +85,41 @@ def main():
     )
     fetch_parser.add_argument(
         '--mode',
-        choices=['full', 'latest'],
+        choices=['full', 'latest', 'repair'],
         default='latest',
-        help='爬取模式: full=全量, latest=增量（默认）'
+        help='爬取模式: full=全量, latest=增量（默认）, repair=修复缺号'
+    )
+    fetch_parser.add_argument(
+        '--year',
+        type=int,
+        help='修复缺号时只检查该年份（默认全部年份）'
+    )
+    fetch_parser.add_argument(
+        '--workers',
+        type=int,
+        help='全量爬取并发数（默认读取 SPIDER_WORKERS，大于 1 时按年份并发爬取）'
+    )
+    fetch_parser.add_argument(
+        '--stream',
+        action='store_true',
+        default=None,
+        help='全量爬取时流式读取响应，边下载边解析边入库（默认读取 SPIDER_STREAM）'
+    )
+    fetch_parser.add_argument(
+        '--pipeline',
+        action='store_true',
+        default=None,
+        help='全量爬取时使用 下载->解析->规整->入库 流水线，各阶段在线程中同时进行（默认读取 SPIDER_PIPELINE）'
+    )
+    fetch_parser.add_argument(
+        '--force',
+        action='store_true',
+        help='增量爬取时忽略开奖日历，未到开奖时间也请求网络'
+    )
+    fetch_parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help='增量爬取通过常驻服务执行（python lottery.py serve，未启动时在本进程中执行）'
     )
     
     # predict 命令
@@ -78,6 +130,11 @@ def main():
         choices=SUPPORTED_LOTTERIES,
         help='彩票类型（可选，不指定则处理所有类型）'
     )
+    predict_parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help='通过常驻服务预测（python lottery.py serve，未启动时在本进程中预测）'
+    )
     
     # export 命令
     export_parser = subparsers.add_parser('export', help='导出数据（CSV + SQL）')
@@ -88,8 +145,220 @@ def main():
         help='彩票类型（可选，不指定则处理所有类型）'
     )
     
+    # generate 命令
+    generate_parser = subparsers.add_parser('generate', help='批量生成号码（写入 CSV/NDJSON 文件）')
+    generate_parser.add_argument(
+        'lottery',
+        choices=SUPPORTED_LOTTERIES,
+        help='彩票类型'
+    )
+    generate_parser.add_argument(
+        '--count',
+        type=int,
+        required=True,
+        help='生成注数'
+    )
+    generate_parser.add_argument(
+        '--strategy',
+        help='使用的策略，多个用逗号分隔（默认使用 DEFAULT_STRATEGIES）'
+    )
+    generate_parser.add_argument(
+        '--out',
+        required=True,
+        help='输出文件路径'
+    )
+    generate_parser.add_argument(
+        '--format',
+        choices=['csv', 'ndjson'],
+        help='输出格式（默认按文件扩展名判断，.ndjson/.jsonl 为 NDJSON，其余为 CSV）'
+    )
+    generate_parser.add_argument(
+        '--max-stall',
+        type=int,
+        default=generate.DEFAULT_MAX_STALL,
+        help=f'连续生成重复号码达到该次数后停止（默认 {generate.DEFAULT_MAX_STALL}）'
+    )
+    
+    # wheel 命令
+    wheel_parser = subparsers.add_parser('wheel', help='旋转矩阵（按覆盖率挑选号码）')
+    wheel_parser.add_argument(
+        'lottery',
+        choices=wheel.WHEEL_LOTTERIES,
+        help='彩票类型（七星彩不适用）'
+    )
+    wheel_parser.add_argument(
+        '--budget',
+        type=int,
+        default=10,
+        help='注数（默认 10）'
+    )
+    wheel_parser.add_argument(
+        '--pool-size',
+        type=int,
+        help='号码池大小（默认双色球/七乐彩 12，大乐透 10）'
+    )
+    wheel_parser.add_argument(
+        '--cover',
+        type=int,
+        choices=[2, 3, 4],
+        default=3,
+        help='覆盖目标: 2=二码, 3=三码（默认）, 4=四码'
+    )
+    wheel_parser.add_argument(
+        '--strategy',
+        help='选号码池使用的策略，多个用逗号分隔（默认 frequency）'
+    )
+    wheel_parser.add_argument(
+        '--out',
+        help='输出文件路径（可选）'
+    )
+    wheel_parser.add_argument(
+        '--format',
+        choices=['csv', 'ndjson'],
+        help='输出格式（默认按文件扩展名判断）'
+    )
+    wheel_parser.add_argument(
+        '--seed',
+        type=int,
+        help='随机种子'
+    )
+    
     # schedule 命令（不需要指定彩票类型，自动处理所有类型）
     schedule_parser = subparsers.add_parser('schedule', help='定时任务（自动处理所有彩票类型）')
+    schedule_parser.add_argument(
+        '--mode',
+        choices=['cron', 'adaptive'],
+        default='cron',
+        help='cron: 每天 21:30 执行（默认）；adaptive: 按开奖日和开奖时间轮询，获取到新一期立即预测并通知'
+    )
+    
+    # serve 命令（常驻服务）
+    serve_parser = subparsers.add_parser('serve', help='常驻服务（保持数据库连接、历史数据和预测器，通过本地套接字处理请求）')
+    serve_parser.add_argument(
+        '--schedule',
+        choices=['cron', 'adaptive'],
+        help='同时在服务内运行定时任务（cron: 每天 21:30；adaptive: 开奖当晚轮询）'
+    )
+    serve_parser.add_argument(
+        '--status',
+        action='store_true',
+        help='查看正在运行的服务状态'
+    )
+    
+    # api 命令（本地 HTTP 接口）
+    api_parser = subparsers.add_parser('api', help='本地 HTTP 接口（预测、最新开奖、统计和号码核对，使用内存中的数据）')
+    api_parser.add_argument(
+        '--host',
+        help='监听地址（默认 API_HOST，127.0.0.1）'
+    )
+    api_parser.add_argument(
+        '--port',
+        type=int,
+        help='端口（默认 API_PORT，8000）'
+    )
+    
+    # queue 命令（任务队列）
+    queue_parser = subparsers.add_parser('queue', help='任务队列（添加任务、查看状态，由 worker 执行）')
+    queue_parser.add_argument(
+        '--backend',
+        help='队列后端（默认 QUEUE_BACKEND：sqlite 为本机，mysql 为多台机器共用）'
+    )
+    queue_subparsers = queue_parser.add_subparsers(dest='queue_command', help='队列命令')
+    queue_add_parser = queue_subparsers.add_parser('add', help='添加任务')
+    queue_add_parser.add_argument(
+        'kind',
+        choices=list(worker.JOB_HANDLERS),
+        help='任务类型'
+    )
+    queue_add_parser.add_argument(
+        'lottery',
+        nargs='?',
+        choices=SUPPORTED_LOTTERIES,
+        help='彩票类型（可选，不指定则每种彩票一个任务；generate 必须指定）'
+    )
+    queue_add_parser.add_argument(
+        '--mode',
+        choices=['incremental', 'full'],
+        default='incremental',
+        help='fetch: 爬取模式（默认 incremental）'
+    )
+    queue_add_parser.add_argument(
+        '--force',
+        action='store_true',
+        help='fetch: 忽略开奖日历'
+    )
+    queue_add_parser.add_argument(
+        '--with-predict',
+        action='store_true',
+        help='fetch: 爬取后预测'
+    )
+    queue_add_parser.add_argument(
+        '--issues',
+        type=int,
+        default=100,
+        help='backtest: 回测最近多少期（默认 100）'
+    )
+    queue_add_parser.add_argument(
+        '--shard-size',
+        type=int,
+        default=20,
+        help='backtest: 每个任务回测的期数（默认 20）'
+    )
+    queue_add_parser.add_argument(
+        '--count',
+        type=int,
+        help='generate: 生成注数'
+    )
+    queue_add_parser.add_argument(
+        '--out',
+        help='generate: 输出文件路径（worker 所在机器上）'
+    )
+    queue_add_parser.add_argument(
+        '--strategy',
+        help='generate: 使用的策略，多个用逗号分隔'
+    )
+    queue_add_parser.add_argument(
+        '--priority',
+        type=int,
+        help='优先级（大的先执行，默认 fetch 10、predict 5、其他 0）'
+    )
+    queue_add_parser.add_argument(
+        '--delay',
+        type=float,
+        default=0,
+        help='延迟多少秒后才可执行'
+    )
+    queue_subparsers.add_parser('status', help='查看各类型任务的状态')
+    queue_retry_parser = queue_subparsers.add_parser('retry', help='失败的任务重新排队')
+    queue_retry_parser.add_argument(
+        'kind',
+        nargs='?',
+        choices=list(worker.JOB_HANDLERS),
+        help='任务类型（可选，不指定则重试全部）'
+    )
+    queue_result_parser = queue_subparsers.add_parser('result', help='查看任务结果（多个回测分片合并显示）')
+    queue_result_parser.add_argument(
+        'job_ids',
+        type=int,
+        nargs='+',
+        help='任务 ID'
+    )
+    
+    # worker 命令（执行任务队列中的任务）
+    worker_parser = subparsers.add_parser('worker', help='领取并执行任务队列中的任务（可在多台机器上运行多个）')
+    worker_parser.add_argument(
+        '--kinds',
+        help=f"只执行这些类型的任务，多个用逗号分隔（默认全部: {','.join(worker.JOB_HANDLERS)}）"
+    )
+    worker_parser.add_argument(
+        '--once',
+        action='store_true',
+        help='队列为空时退出'
+    )
+    worker_parser.add_argument(
+        '--backend',
+        help='队列后端（默认 QUEUE_BACKEND）'
+    )
     
     args = parser.parse_args()
     
@@ -103,14 +372,18 @@ def main():
         lotteries = [args.lottery] if args.lottery else ['ssq', 'dlt', 'qxc', 'qlc']
         for lottery in lotteries:
             if args.mode == 'full':
-                fetch.fetch_full_history(lottery)
+                fetch.fetch_full_history(lottery, workers=args.workers, stream=args.stream, pipeline=args.pipeline)
+            elif args.mode == 'repair':
+                fetch.repair_gaps(lottery, year=args.year)
             else:
-                fetch.fetch_latest(lottery)
+                fetch.fetch_latest(lottery, force=args.force, daemon=args.daemon)
     
     elif args.command == 'predict':
         # 如果没有指定彩票类型，处理所有类型
         lotteries = [args.lottery] if args.lottery else ['ssq', 'dlt', 'qxc', 'qlc']
         for lottery in lotteries:
+            if args.daemon and predict.predict_via_daemon(lottery):
+                continue
             predict.predict(lottery)
     
     elif args.command == 'export':
@@ -137,8 +410,135 @@ def main():
                     print(f"  SQL: {result['sql']}")
                     print(f"  SQLite: {result['sqlite']}")
     
+    elif args.command == 'generate':
+        strategies = args.strategy.split(',') if args.strategy else None
+        result = generate.generate(
+            args.lottery,
+            count=args.count,
+            out=args.out,
+            strategies=strategies,
+            fmt=args.format,
+            max_stall=args.max_stall
+        )
+        if result:
+            print(f"\n✅ {LOTTERY_NAMES[args.lottery]} 批量生成完成")
+            print(f"  注数: {result['count']}")
+            print(f"  速度: {result['rate']:.0f} 注/秒")
+            print(f"  文件: {result['path']}")
+    
+    elif args.command == 'wheel':
+        strategies = args.strategy.split(',') if args.strategy else None
+        predictions = wheel.wheel(
+            args.lottery,
+            budget=args.budget,
+            pool_size=args.pool_size,
+            cover=args.cover,
+            strategies=strategies,
+            out=args.out,
+            fmt=args.format,
+            seed=args.seed
+        )
+        if predictions:
+            print(f"\n✅ {LOTTERY_NAMES[args.lottery]} 旋转矩阵生成 {len(predictions)} 注")
+    
     elif args.command == 'schedule':
-        schedule.start_schedule()
+        schedule.start_schedule(mode=args.mode)
+    
+    elif args.command == 'serve':
+        if args.status:
+            from core.daemon import DaemonClient, DaemonUnavailable
+            try:
+                status = DaemonClient().request('status')
+            except DaemonUnavailable as e:
+                print(f"❌ {e}")
+                return
+            print(f"常驻服务运行中（pid {status['pid']}，{status['started_at']} 启动，已处理 {status['requests']} 个请求）")
+            for lottery_type, info in status['lotteries'].items():
+                print(f"  {LOTTERY_NAMES[lottery_type]}: 最新 {info['latest'] or '-'}，{info['rows']} 条，"
+                      f"{'已分析' if info['analyzed'] else '未分析'}")
+        else:
+            serve.start_server(schedule_mode=args.schedule)
+    
+    elif args.command == 'api':
+        api.start_api(host=args.host, port=args.port)
+    
+    elif args.command == 'queue':
+        run_queue_command(args, queue_parser)
+    
+    elif args.command == 'worker':
+        kinds = args.kinds.split(',') if args.kinds else None
+        worker.start_worker(kinds=kinds, once=args.once, backend=args.backend)
+
+
+def run_queue_command(args, queue_parser):
+    """queue 子命令"""
+    from core.job_queue import get_job_queue
+    from cli.backtest import merge_backtest_results
+
+    if not args.queue_command:
+        queue_parser.print_help()
+        return
+
+    try:
+        queue = get_job_queue(args.backend)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+
+    try:
+        if args.queue_command == 'add':
+            lotteries = [args.lottery] if args.lottery else SUPPORTED_LOTTERIES
+            job_ids = []
+            for lottery in lotteries:
+                if args.kind == 'backtest':
+                    job_ids += worker.enqueue_backtest(queue, lottery, args.issues, args.shard_size,
+                                                       priority=args.priority)
+                    continue
+                payload = {'lottery_type': lottery}
+                if args.kind == 'fetch':
+                    payload.update(mode=args.mode, force=args.force, with_predict=args.with_predict)
+                elif args.kind == 'generate':
+                    if not args.lottery or not args.count or not args.out:
+                        print("❌ generate 任务需要指定彩票类型、--count 和 --out")
+                        return
+                    payload.update(count=args.count, out=args.out,
+                                   strategies=args.strategy.split(',') if args.strategy else None)
+                job_ids.append(worker.enqueue_job(queue, args.kind, payload, priority=args.priority,
+                                                  delay=args.delay))
+            print(f"✅ 已添加 {len(job_ids)} 个 {args.kind} 任务: {', '.join(f'#{i}' for i in job_ids)}")
+
+        elif args.queue_command == 'status':
+            stats = queue.stats()
+            if not stats:
+                print("任务队列为空")
+            for kind, counts in stats.items():
+                print(f"  {kind}: " + '，'.join(f"{status} {counts[status]}" for status in
+                                                ('pending', 'running', 'done', 'failed') if status in counts))
+
+        elif args.queue_command == 'retry':
+            print(f"✅ {queue.retry_failed(args.kind)} 个失败的任务已重新排队")
+
+        elif args.queue_command == 'result':
+            jobs = [queue.get(job_id) for job_id in args.job_ids]
+            for job_id, job in zip(args.job_ids, jobs):
+                if job is None:
+                    print(f"#{job_id}: 不存在")
+                else:
+                    print(f"#{job_id} {job['kind']} {job['status']}（{job['attempts']} 次）"
+                          + (f": {job['error']}" if job['error'] else ''))
+            backtests = [job['result'] for job in jobs
+                         if job and job['kind'] == 'backtest' and job['status'] == 'done']
+            if backtests:
+                merged = merge_backtest_results(backtests)
+                print(f"\n回测 {merged['issues']} 期，{merged['tickets']} 注")
+                print(f"  命中分布: {merged['hits']}")
+                print(f"  每期最佳: {merged['best']}")
+            elif len(jobs) == 1 and jobs[0] and jobs[0]['result'] is not None:
+                print(json.dumps(jobs[0]['result'], ensure_ascii=False, indent=2, default=str))
+    except ValueError as e:
+        print(f"❌ {e}")
+    finally:
+        queue.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,155 @@
+"""
+HTTP 接口压力测试
+用 keep-alive 连接并发请求 `python lottery.py api` 的各个接口，报告每秒请求数和延迟分位数
+
+用法:
+    python scripts/bench_api.py                                   # 压测 http://127.0.0.1:8000（API_HOST / API_PORT）
+    python scripts/bench_api.py --url http://10.0.0.5:8000 -c 64 -d 30
+    python scripts/bench_api.py --serve                           # 在本进程中启动接口后压测（使用 .env 中的数据库）
+    DB_ENGINE=sqlite python scripts/bench_api.py --serve --min-rps 300   # 低于 300 请求/秒时退出码为 1
+"""
+
+import argparse
+import asyncio
+import itertools
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.config import API_CONFIG  # noqa: E402
+
+LOTTERIES = ['ssq', 'dlt', 'qxc', 'qlc']
+
+# 看板常用的请求
+PATHS = ['/api/lotteries'] + [
+    f'/api/{lottery_type}/{endpoint}'
+    for lottery_type in LOTTERIES
+    for endpoint in ('latest', 'predict', 'stats', 'frequency?window=30', 'frequency?window=100')
+]
+
+
+async def _request(reader, writer, host: str, path: str) -> int:
+    """在已建立的连接上发送一个 GET 请求，读取完整响应，返回状态码"""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode('latin-1'))
+    await writer.drain()
+
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split(' ')[1])
+    length = 0
+    for line in lines[1:]:
+        if line.lower().startswith('content-length:'):
+            length = int(line.split(':', 1)[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def _worker(host: str, port: int, paths, deadline: float, latencies: list, errors: list):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            path = next(paths)
+            start = time.perf_counter()
+            try:
+                status = await _request(reader, writer, host, path)
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                errors.append(f"{path}: {e}")
+                writer.close()
+                reader, writer = await asyncio.open_connection(host, port)
+                continue
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(f"{path}: HTTP {status}")
+    finally:
+        writer.close()
+
+
+async def run_load(host: str, port: int, concurrency: int, duration: float) -> dict:
+    paths = itertools.cycle(PATHS)
+    latencies, errors = [], []
+
+    # 预热：每个接口请求一次，填充按期号缓存的响应
+    reader, writer = await asyncio.open_connection(host, port)
+    for path in PATHS:
+        await _request(reader, writer, host, path)
+    writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        _worker(host, port, paths, start + duration, latencies, errors)
+        for _ in range(concurrency)
+    ])
+    elapsed = time.perf_counter() - start
+    return {'latencies': sorted(latencies), 'errors': errors, 'elapsed': elapsed}
+
+
+def _percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def _serve_in_thread() -> int:
+    """在后台线程中启动接口（随机端口），返回端口"""
+    from cli.api import LotteryAPI, serve_api
+
+    api = LotteryAPI()
+    started = threading.Event()
+
+    def run():
+        async def main():
+            ready = asyncio.Event()
+            task = asyncio.create_task(serve_api('127.0.0.1', 0, api, ready))
+            await ready.wait()
+            started.set()
+            await task
+        asyncio.run(main())
+
+    threading.Thread(target=run, name='bench-api-server', daemon=True).start()
+    if not started.wait(120):
+        raise RuntimeError('HTTP 接口启动超时')
+    return api.port
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP 接口压力测试')
+    parser.add_argument('--url', default=f"http://{API_CONFIG['host']}:{API_CONFIG['port']}", help='接口地址')
+    parser.add_argument('-c', '--concurrency', type=int, default=32, help='并发连接数 (默认: 32)')
+    parser.add_argument('-d', '--duration', type=float, default=10, help='压测时长（秒，默认: 10）')
+    parser.add_argument('--serve', action='store_true', help='在本进程中启动接口后压测（客户端与服务端共用 CPU）')
+    parser.add_argument('--min-rps', type=float, default=0, help='低于该请求/秒时退出码为 1')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    if args.serve:
+        host, port = '127.0.0.1', _serve_in_thread()
+
+    result = asyncio.run(run_load(host, port, args.concurrency, args.duration))
+    latencies, errors = result['latencies'], result['errors']
+    rps = len(latencies) / result['elapsed']
+
+    print(f"\n{host}:{port}  并发 {args.concurrency}  时长 {result['elapsed']:.1f}s  接口 {len(PATHS)} 个")
+    print(f"  请求数   {len(latencies)}")
+    print(f"  请求/秒  {rps:.0f}")
+    print(f"  延迟     p50 {_percentile(latencies, 0.5) * 1000:.1f} ms  "
+          f"p95 {_percentile(latencies, 0.95) * 1000:.1f} ms  p99 {_percentile(latencies, 0.99) * 1000:.1f} ms")
+    if errors:
+        print(f"  ❌ 错误 {len(errors)} 次，例如: {errors[:3]}")
+
+    ok = not errors
+    if args.min_rps and rps < args.min_rps:
+        print(f"  ❌ {rps:.0f} 请求/秒 低于 {args.min_rps:.0f}")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+HTML 解析后端基准测试
+对比 lxml / regex / bs4 三种后端解析 500.com 历史数据页面的速度，并校验解析结果一致
+
+用法:
+    python scripts/bench_parser.py                               # 使用合成页面（四种彩票，各 3000 行）
+    python scripts/bench_parser.py --rows 500 --repeat 20
+    python scripts/bench_parser.py --lottery ssq --fixture ssq_history.html   # 使用保存的真实页面
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.config import SPIDER_CONFIG  # noqa: E402
+from core.html_parser import PARSERS, LXML_AVAILABLE  # noqa: E402
+from cli.smart_fetch import get_lottery_modules, import_class  # noqa: E402
+
+LOTTERIES = ['ssq', 'dlt', 'qxc', 'qlc']
+
+
+def _issues(rows: int):
+    """从新到旧的期号（每年 150 期）"""
+    issues = []
+    year, issue = 25, 150
+    for _ in range(rows):
+        issues.append(f"{year:02d}{issue:03d}")
+        issue -= 1
+        if issue == 0:
+            year, issue = year - 1, 150
+    return issues
+
+
+def _money(rng) -> str:
+    return f"{rng.randint(1, 10 ** 9):,}"
+
+
+def _date(rng) -> str:
+    return f"20{rng.randint(3, 25):02d}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+
+def synthesize_page(lottery_type: str, rows: int, seed: int = 0, issues=None) -> str:
+    """按 500.com 历史数据页面的结构合成测试页面（含注释列、&nbsp; 和金额逗号）
+
+    Args:
+        issues: 页面包含的期号（从新到旧，默认从 25150 开始往前 rows 期）
+    """
+    rng = random.Random(seed)
+    body = []
+    issues = issues if issues is not None else _issues(rows)
+
+    if lottery_type in ('ssq', 'dlt'):
+        main_count, main_high, extra_count, extra_high = (6, 33, 1, 16) if lottery_type == 'ssq' else (5, 35, 2, 12)
+        for issue in issues:
+            main = sorted(rng.sample(range(1, main_high + 1), main_count))
+            extra = sorted(rng.sample(range(1, extra_high + 1), extra_count))
+            cells = [f'<!--<td>{rng.randint(0, 9)}</td>--><td>{issue}</td>']
+            cells += [f'<td class="t_cfont2">{n:02d}</td>' for n in main]
+            cells += [f'<td class="t_cfont4">{n:02d}</td>' for n in extra]
+            cells.append('<td class="t_cfont4">&nbsp;</td>')
+            cells += [f'<td>{_money(rng)}</td>' for _ in range(6)]
+            cells.append(f'<td>{_date(rng)}</td>')
+            body.append(f'<tr class="t_tr1">{"".join(cells)}</tr>')
+        table = f'<table width="100%"><thead><tr><td>期号</td></tr></thead><tbody id="tdata">\n' \
+                f'{chr(10).join(body)}\n</tbody></table>'
+    else:
+        header = '<tr class="th"><td>期号</td><td>开奖号码</td><td>总销售额</td><td>奖池</td><td>开奖日期</td><td>备注</td></tr>'
+        for issue in issues:
+            if lottery_type == 'qxc':
+                numbers = ' '.join(str(rng.randint(0, 9)) for _ in range(7))
+                extra_cells = ''
+            else:
+                balls = rng.sample(range(1, 31), 8)
+                basic = ' '.join(f'{n:02d}' for n in sorted(balls[:7]))
+                numbers = f'{basic}<span class="cfont4">{balls[7]:02d}</span>'
+                extra_cells = '<td>&nbsp;</td>'
+            body.append(f'<tr><td>{issue}</td><td class="cfont2">\n  {numbers}\n</td>'
+                        f'<td>{_money(rng)}</td><td>{_money(rng)}</td>{extra_cells}'
+                        f'<td>{_date(rng)}</td><td></td></tr>')
+        table = f'<table id="tablelist" class="chart">\n{header}\n{chr(10).join(body)}\n</table>'
+
+    return (f'<html><head><meta charset="gb2312"><title>历史数据</title>'
+            f'<script>var data = "<tr><td>x</td></tr>";</script></head>'
+            f'<body><div class="wrap">{table}</div></body></html>')
+
+
+def bench(lottery_type: str, html: str, repeat: int):
+    """用各后端解析同一页面，返回 {后端: (每页耗时, 解析结果)}"""
+    modules = get_lottery_modules(lottery_type)
+    spider = import_class(modules['spider_class'])()
+    results = {}
+
+    try:
+        for parser in PARSERS:
+            if parser == 'lxml' and not LXML_AVAILABLE:
+                continue
+            SPIDER_CONFIG['parser'] = parser
+            records = spider._parse_html(html)
+            start = time.perf_counter()
+            for _ in range(repeat):
+                spider._parse_html(html)
+            results[parser] = ((time.perf_counter() - start) / repeat, records)
+    finally:
+        spider.close()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTML 解析后端基准测试')
+    parser.add_argument('--lottery', choices=LOTTERIES, help='彩票类型（默认全部）')
+    parser.add_argument('--fixture', help='保存的 500.com 历史数据页面（需同时指定 --lottery）')
+    parser.add_argument('--rows', type=int, default=3000, help='合成页面的行数 (默认: 3000)')
+    parser.add_argument('--repeat', type=int, default=5, help='每个后端重复解析次数 (默认: 5)')
+    args = parser.parse_args()
+
+    if args.fixture and not args.lottery:
+        parser.error('--fixture 需要同时指定 --lottery')
+
+    # 基准测试只关心耗时，屏蔽爬虫的逐页日志
+    import logging
+    logging.disable(logging.INFO)
+
+    all_equal = True
+    for lottery_type in ([args.lottery] if args.lottery else LOTTERIES):
+        if args.fixture:
+            html = Path(args.fixture).read_text(encoding='utf-8', errors='replace')
+            source = args.fixture
+        else:
+            html = synthesize_page(lottery_type, args.rows)
+            source = f'合成 {args.rows} 行'
+
+        results = bench(lottery_type, html, args.repeat)
+        baseline_time, baseline = results['bs4']
+
+        print(f"\n{lottery_type} ({source}, {len(html) / 1024:.0f} KB, {len(baseline)} 条记录)")
+        for name, (elapsed, records) in results.items():
+            equal = records == baseline
+            all_equal &= equal
+            print(f"  {name:6s} {elapsed * 1000:8.1f} ms/页  {len(records) / elapsed:10.0f} 行/秒  "
+                  f"{baseline_time / elapsed:5.1f}x  {'结果一致' if equal else '结果不一致!'}")
+
+    return 0 if all_equal else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+爬取流程基准测试（离线）
+用录制的（或合成的）500.com 响应回放 爬取 -> 解析 -> 入库 全流程，报告各阶段每秒处理行数，
+不访问网络，可在 CI 中做吞吐量回归测试
+
+用法:
+    python scripts/bench_pipeline.py --synthesize                      # 合成四种彩票全量爬取的夹具后测试（SQLite）
+    SPIDER_FIXTURES=record python lottery.py fetch ssq --mode full     # 录制真实响应（需要空数据库）
+    python scripts/bench_pipeline.py --lottery ssq                     # 回放录制的夹具
+    python scripts/bench_pipeline.py --db mysql --truncate             # 写入 .env 中的 MySQL（请使用专用测试库）
+    python scripts/bench_pipeline.py --synthesize --min-rate 2000      # 端到端低于 2000 行/秒时退出码为 1
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.base_spider import NoDelay  # noqa: E402
+from core.config import SPIDER_CONFIG  # noqa: E402
+from core.fetch_planner import GapIndex, plan_fetch_ranges  # noqa: E402
+from core.fixture_store import FixtureStore  # noqa: E402
+from core.rate_limiter import get_host_limiter  # noqa: E402
+from cli.smart_fetch import get_lottery_modules, import_class, smart_fetch  # noqa: E402
+from scripts.bench_parser import synthesize_page  # noqa: E402
+
+LOTTERIES = ['ssq', 'dlt', 'qxc', 'qlc']
+
+# 合成夹具时每年的期数
+SYNTH_YEAR_ISSUES = 150
+
+
+def _range_issues(start: str, end: str):
+    """期号范围内的期号（从新到旧，每年最多 SYNTH_YEAR_ISSUES 期）"""
+    start_key, end_key = int(start), int(end)
+    issues = []
+    for year in range(end_key // 1000, start_key // 1000 - 1, -1):
+        low = start_key % 1000 if year == start_key // 1000 else 1
+        high = end_key % 1000 if year == end_key // 1000 else SYNTH_YEAR_ISSUES
+        issues += [f"{year:02d}{issue:03d}" for issue in range(min(high, SYNTH_YEAR_ISSUES), low - 1, -1)]
+    return issues
+
+
+def synthesize_fixtures(store: FixtureStore, lottery_type: str) -> int:
+    """按空数据库全量爬取的请求规划合成夹具，返回合成的行数"""
+    modules = get_lottery_modules(lottery_type)
+    spider = import_class(modules['spider_class'])()
+    plan = plan_fetch_ranges(GapIndex([], modules['last_issue']))
+
+    rows = 0
+    for seed, item in enumerate(plan):
+        issues = _range_issues(item['start'], item['end'])
+        html = synthesize_page(lottery_type, len(issues), seed=seed, issues=issues)
+        store.save(spider._range_url(item['start'], item['end']), html.encode('gb2312'),
+                   {'Content-Type': 'text/html; charset=gb2312'})
+        rows += len(issues)
+    return rows
+
+
+def open_database(lottery_type: str, db: str, path: str = None, truncate: bool = False):
+    """打开数据库并建表（sqlite 为新建的临时库）"""
+    modules = get_lottery_modules(lottery_type)
+    if db == 'sqlite':
+        config = {'engine': 'sqlite', 'database': path}
+    else:
+        from core.utils import load_db_config
+        config = load_db_config()
+
+    database = import_class(modules['database_class'])(config)
+    database.connect()
+    database.create_table()
+    if truncate:
+        cursor = database.connection.cursor()
+        cursor.execute(f"DELETE FROM {database.table_name}")
+        database.connection.commit()
+        cursor.close()
+    return database
+
+
+def bench_stages(store: FixtureStore, lottery_type: str, database) -> dict:
+    """逐个回放录制的范围，分别计时 爬取（传输 + 解码）/ 解析 / 入库"""
+    modules = get_lottery_modules(lottery_type)
+    spider = import_class(modules['spider_class'])(delay=NoDelay())
+    timings = {'fetch': 0.0, 'parse': 0.0, 'insert': 0.0}
+    rows = inserted = size = 0
+
+    for meta in store.list(lottery_type):
+        start = time.perf_counter()
+        html = spider.get_text(meta['url'])
+        timings['fetch'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        records = spider._parse_html(html)
+        timings['parse'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        inserted += database.insert_lottery_data(records, skip_existing=True)[0]
+        timings['insert'] += time.perf_counter() - start
+
+        rows += len(records)
+        size += len(html)
+
+    return {'timings': timings, 'rows': rows, 'inserted': inserted, 'size': size}
+
+
+def bench_end_to_end(lottery_type: str) -> dict:
+    """smart_fetch(mode='full') 端到端计时（数据库由 DB_ENGINE / SQLITE_PATH 决定）
+
+    不记录爬取日志、不加跨进程锁，不在 data/journal、data/locks 下留下文件。
+    """
+    start = time.perf_counter()
+    result = smart_fetch(lottery_type, mode='full', journal=False, lock=False)
+    return {'elapsed': time.perf_counter() - start, 'result': result}
+
+
+def _rate(rows: int, elapsed: float) -> float:
+    return rows / elapsed if elapsed > 0 else float('inf')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='爬取流程基准测试（回放录制的响应，不访问网络）')
+    parser.add_argument('--lottery', choices=LOTTERIES, help='彩票类型（默认全部）')
+    parser.add_argument('--fixture-dir', help=f"夹具目录 (默认: {SPIDER_CONFIG['fixture_dir']})")
+    parser.add_argument('--synthesize', action='store_true', help='先合成全量爬取的夹具（覆盖同名夹具）')
+    parser.add_argument('--db', choices=['sqlite', 'mysql'], default='sqlite',
+                        help='入库目标 (默认: sqlite 临时库；mysql 使用 .env 中的配置)')
+    parser.add_argument('--truncate', action='store_true', help='mysql: 测试前清空数据表（请使用专用测试库）')
+    parser.add_argument('--min-rate', type=float, default=0, help='端到端低于该行/秒时退出码为 1')
+    args = parser.parse_args()
+
+    # 回放模式：不访问网络、不使用响应缓存、不限流
+    SPIDER_CONFIG['fixtures'] = 'replay'
+    if args.fixture_dir:
+        SPIDER_CONFIG['fixture_dir'] = Path(args.fixture_dir)
+    store = FixtureStore()
+
+    # 基准测试只关心耗时，屏蔽逐页日志
+    logging.disable(logging.INFO)
+
+    ok = True
+    tmpdir = tempfile.mkdtemp(prefix='bench_pipeline_')
+    for lottery_type in ([args.lottery] if args.lottery else LOTTERIES):
+        modules = get_lottery_modules(lottery_type)
+        get_host_limiter(import_class(modules['spider_class']).BASE_URL, rate=1e9, capacity=1000)
+
+        if args.synthesize:
+            synthesize_fixtures(store, lottery_type)
+        if not store.list(lottery_type):
+            print(f"\n{lottery_type}: 没有夹具（{store.root / lottery_type}），跳过；可使用 --synthesize 或录制模式生成")
+            continue
+
+        # 1. 分阶段
+        database = open_database(lottery_type, args.db, os.path.join(tmpdir, f'{lottery_type}_stages.db'),
+                                 truncate=args.truncate)
+        stages = bench_stages(store, lottery_type, database)
+        database.close()
+
+        # 2. 端到端（smart_fetch 全量爬取，写入新的数据库）
+        if args.db == 'sqlite':
+            os.environ['DB_ENGINE'] = 'sqlite'
+            os.environ['SQLITE_PATH'] = os.path.join(tmpdir, f'{lottery_type}_e2e.db')
+        elif args.truncate:
+            open_database(lottery_type, args.db, truncate=True).close()
+        e2e = bench_end_to_end(lottery_type)
+
+        rows = stages['rows']
+        print(f"\n{lottery_type} ({len(store.list(lottery_type))} 个范围, {rows} 行, "
+              f"{stages['size'] / 1024 / 1024:.1f} MB, 入库: {args.db})")
+        for name, label in [('fetch', '爬取'), ('parse', '解析'), ('insert', '入库')]:
+            elapsed = stages['timings'][name]
+            print(f"  {label}    {elapsed * 1000:9.1f} ms  {_rate(rows, elapsed):12.0f} 行/秒")
+        total = sum(stages['timings'].values())
+        print(f"  合计    {total * 1000:9.1f} ms  {_rate(rows, total):12.0f} 行/秒")
+
+        result = e2e['result']
+        e2e_rows = result.get('inserted', 0)
+        e2e_rate = _rate(e2e_rows, e2e['elapsed'])
+        print(f"  端到端  {e2e['elapsed'] * 1000:9.1f} ms  {e2e_rate:12.0f} 行/秒  (smart_fetch 全量, 新增 {e2e_rows} 条)")
+
+        if not result.get('success', True) or result.get('failed_ranges'):
+            print(f"  ❌ 端到端失败: {result.get('error') or result.get('failed_ranges')}")
+            ok = False
+        elif args.db == 'sqlite' and (stages['inserted'] != rows or e2e_rows != rows):
+            print(f"  ❌ 入库条数不一致: 分阶段 {stages['inserted']}, 端到端 {e2e_rows}, 解析 {rows}")
+            ok = False
+        if args.min_rate and e2e_rate < args.min_rate:
+            print(f"  ❌ 端到端吞吐量 {e2e_rate:.0f} 行/秒 低于 {args.min_rate:.0f}")
+            ok = False
+
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())